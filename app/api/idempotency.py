@@ -0,0 +1,64 @@
+# app/api/idempotency.py
+"""
+Piezas de Idempotency-Key compartidas por las rutas que crean bookings: la respuesta
+repetida y el callback que guarda la respuesta en la misma transacción del booking
+(ver app.services.idempotency_service.claim_idempotency_key).
+"""
+from __future__ import annotations
+
+from typing import Any, Callable
+
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from sqlalchemy.orm import Session
+
+from app.models.idempotency_key import IdempotencyKey
+from app.services.idempotency_service import (
+    IdempotencyClaim,
+    claim_idempotency_key,
+    get_idempotent_response,
+    store_idempotent_response,
+)
+
+
+def replayed_response(stored: IdempotencyKey) -> JSONResponse:
+    return JSONResponse(
+        status_code=stored.response_status,
+        content=stored.response_body,
+        headers={"Idempotent-Replayed": "true"},
+    )
+
+
+def lookup(db: Session, scope: str, key: str, fingerprint: str) -> IdempotencyKey | None:
+    """Camino rápido (solo lectura) antes de validar: el reintento típico termina aquí."""
+    try:
+        return get_idempotent_response(db, scope, key, fingerprint)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+def claim(db: Session, scope: str, key: str, fingerprint: str) -> IdempotencyClaim:
+    try:
+        return claim_idempotency_key(db, scope, key, fingerprint)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+def response_writer(
+    claimed: IdempotencyClaim | None,
+    to_body: Callable[[Any], dict],
+    status_code: int = status.HTTP_201_CREATED,
+) -> Callable[[Any], None] | None:
+    """before_commit para los servicios: guarda la respuesta junto con el booking."""
+    if claimed is None:
+        return None
+
+    def write(result: Any) -> None:
+        store_idempotent_response(claimed, status_code, to_body(result))
+
+    return write
+
+
+def dump(schema: type[BaseModel]) -> Callable[[Any], dict]:
+    return lambda obj: schema.model_validate(obj).model_dump(mode="json")
@@ -0,0 +1,149 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from app.core.availability_events import record_change
+from app.core.dependencies import require_roles, get_current_business_id
+from app.db.session import get_db
+from app.models.availability_exception import AvailabilityException
+from app.models.barber import Barber
+from app.models.staff import Staff
+from app.models.user import User
+from app.schemas.availability_exception import AvailabilityExceptionCreate, AvailabilityExceptionOut
+
+router = APIRouter(tags=["availability exceptions"])
+
+MAX_EXCEPTION_DAYS = 366
+
+
+def _exception_dates(exception: AvailabilityException) -> list:
+    days = []
+    cur = exception.start_date
+    while cur <= exception.end_date:
+        days.append(cur)
+        cur += timedelta(days=1)
+    return days
+
+
+def _record_exception_change(db: Session, exception: AvailabilityException, reason: str) -> None:
+    if exception.barber_id is not None:
+        record_change(db, "barber", exception.barber_id, _exception_dates(exception), reason)
+    elif exception.staff_id is not None:
+        record_change(db, "staff", exception.staff_id, _exception_dates(exception), reason)
+    else:
+        record_change(db, "business", exception.business_id, _exception_dates(exception), reason)
+
+
+# crear excepción (feriado del negocio, vacaciones o bloqueo parcial de un recurso)
+@router.post(
+    "/availability/exceptions",
+    response_model=AvailabilityExceptionOut,
+    status_code=status.HTTP_201_CREATED,
+)
+def create_exception(
+    payload: AvailabilityExceptionCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_roles("business_admin", "super_admin")),
+    business_id: int = Depends(get_current_business_id),
+):
+    if payload.barber_id is not None and payload.staff_id is not None:
+        raise HTTPException(status_code=400, detail="Use barber_id or staff_id, not both")
+
+    if payload.start_date > payload.end_date:
+        raise HTTPException(status_code=400, detail="start_date cannot be greater than end_date")
+
+    if (payload.end_date - payload.start_date).days > MAX_EXCEPTION_DAYS:
+        raise HTTPException(status_code=400, detail=f"Exception cannot exceed {MAX_EXCEPTION_DAYS} days")
+
+    if (payload.start_time is None) != (payload.end_time is None):
+        raise HTTPException(status_code=400, detail="start_time and end_time must be sent together")
+
+    if payload.start_time is not None and payload.start_time >= payload.end_time:
+        raise HTTPException(status_code=400, detail="start_time must be less than end_time")
+
+    if payload.barber_id is not None:
+        barber = (
+            db.query(Barber.id)
+            .filter(Barber.id == payload.barber_id, Barber.business_id == business_id)
+            .first()
+        )
+        if not barber:
+            raise HTTPException(status_code=404, detail="Barber not found")
+
+    if payload.staff_id is not None:
+        staff = (
+            db.query(Staff.id)
+            .filter(Staff.id == payload.staff_id, Staff.business_id == business_id)
+            .first()
+        )
+        if not staff:
+            raise HTTPException(status_code=404, detail="Staff not found")
+
+    exception = AvailabilityException(business_id=business_id, **payload.model_dump())
+    db.add(exception)
+    _record_exception_change(db, exception, "exception_created")
+    db.commit()
+    db.refresh(exception)
+    return exception
+
+
+# listar excepciones del negocio que tocan un rango de fechas
+@router.get("/availability/exceptions", response_model=list[AvailabilityExceptionOut])
+def list_exceptions(
+    start_date: str = Query(..., description="YYYY-MM-DD"),
+    end_date: str = Query(..., description="YYYY-MM-DD (inclusivo)"),
+    barber_id: int | None = Query(default=None),
+    staff_id: int | None = Query(default=None),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_roles("business_admin", "staff", "super_admin")),
+    business_id: int = Depends(get_current_business_id),
+):
+    try:
+        start = datetime.strptime(start_date, "%Y-%m-%d").date()
+        end = datetime.strptime(end_date, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+
+    q = db.query(AvailabilityException).filter(
+        AvailabilityException.business_id == business_id,
+        AvailabilityException.start_date <= end,
+        AvailabilityException.end_date >= start,
+    )
+
+    if barber_id is not None:
+        q = q.filter(AvailabilityException.barber_id == barber_id)
+
+    if staff_id is not None:
+        q = q.filter(AvailabilityException.staff_id == staff_id)
+
+    return q.order_by(AvailabilityException.start_date.asc(), AvailabilityException.id.asc()).all()
+
+
+# borrar excepción (hard delete, no hay histórico que conservar)
+@router.delete("/availability/exceptions/{exception_id}", response_model=AvailabilityExceptionOut)
+def delete_exception(
+    exception_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_roles("business_admin", "super_admin")),
+    business_id: int = Depends(get_current_business_id),
+):
+    exception = (
+        db.query(AvailabilityException)
+        .filter(
+            AvailabilityException.id == exception_id,
+            AvailabilityException.business_id == business_id,
+        )
+        .first()
+    )
+    if not exception:
+        raise HTTPException(status_code=404, detail="Availability exception not found")
+
+    out = AvailabilityExceptionOut.model_validate(exception)
+
+    db.delete(exception)
+    _record_exception_change(db, exception, "exception_deleted")
+    db.commit()
+    return out
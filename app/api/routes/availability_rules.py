@@ -1,12 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from sqlalchemy.orm import Session
-from sqlalchemy import asc, desc
+from sqlalchemy import asc, desc, select
 from datetime import datetime, timedelta, date as date_type, time as time_type
 from typing import List
 from zoneinfo import ZoneInfo
 
+from app.core.availability_events import record_change
 from app.core.time_utils import overlaps_time_ranges
 from app.core.time_utils import merge_availability_windows
+from app.core.instrumentation import BOOKINGS_SCANNED, SLOTS_GENERATED
+from app.core.occupancy import MAX_BUFFER_MIN, Occupancy, padded, slot_step
+from app.core.profiling import profiled
+from app.core.http_cache import PUBLIC_AVAILABILITY, Conditional, conditional
+from app.core.resource_versions import ANY_SCOPE, VersionKey
+from app.core.slot_format import FORMAT_PATTERN, FULL, compact_window, negotiate, slots_response
 
 
 from app.db.session import get_db
@@ -19,8 +26,15 @@ from app.schemas.barber_availability import (
     AvailabilityRuleOut,
     AvailabilityRuleUpdate,
     AvailabilitySlotsOut,
-    SlotWindowOut,
+    AvailabilitySlotsCompactOut,
 )
+from app.services.availability_exception_service import (
+    exceptions_for_day,
+    is_business_closed,
+    is_resource_closed,
+    blocked_intervals,
+)
+from app.services.staff_day import local_day_bounds
 
 router = APIRouter(tags=["availability"])
 
@@ -56,6 +70,7 @@ def create_rule(barber_id: int, payload: AvailabilityRuleCreate, db: Session = D
     if dup:
         if dup.is_active is False:
             dup.is_active = True
+            record_change(db, "barber", barber_id, (), "rule_changed")
             db.commit()
             db.refresh(dup)
             return dup
@@ -82,6 +97,7 @@ def create_rule(barber_id: int, payload: AvailabilityRuleCreate, db: Session = D
 
     rule = BarberAvailabilityRule(barber_id=barber_id, **payload.model_dump())
     db.add(rule)
+    record_change(db, "barber", barber_id, (), "rule_changed")
     db.commit()
     db.refresh(rule)
     return rule
@@ -207,6 +223,7 @@ def update_rule(rule_id: int, payload: AvailabilityRuleUpdate, db: Session = Dep
     for k, v in data.items():
         setattr(rule, k, v)
 
+    record_change(db, "barber", rule.barber_id, (), "rule_changed")
     db.commit()
     db.refresh(rule)
     return rule
@@ -220,6 +237,7 @@ def delete_rule(rule_id: int, db: Session = Depends(get_db)):
 
     # soft delete
     rule.is_active = False
+    record_change(db, "barber", rule.barber_id, (), "rule_changed")
     db.commit()
     db.refresh(rule)
     return rule
@@ -231,13 +249,17 @@ def _generate_time_slots_for_window(
     end_time: time_type,
     step_minutes: int,
     service_duration_min: int | None = None,
+    buffer_before_min: int = 0,
+    buffer_after_min: int = 0,
 ) -> List[str]:
     """
     Genera slots "HH:MM" para una ventana [start_time, end_time).
 
-    - step_minutes: tamaño del slot (ej. 15, 30)
+    - step_minutes: separación entre inicios (paso del negocio o slot_minutes de la regla)
     - service_duration_min: si se envía, el servicio debe caber completo
         dentro de la ventana para que el slot sea válido.
+    - buffer_before_min / buffer_after_min: preparación y limpieza del servicio; también
+        tienen que caber en la ventana (el primer inicio se corre lo de la preparación).
     """
 
     # Validaciones defensivas
@@ -256,13 +278,14 @@ def _generate_time_slots_for_window(
 
     step = timedelta(minutes=step_minutes)
     dur = timedelta(minutes=service_duration_min) if service_duration_min else None
+    after = timedelta(minutes=buffer_after_min)
 
     slots: list[str] = []
-    cur = start_dt
+    cur = start_dt + timedelta(minutes=buffer_before_min)
 
     while cur < end_dt:
         if dur:
-            if cur + dur <= end_dt:
+            if cur + dur + after <= end_dt:
                 slots.append(cur.strftime("%H:%M"))
         else:
             slots.append(cur.strftime("%H:%M"))
@@ -270,22 +293,63 @@ def _generate_time_slots_for_window(
 
     return slots
 
-def _slot_overlaps_booking(
-    slot_start: datetime,
-    slot_end: datetime,
-    booking_start: datetime,
-    booking_end: datetime,
-) -> bool:
-    return slot_start < booking_end and booking_start < slot_end
+def _compact_slots(payload: dict, step_minutes: int | None = None) -> dict:
+    return dict(
+        date=str(payload["date"]),
+        barber_id=payload["barber_id"],
+        day_of_week=payload["day_of_week"],
+        is_closed=payload["is_closed"],
+        service_id=payload["service_id"],
+        duration_min=payload["duration_min"],
+        windows=[
+            compact_window(
+                w["start_time"], w["end_time"], step_minutes or w["slot_minutes"], w["slots"], w["unavailable_slots"]
+            )
+            for w in payload["items"]
+        ],
+    )
+
+
+def _slots_response(payload: dict, slot_format: str, cache: Conditional, step_minutes: int | None = None):
+    return cache.apply(
+        slots_response(
+            payload,
+            slot_format,
+            AvailabilitySlotsOut,
+            lambda full: _compact_slots(full, step_minutes),
+            AvailabilitySlotsCompactOut,
+        )
+    )
+
 
 @router.get("/barbers/{barber_id}/availability/slots", response_model=AvailabilitySlotsOut)
+@profiled("get_slots")
 def get_slots(
+    request: Request,
     barber_id: int,
     date: str = Query(..., description="YYYY-MM-DD"),
     service_id: int | None = Query(default=None),
     merge_windows: bool = Query(default=True, description="Fusiona ventanas pegadas/traslapadas (solo si slot_minutes coincide)"),
+    response_format: str = Query(default=FULL, alias="format", pattern=FORMAT_PATTERN, description="json | compact | msgpack"),
     db: Session = Depends(get_db),
 ):
+    slot_format = negotiate(request, response_format)
+
+    # 304 antes de tocar reglas/bookings si el cliente ya tiene esta versión
+    business_id = select(Barber.business_id).where(Barber.id == barber_id).scalar_subquery()
+    cache = conditional(
+        request,
+        db,
+        [
+            VersionKey("barber", barber_id),
+            VersionKey("exceptions", business_id),
+            VersionKey("business", business_id),
+            VersionKey("services", service_id if service_id is not None else ANY_SCOPE),
+        ],
+        PUBLIC_AVAILABILITY,
+        variant=slot_format,
+    )
+
     barber = db.query(Barber).filter(Barber.id == barber_id).first()
     if not barber:
         raise HTTPException(status_code=404, detail="Barber not found")
@@ -298,8 +362,9 @@ def get_slots(
 
     day_of_week = target_date.weekday()
 
-    # duración del servicio
+    # duración y buffers del servicio
     duration_min: int | None = None
+    buffer_before_min = buffer_after_min = 0
     if service_id is not None:
         service = db.query(Service).filter(Service.id == service_id).first()
         if not service:
@@ -309,6 +374,21 @@ def get_slots(
         if service.duration_min <= 0:
             raise HTTPException(status_code=400, detail="Service duration_min must be > 0")
         duration_min = service.duration_min
+        buffer_before_min, buffer_after_min = service.buffer_before_min, service.buffer_after_min
+
+    # excepciones del día (una consulta): cierre del negocio/barbero corta antes de leer bookings
+    exceptions = exceptions_for_day(db, barber.business_id, target_date)
+    if is_business_closed(exceptions) or is_resource_closed(exceptions, barber_id=barber_id):
+        return _slots_response(dict(
+            date=target_date,
+            barber_id=barber_id,
+            day_of_week=day_of_week,
+            is_closed=True,
+            service_id=service_id,
+            duration_min=duration_min,
+            items=[],
+            slots=[],
+        ), slot_format, cache)
 
     # reglas activas del día
     rules = (
@@ -324,7 +404,7 @@ def get_slots(
 
     # cerrado si no hay reglas
     if not rules:
-        return AvailabilitySlotsOut(
+        return _slots_response(dict(
             date=target_date,
             barber_id=barber_id,
             day_of_week=day_of_week,
@@ -333,7 +413,7 @@ def get_slots(
             duration_min=duration_min,
             items=[],
             slots=[],
-        )
+        ), slot_format, cache)
 
     # windows: o rules tal cual, o mergeadas
     if merge_windows:
@@ -344,23 +424,50 @@ def get_slots(
             for r in rules
         ]
 
-    # rango completo del día para traer bookings confirmados
-    day_start = datetime.combine(target_date, time_type.min)
-    day_end = datetime.combine(target_date, time_type.max)
+    local_tz = ZoneInfo(barber.business.timezone or "America/Monterrey")
 
-    bookings = (
-        db.query(Booking)
-        .filter(
+    # bookings confirmados del día local, más lo que alcanza un buffer (un booking de la
+    # víspera cuya limpieza pasa de medianoche también ocupa este día)
+    day_start, day_end = local_day_bounds(target_date, local_tz, MAX_BUFFER_MIN)
+
+    bookings = db.execute(
+        select(
+            Booking.start_datetime,
+            Booking.end_datetime,
+            Service.buffer_before_min,
+            Service.buffer_after_min,
+        )
+        .join(Service, Service.id == Booking.service_id)
+        .where(
             Booking.barber_id == barber_id,
             Booking.status == "confirmed",
             Booking.start_datetime < day_end,
             Booking.end_datetime > day_start,
         )
         .order_by(asc(Booking.start_datetime))
-        .all()
+    ).all()
+
+    # paso del negocio o SLOT_STEP_MIN; sin ninguno, el slot_minutes de cada ventana
+    step_minutes = slot_step(barber.business.slot_step_min, 0)
+
+    BOOKINGS_SCANNED.inc(len(bookings), engine="barber")
+
+    # ocupación precalculada: bookings (en hora local, con los buffers de su servicio)
+    # + bloqueos parciales de excepciones
+    occupancy = Occupancy(
+        [
+            padded(
+                booking.start_datetime.astimezone(local_tz).replace(tzinfo=None),
+                booking.end_datetime.astimezone(local_tz).replace(tzinfo=None),
+                booking.buffer_before_min,
+                booking.buffer_after_min,
+            )
+            for booking in bookings
+        ]
+        + blocked_intervals(exceptions, target_date, barber_id=barber_id)
     )
 
-    items: list[SlotWindowOut] = []
+    items: list[dict] = []
     slots_flat: list[str] = []
 
     for w in windows:
@@ -368,39 +475,30 @@ def get_slots(
             target_date=target_date,
             start_time=w["start_time"],
             end_time=w["end_time"],
-            step_minutes=w["slot_minutes"],
+            step_minutes=step_minutes or w["slot_minutes"],
             service_duration_min=duration_min,
+            buffer_before_min=buffer_before_min,
+            buffer_after_min=buffer_after_min,
         )
+        SLOTS_GENERATED.inc(len(all_window_slots), engine="barber")
 
         available_slots: list[str] = []
         unavailable_slots: list[str] = []
 
-        local_tz = ZoneInfo(barber.business.timezone or "America/Monterrey")
+        # si viene service_id usamos su duración; si no, usamos el tamaño del slot
+        effective_duration = timedelta(minutes=duration_min if duration_min is not None else w["slot_minutes"])
 
         for slot_str in all_window_slots:
             slot_start = datetime.combine(target_date, datetime.strptime(slot_str, "%H:%M").time())
+            slot_end = slot_start + effective_duration
 
-            # si viene service_id usamos su duración; si no, usamos el tamaño del slot
-            effective_duration = duration_min if duration_min is not None else w["slot_minutes"]
-            slot_end = slot_start + timedelta(minutes=effective_duration)
-
-            is_occupied = any(
-                _slot_overlaps_booking(
-                    slot_start,
-                    slot_end,
-                    booking.start_datetime.astimezone(local_tz).replace(tzinfo=None),
-                    booking.end_datetime.astimezone(local_tz).replace(tzinfo=None),
-                )
-                for booking in bookings
-            )
-
-            if is_occupied:
+            if not occupancy.is_free(*padded(slot_start, slot_end, buffer_before_min, buffer_after_min)):
                 unavailable_slots.append(slot_str)
             else:
                 available_slots.append(slot_str)
 
         items.append(
-            SlotWindowOut(
+            dict(
                 start_time=w["start_time"].strftime("%H:%M"),
                 end_time=w["end_time"].strftime("%H:%M"),
                 slot_minutes=w["slot_minutes"],
@@ -413,7 +511,7 @@ def get_slots(
 
     slots_unique_sorted = sorted(set(slots_flat))
 
-    return AvailabilitySlotsOut(
+    return _slots_response(dict(
         date=target_date,
         barber_id=barber_id,
         day_of_week=day_of_week,
@@ -422,4 +520,4 @@ def get_slots(
         duration_min=duration_min,
         items=items,
         slots=slots_unique_sorted,
-    )
\ No newline at end of file
+    ), slot_format, cache, step_minutes)
\ No newline at end of file
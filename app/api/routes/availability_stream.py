@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime
+
+import orjson
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+
+from app.core.availability_stream import RESYNC, SSE_HEARTBEAT_SECONDS, Subscription, hub
+from app.core.instrumentation import SSE_EVENTS
+
+router = APIRouter(tags=["availability stream"])
+
+# el navegador reintenta a los 3s si se corta (EventSource)
+_PREAMBLE = "retry: 3000\n: connected\n\n"
+
+
+def _resync_event() -> str:
+    SSE_EVENTS.inc(type="resync")
+    return "event: resync\ndata: {}\n\n"
+
+
+async def _events(request: Request, subscription: Subscription, resumed: bool):
+    try:
+        yield _PREAMBLE
+        if resumed:
+            # reconexión (Last-Event-ID): lo que pasó mientras tanto no se guardó
+            yield _resync_event()
+        while not await request.is_disconnected():
+            try:
+                change = await subscription.next(SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                # comentario SSE: mantiene viva la conexión en proxies/balanceadores
+                yield ": ping\n\n"
+                continue
+            if change is RESYNC:
+                yield _resync_event()
+                continue
+            SSE_EVENTS.inc(type="slots")
+            data = orjson.dumps(
+                {
+                    "resource": change.resource,
+                    "id": change.resource_id,
+                    "date": change.date.isoformat() if change.date else None,
+                }
+            ).decode()
+            yield f"id: {next(subscription.ids)}\nevent: slots\ndata: {data}\n\n"
+    finally:
+        hub.unsubscribe(subscription)
+
+
+# stream de cambios de slots del negocio: reemplaza el polling de los widgets de reserva.
+# Cada evento dice qué recurso/día cambió; el cliente vuelve a pedir solo esos slots.
+@router.get("/businesses/{business_id}/availability/stream")
+async def stream_availability(
+    request: Request,
+    business_id: int,
+    staff_id: int | None = Query(default=None),
+    barber_id: int | None = Query(default=None),
+    date: str | None = Query(default=None, description="YYYY-MM-DD"),
+):
+    if staff_id is not None and barber_id is not None:
+        raise HTTPException(status_code=400, detail="Use staff_id or barber_id, not both")
+
+    day = None
+    if date is not None:
+        try:
+            day = datetime.strptime(date, "%Y-%m-%d").date()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+
+    subscription = hub.subscribe(business_id, staff_id=staff_id, barber_id=barber_id, day=day)
+    if subscription is None:
+        raise HTTPException(status_code=503, detail="Too many availability streams", headers={"Retry-After": "30"})
+
+    return StreamingResponse(
+        _events(request, subscription, resumed="last-event-id" in request.headers),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # si el cliente se va antes de que arranque el generador, su finally no corre
+        background=BackgroundTask(hub.unsubscribe, subscription),
+    )
@@ -1,23 +1,36 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import asc, desc, func, distinct
+from sqlalchemy import asc, desc, func, distinct, select
 from typing import Optional
 
+from app.core.dependencies import get_current_business_id, require_roles
 from app.db.session import get_db
 from app.models.barber import Barber
+from app.models.barber_service import barber_services
 from app.models.service import Service
+from app.models.user import User
 from app.schemas.barber import BarberCreate, BarberOut, BarberUpdate, BarberOutSimple
 
 from app.schemas.service import ServiceOut
 from app.schemas.service import ServicePage
+from app.api.serializers import barber_dict, barber_lite_dict, service_dict
+from app.core.http_cache import PUBLIC_CATALOG, conditional
+from app.core.resource_versions import VersionKey
+from app.core.responses import fast_response
 
 router = APIRouter(tags=["barbers"])
 
 # endpoint para crear un barbero
 @router.post("", response_model=BarberOut, status_code=status.HTTP_201_CREATED)
-def create_barber(payload: BarberCreate, db: Session = Depends(get_db)):
-    barber = Barber(**payload.model_dump())
+def create_barber(
+    payload: BarberCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_roles("business_admin", "super_admin")),
+    business_id: int = Depends(get_current_business_id),
+):
+    # business_id sale del usuario, igual que en POST /api/staff (BarberCreate no lo trae)
+    barber = Barber(business_id=business_id, **payload.model_dump())
     db.add(barber)
 
     try:
@@ -38,7 +51,7 @@ def list_barbers(db: Session = Depends(get_db), active_only: bool = True):
     q = db.query(Barber)
     if active_only:
         q = q.filter(Barber.is_active == True)
-    return q.all()
+    return fast_response([barber_dict(b) for b in q.all()], list[BarberOut])
 
 # endpoint para traer un barbero por id
 @router.get("/{barber_id}", response_model=BarberOut)
@@ -46,7 +59,7 @@ def get_barber(barber_id: int, db: Session = Depends(get_db)):
     barber = db.query(Barber).filter(Barber.id == barber_id).first()
     if not barber:
         raise HTTPException(status_code=404, detail="Barber not found")
-    return barber
+    return fast_response(barber_dict(barber), BarberOut)
 
 # endpoint para actualizar barbero
 @router.put("/{barber_id}", response_model=BarberOut)
@@ -140,6 +153,7 @@ def unassign_service(barber_id: int, service_id: int, db: Session = Depends(get_
 # endpoint para listar servicios asignados a un barbero con filtros y ordenamiento
 @router.get("/{barber_id}/services", response_model=ServicePage)
 def get_barber_services(
+    request: Request,
     barber_id: int,
     db: Session = Depends(get_db),
     active_only: bool = True,
@@ -152,6 +166,11 @@ def get_barber_services(
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
 ):
+    assigned = select(barber_services.c.service_id).where(barber_services.c.barber_id == barber_id)
+    cache = conditional(
+        request, db, [VersionKey("services", assigned), VersionKey("barber", barber_id)], PUBLIC_CATALOG
+    )
+
     exists = db.query(Barber.id).filter(Barber.id == barber_id).first()
     if not exists:
         raise HTTPException(status_code=404, detail="Barber not found")
@@ -207,7 +226,10 @@ def get_barber_services(
             .all()
     )
 
-    return {"total": total, "limit": limit, "offset": offset, "items": items}
+    return cache.apply(fast_response(
+        {"total": total, "limit": limit, "offset": offset, "items": [service_dict(s) for s in items]},
+        ServicePage,
+    ))
 
 # endpoint para listar barberos asignados a un servicio
 @router.get("/{service_id}/barbers", response_model=list[BarberOutSimple])
@@ -220,4 +242,4 @@ def get_service_barbers(service_id: int, db: Session = Depends(get_db)):
     if not service.is_active:
         raise HTTPException(status_code=404, detail="Service not found")
 
-    return service.barbers
\ No newline at end of file
+    return fast_response([barber_lite_dict(b) for b in service.barbers], list[BarberOutSimple])
\ No newline at end of file
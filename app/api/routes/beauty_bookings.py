@@ -1,19 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from app.api import idempotency
+from app.core.dependencies import require_roles, get_current_business_id
 from app.db.session import get_db
+from app.models.beauty_booking import BeautyBooking
 from app.models.staff import Staff
-from app.models.beauty_service import BeautyService
-from app.models.staff_service import StaffService
+from app.models.user import User
 from app.schemas.beauty_booking import (
     BeautyBookingCreate,
+    BeautyBookingAutoCreate,
     BeautyBookingOut,
     BeautyBookingCancelOut,
+    BeautyBookingReschedule,
+    BeautyBookingBulkCancel,
+    BeautyBookingBulkCancelOut,
+    BeautyBookingChangesOut,
 )
+from app.services import catalog_cache
+from app.services.booking_changes import MAX_CHANGES_LIMIT, changes_since, parse_cursor
+from app.services.staff_assignment import auto_assign_beauty_booking
+from app.services.availability_exception_service import build_block_exceptions, to_local_naive
 from app.services.beauty_booking_service import (
     create_beauty_booking,
     cancel_beauty_booking,
+    reschedule_beauty_booking,
+    bulk_cancel_beauty_bookings,
 )
+from app.services.idempotency_service import request_fingerprint
 
 router = APIRouter(tags=["beauty_bookings"])
 
@@ -26,12 +41,29 @@ router = APIRouter(tags=["beauty_bookings"])
 def create_booking(
     payload: BeautyBookingCreate,
     db: Session = Depends(get_db),
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key", max_length=255),
 ):
-    staff = db.query(Staff).filter(Staff.id == payload.staff_id).first()
+    # reintento con la misma key -> se responde lo guardado sin repetir validaciones
+    fingerprint = None
+    if idempotency_key:
+        fingerprint = request_fingerprint(payload.model_dump(mode="json"))
+        stored = idempotency.lookup(db, "beauty_bookings", idempotency_key, fingerprint)
+        if stored:
+            return idempotency.replayed_response(stored)
+
+    # validaciones contra el catálogo en memoria del negocio (una lectura de versiones)
+    staff_business_id = catalog_cache.business_of_staff(db, payload.staff_id)
+    catalog = catalog_cache.tenant_catalog(db, staff_business_id) if staff_business_id is not None else None
+    staff = catalog.staff.get(payload.staff_id) if catalog else None
     if not staff:
         raise HTTPException(status_code=404, detail="Staff not found")
 
-    service = db.query(BeautyService).filter(BeautyService.id == payload.beauty_service_id).first()
+    service = catalog.services.get(payload.beauty_service_id)
+    if service is None:
+        # puede ser de otro negocio: se busca en su catálogo para dar el error correcto
+        service_business_id = catalog_cache.business_of_service(db, payload.beauty_service_id)
+        if service_business_id is not None and service_business_id != staff_business_id:
+            service = catalog_cache.tenant_catalog(db, service_business_id).services.get(payload.beauty_service_id)
     if not service:
         raise HTTPException(status_code=404, detail="Beauty service not found")
 
@@ -39,15 +71,7 @@ def create_booking(
         raise HTTPException(status_code=400, detail="Beauty service is inactive")
 
     # validar que ese staff sí pueda hacer ese servicio
-    assignment = (
-        db.query(StaffService)
-        .filter(
-            StaffService.staff_id == payload.staff_id,
-            StaffService.beauty_service_id == payload.beauty_service_id,
-        )
-        .first()
-    )
-    if not assignment:
+    if not catalog.is_assigned(payload.staff_id, payload.beauty_service_id):
         raise HTTPException(
             status_code=400,
             detail="This staff member is not assigned to the selected beauty service",
@@ -59,6 +83,12 @@ def create_booking(
             detail="Staff and beauty service must belong to the same business",
         )
 
+    # la key se reserva en la transacción del booking: un reintento concurrente espera
+    # en el índice único y responde lo guardado en vez de chocar con su propio booking
+    claimed = idempotency.claim(db, "beauty_bookings", idempotency_key, fingerprint) if idempotency_key else None
+    if claimed and claimed.replayed:
+        return idempotency.replayed_response(claimed.record)
+
     try:
         booking = create_beauty_booking(
             session=db,
@@ -66,11 +96,64 @@ def create_booking(
             beauty_service_id=payload.beauty_service_id,
             start_dt=payload.start_datetime,
             end_dt=payload.end_datetime,
+            buffer_before_min=service.buffer_before_min,
+            buffer_after_min=service.buffer_after_min,
+            before_commit=idempotency.response_writer(claimed, idempotency.dump(BeautyBookingOut)),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # con key se responde exactamente lo guardado (igual que un reintento)
+    return claimed.record.response_body if claimed else booking
+
+
+# booking sin staff: se asigna el mejor staff libre a esa hora según la política
+@router.post(
+    "/beauty-bookings/auto",
+    response_model=BeautyBookingOut,
+    status_code=status.HTTP_201_CREATED,
+)
+def create_booking_auto_assign(
+    payload: BeautyBookingAutoCreate,
+    db: Session = Depends(get_db),
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key", max_length=255),
+):
+    fingerprint = None
+    if idempotency_key:
+        fingerprint = request_fingerprint("auto", payload.model_dump(mode="json"))
+        stored = idempotency.lookup(db, "beauty_bookings", idempotency_key, fingerprint)
+        if stored:
+            return idempotency.replayed_response(stored)
+
+    business_id = catalog_cache.business_of_service(db, payload.beauty_service_id)
+    catalog = catalog_cache.tenant_catalog(db, business_id) if business_id is not None else None
+    service = catalog.services.get(payload.beauty_service_id) if catalog else None
+    if not service:
+        raise HTTPException(status_code=404, detail="Beauty service not found")
+
+    if not service.is_active:
+        raise HTTPException(status_code=400, detail="Beauty service is inactive")
+
+    claimed = idempotency.claim(db, "beauty_bookings", idempotency_key, fingerprint) if idempotency_key else None
+    if claimed and claimed.replayed:
+        return idempotency.replayed_response(claimed.record)
+
+    try:
+        booking = auto_assign_beauty_booking(
+            db,
+            catalog,
+            service,
+            payload.start_datetime,
+            policy=payload.policy,
+            preferred_staff_ids=payload.preferred_staff_ids,
+            before_commit=idempotency.response_writer(claimed, idempotency.dump(BeautyBookingOut)),
         )
-        return booking
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+    # con key se responde exactamente lo guardado (igual que un reintento)
+    return claimed.record.response_body if claimed else booking
+
 
 @router.patch(
     "/beauty-bookings/{booking_id}/cancel",
@@ -84,4 +167,102 @@ def cancel_booking(
         booking = cancel_beauty_booking(db, booking_id)
         return booking
     except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.patch(
+    "/beauty-bookings/{booking_id}/reschedule",
+    response_model=BeautyBookingOut,
+)
+def reschedule_booking(
+    booking_id: int,
+    payload: BeautyBookingReschedule,
+    db: Session = Depends(get_db),
+):
+    try:
+        booking = reschedule_beauty_booking(
+            session=db,
+            booking_id=booking_id,
+            start_dt=payload.start_datetime,
+            end_dt=payload.end_datetime,
+        )
+        return booking
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# cancelar todo lo confirmado de un staff en un rango (día libre, enfermedad)
+@router.post(
+    "/staff/{staff_id}/beauty-bookings/bulk-cancel",
+    response_model=BeautyBookingBulkCancelOut,
+)
+def bulk_cancel_staff_bookings(
+    staff_id: int,
+    payload: BeautyBookingBulkCancel,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_roles("business_admin", "super_admin")),
+    business_id: int = Depends(get_current_business_id),
+):
+    staff = (
+        db.query(Staff)
+        .filter(Staff.id == staff_id, Staff.business_id == business_id)
+        .first()
+    )
+    if not staff:
+        raise HTTPException(status_code=404, detail="Staff not found")
+
+    try:
+        block_exceptions = None
+        if payload.block_availability:
+            timezone_name = staff.business.timezone
+            block_exceptions = build_block_exceptions(
+                business_id,
+                to_local_naive(payload.start_datetime, timezone_name),
+                to_local_naive(payload.end_datetime, timezone_name),
+                staff_id=staff_id,
+                reason=payload.reason,
+            )
+
+        rows = bulk_cancel_beauty_bookings(
+            db,
+            staff_id,
+            payload.start_datetime,
+            payload.end_datetime,
+            block_exceptions=block_exceptions,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"cancelled_count": len(rows), "items": rows}
+
+
+# sincronización incremental del calendario del staff: solo lo que cambió desde el cursor
+@router.get("/staff/{staff_id}/beauty-bookings/changes", response_model=BeautyBookingChangesOut)
+def staff_beauty_booking_changes(
+    staff_id: int,
+    since: str | None = Query(default=None, description="cursor de la respuesta anterior; vacío = todo"),
+    limit: int = Query(default=500, ge=1, le=MAX_CHANGES_LIMIT),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_roles("business_admin", "staff", "super_admin")),
+    business_id: int = Depends(get_current_business_id),
+):
+    # un usuario staff solo sincroniza su propio calendario
+    if current_user.role == "staff" and current_user.staff_id != staff_id:
+        raise HTTPException(status_code=403, detail="Insufficient permissions")
+
+    try:
+        cursor = parse_cursor(since)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # solo la columna: sin los selectin de Staff
+    exists = db.execute(
+        select(Staff.id).where(Staff.id == staff_id, Staff.business_id == business_id)
+    ).first()
+    if not exists:
+        raise HTTPException(status_code=404, detail="Staff not found")
+
+    page = changes_since(db, BeautyBooking, BeautyBooking.staff_id, staff_id, cursor, limit)
+    return {"items": page.items, "cursor": str(page.cursor), "has_more": page.has_more}
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.api import idempotency
+from app.core.http_cache import PUBLIC_AVAILABILITY, conditional
+from app.core.resource_versions import VersionKey
+from app.db.session import get_db
+from app.models.staff_service import StaffService
+from app.schemas.beauty_booking import BeautyBookingOut
+from app.schemas.beauty_itinerary import BeautyItinerariesOut, BeautyItineraryBook, BeautyItineraryBookedOut
+from app.services import catalog_cache
+from app.services.beauty_itinerary import (
+    MAX_ITINERARY_RESULTS,
+    MAX_ITINERARY_SERVICES,
+    book_itinerary,
+    find_itineraries,
+)
+from app.services.catalog_cache import ServiceEntry, TenantCatalog
+from app.services.idempotency_service import request_fingerprint
+
+router = APIRouter(tags=["beauty_itineraries"])
+
+
+def _catalog_services(db: Session, service_ids: list[int], known=None) -> tuple[TenantCatalog, list[ServiceEntry]]:
+    """Catálogo del negocio del primer servicio y los servicios pedidos, validados."""
+    business_id = catalog_cache.business_of_service(db, service_ids[0])
+    if business_id is None:
+        raise HTTPException(status_code=404, detail="Beauty service not found")
+    catalog = catalog_cache.tenant_catalog(db, business_id, known=known)
+
+    services = []
+    for service_id in service_ids:
+        # un servicio de otro negocio tampoco está en este catálogo
+        service = catalog.services.get(service_id)
+        if not service:
+            raise HTTPException(status_code=404, detail="Beauty service not found")
+        if not service.is_active:
+            raise HTTPException(status_code=400, detail="Beauty service is inactive")
+        services.append(service)
+    return catalog, services
+
+
+# combos de servicios seguidos (ej. corte -> color -> peinado) con el staff libre en cada paso
+@router.get("/beauty-itineraries", response_model=BeautyItinerariesOut)
+def search_beauty_itineraries(
+    request: Request,
+    response: Response,
+    service_ids: list[int] = Query(..., description="servicios en orden; repetir el parámetro"),
+    date: str = Query(..., description="YYYY-MM-DD"),
+    limit: int = Query(default=5, ge=1, le=MAX_ITINERARY_RESULTS),
+    db: Session = Depends(get_db),
+):
+    if len(service_ids) > MAX_ITINERARY_SERVICES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_ITINERARY_SERVICES} services per itinerary")
+
+    try:
+        target_date = datetime.strptime(date, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+
+    business_id = catalog_cache.business_of_service(db, service_ids[0])
+    if business_id is None:
+        raise HTTPException(status_code=404, detail="Beauty service not found")
+
+    # mismas versiones que los slots de belleza: 304 antes de cargar la agenda
+    cache = conditional(
+        request,
+        db,
+        [
+            VersionKey("beauty_services", business_id),
+            VersionKey("staff", business_id),
+            VersionKey("staff_services", business_id),
+            VersionKey("staff_schedule", business_id),
+            VersionKey(
+                "staff_bookings",
+                select(StaffService.staff_id).where(StaffService.beauty_service_id.in_(service_ids)),
+            ),
+            VersionKey("exceptions", business_id),
+            VersionKey("business", business_id),
+        ],
+        PUBLIC_AVAILABILITY,
+    )
+    catalog, services = _catalog_services(db, service_ids, known=cache.versions.by_resource)
+
+    result = find_itineraries(db, catalog, services, target_date, limit)
+    if not result.truncated:
+        # uno truncado depende del tiempo que tomó: no se guarda
+        cache.apply(response)
+
+    tz = ZoneInfo(catalog.timezone or "America/Monterrey")
+    return {
+        "date": str(target_date),
+        "truncated": result.truncated,
+        "items": [
+            {
+                "start_datetime": itinerary.legs[0].start.replace(tzinfo=tz),
+                "end_datetime": itinerary.legs[-1].end.replace(tzinfo=tz),
+                "staff_changes": itinerary.staff_changes,
+                "legs": [
+                    {
+                        "beauty_service_id": leg.service_id,
+                        "staff_id": leg.staff_id,
+                        "staff_name": catalog.staff[leg.staff_id].name,
+                        "start_datetime": leg.start.replace(tzinfo=tz),
+                        "end_datetime": leg.end.replace(tzinfo=tz),
+                    }
+                    for leg in itinerary.legs
+                ],
+            }
+            for itinerary in result.items
+        ],
+    }
+
+
+def _itinerary_body(bookings) -> dict:
+    return {"items": [BeautyBookingOut.model_validate(b).model_dump(mode="json") for b in bookings]}
+
+
+# reservar un itinerario completo: todos los bookings en una transacción o ninguno
+@router.post(
+    "/beauty-itineraries",
+    response_model=BeautyItineraryBookedOut,
+    status_code=status.HTTP_201_CREATED,
+)
+def book_beauty_itinerary(
+    payload: BeautyItineraryBook,
+    db: Session = Depends(get_db),
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key", max_length=255),
+):
+    fingerprint = None
+    if idempotency_key:
+        fingerprint = request_fingerprint(payload.model_dump(mode="json"))
+        stored = idempotency.lookup(db, "beauty_itineraries", idempotency_key, fingerprint)
+        if stored:
+            return idempotency.replayed_response(stored)
+
+    catalog, services = _catalog_services(db, [leg.beauty_service_id for leg in payload.legs])
+
+    claimed = idempotency.claim(db, "beauty_itineraries", idempotency_key, fingerprint) if idempotency_key else None
+    if claimed and claimed.replayed:
+        return idempotency.replayed_response(claimed.record)
+
+    try:
+        bookings = book_itinerary(
+            db,
+            catalog,
+            [(service, leg.staff_id, leg.start_datetime) for service, leg in zip(services, payload.legs)],
+            before_commit=idempotency.response_writer(claimed, _itinerary_body),
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return claimed.record.response_body if claimed else _itinerary_body(bookings)
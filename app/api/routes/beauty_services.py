@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 from app.core.dependencies import require_roles, get_current_business_id
+from app.core.http_cache import PRIVATE, conditional
+from app.core.resource_versions import VersionKey
 from app.models.user import User
 
 from app.db.session import get_db
+from app.services import catalog_cache
 from app.models.business import Business
 from app.models.beauty_service import BeautyService
 from app.schemas.beauty_service import (
@@ -28,21 +31,27 @@ def create_beauty_service(
         category=payload.category,
         duration_min=payload.duration_min,
         price=payload.price,
+        buffer_before_min=payload.buffer_before_min,
+        buffer_after_min=payload.buffer_after_min,
         is_active=True,
     )
 
     db.add(service)
     db.commit()
+    catalog_cache.invalidate(business_id)
     db.refresh(service)
     return service
 
 # listar servicios de belleza por negocio (multi-tenant)
 @router.get("/beauty-services", response_model=list[BeautyServiceOut])
 def list_beauty_services(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_roles("business_admin", "staff", "super_admin")),
     business_id: int = Depends(get_current_business_id),
 ):
+    conditional(request, db, [VersionKey("beauty_services", business_id)], PRIVATE).apply(response)
     return (
         db.query(BeautyService)
         .filter(BeautyService.business_id == business_id)
@@ -99,6 +108,7 @@ def update_beauty_service(
         setattr(service, key, value)
 
     db.commit()
+    catalog_cache.invalidate(business_id)
     db.refresh(service)
     return service
 
@@ -124,5 +134,6 @@ def delete_beauty_service(
 
     service.is_active = False
     db.commit()
+    catalog_cache.invalidate(business_id)
     db.refresh(service)
     return service
\ No newline at end of file
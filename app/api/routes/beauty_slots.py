@@ -1,18 +1,32 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta, time as time_type
+from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from app.core.instrumentation import BOOKINGS_SCANNED, SLOTS_GENERATED
+from app.core.occupancy import MAX_BUFFER_MIN, Occupancy, padded, slot_step
+from app.core.profiling import profiled
+from app.core.http_cache import PUBLIC_AVAILABILITY, Conditional, conditional
+from app.core.resource_versions import VersionKey
+from app.core.slot_format import FORMAT_PATTERN, FULL, compact_window, negotiate, slots_response
 from app.db.session import get_db
-from app.models.beauty_service import BeautyService
-from app.models.staff import Staff
-from app.models.staff_service import StaffService
 from app.models.staff_availability_rule import StaffAvailabilityRule
 from app.models.beauty_booking import BeautyBooking
-from app.schemas.beauty_slots import BeautyAvailableSlotsOut, StaffSlotWindowOut
+from app.models.beauty_service import BeautyService
+from app.models.staff_service import StaffService
+from app.schemas.beauty_slots import BeautyAvailableSlotsCompactOut, BeautyAvailableSlotsOut
+from app.services import catalog_cache
+from app.services.availability_exception_service import (
+    exceptions_for_day,
+    is_business_closed,
+    is_resource_closed,
+    blocked_intervals,
+)
+from app.services.staff_day import local_day_bounds
 
 router = APIRouter(tags=["beauty_slots"])
 
@@ -33,7 +47,14 @@ def _generate_slots_for_staff_window(
     start_time,
     end_time,
     service_duration_min: int,
+    step_minutes: int | None = None,
+    buffer_before_min: int = 0,
+    buffer_after_min: int = 0,
 ) -> list[str]:
+    """
+    Inicios "HH:MM" donde el servicio cabe en la ventana con su preparación y limpieza.
+    step_minutes es el paso del negocio (o SLOT_STEP_MIN); sin él se avanza la duración.
+    """
     start_dt = datetime.combine(target_date, start_time)
     end_dt = datetime.combine(target_date, end_time)
 
@@ -41,41 +62,97 @@ def _generate_slots_for_staff_window(
         return []
 
     duration = timedelta(minutes=service_duration_min)
-    cur = start_dt
+    after = timedelta(minutes=buffer_after_min)
+    step = timedelta(minutes=step_minutes or service_duration_min)
+    cur = start_dt + timedelta(minutes=buffer_before_min)
     slots: list[str] = []
 
-    while cur + duration <= end_dt:
+    while cur + duration + after <= end_dt:
         slots.append(cur.strftime("%H:%M"))
-        cur += duration
+        cur += step
 
     return slots
 
 
-def _slot_overlaps_booking(
-    slot_start: datetime,
-    slot_end: datetime,
-    booking_start: datetime,
-    booking_end: datetime,
-) -> bool:
-    return slot_start < booking_end and booking_start < slot_end
+def _slots_response(payload: dict, service_duration_min: int, step_minutes: int, slot_format: str, cache: Conditional):
+    def to_compact(full: dict) -> dict:
+        return dict(
+            service_id=full["service_id"],
+            service_name=full["service_name"],
+            date=full["date"],
+            day_of_week=full["day_of_week"],
+            is_closed=full["is_closed"],
+            service_duration_min=service_duration_min,
+            windows=[
+                dict(
+                    staff_id=w["staff_id"],
+                    staff_name=w["staff_name"],
+                    **compact_window(
+                        w["start_time"], w["end_time"], step_minutes, w["slots"], w["unavailable_slots"]
+                    ),
+                )
+                for w in full["items"]
+            ],
+        )
+
+    return cache.apply(
+        slots_response(payload, slot_format, BeautyAvailableSlotsOut, to_compact, BeautyAvailableSlotsCompactOut)
+    )
 
 
 @router.get(
     "/beauty-services/{service_id}/available-slots",
     response_model=BeautyAvailableSlotsOut,
 )
+@profiled("beauty_slots")
 def get_beauty_service_available_slots(
+    request: Request,
     service_id: int,
     date: str = Query(..., description="YYYY-MM-DD"),
+    response_format: str = Query(default=FULL, alias="format", pattern=FORMAT_PATTERN, description="json | compact | msgpack"),
     db: Session = Depends(get_db),
 ):
-    service = db.query(BeautyService).filter(BeautyService.id == service_id).first()
+    slot_format = negotiate(request, response_format)
+
+    # negocio del servicio: en memoria salvo la primera vez que se ve el id
+    business_id = catalog_cache.business_of_service(db, service_id)
+    if business_id is None:
+        raise HTTPException(status_code=404, detail="Beauty service not found")
+
+    # 304 antes de recorrer staff/reglas/bookings si el cliente ya tiene esta versión
+    cache = conditional(
+        request,
+        db,
+        [
+            VersionKey("beauty_services", business_id),
+            VersionKey("staff", business_id),
+            VersionKey("staff_services", business_id),
+            VersionKey("staff_schedule", business_id),
+            # solo la agenda del staff que ofrece el servicio
+            VersionKey(
+                "staff_bookings",
+                select(StaffService.staff_id).where(StaffService.beauty_service_id == service_id),
+            ),
+            VersionKey("exceptions", business_id),
+            VersionKey("business", business_id),
+        ],
+        PUBLIC_AVAILABILITY,
+        variant=slot_format,
+    )
+
+    # servicio, staff asignado y timezone salen del catálogo en memoria; las versiones
+    # ya leídas para el ETag sirven para validarlo sin otra consulta
+    catalog = catalog_cache.tenant_catalog(db, business_id, known=cache.versions.by_resource)
+    service = catalog.services.get(service_id)
     if not service:
         raise HTTPException(status_code=404, detail="Beauty service not found")
 
     if not service.is_active:
         raise HTTPException(status_code=400, detail="Beauty service is inactive")
 
+    # paso entre inicios: el del negocio, el default (SLOT_STEP_MIN) o la duración
+    step_minutes = slot_step(catalog.slot_step_min, service.duration_min)
+
     try:
         target_date = datetime.strptime(date, "%Y-%m-%d").date()
     except ValueError:
@@ -83,30 +160,41 @@ def get_beauty_service_available_slots(
 
     day_of_week = DAY_NAME_MAP[target_date.weekday()]
 
-    # staff que puede hacer este servicio
-    staff_list = (
-        db.query(Staff)
-        .join(StaffService, StaffService.staff_id == Staff.id)
-        .filter(
-            StaffService.beauty_service_id == service_id,
-            Staff.is_active.is_(True),
-        )
-        .order_by(Staff.id.asc())
-        .all()
-    )
+    # excepciones del día para todo el negocio (una consulta); cierre total corta aquí
+    exceptions = exceptions_for_day(db, service.business_id, target_date)
+    if is_business_closed(exceptions):
+        return _slots_response(dict(
+            service_id=service.id,
+            service_name=service.name,
+            date=str(target_date),
+            day_of_week=day_of_week,
+            is_closed=True,
+            items=[],
+        ), service.duration_min, step_minutes, slot_format, cache)
+
+    # staff activo que puede hacer este servicio (ordenado por id)
+    staff_list = catalog.active_staff_for(service_id)
 
     if not staff_list:
-        return BeautyAvailableSlotsOut(
+        return _slots_response(dict(
             service_id=service.id,
             service_name=service.name,
             date=str(target_date),
             day_of_week=day_of_week,
+            is_closed=False,
             items=[],
-        )
+        ), service.duration_min, step_minutes, slot_format, cache)
 
-    items: list[StaffSlotWindowOut] = []
+    # timezone del negocio
+    local_tz = ZoneInfo(catalog.timezone or "America/Monterrey")
+
+    items: list[dict] = []
 
     for staff in staff_list:
+        # staff con el día bloqueado completo
+        if is_resource_closed(exceptions, staff_id=staff.id):
+            continue
+
         rules = (
             db.query(StaffAvailabilityRule)
             .filter(
@@ -120,23 +208,41 @@ def get_beauty_service_available_slots(
         if not rules:
             continue
 
-        # timezone del negocio
-        local_tz = ZoneInfo(staff.business.timezone or "America/Monterrey")
-
-        # traer bookings confirmados del día para este staff
-        day_start = datetime.combine(target_date, time_type.min)
-        day_end = datetime.combine(target_date, time_type.max)
+        # bookings confirmados del día local del staff, más lo que alcanza un buffer
+        day_start, day_end = local_day_bounds(target_date, local_tz, MAX_BUFFER_MIN)
 
-        bookings = (
-            db.query(BeautyBooking)
-            .filter(
+        bookings = db.execute(
+            select(
+                BeautyBooking.start_datetime,
+                BeautyBooking.end_datetime,
+                BeautyService.buffer_before_min,
+                BeautyService.buffer_after_min,
+            )
+            .join(BeautyService, BeautyService.id == BeautyBooking.beauty_service_id)
+            .where(
                 BeautyBooking.staff_id == staff.id,
                 BeautyBooking.status == "confirmed",
                 BeautyBooking.start_datetime < day_end,
                 BeautyBooking.end_datetime > day_start,
             )
             .order_by(BeautyBooking.start_datetime.asc())
-            .all()
+        ).all()
+
+        BOOKINGS_SCANNED.inc(len(bookings), engine="beauty")
+
+        # ocupación precalculada del staff: bookings (hora local, con los buffers de su
+        # servicio) + bloqueos parciales
+        occupancy = Occupancy(
+            [
+                padded(
+                    booking.start_datetime.astimezone(local_tz).replace(tzinfo=None),
+                    booking.end_datetime.astimezone(local_tz).replace(tzinfo=None),
+                    booking.buffer_before_min,
+                    booking.buffer_after_min,
+                )
+                for booking in bookings
+            ]
+            + blocked_intervals(exceptions, target_date, staff_id=staff.id)
         )
 
         for rule in rules:
@@ -145,7 +251,11 @@ def get_beauty_service_available_slots(
                 start_time=rule.start_time,
                 end_time=rule.end_time,
                 service_duration_min=service.duration_min,
+                step_minutes=step_minutes,
+                buffer_before_min=service.buffer_before_min,
+                buffer_after_min=service.buffer_after_min,
             )
+            SLOTS_GENERATED.inc(len(all_slots), engine="beauty")
 
             available_slots: list[str] = []
             unavailable_slots: list[str] = []
@@ -156,24 +266,15 @@ def get_beauty_service_available_slots(
                     datetime.strptime(slot_str, "%H:%M").time(),
                 )
                 slot_end = slot_start + timedelta(minutes=service.duration_min)
+                footprint = padded(slot_start, slot_end, service.buffer_before_min, service.buffer_after_min)
 
-                is_occupied = any(
-                    _slot_overlaps_booking(
-                        slot_start,
-                        slot_end,
-                        booking.start_datetime.astimezone(local_tz).replace(tzinfo=None),
-                        booking.end_datetime.astimezone(local_tz).replace(tzinfo=None),
-                    )
-                    for booking in bookings
-                )
-
-                if is_occupied:
+                if not occupancy.is_free(*footprint):
                     unavailable_slots.append(slot_str)
                 else:
                     available_slots.append(slot_str)
 
             items.append(
-                StaffSlotWindowOut(
+                dict(
                     staff_id=staff.id,
                     staff_name=staff.name,
                     day_of_week=rule.day_of_week,
@@ -185,10 +286,11 @@ def get_beauty_service_available_slots(
                 )
             )
 
-    return BeautyAvailableSlotsOut(
+    return _slots_response(dict(
         service_id=service.id,
         service_name=service.name,
         date=str(target_date),
         day_of_week=day_of_week,
+        is_closed=False,
         items=items,
-    )
\ No newline at end of file
+    ), service.duration_min, step_minutes, slot_format, cache)
\ No newline at end of file
@@ -1,11 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from app.api import idempotency
+from app.core.dependencies import require_roles, get_current_business_id
 from app.db.session import get_db
 from app.models.barber import Barber
+from app.models.booking import Booking
+from app.models.user import User
 from app.models.service import Service
-from app.schemas.booking import BookingCreate, BookingOut, BookingCancelOut
-from app.services.booking_service import create_booking, cancel_booking
+from app.schemas.booking import (
+    BookingCreate,
+    BookingOut,
+    BookingCancelOut,
+    BookingReschedule,
+    BookingBulkCancel,
+    BookingBulkCancelOut,
+    BookingChangesOut,
+)
+from app.services.booking_changes import MAX_CHANGES_LIMIT, changes_since, parse_cursor
+from app.services.availability_exception_service import build_block_exceptions, to_local_naive
+from app.services.booking_service import (
+    create_booking,
+    cancel_booking,
+    reschedule_booking,
+    bulk_cancel_bookings,
+)
+from app.services.idempotency_service import request_fingerprint
 
 router = APIRouter(tags=["bookings"])
 
@@ -15,7 +36,16 @@ def create_barber_booking(
     barber_id: int,
     payload: BookingCreate,
     db: Session = Depends(get_db),
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key", max_length=255),
 ):
+    # reintento con la misma key -> se responde lo guardado sin repetir validaciones
+    fingerprint = None
+    if idempotency_key:
+        fingerprint = request_fingerprint(barber_id, payload.model_dump(mode="json"))
+        stored = idempotency.lookup(db, "bookings", idempotency_key, fingerprint)
+        if stored:
+            return idempotency.replayed_response(stored)
+
     barber = db.query(Barber).filter(Barber.id == barber_id).first()
     if not barber:
         raise HTTPException(status_code=404, detail="Barber not found")
@@ -27,6 +57,12 @@ def create_barber_booking(
     if not service.is_active:
         raise HTTPException(status_code=400, detail="Service is inactive")
 
+    # la key se reserva en la transacción del booking: un reintento concurrente espera
+    # en el índice único y responde lo guardado en vez de chocar con su propio booking
+    claimed = idempotency.claim(db, "bookings", idempotency_key, fingerprint) if idempotency_key else None
+    if claimed and claimed.replayed:
+        return idempotency.replayed_response(claimed.record)
+
     try:
         booking = create_booking(
             session=db,
@@ -34,11 +70,16 @@ def create_barber_booking(
             service_id=payload.service_id,
             start_dt=payload.start_datetime,
             end_dt=payload.end_datetime,
+            buffer_before_min=service.buffer_before_min,
+            buffer_after_min=service.buffer_after_min,
+            before_commit=idempotency.response_writer(claimed, idempotency.dump(BookingOut)),
         )
-        return booking
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+    # con key se responde exactamente lo guardado (igual que un reintento)
+    return claimed.record.response_body if claimed else booking
+
 
 @router.patch("/barbers/{barber_id}/bookings/{booking_id}/cancel", response_model=BookingCancelOut)
 def cancel_barber_booking(
@@ -54,4 +95,94 @@ def cancel_barber_booking(
         booking = cancel_booking(db, booking_id)
         return booking
     except ValueError as e:
-        raise HTTPException(status_code=404, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.patch("/barbers/{barber_id}/bookings/{booking_id}/reschedule", response_model=BookingOut)
+def reschedule_barber_booking(
+    barber_id: int,
+    booking_id: int,
+    payload: BookingReschedule,
+    db: Session = Depends(get_db),
+):
+    try:
+        booking = reschedule_booking(
+            session=db,
+            barber_id=barber_id,
+            booking_id=booking_id,
+            start_dt=payload.start_datetime,
+            end_dt=payload.end_datetime,
+        )
+        return booking
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+# cancelar todo lo confirmado de un barbero en un rango (día libre, enfermedad)
+@router.post("/barbers/{barber_id}/bookings/bulk-cancel", response_model=BookingBulkCancelOut)
+def bulk_cancel_barber_bookings(
+    barber_id: int,
+    payload: BookingBulkCancel,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_roles("business_admin", "super_admin")),
+    business_id: int = Depends(get_current_business_id),
+):
+    barber = (
+        db.query(Barber)
+        .filter(Barber.id == barber_id, Barber.business_id == business_id)
+        .first()
+    )
+    if not barber:
+        raise HTTPException(status_code=404, detail="Barber not found")
+
+    try:
+        block_exceptions = None
+        if payload.block_availability:
+            timezone_name = barber.business.timezone
+            block_exceptions = build_block_exceptions(
+                business_id,
+                to_local_naive(payload.start_datetime, timezone_name),
+                to_local_naive(payload.end_datetime, timezone_name),
+                barber_id=barber_id,
+                reason=payload.reason,
+            )
+
+        rows = bulk_cancel_bookings(
+            db,
+            barber_id,
+            payload.start_datetime,
+            payload.end_datetime,
+            block_exceptions=block_exceptions,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"cancelled_count": len(rows), "items": rows}
+
+
+# sincronización incremental del calendario: solo lo que cambió desde el cursor
+@router.get("/barbers/{barber_id}/bookings/changes", response_model=BookingChangesOut)
+def barber_booking_changes(
+    barber_id: int,
+    since: str | None = Query(default=None, description="cursor de la respuesta anterior; vacío = todo"),
+    limit: int = Query(default=500, ge=1, le=MAX_CHANGES_LIMIT),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_roles("business_admin", "super_admin")),
+    business_id: int = Depends(get_current_business_id),
+):
+    try:
+        cursor = parse_cursor(since)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # solo la columna: sin cargar la relación de servicios del barbero
+    exists = db.execute(
+        select(Barber.id).where(Barber.id == barber_id, Barber.business_id == business_id)
+    ).first()
+    if not exists:
+        raise HTTPException(status_code=404, detail="Barber not found")
+
+    page = changes_since(db, Booking, Booking.barber_id, barber_id, cursor, limit)
+    return {"items": page.items, "cursor": str(page.cursor), "has_more": page.has_more}
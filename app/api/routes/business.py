@@ -0,0 +1,47 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.core.dependencies import get_current_business_id, require_roles
+from app.db.session import get_db
+from app.models.business import Business
+from app.models.user import User
+from app.schemas.business import BusinessSettingsOut, BusinessSettingsUpdate
+from app.services import catalog_cache
+
+router = APIRouter(tags=["business"])
+
+
+@router.get("/business/settings", response_model=BusinessSettingsOut)
+def get_business_settings(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_roles("business_admin", "staff", "super_admin")),
+    business_id: int = Depends(get_current_business_id),
+):
+    business = db.get(Business, business_id)
+    if not business:
+        raise HTTPException(status_code=404, detail="Business not found")
+    return business
+
+
+@router.put("/business/settings", response_model=BusinessSettingsOut)
+def update_business_settings(
+    payload: BusinessSettingsUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_roles("business_admin", "super_admin")),
+    business_id: int = Depends(get_current_business_id),
+):
+    business = db.get(Business, business_id)
+    if not business:
+        raise HTTPException(status_code=404, detail="Business not found")
+
+    # solo lo enviado: {"slot_step_min": null} vuelve al default
+    for key, value in payload.model_dump(exclude_unset=True).items():
+        setattr(business, key, value)
+
+    # el cambio incrementa ("business", id): los ETags de slots y el catálogo en memoria
+    # de los demás workers lo notan por versión
+    db.commit()
+    catalog_cache.invalidate(business_id)
+    # solo columnas: un refresh completo recargaría por selectin todo el catálogo del negocio
+    db.refresh(business, ["id", "name", "timezone", "slot_step_min"])
+    return business
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.dependencies import get_current_business_id, require_roles
+from app.core.http_cache import PRIVATE, conditional
+from app.db.session import get_db
+from app.models.barber import Barber
+from app.models.staff import Staff
+from app.models.user import User
+from app.schemas.calendar_feed import CalendarFeedOut
+from app.services.calendar_feed import (
+    feed_token,
+    feed_window,
+    iter_feed,
+    owner_name,
+    parse_feed_token,
+    version_keys,
+)
+
+router = APIRouter(tags=["calendar feed"])
+
+
+def _feed_url(request: Request, kind: str, owner_id: int) -> dict:
+    return {"url": str(request.url_for("calendar_feed", token=feed_token(kind, owner_id)))}
+
+
+@router.get("/barbers/{barber_id}/calendar-feed", response_model=CalendarFeedOut)
+def barber_calendar_feed_url(
+    request: Request,
+    barber_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_roles("business_admin", "super_admin")),
+    business_id: int = Depends(get_current_business_id),
+):
+    # solo la columna: sin cargar la relación de servicios del barbero
+    exists = db.execute(
+        select(Barber.id).where(Barber.id == barber_id, Barber.business_id == business_id)
+    ).first()
+    if not exists:
+        raise HTTPException(status_code=404, detail="Barber not found")
+    return _feed_url(request, "barber", barber_id)
+
+
+@router.get("/staff/{staff_id}/calendar-feed", response_model=CalendarFeedOut)
+def staff_calendar_feed_url(
+    request: Request,
+    staff_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_roles("business_admin", "staff", "super_admin")),
+    business_id: int = Depends(get_current_business_id),
+):
+    # un usuario staff solo puede pedir la URL de su propio calendario
+    if current_user.role == "staff" and current_user.staff_id != staff_id:
+        raise HTTPException(status_code=403, detail="Insufficient permissions")
+
+    exists = db.execute(
+        select(Staff.id).where(Staff.id == staff_id, Staff.business_id == business_id)
+    ).first()
+    if not exists:
+        raise HTTPException(status_code=404, detail="Staff not found")
+    return _feed_url(request, "staff", staff_id)
+
+
+# feed .ics de suscripción: sin JWT (el token de la URL autoriza). Un feed sin cambios
+# es un 304 con una sola consulta (las versiones); si cambió, se transmite por chunks.
+@router.get("/calendar/{token}.ics", name="calendar_feed")
+def calendar_feed(request: Request, token: str, db: Session = Depends(get_db)):
+    try:
+        owner = parse_feed_token(token)
+    except ValueError:
+        # mismo 404 que un dueño inexistente: no confirmar qué tokens existen
+        raise HTTPException(status_code=404, detail="Calendar not found")
+
+    window = feed_window()
+    # la ventana móvil cambia el cuerpo sin tocar versiones: va en el ETag y en Last-Modified
+    cache = conditional(
+        request,
+        db,
+        version_keys(owner),
+        PRIVATE,
+        variant=window.start.strftime("%Y%m%d"),
+        weak=False,
+        changed_at=window.rolled_at,
+    )
+
+    name = owner_name(db, owner)
+    if name is None:
+        raise HTTPException(status_code=404, detail="Calendar not found")
+
+    return StreamingResponse(
+        iter_feed(owner, name, window),
+        media_type="text/calendar; charset=utf-8",
+        headers={**cache.headers(), "Content-Disposition": 'inline; filename="calendar.ics"'},
+    )
@@ -0,0 +1,21 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.metrics import CONTENT_TYPE_LATEST, REGISTRY, generate_latest
+
+router = APIRouter(tags=["metrics"])
+
+# se monta sin prefijo (/metrics), donde Prometheus lo busca por default
+prometheus_router = APIRouter(tags=["metrics"])
+
+
+# métricas en JSON (lock wait / conflictos de booking, etc.)
+@router.get("/metrics/json")
+def metrics_json():
+    return REGISTRY.snapshot()
+
+
+# formato de texto de Prometheus (suma todos los workers si METRICS_MULTIPROC_DIR está definido)
+@prometheus_router.get("/metrics", include_in_schema=False)
+def metrics_prometheus():
+    return PlainTextResponse(generate_latest(), media_type=CONTENT_TYPE_LATEST)
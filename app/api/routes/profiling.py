@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse, Response
+
+from app.core.dependencies import require_roles
+from app.core.profiling import PROFILE_SAMPLE_RATE, PROFILE_STORE
+from app.models.user import User
+
+router = APIRouter(tags=["profiling"])
+
+
+@router.get("/admin/profiles")
+def list_profiles(
+    current_user: User = Depends(require_roles("super_admin")),
+):
+    return {
+        "sample_rate": PROFILE_SAMPLE_RATE,
+        "items": PROFILE_STORE.summary(),
+    }
+
+
+@router.get("/admin/profiles/{name}/pstats")
+def download_pstats(
+    name: str,
+    current_user: User = Depends(require_roles("super_admin")),
+):
+    try:
+        data = PROFILE_STORE.pstats_bytes(name)
+    except LookupError:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    return Response(
+        content=data,
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="{name}.pstats"'},
+    )
+
+
+@router.get("/admin/profiles/{name}/collapsed", response_class=PlainTextResponse)
+def download_collapsed(
+    name: str,
+    current_user: User = Depends(require_roles("super_admin")),
+):
+    try:
+        return PROFILE_STORE.collapsed(name)
+    except LookupError:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+
+@router.delete("/admin/profiles", status_code=204)
+def reset_profiles(
+    current_user: User = Depends(require_roles("super_admin")),
+):
+    PROFILE_STORE.reset()
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, time as time_type
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.core.dependencies import require_roles, get_current_business_id
+from app.db.session import get_db
+from app.models.barber import Barber
+from app.models.staff import Staff
+from app.models.user import User
+from app.schemas.booking import BookingHistoryOut
+from app.schemas.beauty_booking import BeautyBookingHistoryOut
+from app.services.archive_service import booking_history_stmt, beauty_booking_history_stmt
+
+router = APIRouter(tags=["reports"])
+
+MAX_RANGE_DAYS = 366
+
+
+def _parse_range(start_date: str, end_date: str) -> tuple[datetime, datetime]:
+    try:
+        start = datetime.strptime(start_date, "%Y-%m-%d").date()
+        end = datetime.strptime(end_date, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD")
+
+    if start > end:
+        raise HTTPException(status_code=400, detail="start_date cannot be greater than end_date")
+
+    if (end - start).days > MAX_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range cannot exceed {MAX_RANGE_DAYS} days")
+
+    # end_date inclusivo
+    return datetime.combine(start, time_type.min), datetime.combine(end + timedelta(days=1), time_type.min)
+
+
+# historial de bookings de un barbero (tabla caliente + archivo)
+@router.get("/reports/barbers/{barber_id}/bookings", response_model=list[BookingHistoryOut])
+def barber_booking_history(
+    barber_id: int,
+    start_date: str = Query(..., description="YYYY-MM-DD"),
+    end_date: str = Query(..., description="YYYY-MM-DD (inclusivo)"),
+    status: str | None = Query(default=None, pattern="^(confirmed|cancelled)$"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_roles("business_admin", "super_admin")),
+    business_id: int = Depends(get_current_business_id),
+):
+    barber = (
+        db.query(Barber)
+        .filter(Barber.id == barber_id, Barber.business_id == business_id)
+        .first()
+    )
+    if not barber:
+        raise HTTPException(status_code=404, detail="Barber not found")
+
+    start_dt, end_dt = _parse_range(start_date, end_date)
+
+    rows = db.execute(booking_history_stmt(barber_id, start_dt, end_dt, status)).mappings().all()
+    return rows
+
+
+# historial de beauty bookings de un staff (tabla caliente + archivo)
+@router.get("/reports/staff/{staff_id}/beauty-bookings", response_model=list[BeautyBookingHistoryOut])
+def staff_beauty_booking_history(
+    staff_id: int,
+    start_date: str = Query(..., description="YYYY-MM-DD"),
+    end_date: str = Query(..., description="YYYY-MM-DD (inclusivo)"),
+    status: str | None = Query(default=None, pattern="^(confirmed|cancelled)$"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_roles("business_admin", "super_admin")),
+    business_id: int = Depends(get_current_business_id),
+):
+    staff = (
+        db.query(Staff)
+        .filter(Staff.id == staff_id, Staff.business_id == business_id)
+        .first()
+    )
+    if not staff:
+        raise HTTPException(status_code=404, detail="Staff not found")
+
+    start_dt, end_dt = _parse_range(start_date, end_date)
+
+    rows = db.execute(beauty_booking_history_stmt(staff_id, start_dt, end_dt, status)).mappings().all()
+    return rows
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy import asc, desc
@@ -6,6 +6,10 @@ from sqlalchemy import asc, desc
 from app.db.session import get_db
 from app.models.service import Service
 from app.schemas.service import ServiceCreate, ServiceOut, ServiceUpdate, BarberLiteOut
+from app.api.serializers import barber_lite_dict, service_dict
+from app.core.http_cache import PUBLIC_CATALOG, conditional
+from app.core.resource_versions import ANY_SCOPE, VersionKey
+from app.core.responses import fast_response
 
 router = APIRouter(tags=["services"])
 
@@ -19,6 +23,8 @@ def create_service(payload: ServiceCreate, db: Session = Depends(get_db)):
             existing.is_active = True
             existing.duration_min = payload.duration_min
             existing.price = payload.price
+            existing.buffer_before_min = payload.buffer_before_min
+            existing.buffer_after_min = payload.buffer_after_min
             db.commit()
             db.refresh(existing)
             return existing
@@ -39,6 +45,7 @@ def create_service(payload: ServiceCreate, db: Session = Depends(get_db)):
 # Listar servicios con filtros y ordenamiento
 @router.get("", response_model=list[ServiceOut])
 def list_services(
+    request: Request,
     db: Session = Depends(get_db),
     active_only: bool = True,
 
@@ -52,6 +59,8 @@ def list_services(
     order_by: str = Query(default="id"),
     order: str = Query(default="asc"),
 ):
+    cache = conditional(request, db, [VersionKey("services", ANY_SCOPE)], PUBLIC_CATALOG)
+
     q = db.query(Service)
 
     # filtros
@@ -99,7 +108,7 @@ def list_services(
 
     q = q.order_by(asc(col) if order_lower == "asc" else desc(col))
 
-    return q.all()
+    return cache.apply(fast_response([service_dict(s) for s in q.all()], list[ServiceOut]))
 
 # Obtener un servicio por ID
 @router.get("/{service_id}", response_model=ServiceOut)
@@ -107,7 +116,7 @@ def get_service(service_id: int, db: Session = Depends(get_db)):
     service = db.query(Service).filter(Service.id == service_id).first()
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
-    return service
+    return fast_response(service_dict(service), ServiceOut)
 
 # Actualizar un servicio
 @router.put("/{service_id}", response_model=ServiceOut)
@@ -169,5 +178,5 @@ def get_service_barbers(service_id: int, db: Session = Depends(get_db)):
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
 
-    return service.barbers
+    return fast_response([barber_lite_dict(b) for b in service.barbers], list[BarberLiteOut])
 
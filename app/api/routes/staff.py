@@ -1,9 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
 from app.core.dependencies import require_roles, get_current_business_id
+from app.core.http_cache import PRIVATE, conditional
+from app.core.resource_versions import VersionKey
 from app.models.user import User
 
 from app.db.session import get_db
+from app.services import catalog_cache
 from app.models.staff import Staff
 from app.models.business import Business
 from app.schemas.staff import StaffCreate, StaffOut, StaffUpdate
@@ -28,15 +31,19 @@ def create_staff(
 
     db.add(staff)
     db.commit()
+    catalog_cache.invalidate(business_id)
     db.refresh(staff)
     return staff
 
 @router.get("/staff", response_model=list[StaffOut])
 def list_staff(
+    request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     current_user: User = Depends(require_roles("business_admin", "staff", "super_admin")),
     business_id: int = Depends(get_current_business_id),
 ):
+    conditional(request, db, [VersionKey("staff", business_id)], PRIVATE).apply(response)
     return (
         db.query(Staff)
         .filter(Staff.business_id == business_id, Staff.is_active == True)
@@ -91,6 +98,7 @@ def update_staff(
         setattr(staff, key, value)
 
     db.commit()
+    catalog_cache.invalidate(business_id)
     db.refresh(staff)
     return staff
 
@@ -115,5 +123,6 @@ def delete_staff(
 
     staff.is_active = False
     db.commit()
+    catalog_cache.invalidate(business_id)
     db.refresh(staff)
     return staff
\ No newline at end of file
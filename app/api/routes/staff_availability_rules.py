@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends
 from sqlalchemy.orm import Session
 
+from app.core.availability_events import record_change
 from app.db.session import get_db
 from app.models.staff_availability_rule import StaffAvailabilityRule
 from app.schemas.staff_availability_rule import (
@@ -17,6 +18,7 @@ def create_rule(data: StaffAvailabilityRuleCreate, db: Session = Depends(get_db)
     rule = StaffAvailabilityRule(**data.model_dump())
 
     db.add(rule)
+    record_change(db, "staff", rule.staff_id, (), "rule_changed")
     db.commit()
     db.refresh(rule)
 
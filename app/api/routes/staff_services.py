@@ -4,6 +4,7 @@ from app.models.user import User
 from sqlalchemy.orm import Session
 
 from app.db.session import get_db
+from app.services import catalog_cache
 from app.models.staff import Staff
 from app.models.beauty_service import BeautyService
 from app.models.staff_service import StaffService
@@ -65,6 +66,7 @@ def assign_service_to_staff(
     )
     db.add(link)
     db.commit()
+    catalog_cache.invalidate(business_id)
     db.refresh(link)
     return link
 
@@ -115,6 +117,7 @@ def unassign_service_from_staff(
 
     db.delete(link)
     db.commit()
+    catalog_cache.invalidate(business_id)
     return link
 
 # endpoint para listar los servicios asignados a un staff, se hace un join entre StaffService y BeautyService 
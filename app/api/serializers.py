@@ -0,0 +1,39 @@
+# app/api/serializers.py
+"""
+Builders de dicts para respuestas grandes. Arman el mismo JSON que BarberOut /
+ServiceOut pero sin validar cada instancia ORM con Pydantic (ver app.core.responses).
+El orden de las keys sigue al de los schemas.
+"""
+from __future__ import annotations
+
+from app.models.barber import Barber
+from app.models.service import Service
+
+
+def service_dict(service: Service) -> dict:
+    # price queda como Decimal; AppJSONResponse lo manda como número igual que ServiceOut
+    return {
+        "id": service.id,
+        "name": service.name,
+        "duration_min": service.duration_min,
+        "price": service.price,
+        "buffer_before_min": service.buffer_before_min,
+        "buffer_after_min": service.buffer_after_min,
+        "is_active": service.is_active,
+    }
+
+
+def barber_lite_dict(barber: Barber) -> dict:
+    return {
+        "id": barber.id,
+        "name": barber.name,
+        "phone": barber.phone,
+        "email": barber.email,
+        "is_active": barber.is_active,
+    }
+
+
+def barber_dict(barber: Barber) -> dict:
+    data = barber_lite_dict(barber)
+    data["services"] = [service_dict(s) for s in barber.services]
+    return data
@@ -0,0 +1,93 @@
+# app/core/availability_events.py
+from __future__ import annotations
+
+import logging
+from datetime import date, datetime, timedelta, timezone
+from typing import Callable, Iterable, NamedTuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+_SESSION_KEY = "availability_changes"
+
+
+class AvailabilityChange(NamedTuple):
+    resource: str           # "barber" | "staff" | "business"
+    resource_id: int
+    dates: tuple[date, ...]  # días afectados (ej. día viejo y nuevo en un reschedule); vacío = todos
+    reason: str             # "booking_created" | "booking_cancelled" | "booking_rescheduled" | "rule_changed" | ...
+
+
+_subscribers: list[Callable[[AvailabilityChange], None]] = []
+
+
+def subscribe(callback: Callable[[AvailabilityChange], None]) -> None:
+    """Registra un callback que recibe cada cambio después del commit."""
+    if callback not in _subscribers:
+        _subscribers.append(callback)
+
+
+def unsubscribe(callback: Callable[[AvailabilityChange], None]) -> None:
+    if callback in _subscribers:
+        _subscribers.remove(callback)
+
+
+def dates_between(start_dt: datetime, end_dt: datetime, timezone_name: str | None = None) -> tuple[date, ...]:
+    """
+    Días locales del negocio que toca el rango [start_dt, end_dt). Los motores de slots
+    agrupan por día local: un booking de las 19:00 en Monterrey es 01:00 UTC del día
+    siguiente y tiene que publicarse con el día local. Naive = UTC (así se guarda).
+    """
+    tz = ZoneInfo(timezone_name or "America/Monterrey")
+    start_dt = (start_dt if start_dt.tzinfo else start_dt.replace(tzinfo=timezone.utc)).astimezone(tz)
+    end_dt = (end_dt if end_dt.tzinfo else end_dt.replace(tzinfo=timezone.utc)).astimezone(tz)
+    last = (end_dt - timedelta(microseconds=1)).date() if end_dt > start_dt else start_dt.date()
+    cur = start_dt.date()
+    days = []
+    while cur <= last:
+        days.append(cur)
+        cur += timedelta(days=1)
+    return tuple(days)
+
+
+def record_change(
+    session: Session,
+    resource: str,
+    resource_id: int,
+    dates: Iterable[date],
+    reason: str,
+) -> None:
+    """
+    Anota un cambio de disponibilidad en la sesión. Se publica solo si la
+    transacción hace commit; en rollback se descarta.
+    """
+    change = AvailabilityChange(resource, resource_id, tuple(sorted(set(dates))), reason)
+    session.info.setdefault(_SESSION_KEY, []).append(change)
+
+
+def pending_changes(session: Session) -> list[AvailabilityChange]:
+    return list(session.info.get(_SESSION_KEY, []))
+
+
+def publish(change: AvailabilityChange) -> None:
+    for callback in list(_subscribers):
+        try:
+            callback(change)
+        except Exception:
+            # un suscriptor roto no debe tumbar el request que ya hizo commit
+            logger.exception("availability subscriber failed for %s", change)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_after_commit(session: Session) -> None:
+    changes = session.info.pop(_SESSION_KEY, None)
+    for change in changes or ():
+        publish(change)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop(_SESSION_KEY, None)
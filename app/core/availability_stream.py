@@ -0,0 +1,168 @@
+# app/core/availability_stream.py
+"""
+Fan-out en memoria de cambios de disponibilidad hacia clientes SSE.
+
+El hub recibe las claves "*_slots" del bus de invalidación (commits locales y NOTIFY
+de otros workers) y las reparte a las suscripciones del negocio que coinciden con sus
+filtros (staff/barbero/fecha). Cada suscripción tiene una cola acotada en su event
+loop: si el cliente no alcanza a leer y la cola se llena, se vacía y se deja un solo
+evento "resync" (el cliente vuelve a pedir los slots completos) en vez de crecer sin
+límite o bloquear al que publica.
+
+publish() se llama desde hilos (endpoints sync, listener de NOTIFY): se pasa al loop
+de cada suscripción con call_soon_threadsafe.
+"""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import os
+import threading
+from datetime import date
+from typing import NamedTuple, Sequence
+
+from app.core import invalidation
+from app.core.instrumentation import SSE_CLIENTS, SSE_EVENTS
+from app.core.invalidation import Invalidation
+
+SSE_QUEUE_SIZE = int(os.getenv("SSE_QUEUE_SIZE", "100"))
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+SSE_MAX_CLIENTS = int(os.getenv("SSE_MAX_CLIENTS", "1000"))
+
+if SSE_QUEUE_SIZE < 1:
+    raise RuntimeError(f"SSE_QUEUE_SIZE invalido: {SSE_QUEUE_SIZE}. Debe ser >= 1")
+if SSE_HEARTBEAT_SECONDS <= 0:
+    raise RuntimeError(f"SSE_HEARTBEAT_SECONDS invalido: {SSE_HEARTBEAT_SECONDS}. Debe ser > 0")
+if SSE_MAX_CLIENTS < 1:
+    raise RuntimeError(f"SSE_MAX_CLIENTS invalido: {SSE_MAX_CLIENTS}. Debe ser >= 1")
+
+# entity del bus -> recurso que viaja al cliente
+_SLOT_ENTITIES = {"barber_slots": "barber", "staff_slots": "staff", "business_slots": "business"}
+
+
+class SlotChange(NamedTuple):
+    resource: str        # "barber" | "staff" | "business" (excepción de todo el negocio)
+    resource_id: int
+    date: date | None    # None = todos los días (ej. cambió una regla)
+
+
+# en la cola: un SlotChange o RESYNC
+RESYNC = None
+
+
+class Subscription:
+    def __init__(
+        self,
+        business_id: int,
+        staff_id: int | None = None,
+        barber_id: int | None = None,
+        day: date | None = None,
+        queue_size: int = SSE_QUEUE_SIZE,
+    ):
+        self.business_id = business_id
+        self.staff_id = staff_id
+        self.barber_id = barber_id
+        self.day = day
+        self.loop = asyncio.get_running_loop()
+        self.queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self.ids = itertools.count(1)
+        self._resync_pending = False
+
+    def matches(self, change: SlotChange) -> bool:
+        if self.day is not None and change.date is not None and change.date != self.day:
+            return False
+        if change.resource == "business":
+            return True
+        if self.staff_id is None and self.barber_id is None:
+            return True
+        if change.resource == "staff":
+            return change.resource_id == self.staff_id
+        return change.resource_id == self.barber_id
+
+    def offer(self, change: SlotChange | None) -> None:
+        """Solo desde el loop de la suscripción."""
+        if self._resync_pending:
+            # ya hay un resync en cola: cubre todo lo que llegue antes de leerlo
+            return
+        if change is not RESYNC:
+            try:
+                self.queue.put_nowait(change)
+                return
+            except asyncio.QueueFull:
+                SSE_EVENTS.inc(self.queue.qsize(), type="dropped")
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(RESYNC)
+        self._resync_pending = True
+
+    async def next(self, timeout: float) -> SlotChange | None:
+        """Siguiente cambio (o RESYNC). asyncio.TimeoutError si no llega nada en `timeout`."""
+        change = await asyncio.wait_for(self.queue.get(), timeout)
+        if change is RESYNC:
+            self._resync_pending = False
+        return change
+
+
+class AvailabilityHub:
+    def __init__(self, max_clients: int = SSE_MAX_CLIENTS):
+        self.max_clients = max_clients
+        self._lock = threading.Lock()
+        self._subscriptions: dict[int, set[Subscription]] = {}
+        self._count = 0
+
+    def subscribe(self, business_id: int, **filters) -> Subscription | None:
+        """None si el worker ya tiene max_clients abiertos."""
+        subscription = Subscription(business_id, **filters)
+        with self._lock:
+            if self._count >= self.max_clients:
+                return None
+            self._subscriptions.setdefault(business_id, set()).add(subscription)
+            self._count += 1
+        SSE_CLIENTS.inc()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.business_id)
+            if subscriptions is None or subscription not in subscriptions:
+                return
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.business_id]
+            self._count -= 1
+        SSE_CLIENTS.dec()
+
+    def publish(self, items: Sequence[Invalidation]) -> None:
+        """Handler del bus: agrupa por negocio y encola en cada suscripción que coincide."""
+        by_business: dict[int, list[SlotChange]] = {}
+        resync_all = False
+        for item in items:
+            if item.entity in ("resync", "global"):
+                resync_all = True
+            elif item.entity in _SLOT_ENTITIES and item.tenant:
+                by_business.setdefault(item.tenant, []).append(
+                    SlotChange(_SLOT_ENTITIES[item.entity], item.id, item.date)
+                )
+
+        with self._lock:
+            if resync_all:
+                targets = [(s, [RESYNC]) for subs in self._subscriptions.values() for s in subs]
+            else:
+                targets = []
+                for business_id, changes in by_business.items():
+                    for subscription in self._subscriptions.get(business_id, ()):
+                        matched = [c for c in changes if subscription.matches(c)]
+                        if matched:
+                            targets.append((subscription, matched))
+
+        for subscription, changes in targets:
+            for change in changes:
+                try:
+                    subscription.loop.call_soon_threadsafe(subscription.offer, change)
+                except RuntimeError:
+                    # loop cerrado: el cliente ya se fue y su finally hará unsubscribe
+                    break
+
+
+hub = AvailabilityHub()
+invalidation.register(hub.publish)
@@ -0,0 +1,241 @@
+# app/core/compression.py
+"""
+Middleware ASGI de compresión (brotli / gzip) para respuestas JSON grandes.
+
+- Negocia con Accept-Encoding (respeta q=0) en el orden de COMPRESSION_ENCODINGS.
+- Respuestas de un solo cuerpo: se comprimen solo si pesan >= COMPRESSION_MIN_SIZE.
+- Respuestas en streaming: se comprimen chunk por chunk con flush, así cada chunk
+  llega al cliente sin esperar al final (si traen Content-Length chico, no se tocan).
+- Métricas por template de ruta: bytes antes/después (ahorro = input - output), CPU
+  gastada en comprimir y respuestas no comprimidas por motivo, para ajustar
+  nivel/umbral por ruta.
+
+brotli es opcional: sin el paquete solo se ofrece gzip.
+"""
+from __future__ import annotations
+
+import os
+import time
+import zlib
+
+from starlette.datastructures import MutableHeaders
+
+from app.core.instrumentation import (
+    HTTP_COMPRESSION_CPU_SECONDS,
+    HTTP_COMPRESSION_INPUT_BYTES,
+    HTTP_COMPRESSION_OUTPUT_BYTES,
+    HTTP_COMPRESSION_SKIPPED,
+    route_template,
+)
+
+try:
+    import brotli
+except ImportError:  # opcional
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+# orden de preferencia; vacío desactiva la compresión
+COMPRESSION_ENCODINGS = tuple(
+    e.strip() for e in os.getenv("COMPRESSION_ENCODINGS", "br,gzip").split(",") if e.strip()
+)
+
+SUPPORTED_ENCODINGS = ("br", "gzip")
+
+if COMPRESSION_MIN_SIZE < 0:
+    raise RuntimeError(f"COMPRESSION_MIN_SIZE invalido: {COMPRESSION_MIN_SIZE}. Debe ser >= 0")
+if not 1 <= COMPRESSION_GZIP_LEVEL <= 9:
+    raise RuntimeError(f"COMPRESSION_GZIP_LEVEL invalido: {COMPRESSION_GZIP_LEVEL}. Debe estar entre 1 y 9")
+if not 0 <= COMPRESSION_BROTLI_QUALITY <= 11:
+    raise RuntimeError(f"COMPRESSION_BROTLI_QUALITY invalido: {COMPRESSION_BROTLI_QUALITY}. Debe estar entre 0 y 11")
+_unknown = [e for e in COMPRESSION_ENCODINGS if e not in SUPPORTED_ENCODINGS]
+if _unknown:
+    raise RuntimeError(
+        f"COMPRESSION_ENCODINGS invalido: {', '.join(_unknown)}. Opciones: {', '.join(SUPPORTED_ENCODINGS)}"
+    )
+
+# tipos que vale la pena comprimir (prefijos de Content-Type)
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-msgpack",
+    "application/javascript",
+    "text/plain",
+    "text/html",
+    "text/csv",
+    "text/calendar",
+)
+
+
+def available_encodings(preferred: tuple[str, ...] = COMPRESSION_ENCODINGS) -> tuple[str, ...]:
+    return tuple(e for e in preferred if e != "br" or brotli is not None)
+
+
+def choose_encoding(accept_encoding: str, offered: tuple[str, ...]) -> str | None:
+    """La codificación ofrecida con mayor q en Accept-Encoding (empates: orden de `offered`)."""
+    weights: dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[token] = q
+
+    best, best_q = None, 0.0
+    for encoding in offered:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+class _Compressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=brotli_quality)
+        else:
+            # wbits 31 = formato gzip (header + crc)
+            self._gz = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._br.process(data) + self._br.flush()
+        return self._gz.compress(data) + self._gz.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == "br":
+            return self._br.process(data) + self._br.finish()
+        return self._gz.compress(data) + self._gz.flush(zlib.Z_FINISH)
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app,
+        minimum_size: int = COMPRESSION_MIN_SIZE,
+        gzip_level: int = COMPRESSION_GZIP_LEVEL,
+        brotli_quality: int = COMPRESSION_BROTLI_QUALITY,
+        encodings: tuple[str, ...] = COMPRESSION_ENCODINGS,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.encodings = available_encodings(encodings)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.encodings:
+            await self.app(scope, receive, send)
+            return
+
+        accept = ""
+        for key, value in scope.get("headers", []):
+            if key == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+        encoding = choose_encoding(accept, self.encodings) if accept else None
+
+        start_message = None
+        compressor: _Compressor | None = None
+        passthrough = False
+        bytes_in = bytes_out = 0
+        cpu = 0.0
+
+        def compress(fn, data: bytes) -> bytes:
+            nonlocal bytes_in, bytes_out, cpu
+            # thread_time: CPU de este hilo; nada más corre en el loop mientras tanto
+            t0 = time.thread_time()
+            out = fn(data)
+            cpu += time.thread_time() - t0
+            bytes_in += len(data)
+            bytes_out += len(out)
+            return out
+
+        def skip(reason: str) -> None:
+            HTTP_COMPRESSION_SKIPPED.inc(route=route_template(scope), reason=reason)
+
+        async def send_compressed(message):
+            nonlocal start_message, compressor, passthrough
+
+            if message["type"] == "http.response.start":
+                # se retiene hasta ver el primer chunk del cuerpo
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                headers = MutableHeaders(raw=list(start_message.get("headers", [])))
+                content_type = headers.get("content-type", "")
+                compressible = content_type.startswith(COMPRESSIBLE_TYPES)
+                if compressible:
+                    # la respuesta cambia según Accept-Encoding aunque esta vez no se comprima
+                    headers.add_vary_header("Accept-Encoding")
+
+                declared = headers.get("content-length")
+                # tamaño conocido: el cuerpo completo o el Content-Length declarado del stream
+                size = len(body) if not more_body else int(declared) if declared else None
+                reason = None
+                if not compressible:
+                    reason = "content_type"
+                elif encoding is None:
+                    reason = "not_accepted"
+                elif "content-encoding" in headers or "no-transform" in headers.get("cache-control", ""):
+                    reason = "already_encoded"
+                elif start_message["status"] < 200 or start_message["status"] in (204, 304):
+                    reason = "status"
+                elif size is not None and size < self.minimum_size:
+                    reason = "below_threshold"
+
+                if reason is not None:
+                    if compressible:
+                        skip(reason)
+                    passthrough = True
+                    await send({**start_message, "headers": headers.raw})
+                    await send(message)
+                    return
+
+                compressor = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+                headers["Content-Encoding"] = encoding
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    # un ETag fuerte no puede compartirse entre representaciones
+                    headers["ETag"] = f"W/{etag}"
+
+                if not more_body:
+                    payload = compress(compressor.finish, body)
+                    headers["Content-Length"] = str(len(payload))
+                    await send({**start_message, "headers": headers.raw})
+                    await send({"type": "http.response.body", "body": payload})
+                    return
+
+                del headers["Content-Length"]
+                await send({**start_message, "headers": headers.raw})
+
+            if more_body:
+                payload = compress(compressor.chunk, body)
+                if payload:
+                    await send({"type": "http.response.body", "body": payload, "more_body": True})
+            else:
+                await send({"type": "http.response.body", "body": compress(compressor.finish, body)})
+
+        try:
+            await self.app(scope, receive, send_compressed)
+        finally:
+            if compressor is not None:
+                route = route_template(scope)
+                HTTP_COMPRESSION_INPUT_BYTES.inc(bytes_in, route=route, encoding=compressor.encoding)
+                HTTP_COMPRESSION_OUTPUT_BYTES.inc(bytes_out, route=route, encoding=compressor.encoding)
+                HTTP_COMPRESSION_CPU_SECONDS.inc(cpu, route=route, encoding=compressor.encoding)
@@ -0,0 +1,141 @@
+# app/core/http_cache.py
+"""
+Caché HTTP condicional (ETag / Last-Modified + Cache-Control) sobre resource_versions.
+
+    cache = conditional(request, db, [VersionKey("services", ANY_SCOPE)], PUBLIC_CATALOG)
+    ...                                # solo se llega aquí si el cliente no tiene la versión
+    return cache.apply(fast_response(...))
+
+conditional() hace una sola consulta (las versiones); si If-None-Match / If-Modified-Since
+coinciden levanta un 304 sin cuerpo antes de que el endpoint corra su consulta principal.
+If-None-Match es el validador exacto; Last-Modified tiene resolución de un segundo y no
+se manda mientras ese segundo no termina. Los ETags son débiles: la misma versión puede
+viajar en JSON, compacto o comprimida.
+weak=False da un ETag fuerte cuando el cuerpo es byte a byte el mismo para una versión
+(ej. el feed .ics); la compresión lo vuelve débil al cambiar los bytes.
+"""
+from __future__ import annotations
+
+import os
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, NamedTuple
+
+from fastapi import HTTPException, Request, Response
+from sqlalchemy.orm import Session
+
+from app.core.resource_versions import VersionKey, Versions, read_versions
+
+CATALOG_CACHE_MAX_AGE = int(os.getenv("CATALOG_CACHE_MAX_AGE", "60"))
+AVAILABILITY_CACHE_MAX_AGE = int(os.getenv("AVAILABILITY_CACHE_MAX_AGE", "0"))
+
+if CATALOG_CACHE_MAX_AGE < 0 or AVAILABILITY_CACHE_MAX_AGE < 0:
+    raise RuntimeError("CATALOG_CACHE_MAX_AGE / AVAILABILITY_CACHE_MAX_AGE no pueden ser negativos")
+
+
+def _public(max_age: int) -> str:
+    # max-age=0 -> el CDN guarda la respuesta pero revalida siempre (con ETag es un 304 barato)
+    return f"public, max-age={max_age}" if max_age else "public, no-cache"
+
+
+# catálogos públicos (servicios de barbería): el CDN los sirve sin tocar la API
+PUBLIC_CATALOG = _public(CATALOG_CACHE_MAX_AGE)
+# slots públicos: cambian con cada booking
+PUBLIC_AVAILABILITY = _public(AVAILABILITY_CACHE_MAX_AGE)
+# endpoints con JWT: solo el navegador puede guardar, y revalida siempre
+PRIVATE = "private, no-cache"
+
+
+class Conditional(NamedTuple):
+    etag: str
+    last_modified: datetime | None
+    cache_control: str
+    versions: Versions  # lo leído para el ETag; el endpoint puede reusarlo (ej. catalog_cache)
+
+    def headers(self) -> dict[str, str]:
+        headers = {"ETag": self.etag, "Cache-Control": self.cache_control}
+        if self.last_modified is not None:
+            headers["Last-Modified"] = format_datetime(self.last_modified, usegmt=True)
+        return headers
+
+    def apply(self, response: Response) -> Response:
+        response.headers.update(self.headers())
+        return response
+
+
+def _last_modified(updated_at: datetime | None, now: datetime | None = None) -> datetime | None:
+    """
+    Last-Modified en segundos enteros, o None si la última escritura cayó en el segundo en
+    curso: otra escritura en ese mismo segundo tendría el mismo Last-Modified y un
+    If-Modified-Since con él daría un 304 viejo. Sin el header el cliente valida con el ETag.
+    """
+    if updated_at is None:
+        return None
+    # SQLite devuelve naive: se guardó en UTC
+    updated_at = updated_at if updated_at.tzinfo else updated_at.replace(tzinfo=timezone.utc)
+    last_modified = updated_at.astimezone(timezone.utc).replace(microsecond=0)
+    if last_modified >= (now or datetime.now(timezone.utc)).replace(microsecond=0):
+        return None
+    return last_modified
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # comparación débil: W/"x" == "x"
+    target = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == target for tag in if_none_match.split(","))
+
+
+def _not_modified_since(if_modified_since: str, last_modified: datetime | None) -> bool:
+    if last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified <= since
+
+
+def conditional(
+    request: Request,
+    db: Session,
+    keys: Iterable[VersionKey],
+    cache_control: str,
+    variant: str = "",
+    weak: bool = True,
+    changed_at: datetime | None = None,
+) -> Conditional:
+    """
+    Calcula ETag/Last-Modified de las versiones de `keys`. Si el cliente ya tiene esa
+    versión levanta HTTPException(304) con los mismos headers. `variant` distingue
+    representaciones de la misma URL (ej. el formato negociado por Accept). `changed_at`
+    es un cambio que no pasa por las versiones (ej. la ventana móvil del feed, que va en
+    `variant`): Last-Modified nunca queda antes, o If-Modified-Since daría un 304 viejo.
+    """
+    versions = read_versions(db, keys)
+    tag = ".".join(str(v) for v in versions.values)
+    if variant:
+        tag = f"{tag}-{variant}"
+    updated_at = versions.updated_at
+    if updated_at is not None and updated_at.tzinfo is None:
+        updated_at = updated_at.replace(tzinfo=timezone.utc)
+    if changed_at is not None and (updated_at is None or updated_at < changed_at):
+        updated_at = changed_at
+    last_modified = _last_modified(updated_at)
+    etag = f'W/"{tag}"' if weak else f'"{tag}"'
+    result = Conditional(etag, last_modified, cache_control, versions)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match manda sobre If-Modified-Since (RFC 9110 13.2.2)
+        not_modified = _etag_matches(if_none_match, result.etag)
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        not_modified = if_modified_since is not None and _not_modified_since(if_modified_since, last_modified)
+
+    if not_modified:
+        raise HTTPException(status_code=304, headers=result.headers())
+    return result
@@ -0,0 +1,156 @@
+# app/core/instrumentation.py
+from __future__ import annotations
+
+import time
+
+from sqlalchemy.engine import Engine
+
+from app.core.metrics import counter, ensure_multiprocess_flusher, gauge, histogram
+
+# rutas sin match (404, scans) comparten una sola serie para no inflar cardinalidad
+UNMATCHED_ROUTE = "unmatched"
+
+HTTP_REQUESTS_IN_FLIGHT = gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being served",
+    ("method",),
+)
+
+HTTP_REQUEST_DURATION = histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ("method", "route", "status"),
+)
+
+HTTP_RESPONSE_SIZE = histogram(
+    "http_response_size_bytes",
+    "HTTP response body size by route template",
+    ("method", "route"),
+    buckets=(100, 500, 1_000, 5_000, 10_000, 50_000, 100_000, 500_000, 1_000_000),
+)
+
+HTTP_COMPRESSION_INPUT_BYTES = counter(
+    "http_compression_input_bytes_total",
+    "Response bytes fed to the compressor",
+    ("route", "encoding"),
+)
+
+HTTP_COMPRESSION_OUTPUT_BYTES = counter(
+    "http_compression_output_bytes_total",
+    "Compressed response bytes sent (saved = input - output)",
+    ("route", "encoding"),
+)
+
+HTTP_COMPRESSION_CPU_SECONDS = counter(
+    "http_compression_cpu_seconds_total",
+    "CPU time spent compressing responses",
+    ("route", "encoding"),
+)
+
+HTTP_COMPRESSION_SKIPPED = counter(
+    "http_compression_skipped_total",
+    "Compressible responses sent uncompressed, by reason",
+    ("route", "reason"),
+)
+
+CACHE_INVALIDATIONS = counter(
+    "cache_invalidations_total",
+    "Invalidation keys applied to in-process caches (local commit, remote NOTIFY, resync)",
+    ("source",),
+)
+
+SSE_CLIENTS = gauge("sse_clients", "Open availability SSE streams in this worker")
+
+SSE_EVENTS = counter(
+    "sse_events_total",
+    "Availability SSE events by type (slots, resync, dropped on queue overflow)",
+    ("type",),
+)
+
+DB_POOL_CHECKED_OUT = gauge("db_pool_checked_out", "DB connections currently checked out of the pool")
+DB_POOL_SIZE = gauge("db_pool_size", "Configured DB pool size")
+DB_POOL_OVERFLOW = gauge("db_pool_overflow", "DB connections opened beyond the pool size")
+
+SLOTS_GENERATED = counter(
+    "slot_engine_slots_generated_total",
+    "Candidate slots evaluated by the slot engines",
+    ("engine",),
+)
+
+BOOKINGS_SCANNED = counter(
+    "slot_engine_bookings_scanned_total",
+    "Confirmed bookings loaded by the slot engines to build occupancy",
+    ("engine",),
+)
+
+
+def route_template(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+def _pool_stat(engine: Engine, name: str) -> float:
+    # no todos los pools exponen las mismas estadísticas (ej. SQLite en tests)
+    stat = getattr(engine.pool, name, None)
+    return float(stat()) if callable(stat) else 0.0
+
+
+def install_pool_metrics(engine: Engine) -> None:
+    DB_POOL_CHECKED_OUT.set_function(lambda: _pool_stat(engine, "checkedout"))
+    DB_POOL_SIZE.set_function(lambda: _pool_stat(engine, "size"))
+    DB_POOL_OVERFLOW.set_function(lambda: max(_pool_stat(engine, "overflow"), 0.0))
+
+
+def _is_event_stream(headers) -> bool:
+    return any(
+        name.lower() == b"content-type" and value.split(b";")[0].strip().lower() == b"text/event-stream"
+        for name, value in headers
+    )
+
+
+class PrometheusMiddleware:
+    """
+    Middleware ASGI: latencia, tamaño de respuesta y requests en curso, etiquetados
+    por template de ruta (`/api/barbers/{barber_id}/...`) y no por path crudo.
+    Los streams SSE salen de estas métricas al empezar la respuesta: duran lo que dure
+    el cliente conectado y se cuentan en SSE_CLIENTS.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        ensure_multiprocess_flusher()
+
+        method = scope.get("method", "GET")
+        started = time.perf_counter()
+        status_code = 500
+        body_size = 0
+        streaming = False
+
+        async def send_with_metrics(message):
+            nonlocal status_code, body_size, streaming
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if _is_event_stream(message.get("headers", [])):
+                    streaming = True
+                    HTTP_REQUESTS_IN_FLIGHT.dec(method=method)
+            elif message["type"] == "http.response.body":
+                body_size += len(message.get("body", b""))
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc(method=method)
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            if not streaming:
+                HTTP_REQUESTS_IN_FLIGHT.dec(method=method)
+                route = route_template(scope)
+                HTTP_REQUEST_DURATION.observe(
+                    time.perf_counter() - started, method=method, route=route, status=status_code
+                )
+                HTTP_RESPONSE_SIZE.observe(body_size, method=method, route=route)
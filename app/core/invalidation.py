@@ -0,0 +1,263 @@
+# app/core/invalidation.py
+"""
+Bus de invalidación entre workers con LISTEN/NOTIFY de Postgres (sin Redis).
+
+Escritura: en before_commit se juntan las claves que cambió la transacción (las de
+resource_versions y los días de availability_events) y se emite un pg_notify. NOTIFY
+es transaccional: si hay rollback no sale nada, y si hay commit sale junto con él.
+En el propio worker las mismas claves se aplican en after_commit, sin esperar el eco.
+
+Lectura: cada worker levanta un InvalidationListener (hilo con su propia conexión
+psycopg, fuera del pool) que escucha el canal y pasa las claves a los handlers
+registrados. Si la conexión se cae puede haberse perdido algo: al reconectar se
+despacha RESYNC y cada caché se vacía completa.
+
+    invalidation.register(handler)   # handler(items: Sequence[Invalidation]) -> None
+
+Con SQLite (dev/tests) no hay NOTIFY: solo el despacho local en after_commit.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import re
+import threading
+import uuid
+from datetime import date, datetime
+from typing import Callable, Iterable, NamedTuple, Sequence
+
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.core.availability_events import pending_changes
+from app.core.instrumentation import CACHE_INVALIDATIONS
+from app.core.resource_versions import barber_business, bump_pending_changes, bumped_keys, staff_business
+
+try:
+    import psycopg
+except ImportError:  # solo hace falta para escuchar en Postgres
+    psycopg = None
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_BUS = os.getenv("INVALIDATION_BUS", "1")
+INVALIDATION_CHANNEL = os.getenv("INVALIDATION_CHANNEL", "beautybarber_invalidation")
+
+if INVALIDATION_BUS not in ("0", "1"):
+    raise RuntimeError(f"INVALIDATION_BUS invalido: {INVALIDATION_BUS}. Opciones: 0, 1")
+if not re.fullmatch(r"[a-z_][a-z0-9_]{0,62}", INVALIDATION_CHANNEL):
+    raise RuntimeError(
+        f"INVALIDATION_CHANNEL invalido: {INVALIDATION_CHANNEL}. Debe ser un identificador en minúsculas"
+    )
+
+# el límite de Postgres es 8000 bytes por payload; se parte en varios NOTIFY
+MAX_PAYLOAD_BYTES = 7900
+
+# identifica a este proceso: su propio eco se ignora (ya se aplicó en after_commit)
+ORIGIN = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+
+_SESSION_KEY = "invalidation_pending"
+
+# recursos de resource_versions cuyo scope es el business_id
+TENANT_RESOURCES = frozenset(
+    {"beauty_services", "staff", "staff_services", "staff_schedule", "exceptions", "business"}
+)
+
+
+class Invalidation(NamedTuple):
+    tenant: int              # business_id; 0 = sin tenant (catálogo global de barbería, época global)
+    entity: str              # resource de resource_versions, o "<recurso>_slots" para días de agenda
+    id: int = 0              # barber/staff/business id cuando aplica
+    date: date | None = None  # día afectado (solo *_slots; None = todos)
+
+
+# se perdieron notificaciones (reconexión o payload ilegible): vaciar todo
+RESYNC = Invalidation(0, "resync")
+
+Handler = Callable[[Sequence[Invalidation]], None]
+_handlers: list[Handler] = []
+
+
+def register(handler: Handler) -> None:
+    if handler not in _handlers:
+        _handlers.append(handler)
+
+
+def unregister(handler: Handler) -> None:
+    if handler in _handlers:
+        _handlers.remove(handler)
+
+
+def dispatch(items: Sequence[Invalidation], source: str = "local") -> None:
+    if not items:
+        return
+    CACHE_INVALIDATIONS.inc(len(items), source=source)
+    for handler in list(_handlers):
+        try:
+            handler(items)
+        except Exception:
+            # una caché rota no debe tumbar el request que ya hizo commit ni el listener
+            logger.exception("invalidation handler failed (%d items)", len(items))
+
+
+# ---- codificación: "tenant:entity:id:yyyymmdd" separados por coma, con origen al frente
+
+
+def encode(items: Iterable[Invalidation], origin: str | None = None) -> list[str]:
+    """Payloads de NOTIFY (uno o más, cada uno bajo MAX_PAYLOAD_BYTES)."""
+    payloads: list[str] = []
+    prefix = f"{origin or ORIGIN}|"
+    current = prefix
+    for item in items:
+        token = f"{item.tenant}:{item.entity}:{item.id}:{item.date.strftime('%Y%m%d') if item.date else ''}"
+        sep = "," if current != prefix else ""
+        if len(current) + len(sep) + len(token) > MAX_PAYLOAD_BYTES:
+            payloads.append(current)
+            current, sep = prefix, ""
+        current += sep + token
+    if current != prefix:
+        payloads.append(current)
+    return payloads
+
+
+def decode(payload: str) -> tuple[str, list[Invalidation]]:
+    """(origen, claves). ValueError si el payload no tiene el formato de encode()."""
+    origin, sep, body = payload.partition("|")
+    if not sep:
+        raise ValueError("payload sin origen")
+    items = []
+    for token in filter(None, body.split(",")):
+        tenant, entity, obj_id, day = token.split(":")
+        items.append(
+            Invalidation(int(tenant), entity, int(obj_id), datetime.strptime(day, "%Y%m%d").date() if day else None)
+        )
+    return origin, items
+
+
+# ---- emisión desde la sesión
+
+
+def _collect(session: Session) -> list[Invalidation]:
+    items: set[Invalidation] = set()
+    for resource, scope in bumped_keys(session):
+        if resource in TENANT_RESOURCES:
+            items.add(Invalidation(scope, resource))
+        elif resource == "barber":
+            items.add(Invalidation(barber_business(session, scope) or 0, resource, scope))
+        elif resource == "staff_bookings":
+            items.add(Invalidation(staff_business(session, scope) or 0, resource, scope))
+        else:
+            items.add(Invalidation(0, resource))
+
+    for change in pending_changes(session):
+        if change.resource == "staff":
+            tenant = staff_business(session, change.resource_id)
+        elif change.resource == "barber":
+            tenant = barber_business(session, change.resource_id)
+        else:
+            tenant = change.resource_id
+        # sin días (cambio de reglas) = todos los días del recurso
+        for day in change.dates or (None,):
+            items.add(Invalidation(tenant or 0, f"{change.resource}_slots", change.resource_id, day))
+    return sorted(items, key=lambda i: (i.tenant, i.entity, i.id, i.date or date.min))
+
+
+@event.listens_for(Session, "before_commit")
+def _notify_before_commit(session: Session) -> None:
+    if session.in_nested_transaction():
+        return
+    # commit() flushea después de before_commit: se adelanta para que los bumps de ese
+    # flush (resource_versions.after_flush) entren en este NOTIFY. Los de record_change
+    # se piden aquí mismo: no depende del orden en que SQLAlchemy corre los before_commit
+    if session.new or session.dirty or session.deleted:
+        session.flush()
+    bump_pending_changes(session)
+
+    items = _collect(session)
+    if not items:
+        return
+    session.info[_SESSION_KEY] = items
+
+    connection = session.connection()
+    if INVALIDATION_BUS == "1" and connection.dialect.name == "postgresql":
+        for payload in encode(items):
+            connection.execute(
+                text("SELECT pg_notify(:channel, :payload)"),
+                {"channel": INVALIDATION_CHANNEL, "payload": payload},
+            )
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_after_commit(session: Session) -> None:
+    items = session.info.pop(_SESSION_KEY, None)
+    if items:
+        dispatch(items)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop(_SESSION_KEY, None)
+
+
+# ---- escucha en cada worker
+
+
+def handle_payload(payload: str) -> None:
+    try:
+        origin, items = decode(payload)
+    except ValueError:
+        logger.warning("invalidation payload ilegible, resync: %r", payload[:200])
+        dispatch([RESYNC], source="resync")
+        return
+    if origin != ORIGIN:
+        dispatch(items, source="remote")
+
+
+class InvalidationListener:
+    """Hilo daemon con LISTEN sobre INVALIDATION_CHANNEL; reconecta con backoff."""
+
+    def __init__(self, engine: Engine, channel: str = INVALIDATION_CHANNEL, poll_seconds: float = 1.0):
+        self.url = engine.url.set(drivername="postgresql").render_as_string(hide_password=False)
+        self.channel = channel
+        self.poll_seconds = poll_seconds
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="invalidation-listener", daemon=True)
+
+    def start(self) -> "InvalidationListener":
+        self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._thread.join(timeout)
+
+    def _run(self) -> None:
+        delay = self.poll_seconds
+        connected_before = False
+        while not self._stop.is_set():
+            try:
+                with psycopg.connect(self.url, autocommit=True) as conn:
+                    conn.execute(f"LISTEN {self.channel}")
+                    if connected_before:
+                        # lo que se haya emitido mientras no escuchábamos se perdió
+                        dispatch([RESYNC], source="resync")
+                    connected_before = True
+                    delay = self.poll_seconds
+                    while not self._stop.is_set():
+                        for notify in conn.notifies(timeout=self.poll_seconds):
+                            handle_payload(notify.payload)
+            except Exception:
+                logger.exception("invalidation listener desconectado, reintentando en %.1fs", delay)
+                self._stop.wait(delay)
+                delay = min(delay * 2, 30.0)
+
+
+def start_listener(engine: Engine) -> InvalidationListener | None:
+    """Arranca el listener si aplica (Postgres, bus activo y psycopg instalado)."""
+    if INVALIDATION_BUS != "1" or engine.dialect.name != "postgresql":
+        return None
+    if psycopg is None:
+        logger.warning("INVALIDATION_BUS=1 pero psycopg no está instalado: solo invalidación local")
+        return None
+    return InvalidationListener(engine).start()
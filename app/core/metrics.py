@@ -0,0 +1,428 @@
+# app/core/metrics.py
+from __future__ import annotations
+
+import atexit
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Modo multi-worker (gunicorn/uvicorn --workers N): cada proceso escribe su snapshot
+# en este directorio y /metrics suma los de todos. Vacío = solo el proceso actual.
+# Los snapshots de procesos terminados se suman a metrics_dead.json y se borran (al
+# salir, al arrancar un worker con el mismo pid o al leer /metrics), así un pid reusado
+# no pisa ni mezcla lo que contó el muerto.
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR", "")
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+
+CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        if amount < 0:
+            raise ValueError("Counter can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> dict[tuple[str, ...], float]:
+        with self._lock:
+            return dict(self._values)
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple[str, ...], float] = {}
+        self._function: Callable[[], float] | None = None
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Valor calculado al momento de leer (solo gauges sin labels, ej. estado del pool)."""
+        if self.labelnames:
+            raise ValueError("set_function only supports gauges without labels")
+        self._function = function
+
+    def samples(self) -> dict[tuple[str, ...], float]:
+        if self._function is not None:
+            return {(): float(self._function())}
+        with self._lock:
+            return dict(self._values)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # por label: [conteos por bucket (no acumulados) + overflow, suma]
+        self._values: dict[tuple[str, ...], tuple[list[int], list[float]]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[idx] += 1
+            total[0] += value
+
+    def samples(self) -> dict[tuple[str, ...], dict]:
+        out = {}
+        with self._lock:
+            for key, (counts, total) in self._values.items():
+                out[key] = {"counts": list(counts), "sum": total[0], "count": sum(counts)}
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric already registered: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def collect(self) -> list[_Metric]:
+        with self._lock:
+            return list(self._metrics.values())
+
+    def snapshot(self) -> dict:
+        """Vista JSON de todas las métricas (para endpoints de diagnóstico)."""
+        out: dict = {}
+        for metric in self.collect():
+            series = []
+            for key, value in metric.samples().items():
+                labels = dict(zip(metric.labelnames, key))
+                if isinstance(metric, Histogram):
+                    series.append({"labels": labels, "buckets": list(metric.buckets), **value})
+                else:
+                    series.append({"labels": labels, "value": value})
+            out[metric.name] = {"type": metric.kind, "help": metric.documentation, "series": series}
+        return out
+
+    def dump(self) -> dict:
+        """Formato serializable usado para exposición y para el modo multi-worker."""
+        out: dict = {}
+        for metric in self.collect():
+            entry = {
+                "type": metric.kind,
+                "help": metric.documentation,
+                "labelnames": list(metric.labelnames),
+                "series": [[list(key), value] for key, value in metric.samples().items()],
+            }
+            if isinstance(metric, Histogram):
+                entry["buckets"] = list(metric.buckets)
+                for _key, value in entry["series"]:
+                    value.pop("count", None)
+            out[metric.name] = entry
+        return out
+
+
+REGISTRY = Registry()
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def merge_dumps(dumps: list[tuple[dict, bool]]) -> dict:
+    """
+    Suma dumps de varios procesos. Counters e histogramas se suman siempre (lo que
+    contó un worker muerto sigue contando); los gauges solo de procesos vivos.
+    """
+    merged: dict = {}
+    for dump, alive in dumps:
+        for name, entry in dump.items():
+            if entry["type"] == "gauge" and not alive:
+                continue
+            target = merged.setdefault(
+                name,
+                {**{k: v for k, v in entry.items() if k != "series"}, "series": {}},
+            )
+            for key, value in entry["series"]:
+                key = tuple(key)
+                if entry["type"] == "histogram":
+                    cur = target["series"].get(key)
+                    if cur is None:
+                        target["series"][key] = {"counts": list(value["counts"]), "sum": value["sum"]}
+                    else:
+                        cur["counts"] = [a + b for a, b in zip(cur["counts"], value["counts"])]
+                        cur["sum"] += value["sum"]
+                else:
+                    target["series"][key] = target["series"].get(key, 0.0) + value
+
+    for entry in merged.values():
+        entry["series"] = [[list(key), value] for key, value in entry["series"].items()]
+    return merged
+
+
+_DEAD_SNAPSHOT = "metrics_dead.json"
+
+
+def _snapshot_path(directory: str, pid: int) -> str:
+    return os.path.join(directory, f"metrics_{pid}.json")
+
+
+def _snapshot_pid(filename: str) -> int | None:
+    if not (filename.startswith("metrics_") and filename.endswith(".json")):
+        return None
+    try:
+        return int(filename[len("metrics_"):-len(".json")])
+    except ValueError:
+        return None
+
+
+def _read_dump(path: str) -> dict | None:
+    try:
+        with open(path, encoding="utf-8") as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError):
+        logger.warning("skipping unreadable metrics snapshot %s", os.path.basename(path))
+        return None
+
+
+def _write_dump(path: str, dump: dict) -> None:
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(dump, fh)
+    # reemplazo atómico: el que lee nunca ve un archivo a medias
+    os.replace(tmp, path)
+
+
+@contextmanager
+def _directory_lock(directory: str) -> Iterator[None]:
+    """Serializa entre procesos la lectura de snapshots y el pase a metrics_dead.json."""
+    with open(os.path.join(directory, ".metrics.lock"), "a") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def _fold_dead(directory: str, pids: list[int]) -> None:
+    """Suma los snapshots de esos pids a metrics_dead.json y los borra (con el lock tomado)."""
+    dead_path = os.path.join(directory, _DEAD_SNAPSHOT)
+    paths = [_snapshot_path(directory, pid) for pid in pids]
+    dumps = [dump for dump in map(_read_dump, paths) if dump is not None]
+    if dumps:
+        previous = _read_dump(dead_path)
+        if previous is not None:
+            dumps.insert(0, previous)
+        # gauges fuera (alive=False): solo quedan counters e histogramas
+        _write_dump(dead_path, merge_dumps([(dump, False) for dump in dumps]))
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def mark_process_dead(pid: int, directory: str | None = None) -> None:
+    """Pasa el snapshot de un proceso terminado a metrics_dead.json."""
+    directory = directory or METRICS_MULTIPROC_DIR
+    if not directory or not os.path.exists(_snapshot_path(directory, pid)):
+        return
+    with _directory_lock(directory):
+        _fold_dead(directory, [pid])
+
+
+def write_process_snapshot(registry: Registry | None = None, directory: str | None = None) -> None:
+    registry = registry or REGISTRY
+    directory = directory or METRICS_MULTIPROC_DIR
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    _write_dump(_snapshot_path(directory, os.getpid()), registry.dump())
+
+
+def collect_multiprocess(registry: Registry | None = None, directory: str | None = None) -> dict:
+    registry = registry or REGISTRY
+    directory = directory or METRICS_MULTIPROC_DIR
+    own_pid = os.getpid()
+
+    dumps: list[tuple[dict, bool]] = [(registry.dump(), True)]
+    with _directory_lock(directory):
+        pids = [pid for pid in map(_snapshot_pid, os.listdir(directory)) if pid is not None and pid != own_pid]
+        dead = [pid for pid in pids if not _pid_alive(pid)]
+        if dead:
+            _fold_dead(directory, dead)
+
+        for pid in pids:
+            if pid in dead:
+                continue
+            dump = _read_dump(_snapshot_path(directory, pid))
+            if dump is not None:
+                dumps.append((dump, True))
+        dump = _read_dump(os.path.join(directory, _DEAD_SNAPSHOT))
+        if dump is not None:
+            dumps.append((dump, False))
+    return merge_dumps(dumps)
+
+
+_flusher_pid: int | None = None
+_flusher_lock = threading.Lock()
+
+
+def ensure_multiprocess_flusher() -> None:
+    """
+    Arranca (una vez por proceso) el hilo que escribe el snapshot de este worker.
+    Se llama en cada request porque los hilos no sobreviven al fork de los workers.
+    """
+    global _flusher_pid
+    if not METRICS_MULTIPROC_DIR or _flusher_pid == os.getpid():
+        return
+    with _flusher_lock:
+        if _flusher_pid == os.getpid():
+            return
+        _flusher_pid = pid = os.getpid()
+        # lo que quedó con este pid es de un proceso anterior que murió sin limpiar
+        mark_process_dead(pid)
+
+        def _on_exit():
+            if os.getpid() == pid:
+                write_process_snapshot()
+                mark_process_dead(pid)
+
+        atexit.register(_on_exit)
+
+        def _loop():
+            while True:
+                try:
+                    write_process_snapshot()
+                except Exception:
+                    logger.exception("failed to write metrics snapshot")
+                time.sleep(METRICS_FLUSH_INTERVAL)
+
+        threading.Thread(target=_loop, name="metrics-flusher", daemon=True).start()
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames, key, extra: tuple[tuple[str, str], ...] = ()) -> str:
+    pairs = [*zip(labelnames, key), *extra]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label(str(value))}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def render_text(dump: dict) -> str:
+    """Formato de exposición de texto de Prometheus (0.0.4)."""
+    lines: list[str] = []
+    for name in sorted(dump):
+        entry = dump[name]
+        labelnames = entry["labelnames"]
+        lines.append(f"# HELP {name} {entry['help']}")
+        lines.append(f"# TYPE {name} {entry['type']}")
+        for key, value in sorted(entry["series"], key=lambda s: s[0]):
+            if entry["type"] == "histogram":
+                cumulative = 0
+                for bound, count in zip([*entry["buckets"], float("inf")], value["counts"]):
+                    cumulative += count
+                    labels = _format_labels(labelnames, key, (("le", _format_value(bound)),))
+                    lines.append(f"{name}_bucket{labels} {cumulative}")
+                labels = _format_labels(labelnames, key)
+                lines.append(f"{name}_sum{labels} {_format_value(value['sum'])}")
+                lines.append(f"{name}_count{labels} {cumulative}")
+            else:
+                lines.append(f"{name}{_format_labels(labelnames, key)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def generate_latest(registry: Registry | None = None) -> str:
+    registry = registry or REGISTRY
+    if METRICS_MULTIPROC_DIR:
+        write_process_snapshot(registry)
+        return render_text(collect_multiprocess(registry))
+    return render_text(registry.dump())
+
+
+def counter(name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def histogram(
+    name: str,
+    documentation: str,
+    labelnames: tuple[str, ...] = (),
+    buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+def gauge(name: str, documentation: str, labelnames: tuple[str, ...] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, labelnames))
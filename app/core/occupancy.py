@@ -0,0 +1,76 @@
+# app/core/occupancy.py
+from __future__ import annotations
+
+import os
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone
+from typing import Iterable
+
+# tope de preparación/limpieza por servicio (minutos). has_overlap amplía su búsqueda
+# por este margen para encontrar bookings cuyo buffer alcanza al nuevo
+MAX_BUFFER_MIN = 240
+
+# límites del paso entre inicios de slot (businesses.slot_step_min y SLOT_STEP_MIN)
+MIN_SLOT_STEP_MIN = 5
+MAX_SLOT_STEP_MIN = 240
+
+# paso por defecto para negocios sin slot_step_min; 0 = la duración del servicio (belleza)
+# o el slot_minutes de cada regla (barbería)
+SLOT_STEP_MIN = int(os.getenv("SLOT_STEP_MIN", "0"))
+
+if SLOT_STEP_MIN != 0 and not MIN_SLOT_STEP_MIN <= SLOT_STEP_MIN <= MAX_SLOT_STEP_MIN:
+    raise RuntimeError(
+        f"SLOT_STEP_MIN invalido: {SLOT_STEP_MIN}. Debe ser 0 o estar entre {MIN_SLOT_STEP_MIN} y {MAX_SLOT_STEP_MIN}"
+    )
+
+
+def slot_step(business_step: int | None, fallback: int) -> int:
+    """Paso entre inicios: el del negocio, si no SLOT_STEP_MIN, si no `fallback`."""
+    return business_step or SLOT_STEP_MIN or fallback
+
+
+def padded(start: datetime, end: datetime, before_min: int = 0, after_min: int = 0) -> tuple[datetime, datetime]:
+    """Lo que ocupa un booking en la agenda: [inicio - preparación, fin + limpieza)."""
+    return start - timedelta(minutes=before_min), end + timedelta(minutes=after_min)
+
+
+def as_utc(value: datetime) -> datetime:
+    """Aware para comparar en Python (SQLite devuelve naive: se guardó en UTC)."""
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+class Occupancy:
+    """
+    Intervalos ocupados [start, end) de un recurso en un día, fusionados y ordenados.
+    Se construye una vez por request y cada slot candidato se consulta en O(log n)
+    en vez de recorrer todos los bookings.
+    """
+
+    __slots__ = ("_starts", "_ends")
+
+    def __init__(self, intervals: Iterable[tuple[datetime, datetime]] = ()):
+        merged: list[list[datetime]] = []
+        for start, end in sorted(i for i in intervals if i[0] < i[1]):
+            if merged and start <= merged[-1][1]:
+                if end > merged[-1][1]:
+                    merged[-1][1] = end
+            else:
+                merged.append([start, end])
+
+        self._starts = [s for s, _ in merged]
+        self._ends = [e for _, e in merged]
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def intervals(self) -> list[tuple[datetime, datetime]]:
+        return list(zip(self._starts, self._ends))
+
+    def is_free(self, start: datetime, end: datetime) -> bool:
+        # último intervalo que empieza en o antes de `start`
+        i = bisect_right(self._starts, start) - 1
+        if i >= 0 and self._ends[i] > start:
+            return False
+        # siguiente intervalo: libre si empieza en o después de `end`
+        nxt = i + 1
+        return nxt >= len(self._starts) or self._starts[nxt] >= end
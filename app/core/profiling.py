@@ -0,0 +1,207 @@
+# app/core/profiling.py
+from __future__ import annotations
+
+import cProfile
+import functools
+import inspect
+import os
+import pstats
+import random
+import tempfile
+import threading
+from contextvars import ContextVar
+
+from app.core.security import decode_access_token
+
+# Perfilado bajo demanda de endpoints calientes (get_slots, beauty slots):
+# - header `X-Profile: 1` con token de super_admin, o
+# - muestreo aleatorio: PROFILE_SAMPLE_RATE (0.0 - 1.0, default 0 = apagado)
+# Con ambos apagados el costo es revisar un header y leer un contextvar.
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+
+if not 0.0 <= PROFILE_SAMPLE_RATE <= 1.0:
+    raise RuntimeError(f"PROFILE_SAMPLE_RATE invalido: {PROFILE_SAMPLE_RATE}. Debe estar entre 0 y 1")
+
+PROFILE_HEADER = b"x-profile"
+PROFILE_ROLES = ("super_admin",)
+
+_profiling_enabled: ContextVar[bool] = ContextVar("profiling_enabled", default=False)
+
+
+class ProfileStore:
+    """Perfiles acumulados en memoria por endpoint (por proceso)."""
+
+    def __init__(self):
+        self._stats: dict[str, pstats.Stats] = {}
+        self._samples: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, profile: cProfile.Profile) -> None:
+        with self._lock:
+            if name in self._stats:
+                self._stats[name].add(profile)
+            else:
+                self._stats[name] = pstats.Stats(profile)
+            self._samples[name] = self._samples.get(name, 0) + 1
+
+    def names(self) -> list[str]:
+        with self._lock:
+            return sorted(self._stats)
+
+    def summary(self) -> list[dict]:
+        with self._lock:
+            return [
+                {
+                    "name": name,
+                    "samples": self._samples[name],
+                    "total_seconds": round(stats.total_tt, 6),
+                }
+                for name, stats in sorted(self._stats.items())
+            ]
+
+    def pstats_bytes(self, name: str) -> bytes:
+        """Archivo binario de pstats (abrir con `python -m pstats` o snakeviz)."""
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                raise LookupError(name)
+            fd, path = tempfile.mkstemp(suffix=".pstats")
+            os.close(fd)
+            try:
+                stats.dump_stats(path)
+                with open(path, "rb") as fh:
+                    return fh.read()
+            finally:
+                os.unlink(path)
+
+    def collapsed(self, name: str) -> str:
+        """
+        Stacks en formato "collapsed" (flamegraph.pl / speedscope).
+        cProfile no guarda stacks completos: cada función se cuelga de su caller con
+        más tiempo acumulado, así que es una aproximación con peso = tottime en µs.
+        """
+        with self._lock:
+            stats = self._stats.get(name)
+            if stats is None:
+                raise LookupError(name)
+            raw = dict(stats.stats)
+
+        def label(func) -> str:
+            filename, line, fn_name = func
+            return f"{fn_name} ({os.path.basename(filename)}:{line})"
+
+        def main_caller(func):
+            callers = raw[func][4]
+            candidates = [c for c in callers if c in raw]
+            if not candidates:
+                return None
+            # callers[c] = (cc, nc, tt, ct): se elige el de mayor tiempo acumulado
+            return max(candidates, key=lambda c: callers[c][3])
+
+        lines: list[str] = []
+        for func, (_cc, _nc, tottime, _ct, _callers) in raw.items():
+            weight = int(tottime * 1_000_000)
+            if weight <= 0:
+                continue
+            stack = [label(func)]
+            seen = {func}
+            cur = main_caller(func)
+            while cur is not None and cur not in seen:
+                stack.append(label(cur))
+                seen.add(cur)
+                cur = main_caller(cur)
+            lines.append(f"{';'.join(reversed(stack))} {weight}")
+        return "\n".join(sorted(lines)) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+            self._samples.clear()
+
+
+PROFILE_STORE = ProfileStore()
+
+
+def profiling_enabled() -> bool:
+    return _profiling_enabled.get()
+
+
+def profiled(name: str | None = None):
+    """
+    Decorador para endpoints sync: si el request actual está marcado para perfilar,
+    corre el endpoint bajo cProfile (en el hilo del threadpool) y acumula el perfil.
+    """
+
+    def decorator(fn):
+        profile_name = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _profiling_enabled.get():
+                return fn(*args, **kwargs)
+
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Python 3.12+: solo un profiler activo a la vez por proceso
+                return fn(*args, **kwargs)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                profile.disable()
+                PROFILE_STORE.add(profile_name, profile)
+
+        # FastAPI resuelve las anotaciones con los globals del wrapper (este módulo);
+        # con `from __future__ import annotations` en la ruta quedarían strings sin resolver
+        wrapper.__signature__ = inspect.signature(fn, eval_str=True)
+        return wrapper
+
+    return decorator
+
+
+def _header(scope, name: bytes) -> bytes | None:
+    for key, value in scope.get("headers", []):
+        if key == name:
+            return value
+    return None
+
+
+def _is_profile_admin(scope) -> bool:
+    auth = _header(scope, b"authorization")
+    if not auth or not auth.lower().startswith(b"bearer "):
+        return False
+    try:
+        payload = decode_access_token(auth[7:].decode("latin-1"))
+    except ValueError:
+        return False
+    return payload.get("role") in PROFILE_ROLES
+
+
+class ProfilingMiddleware:
+    """Marca el request para perfilar (header de admin o muestreo) vía contextvar."""
+
+    def __init__(self, app, sample_rate: float = PROFILE_SAMPLE_RATE):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        enabled = False
+        if _header(scope, PROFILE_HEADER) in (b"1", b"true"):
+            enabled = _is_profile_admin(scope)
+        elif self.sample_rate > 0.0:
+            enabled = random.random() < self.sample_rate
+
+        if not enabled:
+            await self.app(scope, receive, send)
+            return
+
+        token = _profiling_enabled.set(True)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _profiling_enabled.reset(token)
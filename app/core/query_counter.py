@@ -0,0 +1,263 @@
+# app/core/query_counter.py
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from sqlalchemy import event
+from sqlalchemy.engine import CursorResult, Engine
+from sqlalchemy.orm import ORMExecuteState, Session
+
+logger = logging.getLogger("app.db.queries")
+
+# a partir de cuántas repeticiones de la misma "forma" de SQL se marca como N+1
+QUERY_REPEAT_THRESHOLD = int(os.getenv("QUERY_REPEAT_THRESHOLD", "5"))
+
+# cuántos statements se guardan por request para diagnóstico
+MAX_RECORDED_STATEMENTS = 200
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_NUMBER_RE = re.compile(r"\b\d+\b")
+_IN_LIST_RE = re.compile(r"\bIN\s*\((?:[^()]*)\)", re.IGNORECASE)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+
+
+def statement_shape(statement: str) -> str:
+    """Normaliza un SQL para agrupar statements iguales que solo cambian en literales."""
+    shape = _STRING_RE.sub("?", statement)
+    shape = _IN_LIST_RE.sub("IN (?)", shape)
+    shape = _NUMBER_RE.sub("?", shape)
+    return _WHITESPACE_RE.sub(" ", shape).strip()
+
+
+class QueryStats:
+    __slots__ = ("count", "duration", "shapes", "statements", "rows", "_lock")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.shapes: Counter[str] = Counter()
+        self.statements: list[str] = []
+        # filas traídas por session.execute (ORM o Core, lazy loads incluidos), ver install_row_counter
+        self.rows = 0
+        self._lock = threading.Lock()
+
+    def record(self, statement: str, elapsed: float) -> None:
+        shape = statement_shape(statement)
+        with self._lock:
+            self.count += 1
+            self.duration += elapsed
+            self.shapes[shape] += 1
+            if len(self.statements) < MAX_RECORDED_STATEMENTS:
+                self.statements.append(statement)
+
+    def record_rows(self, n: int = 1) -> None:
+        with self._lock:
+            self.rows += n
+
+    def merge(self, other: "QueryStats") -> None:
+        with self._lock:
+            self.count += other.count
+            self.duration += other.duration
+            self.shapes.update(other.shapes)
+            room = MAX_RECORDED_STATEMENTS - len(self.statements)
+            if room > 0:
+                self.statements.extend(other.statements[:room])
+            self.rows += other.rows
+
+    def repeated_shapes(self, threshold: int = QUERY_REPEAT_THRESHOLD) -> list[tuple[str, int]]:
+        return [(shape, n) for shape, n in self.shapes.most_common() if n >= threshold]
+
+    def describe(self) -> str:
+        lines = [f"{self.count} statements, {self.rows} rows, {self.duration * 1000:.2f} ms"]
+        for i, statement in enumerate(self.statements, 1):
+            lines.append(f"  {i}. {_WHITESPACE_RE.sub(' ', statement).strip()}")
+        for shape, n in self.repeated_shapes():
+            lines.append(f"  repeated x{n}: {shape}")
+        return "\n".join(lines)
+
+
+_current_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+# colectores activos (count_queries) que reciben las stats de cada request terminado;
+# TestClient corre la app en otro hilo y el contextvar no siempre se propaga
+_active_collectors: list[QueryStats] = []
+_collectors_lock = threading.Lock()
+
+
+def current_stats() -> QueryStats | None:
+    return _current_stats.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_start_time"].pop()
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+def _handle_error(context) -> None:
+    # un statement que falla (ej. IntegrityError) no pasa por after_cursor_execute
+    conn = context.connection
+    if conn is None or not conn.info.get("query_start_time"):
+        return
+    started = conn.info["query_start_time"].pop()
+    stats = _current_stats.get()
+    if stats is not None and context.statement:
+        stats.record(context.statement, time.perf_counter() - started)
+
+
+def install_query_counter(engine: Engine) -> None:
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+
+def _count_fetched_rows(state: ORMExecuteState):
+    stats = _current_stats.get()
+    # yield_per / stream_results: el feed va por lotes y contarlo obligaría a bufferizar
+    options = state.execution_options
+    if stats is None or options.get("yield_per") or options.get("stream_results"):
+        return None
+
+    result = state.invoke_statement()
+    if isinstance(result, CursorResult) and not result.returns_rows:
+        return result
+    # se traen las filas aquí (igual las iba a leer quien llamó) y se devuelve una copia
+    frozen = result.freeze()
+    stats.record_rows(len(frozen.data))
+    return frozen()
+
+
+def install_row_counter() -> None:
+    """
+    Cuenta las filas que devuelve cada session.execute: selects ORM y Core, RETURNING,
+    get/refresh y lazy/selectin loads. Las filas de joins cuentan aunque den una instancia.
+    """
+    if not event.contains(Session, "do_orm_execute", _count_fetched_rows):
+        event.listen(Session, "do_orm_execute", _count_fetched_rows)
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryStats]:
+    """Cuenta statements ejecutados dentro del bloque (incluye requests de TestClient)."""
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    with _collectors_lock:
+        _active_collectors.append(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+        with _collectors_lock:
+            _active_collectors.remove(stats)
+
+
+@contextmanager
+def assert_max_queries(limit: int, max_rows: int | None = None) -> Iterator[QueryStats]:
+    """
+    Helper de tests para declarar el presupuesto de queries (y filas traídas) de un endpoint:
+
+        with assert_max_queries(3, max_rows=10):
+            client.get("/api/staff")
+    """
+    with count_queries() as stats:
+        yield stats
+
+    if stats.count > limit:
+        raise AssertionError(f"Expected at most {limit} statements, got {stats.describe()}")
+
+    if max_rows is not None and stats.rows > max_rows:
+        raise AssertionError(f"Expected at most {max_rows} rows, got {stats.describe()}")
+
+
+class QueryCounterMiddleware:
+    """
+    Middleware ASGI: cuenta statements y tiempo de DB por request, los expone en
+    `Server-Timing` y en un log estructurado, y avisa si una misma forma de SQL se
+    repite más de QUERY_REPEAT_THRESHOLD veces (patrón N+1).
+    """
+
+    def __init__(self, app, threshold: int = QUERY_REPEAT_THRESHOLD):
+        self.app = app
+        self.threshold = threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                total_ms = (time.perf_counter() - started) * 1000
+                timing = (
+                    f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries, {stats.rows} rows", '
+                    f"app;dur={total_ms:.2f}"
+                )
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timing.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_stats.reset(token)
+            self._report(scope, stats, status_code, time.perf_counter() - started)
+
+    def _report(self, scope, stats: QueryStats, status_code: int, elapsed: float) -> None:
+        with _collectors_lock:
+            collectors = list(_active_collectors)
+        for collector in collectors:
+            collector.merge(stats)
+
+        route = scope.get("route")
+        path = getattr(route, "path", scope.get("path"))
+
+        logger.info(
+            json.dumps(
+                {
+                    "event": "request_queries",
+                    "method": scope.get("method"),
+                    "route": path,
+                    "status": status_code,
+                    "queries": stats.count,
+                    "rows": stats.rows,
+                    "db_ms": round(stats.duration * 1000, 2),
+                    "total_ms": round(elapsed * 1000, 2),
+                }
+            )
+        )
+
+        for shape, n in stats.repeated_shapes(self.threshold):
+            logger.warning(
+                json.dumps(
+                    {
+                        "event": "repeated_query",
+                        "method": scope.get("method"),
+                        "route": path,
+                        "count": n,
+                        "statement": shape,
+                    }
+                )
+            )
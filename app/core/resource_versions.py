@@ -0,0 +1,300 @@
+# app/core/resource_versions.py
+"""
+Contadores de versión por recurso/tenant (tabla resource_versions) para ETags baratos.
+
+Cada flush que toca un modelo versionado incrementa sus claves en la misma transacción,
+así que la versión cambia exactamente cuando cambia lo que lee el endpoint, sin hashear
+el cuerpo de la respuesta. Las escrituras con Core/SQL crudo no pasan por aquí: quien
+las haga debe llamar a bump() (o bump_global() para invalidar todo).
+
+Claves:
+    ("services", service_id)    servicio de barbería (el catálogo se lee con ANY_SCOPE)
+    ("barber", barber_id)       barbero, sus servicios asignados, reglas y bookings
+    ("beauty_services", biz)    catálogo de servicios de belleza del negocio
+    ("staff", biz)              staff del negocio
+    ("staff_services", biz)     asignaciones staff <-> servicio de belleza del negocio
+    ("staff_schedule", biz)     reglas de horario del staff del negocio
+    ("staff_bookings", staff)   beauty bookings de un staff (slots y feed de calendario)
+    ("exceptions", biz)         excepciones de disponibilidad del negocio
+    ("business", biz)           datos del negocio (timezone)
+    ("global", 0)               época global; entra en todos los ETags
+
+Las escrituras frecuentes (bookings) solo tocan la fila de su barbero/staff: dos reservas
+de staff distintos del mismo negocio no se serializan en el upsert de la misma fila. Los
+lectores que dependen de varios recursos piden un conjunto de scopes (subquery o lista)
+y reciben la suma de sus versiones.
+"""
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import Collection, Iterable, NamedTuple, Union
+
+from sqlalchemy import Select, and_, event, inspect, or_, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.core.availability_events import pending_changes
+from app.models.availability_exception import AvailabilityException
+from app.models.barber import Barber
+from app.models.barber_availability_rule import BarberAvailabilityRule
+from app.models.beauty_booking import BeautyBooking
+from app.models.beauty_service import BeautyService
+from app.models.booking import Booking
+from app.models.business import Business
+from app.models.resource_version import ResourceVersion
+from app.models.service import Service
+from app.models.staff import Staff
+from app.models.staff_availability_rule import StaffAvailabilityRule
+from app.models.staff_service import StaffService
+
+GLOBAL = ("global", 0)
+
+# claves ya incrementadas en la transacción en curso (para no repetirlas en before_commit)
+_SESSION_KEY = "resource_versions_bumped"
+_STAFF_CACHE_KEY = "resource_versions_staff_business"
+_BARBER_CACHE_KEY = "resource_versions_barber_business"
+_TIMEZONE_CACHE_KEY = "resource_versions_business_timezone"
+
+# todas las filas del recurso (ej. el catálogo completo de servicios)
+ANY_SCOPE = "*"
+
+# el scope puede ser un id, un scalar_subquery (ej. business_id de un barbero), un
+# conjunto de ids / un select de ids (ej. staff que ofrece un servicio) o ANY_SCOPE
+Scope = Union[int, ColumnElement, Select, Collection[int], str]
+
+
+class VersionKey(NamedTuple):
+    resource: str
+    scope: Scope
+
+
+class Versions(NamedTuple):
+    values: tuple[int, ...]          # en el orden de las claves pedidas (+ global al final);
+                                     # un scope con varias filas vale la suma de sus versiones
+    updated_at: datetime | None      # el más reciente; None si ninguna clave se ha escrito
+    by_resource: dict[str, int]      # mismas versiones indexadas por resource
+
+
+def _values(obj, attr: str) -> set:
+    """Valor actual y anterior (si cambió en este flush) de una columna."""
+    history = inspect(obj).attrs[attr].history
+    values = set(history.added) | set(history.unchanged) | set(history.deleted)
+    if not values:
+        values = {getattr(obj, attr)}
+    return {v for v in values if v is not None}
+
+
+def _business_of(session: Session, model, obj_id: int, cache_key: str) -> int | None:
+    cache = session.info.setdefault(cache_key, {})
+    if obj_id not in cache:
+        # casi siempre está en el identity map; si no, solo las columnas (sin los selectin del
+        # modelo) y de paso la timezone del negocio, que pide business_timezone
+        obj = session.identity_map.get(identity_key(model, obj_id))
+        if obj is not None:
+            cache[obj_id] = obj.business_id
+        else:
+            row = session.execute(
+                select(model.business_id, Business.timezone)
+                .outerjoin(Business, Business.id == model.business_id)
+                .where(model.id == obj_id)
+            ).first()
+            cache[obj_id] = row.business_id if row else None
+            if row is not None and row.business_id is not None:
+                session.info.setdefault(_TIMEZONE_CACHE_KEY, {})[row.business_id] = row.timezone
+    return cache[obj_id]
+
+
+def staff_business(session: Session, staff_id: int) -> int | None:
+    """business_id de un staff, cacheado por transacción."""
+    return _business_of(session, Staff, staff_id, _STAFF_CACHE_KEY)
+
+
+def barber_business(session: Session, barber_id: int) -> int | None:
+    """business_id de un barbero, cacheado por transacción."""
+    return _business_of(session, Barber, barber_id, _BARBER_CACHE_KEY)
+
+
+def business_timezone(session: Session, resource: str, resource_id: int) -> str | None:
+    """Timezone del negocio de un barbero/staff/negocio, cacheado por transacción."""
+    if resource == "barber":
+        business_id = barber_business(session, resource_id)
+    elif resource == "staff":
+        business_id = staff_business(session, resource_id)
+    else:
+        business_id = resource_id
+    if business_id is None:
+        return None
+
+    cache = session.info.setdefault(_TIMEZONE_CACHE_KEY, {})
+    if business_id not in cache:
+        business = session.identity_map.get(identity_key(Business, business_id))
+        if business is not None:
+            cache[business_id] = business.timezone
+        else:
+            cache[business_id] = session.execute(
+                select(Business.timezone).where(Business.id == business_id)
+            ).scalar()
+    return cache[business_id]
+
+
+def keys_for(session: Session, obj) -> set[tuple[str, int]]:
+    if isinstance(obj, Service):
+        return {("services", obj.id)}
+    if isinstance(obj, Barber):
+        return {("barber", obj.id)}
+    if isinstance(obj, (BarberAvailabilityRule, Booking)):
+        return {("barber", barber_id) for barber_id in _values(obj, "barber_id")}
+    if isinstance(obj, BeautyService):
+        return {("beauty_services", biz) for biz in _values(obj, "business_id")}
+    if isinstance(obj, Staff):
+        return {("staff", biz) for biz in _values(obj, "business_id")}
+    if isinstance(obj, BeautyBooking):
+        # por staff: no serializa las reservas de todo el negocio en una sola fila
+        return {("staff_bookings", staff_id) for staff_id in _values(obj, "staff_id")}
+    if isinstance(obj, (StaffService, StaffAvailabilityRule)):
+        resource = "staff_services" if isinstance(obj, StaffService) else "staff_schedule"
+        businesses = {staff_business(session, staff_id) for staff_id in _values(obj, "staff_id")}
+        return {(resource, biz) for biz in businesses if biz is not None}
+    if isinstance(obj, AvailabilityException):
+        return {("exceptions", biz) for biz in _values(obj, "business_id")}
+    if isinstance(obj, Business):
+        return {("business", obj.id)}
+    return set()
+
+
+def bump(connection, keys: Iterable[tuple[str, int]]) -> None:
+    """Incrementa (o crea en 1) las versiones de `keys`, en un solo statement."""
+    keys = sorted(set(keys))  # orden fijo: dos transacciones no se bloquean cruzado
+    if not keys:
+        return
+
+    table = ResourceVersion.__table__
+    now = datetime.now(timezone.utc)
+    dialect = connection.dialect.name
+
+    if dialect in ("postgresql", "sqlite"):
+        insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = insert(table).values(
+            [{"resource": r, "scope_id": s, "version": 1, "updated_at": now} for r, s in keys]
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.resource, table.c.scope_id],
+            set_={"version": table.c.version + 1, "updated_at": now},
+        )
+        connection.execute(stmt)
+        return
+
+    # otros motores: update y, si no existía, insert
+    for resource, scope_id in keys:
+        result = connection.execute(
+            update(table)
+            .where(table.c.resource == resource, table.c.scope_id == scope_id)
+            .values(version=table.c.version + 1, updated_at=now)
+        )
+        if result.rowcount == 0:
+            connection.execute(
+                table.insert().values(resource=resource, scope_id=scope_id, version=1, updated_at=now)
+            )
+
+
+def bump_global(connection) -> None:
+    """Invalida todos los ETags (ej. después de cargar datos con SQL crudo)."""
+    bump(connection, [GLOBAL])
+
+
+def _scope_filter(key: VersionKey):
+    if isinstance(key.scope, str) and key.scope == ANY_SCOPE:
+        return ResourceVersion.resource == key.resource
+    if isinstance(key.scope, Select):
+        scope = ResourceVersion.scope_id.in_(key.scope)
+    elif isinstance(key.scope, (list, tuple, set, frozenset)):
+        scope = ResourceVersion.scope_id.in_(sorted(key.scope))
+    else:
+        scope = ResourceVersion.scope_id == key.scope
+    return and_(ResourceVersion.resource == key.resource, scope)
+
+
+def read_versions(db: Session, keys: Iterable[VersionKey]) -> Versions:
+    """
+    Versiones actuales de `keys` + la global, en una sola consulta. Claves sin fila valen 0.
+    Cada resource puede aparecer una sola vez (el scope puede ser un subquery y no se
+    conoce hasta leer la fila); si el scope abarca varias filas se suman sus versiones,
+    que solo crecen, así que la suma cambia con cualquier escritura del conjunto.
+    """
+    keys = list(keys) + [VersionKey(*GLOBAL)]
+    if len({k.resource for k in keys}) != len(keys):
+        raise ValueError("read_versions: resource repetido en las claves")
+    rows = db.execute(
+        select(ResourceVersion.resource, ResourceVersion.version, ResourceVersion.updated_at).where(
+            or_(*(_scope_filter(k) for k in keys))
+        )
+    ).all()
+
+    found: dict[str, int] = {}
+    for row in rows:
+        found[row.resource] = found.get(row.resource, 0) + row.version
+    values = tuple(found.get(k.resource, 0) for k in keys)
+    updated = [row.updated_at for row in rows]
+    return Versions(values, max(updated) if updated else None, {k.resource: v for k, v in zip(keys, values)})
+
+
+def bumped_keys(session: Session) -> set[tuple[str, int]]:
+    """Claves ya incrementadas en la transacción en curso."""
+    return set(session.info.get(_SESSION_KEY, ()))
+
+
+def _bump_once(session: Session, keys: set[tuple[str, int]]) -> None:
+    done = session.info.setdefault(_SESSION_KEY, set())
+    keys = keys - done
+    if keys:
+        bump(session.connection(), keys)
+        done |= keys
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_after_flush(session: Session, flush_context) -> None:
+    keys: set[tuple[str, int]] = set()
+    for obj in session.new:
+        keys |= keys_for(session, obj)
+    for obj in session.dirty:
+        if session.is_modified(obj):
+            keys |= keys_for(session, obj)
+    for obj in session.deleted:
+        keys |= keys_for(session, obj)
+    _bump_once(session, keys)
+
+
+def bump_pending_changes(session: Session) -> None:
+    """
+    Incrementa las claves de los cambios anotados con availability_events.record_change.
+    Corre en before_commit; se puede llamar antes (ej. quien necesita bumped_keys completo
+    en su propio before_commit): lo ya incrementado no se repite.
+    """
+    # reschedule/bulk-cancel escriben con update() de Core: no pasan por el flush, pero
+    # sí anotan el cambio con availability_events.record_change
+    keys: set[tuple[str, int]] = set()
+    for change in pending_changes(session):
+        if change.resource == "barber":
+            keys.add(("barber", change.resource_id))
+        elif change.resource == "staff" and change.reason.startswith("booking_"):
+            # reglas y excepciones pasan por el flush con sus propias claves
+            keys.add(("staff_bookings", change.resource_id))
+        elif change.resource == "business":
+            keys.add(("exceptions", change.resource_id))
+    _bump_once(session, keys)
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_availability_changes(session: Session) -> None:
+    bump_pending_changes(session)
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _reset_bumped(session: Session) -> None:
+    session.info.pop(_SESSION_KEY, None)
+    session.info.pop(_STAFF_CACHE_KEY, None)
+    session.info.pop(_BARBER_CACHE_KEY, None)
+    session.info.pop(_TIMEZONE_CACHE_KEY, None)
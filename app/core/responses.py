@@ -0,0 +1,50 @@
+# app/core/responses.py
+from __future__ import annotations
+
+import os
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any
+
+import orjson
+from fastapi.responses import ORJSONResponse
+from pydantic import TypeAdapter
+
+# Valida los payloads armados a mano contra su schema antes de responder.
+# Apagado en producción (es justo el costo que se quiere evitar); los tests lo prenden
+# para detectar cuando un builder de dicts y su schema se desalinean.
+RESPONSE_VALIDATION = os.getenv("RESPONSE_VALIDATION", "0") == "1"
+
+
+def _default(obj: Any):
+    # Numeric de SQLAlchemy llega como Decimal; la API siempre lo expuso como número
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+class AppJSONResponse(ORJSONResponse):
+    """
+    Respuesta JSON con orjson. OPT_UTC_Z mantiene el formato de Pydantic para
+    datetimes UTC ("...Z") y así el cambio de encoder no altera las respuestas.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_UTC_Z)
+
+
+@lru_cache(maxsize=None)
+def type_adapter(tp: Any) -> TypeAdapter:
+    """TypeAdapter cacheado por tipo (construirlo es caro; reusarlo es barato)."""
+    return TypeAdapter(tp)
+
+
+def fast_response(content: Any, response_type: Any = None, status_code: int = 200) -> AppJSONResponse:
+    """
+    Responde un payload de dicts/listas sin pasar por la validación de response_model
+    de FastAPI. `response_type` es el schema declarado en la ruta (se valida solo con
+    RESPONSE_VALIDATION=1).
+    """
+    if RESPONSE_VALIDATION and response_type is not None:
+        type_adapter(response_type).validate_python(content)
+    return AppJSONResponse(content=content, status_code=status_code)
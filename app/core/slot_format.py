@@ -0,0 +1,122 @@
+# app/core/slot_format.py
+"""
+Formato compacto de los endpoints de slots.
+
+El JSON de siempre repite cada "HH:MM" en `slots`/`unavailable_slots` de cada ventana
+(y otra vez en el `slots` plano). El compacto manda cada ventana como:
+
+    {"start": 540, "end": 780, "offset": 0, "step": 30, "count": 8, "mask": "3w=="}
+
+- start/end: minutos desde medianoche (hora local del negocio)
+- offset: minutos de start al primer slot (preparación del servicio; 0 sin buffers)
+- step: minutos entre el inicio de un slot y el siguiente
+- count: cantidad de slots de la ventana; el slot i empieza en start + offset + i * step
+- mask: bitmap en base64, bit i = slot i disponible (LSB primero dentro de cada byte)
+
+Se pide con ?format=compact (JSON) o ?format=msgpack / Accept: application/x-msgpack
+(requiere el paquete msgpack). Sin nada de eso la respuesta es la de siempre.
+"""
+from __future__ import annotations
+
+import base64
+from typing import Any, Callable
+
+from fastapi import HTTPException, Request
+from fastapi.responses import Response
+
+from app.core.responses import RESPONSE_VALIDATION, AppJSONResponse, fast_response, type_adapter
+
+try:
+    import msgpack
+except ImportError:  # opcional: sin msgpack solo queda el compacto en JSON
+    msgpack = None
+
+MSGPACK_MEDIA_TYPE = "application/x-msgpack"
+
+FULL = "json"
+COMPACT = "compact"
+MSGPACK = "msgpack"
+
+# para el Query(...) de las rutas
+FORMAT_PATTERN = f"^({FULL}|{COMPACT}|{MSGPACK})$"
+
+
+class MsgpackResponse(Response):
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return msgpack.packb(content, use_bin_type=True)
+
+
+def negotiate(request: Request, requested: str) -> str:
+    """
+    Decide el formato: el query param manda; si no viene, Accept puede pedir msgpack.
+    ?format=msgpack sin la librería instalada es un 406; por Accept simplemente se
+    cae al JSON de siempre (Accept es una preferencia, no una exigencia).
+    """
+    if requested == MSGPACK:
+        if msgpack is None:
+            raise HTTPException(status_code=406, detail="msgpack format is not available")
+        return MSGPACK
+    if requested == COMPACT:
+        return COMPACT
+    if msgpack is not None and MSGPACK_MEDIA_TYPE in request.headers.get("accept", ""):
+        return MSGPACK
+    return FULL
+
+
+def _minutes(hhmm: str) -> int:
+    return int(hhmm[:2]) * 60 + int(hhmm[3:5])
+
+
+def encode_mask(available: list[bool]) -> str:
+    buf = bytearray((len(available) + 7) // 8)
+    for i, ok in enumerate(available):
+        if ok:
+            buf[i >> 3] |= 1 << (i & 7)
+    return base64.b64encode(bytes(buf)).decode("ascii")
+
+
+def decode_mask(mask: str, count: int) -> list[bool]:
+    buf = base64.b64decode(mask)
+    return [bool(buf[i >> 3] >> (i & 7) & 1) for i in range(count)]
+
+
+def compact_window(start_time: str, end_time: str, step: int, slots: list[str], unavailable_slots: list[str]) -> dict:
+    """Ventana del formato completo ("HH:MM" + listas) -> start/end/step/count/mask."""
+    start = _minutes(start_time)
+    # las dos listas vienen ordenadas: el primer slot es el menor de sus primeros
+    first = min(slots[:1] + unavailable_slots[:1], default=start_time)
+    offset = _minutes(first) - start
+    count = len(slots) + len(unavailable_slots)
+    available = [False] * count
+    for s in slots:
+        available[(_minutes(s) - start - offset) // step] = True
+    return {
+        "start": start,
+        "end": _minutes(end_time),
+        "offset": offset,
+        "step": step,
+        "count": count,
+        "mask": encode_mask(available),
+    }
+
+
+def slots_response(
+    payload: dict,
+    slot_format: str,
+    response_type: Any,
+    to_compact: Callable[[dict], dict],
+    compact_type: Any,
+) -> Response:
+    """Respuesta en el formato negociado; `to_compact` convierte el payload completo."""
+    if slot_format == FULL:
+        response = fast_response(payload, response_type)
+    else:
+        compact = to_compact(payload)
+        if RESPONSE_VALIDATION:
+            type_adapter(compact_type).validate_python(compact)
+        response = MsgpackResponse(compact) if slot_format == MSGPACK else AppJSONResponse(compact)
+    # el cuerpo depende de Accept: los caches no deben mezclar formatos
+    response.headers["Vary"] = "Accept"
+    return response
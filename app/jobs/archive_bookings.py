@@ -0,0 +1,55 @@
+# Job de archivado de bookings cancelados/viejos.
+# Uso: python -m app.jobs.archive_bookings --table all --retention-days 180 --batch-size 500 --sleep 0.2
+from __future__ import annotations
+
+import argparse
+
+from app.db.session import SessionLocal
+from app.services.archive_service import (
+    ARCHIVE_SPECS,
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_RETENTION_DAYS,
+    DEFAULT_SYNC_RETENTION_DAYS,
+    run_archive_job,
+)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Archiva bookings cancelados o fuera de retención")
+    parser.add_argument("--table", choices=[*ARCHIVE_SPECS.keys(), "all"], default="all")
+    parser.add_argument("--retention-days", type=int, default=DEFAULT_RETENTION_DAYS)
+    parser.add_argument(
+        "--sync-retention-days",
+        type=int,
+        default=DEFAULT_SYNC_RETENTION_DAYS,
+        help="días que una fila cambiada (ej. cancelada) espera para que el feed de sincronización la entregue",
+    )
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--sleep", type=float, default=0.1, help="segundos entre lotes (throttling)")
+    parser.add_argument("--max-batches", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    job_names = list(ARCHIVE_SPECS.keys()) if args.table == "all" else [args.table]
+
+    db = SessionLocal()
+    try:
+        for job_name in job_names:
+            result = run_archive_job(
+                db,
+                job_name,
+                retention_days=args.retention_days,
+                sync_retention_days=args.sync_retention_days,
+                batch_size=args.batch_size,
+                sleep_seconds=args.sleep,
+                max_batches=args.max_batches,
+            )
+            print(
+                f"{result.job_name}: moved={result.rows_moved} batches={result.batches} "
+                f"pass_completed={result.pass_completed}"
+            )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+# Limpieza de Idempotency-Keys expiradas (TTL).
+# Uso: python -m app.jobs.purge_idempotency_keys
+from __future__ import annotations
+
+import argparse
+
+from app.db.session import SessionLocal
+from app.services.idempotency_service import purge_expired_idempotency_keys
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Borra Idempotency-Keys expiradas")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    db = SessionLocal()
+    try:
+        deleted = purge_expired_idempotency_keys(db, batch_size=args.batch_size)
+        print(f"idempotency_keys: deleted={deleted}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,18 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
+from app.core.compression import CompressionMiddleware
+from app.core.invalidation import start_listener
+from app.core.instrumentation import PrometheusMiddleware, install_pool_metrics
+from app.core.profiling import ProfilingMiddleware
+from app.core.query_counter import QueryCounterMiddleware, install_query_counter, install_row_counter
+from app.core.responses import AppJSONResponse
+from app.db.session import engine
+
 from app.api.routes.health import router as health_router
 from app.api.routes.barbers import router as barbers_router
+from app.api.routes.business import router as business_router
 from app.api.routes.services import router as services_router
 from app.api.routes.availability_rules import router as availability_rules_router
 from app.api.routes.booking import router as booking_router
@@ -11,17 +22,56 @@ from app.api.routes.staff_services import router as staff_services_router
 from app.api.routes.staff_availability_rules import router as staff_availability_router
 from app.api.routes.beauty_slots import router as beauty_slots_router
 from app.api.routes.beauty_bookings import router as beauty_bookings_router
+from app.api.routes.beauty_itineraries import router as beauty_itineraries_router
 from app.api.routes.auth import router as auth_router
+from app.api.routes.reports import router as reports_router
+from app.api.routes.metrics import router as metrics_router, prometheus_router
+from app.api.routes.availability_exceptions import router as availability_exceptions_router
+from app.api.routes.availability_stream import router as availability_stream_router
+from app.api.routes.calendar_feed import router as calendar_feed_router
+from app.api.routes.profiling import router as profiling_router
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # invalidación de cachés entre workers (LISTEN/NOTIFY); no-op fuera de Postgres
+    listener = start_listener(engine)
+    try:
+        yield
+    finally:
+        if listener is not None:
+            listener.stop()
+
+
+app = FastAPI(title="BeautyBarber API", default_response_class=AppJSONResponse, lifespan=lifespan)
+
+# compresión brotli/gzip (la más interna: las métricas HTTP ven bytes y tiempo reales)
+app.add_middleware(CompressionMiddleware)
+
+# conteo de queries por request (Server-Timing + logs + aviso de N+1)
+install_query_counter(engine)
+install_row_counter()
+app.add_middleware(QueryCounterMiddleware)
+
+# métricas Prometheus por template de ruta + estado del pool de conexiones
+install_pool_metrics(engine)
+app.add_middleware(PrometheusMiddleware)
 
-app = FastAPI(title="BeautyBarber API")
+# perfilado opt-in (X-Profile de super_admin o PROFILE_SAMPLE_RATE)
+app.add_middleware(ProfilingMiddleware)
 
 # Health / utilidades
 app.include_router(health_router, prefix="/api", tags=["health"])
+app.include_router(metrics_router, prefix="/api", tags=["metrics"])
+app.include_router(prometheus_router)
 
 # Recursos principales
+app.include_router(business_router, prefix="/api", tags=["business"])
 app.include_router(barbers_router, prefix="/api/barbers", tags=["barbers"])
 app.include_router(services_router, prefix="/api/services", tags=["services"])
 app.include_router(availability_rules_router, prefix="/api", tags=["availability"])
+app.include_router(availability_exceptions_router, prefix="/api", tags=["availability exceptions"])
+app.include_router(availability_stream_router, prefix="/api", tags=["availability stream"])
 app.include_router(booking_router, prefix="/api", tags=["bookings"])
 app.include_router(staff_router, prefix="/api", tags=["staff"])
 app.include_router(beauty_services_router, prefix="/api", tags=["beauty_services"])
@@ -29,4 +79,8 @@ app.include_router(staff_services_router, prefix="/api", tags=["staff_services"]
 app.include_router(staff_availability_router, prefix="/api", tags=["staff availability"])
 app.include_router(beauty_slots_router, prefix="/api", tags=["beauty_slots"])
 app.include_router(beauty_bookings_router, prefix="/api", tags=["beauty_bookings"])
-app.include_router(auth_router, prefix="/api", tags=["auth"])
\ No newline at end of file
+app.include_router(beauty_itineraries_router, prefix="/api", tags=["beauty_itineraries"])
+app.include_router(calendar_feed_router, prefix="/api", tags=["calendar feed"])
+app.include_router(auth_router, prefix="/api", tags=["auth"])
+app.include_router(reports_router, prefix="/api", tags=["reports"])
+app.include_router(profiling_router, prefix="/api", tags=["profiling"])
\ No newline at end of file
@@ -9,4 +9,10 @@ from app.models.beauty_service import BeautyService
 from app.models.staff_service import StaffService
 from app.models.staff_availability_rule import StaffAvailabilityRule
 from app.models.beauty_booking import BeautyBooking
-from app.models.user import User
\ No newline at end of file
+from app.models.user import User
+from app.models.booking_archive import BookingArchive
+from app.models.beauty_booking_archive import BeautyBookingArchive
+from app.models.archive_checkpoint import ArchiveCheckpoint
+from app.models.idempotency_key import IdempotencyKey
+from app.models.availability_exception import AvailabilityException
+from app.models.resource_version import ResourceVersion
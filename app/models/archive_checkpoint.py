@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from datetime import datetime
+from sqlalchemy import BigInteger, Integer, String, DateTime, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+# Progreso del job de archivado (uno por tabla), permite reanudar si el proceso muere
+class ArchiveCheckpoint(Base):
+    __tablename__ = "archive_checkpoints"
+
+    job_name: Mapped[str] = mapped_column(String(50), primary_key=True)
+
+    # último id procesado en la pasada actual (0 = pasada nueva)
+    last_id: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    rows_moved: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        onupdate=func.now(),
+        nullable=False,
+    )
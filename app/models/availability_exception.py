@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from datetime import datetime, date, time
+from sqlalchemy import Integer, String, Date, Time, DateTime, ForeignKey, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+# Excepciones a las reglas semanales (feriados, vacaciones, bloqueos parciales).
+# - barber_id y staff_id en NULL -> aplica a todo el negocio
+# - start_time/end_time en NULL -> día completo
+# - start_time/end_time (hora local del negocio) se aplican a cada día de [start_date, end_date]
+class AvailabilityException(Base):
+    __tablename__ = "availability_exceptions"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+
+    business_id: Mapped[int] = mapped_column(
+        ForeignKey("businesses.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+
+    barber_id: Mapped[int | None] = mapped_column(
+        ForeignKey("barbers.id", ondelete="CASCADE"),
+        nullable=True,
+        index=True,
+    )
+
+    staff_id: Mapped[int | None] = mapped_column(
+        ForeignKey("staff.id", ondelete="CASCADE"),
+        nullable=True,
+        index=True,
+    )
+
+    # rango inclusivo
+    start_date: Mapped[date] = mapped_column(Date, nullable=False)
+    end_date: Mapped[date] = mapped_column(Date, nullable=False)
+
+    start_time: Mapped[time | None] = mapped_column(Time, nullable=True)
+    end_time: Mapped[time | None] = mapped_column(Time, nullable=True)
+
+    reason: Mapped[str | None] = mapped_column(String(120), nullable=True)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+    @property
+    def is_full_day(self) -> bool:
+        return self.start_time is None or self.end_time is None
+
+    @property
+    def is_business_wide(self) -> bool:
+        return self.barber_id is None and self.staff_id is None
+
+
+# búsqueda por fecha: business_id = ? AND start_date <= d AND end_date >= d
+Index(
+    "ix_availability_exceptions_business_dates",
+    AvailabilityException.business_id,
+    AvailabilityException.start_date,
+    AvailabilityException.end_date,
+)
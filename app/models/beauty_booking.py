@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime
-from sqlalchemy import ForeignKey, String, DateTime, func, Integer, Index
+from sqlalchemy import BigInteger, ForeignKey, String, DateTime, func, Integer, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base
@@ -40,9 +40,17 @@ class BeautyBooking(Base):
         nullable=False,
     )
 
+    # cursor de sincronización: lo llenan los hooks de app/services/booking_changes.py
+    change_seq: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default="0")
+    # insert | update | cancel
+    change_op: Mapped[str] = mapped_column(String(10), nullable=False, server_default="insert")
+    # cuándo se estampó el último cambio: el archivado no mueve lo que los clientes aún no sincronizan
+    changed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
     staff = relationship("Staff", back_populates="beauty_bookings")
     beauty_service = relationship("BeautyService", back_populates="beauty_bookings")
 
 
 Index("ix_beauty_bookings_staff_start", BeautyBooking.staff_id, BeautyBooking.start_datetime)
-Index("ix_beauty_bookings_staff_end", BeautyBooking.staff_id, BeautyBooking.end_datetime)
\ No newline at end of file
+Index("ix_beauty_bookings_staff_end", BeautyBooking.staff_id, BeautyBooking.end_datetime)
+Index("ix_beauty_bookings_staff_change", BeautyBooking.staff_id, BeautyBooking.change_seq, BeautyBooking.id)
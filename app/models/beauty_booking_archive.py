@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from datetime import datetime
+from sqlalchemy import Integer, String, DateTime, func, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+class BeautyBookingArchive(Base):
+    __tablename__ = "beauty_bookings_archive"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+
+    staff_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    beauty_service_id: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    start_datetime: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    end_datetime: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    status: Mapped[str] = mapped_column(String(20), nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False,
+    )
+
+
+Index(
+    "ix_beauty_bookings_archive_staff_start",
+    BeautyBookingArchive.staff_id,
+    BeautyBookingArchive.start_datetime,
+)
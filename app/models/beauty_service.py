@@ -23,6 +23,10 @@ class BeautyService(Base):
     duration_min: Mapped[int] = mapped_column(Integer, nullable=False, default=30)
     price: Mapped[float] = mapped_column(Numeric(10, 2), nullable=False, default=0)
 
+    # minutos de preparación/limpieza que el staff queda ocupado antes/después
+    buffer_before_min: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    buffer_after_min: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
 
@@ -2,7 +2,7 @@
 from __future__ import annotations
 
 from datetime import datetime
-from sqlalchemy import ForeignKey, String, DateTime, func, Index
+from sqlalchemy import BigInteger, ForeignKey, String, DateTime, func, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.db.base import Base 
@@ -24,9 +24,17 @@ class Booking(Base):
 
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
+    # cursor de sincronización: lo llenan los hooks de app/services/booking_changes.py
+    change_seq: Mapped[int] = mapped_column(BigInteger, nullable=False, server_default="0")
+    # insert | update | cancel
+    change_op: Mapped[str] = mapped_column(String(10), nullable=False, server_default="insert")
+    # cuándo se estampó el último cambio: el archivado no mueve lo que los clientes aún no sincronizan
+    changed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
     barber = relationship("Barber", back_populates="bookings")
     service = relationship("Service")
 
 # Índices útiles (performance)
 Index("ix_bookings_barber_start", Booking.barber_id, Booking.start_datetime)
-Index("ix_bookings_barber_end", Booking.barber_id, Booking.end_datetime)
\ No newline at end of file
+Index("ix_bookings_barber_end", Booking.barber_id, Booking.end_datetime)
+Index("ix_bookings_barber_change", Booking.barber_id, Booking.change_seq, Booking.id)
@@ -0,0 +1,31 @@
+# app/models/booking_archive.py
+from __future__ import annotations
+
+from datetime import datetime
+from sqlalchemy import Integer, String, DateTime, func, Index
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+# Copia "fría" de bookings: cancelados o fuera de la ventana de retención.
+# Sin FKs a propósito, el histórico sobrevive aunque se borre el barbero/servicio.
+class BookingArchive(Base):
+    __tablename__ = "bookings_archive"
+
+    # mismo id que tenía en la tabla caliente
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+
+    barber_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    service_id: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    start_datetime: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    end_datetime: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    status: Mapped[str] = mapped_column(String(20), nullable=False)
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    archived_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+Index("ix_bookings_archive_barber_start", BookingArchive.barber_id, BookingArchive.start_datetime)
@@ -30,6 +30,9 @@ class Business(Base):
     timezone: Mapped[str] = mapped_column(String(64), nullable=False, default="America/Monterrey")
     currency: Mapped[str] = mapped_column(String(3), nullable=False, default="MXN")
 
+    # separación entre inicios de slot (minutos); None = duración del servicio / slot_minutes de la regla
+    slot_step_min: Mapped[int | None] = mapped_column(Integer, nullable=True)
+
     # SaaS meta
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from datetime import datetime
+from sqlalchemy import BigInteger, DateTime, Integer, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.db.base import Base
+
+
+# Versión por recurso/tenant para ETags (ver app.core.resource_versions).
+# Se incrementa en el mismo flush que escribe el recurso; nunca se lee el cuerpo para versionar.
+class ResourceVersion(Base):
+    __tablename__ = "resource_versions"
+
+    # ej. "services", "barber", "staff", "exceptions"
+    resource: Mapped[str] = mapped_column(String(50), primary_key=True)
+    # id del tenant/recurso dueño de la versión (0 = global)
+    scope_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    version: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -16,6 +16,10 @@ class Service(Base):
     duration_min: Mapped[int] = mapped_column(Integer, nullable=False)
     price: Mapped[Decimal] = mapped_column(Numeric(10, 2), nullable=False)
 
+    # minutos de preparación/limpieza que el barbero queda ocupado antes/después
+    buffer_before_min: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    buffer_after_min: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+
     is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
 
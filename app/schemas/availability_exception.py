@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from datetime import date, datetime, time
+from pydantic import BaseModel, Field
+
+
+class AvailabilityExceptionCreate(BaseModel):
+    # ambos en None -> todo el negocio
+    barber_id: int | None = Field(default=None, gt=0)
+    staff_id: int | None = Field(default=None, gt=0)
+    start_date: date
+    end_date: date
+    # ambos en None -> día completo
+    start_time: time | None = None
+    end_time: time | None = None
+    reason: str | None = Field(default=None, max_length=120)
+
+
+class AvailabilityExceptionOut(BaseModel):
+    id: int
+    business_id: int
+    barber_id: int | None = None
+    staff_id: int | None = None
+    start_date: date
+    end_date: date
+    start_time: time | None = None
+    end_time: time | None = None
+    reason: str | None = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -47,4 +47,22 @@ class AvailabilitySlotsOut(BaseModel):
     service_id: int | None = None
     duration_min: int | None = None
     items: list[SlotWindowOut]
-    slots: list[str]  # plano, sin duplicados y ordenado
\ No newline at end of file
+    slots: list[str]  # plano, sin duplicados y ordenado
+# Ventana en formato compacto (ver app.core.slot_format)
+class CompactSlotWindowOut(BaseModel):
+    start: int   # minutos desde medianoche
+    end: int
+    offset: int = 0  # minutos de start al primer slot (preparación del servicio)
+    step: int    # minutos entre slots
+    count: int   # slot i = start + offset + i * step
+    mask: str    # base64, bit i = slot i disponible
+
+# Respuesta de slots en formato compacto (?format=compact / msgpack)
+class AvailabilitySlotsCompactOut(BaseModel):
+    date: str
+    barber_id: int
+    day_of_week: int
+    is_closed: bool = False
+    service_id: int | None = None
+    duration_min: int | None = None
+    windows: list[CompactSlotWindowOut]
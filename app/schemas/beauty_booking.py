@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 from datetime import datetime
+from typing import Literal
+
 from pydantic import BaseModel, Field
 
 
@@ -11,6 +13,20 @@ class BeautyBookingCreate(BaseModel):
     end_datetime: datetime
 
 
+class BeautyBookingAutoCreate(BaseModel):
+    # sin staff_id: lo elige el servidor (app/services/staff_assignment.py)
+    beauty_service_id: int = Field(gt=0)
+    start_datetime: datetime
+    # None = BEAUTY_ASSIGN_POLICY
+    policy: Literal["least_booked", "round_robin", "preferred"] | None = None
+    preferred_staff_ids: list[int] = Field(default_factory=list, max_length=20)
+
+
+class BeautyBookingReschedule(BaseModel):
+    start_datetime: datetime
+    end_datetime: datetime
+
+
 class BeautyBookingOut(BaseModel):
     id: int
     staff_id: int
@@ -29,4 +45,32 @@ class BeautyBookingCancelOut(BaseModel):
     status: str
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class BeautyBookingHistoryOut(BeautyBookingOut):
+    archived: bool = False
+
+
+class BeautyBookingBulkCancel(BaseModel):
+    start_datetime: datetime
+    end_datetime: datetime
+    # además de cancelar, bloquear el rango con una excepción de disponibilidad
+    block_availability: bool = False
+    reason: str | None = Field(default=None, max_length=120)
+
+
+class BeautyBookingBulkCancelOut(BaseModel):
+    cancelled_count: int
+    items: list[BeautyBookingOut]
+
+
+class BeautyBookingChangeOut(BeautyBookingOut):
+    # insert | update | cancel (el cliente hace upsert salvo en cancel)
+    change_op: str
+
+
+class BeautyBookingChangesOut(BaseModel):
+    items: list[BeautyBookingChangeOut]
+    # se manda como ?since= en la siguiente llamada
+    cursor: str
+    has_more: bool
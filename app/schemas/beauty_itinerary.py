@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from pydantic import BaseModel, Field
+
+from app.schemas.beauty_booking import BeautyBookingOut
+
+
+class ItineraryLegOut(BaseModel):
+    beauty_service_id: int
+    staff_id: int
+    staff_name: str
+    start_datetime: datetime
+    end_datetime: datetime
+
+
+class ItineraryOut(BaseModel):
+    start_datetime: datetime
+    end_datetime: datetime
+    staff_changes: int
+    legs: list[ItineraryLegOut]
+
+
+class BeautyItinerariesOut(BaseModel):
+    date: str
+    items: list[ItineraryOut]
+    # se acabó el presupuesto de búsqueda: puede haber más inicios posibles
+    truncated: bool = False
+
+
+class ItineraryLegIn(BaseModel):
+    beauty_service_id: int = Field(gt=0)
+    staff_id: int = Field(gt=0)
+    start_datetime: datetime
+
+
+class BeautyItineraryBook(BaseModel):
+    # normalmente un item de GET /beauty-itineraries tal cual
+    legs: list[ItineraryLegIn] = Field(min_length=1, max_length=5)
+
+
+class BeautyItineraryBookedOut(BaseModel):
+    items: list[BeautyBookingOut]
@@ -3,12 +3,16 @@ from __future__ import annotations
 from datetime import datetime
 from pydantic import BaseModel, Field
 
+from app.core.occupancy import MAX_BUFFER_MIN
+
 
 class BeautyServiceBase(BaseModel):
     name: str = Field(min_length=2, max_length=120)
     category: str | None = Field(default=None, max_length=50)
     duration_min: int = Field(gt=0, le=600)
     price: float = Field(ge=0)
+    buffer_before_min: int = Field(default=0, ge=0, le=MAX_BUFFER_MIN)
+    buffer_after_min: int = Field(default=0, ge=0, le=MAX_BUFFER_MIN)
 
 
 class BeautyServiceCreate(BeautyServiceBase):
@@ -20,6 +24,8 @@ class BeautyServiceUpdate(BaseModel):
     category: str | None = Field(default=None, max_length=50)
     duration_min: int | None = Field(default=None, gt=0, le=600)
     price: float | None = Field(default=None, ge=0)
+    buffer_before_min: int | None = Field(default=None, ge=0, le=MAX_BUFFER_MIN)
+    buffer_after_min: int | None = Field(default=None, ge=0, le=MAX_BUFFER_MIN)
     is_active: bool | None = None
 
 
@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from pydantic import BaseModel
 
+from app.schemas.barber_availability import CompactSlotWindowOut
+
 
 class StaffSlotWindowOut(BaseModel):
     staff_id: int
@@ -19,4 +21,19 @@ class BeautyAvailableSlotsOut(BaseModel):
     service_name: str
     date: str
     day_of_week: str
-    items: list[StaffSlotWindowOut]
\ No newline at end of file
+    is_closed: bool = False
+    items: list[StaffSlotWindowOut]
+
+class StaffCompactWindowOut(CompactSlotWindowOut):
+    staff_id: int
+    staff_name: str
+
+
+class BeautyAvailableSlotsCompactOut(BaseModel):
+    service_id: int
+    service_name: str
+    date: str
+    day_of_week: str
+    is_closed: bool = False
+    service_duration_min: int
+    windows: list[StaffCompactWindowOut]
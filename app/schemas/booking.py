@@ -9,6 +9,11 @@ class BookingCreate(BaseModel):
     end_datetime: datetime
 
 
+class BookingReschedule(BaseModel):
+    start_datetime: datetime
+    end_datetime: datetime
+
+
 class BookingOut(BaseModel):
     id: int
     barber_id: int
@@ -27,4 +32,32 @@ class BookingCancelOut(BaseModel):
     status: str
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+class BookingHistoryOut(BookingOut):
+    archived: bool = False
+
+
+class BookingBulkCancel(BaseModel):
+    start_datetime: datetime
+    end_datetime: datetime
+    # además de cancelar, bloquear el rango con una excepción de disponibilidad
+    block_availability: bool = False
+    reason: str | None = Field(default=None, max_length=120)
+
+
+class BookingBulkCancelOut(BaseModel):
+    cancelled_count: int
+    items: list[BookingOut]
+
+
+class BookingChangeOut(BookingOut):
+    # insert | update | cancel (el cliente hace upsert salvo en cancel)
+    change_op: str
+
+
+class BookingChangesOut(BaseModel):
+    items: list[BookingChangeOut]
+    # se manda como ?since= en la siguiente llamada
+    cursor: str
+    has_more: bool
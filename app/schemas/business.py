@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from pydantic import BaseModel, Field
+
+from app.core.occupancy import MAX_SLOT_STEP_MIN, MIN_SLOT_STEP_MIN
+
+
+class BusinessSettingsUpdate(BaseModel):
+    # null = volver al default (SLOT_STEP_MIN, o la duración / slot_minutes de la regla)
+    slot_step_min: int | None = Field(default=None, ge=MIN_SLOT_STEP_MIN, le=MAX_SLOT_STEP_MIN)
+
+
+class BusinessSettingsOut(BaseModel):
+    id: int
+    name: str
+    timezone: str
+    slot_step_min: int | None
+
+    class Config:
+        from_attributes = True
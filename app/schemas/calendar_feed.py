@@ -0,0 +1,6 @@
+from pydantic import BaseModel
+
+
+class CalendarFeedOut(BaseModel):
+    # URL de suscripción (webcal/https); quien la tenga ve la agenda: tratarla como secreto
+    url: str
@@ -2,11 +2,15 @@ from pydantic import BaseModel, field_serializer, Field, ConfigDict
 from typing import Optional
 from decimal import Decimal
 
+from app.core.occupancy import MAX_BUFFER_MIN
+
 # esquema para crear un servicio
 class ServiceCreate(BaseModel):
     name: str = Field(min_length=2, max_length=120)
     duration_min: int = Field(gt=0)
     price: float = Field(gt=0)
+    buffer_before_min: int = Field(default=0, ge=0, le=MAX_BUFFER_MIN)
+    buffer_after_min: int = Field(default=0, ge=0, le=MAX_BUFFER_MIN)
 
 # esquema para actualizar un servicio
 # con este update se puede mandar un solo campo a actualizar sin necesidad de mandar todos.
@@ -14,6 +18,8 @@ class ServiceUpdate(BaseModel):
     name: Optional[str] = Field(default=None, min_length=2, max_length=120)
     duration_min: Optional[int] = Field(default=None, gt=0)
     price: Optional[float] = Field(default=None, gt=0)
+    buffer_before_min: Optional[int] = Field(default=None, ge=0, le=MAX_BUFFER_MIN)
+    buffer_after_min: Optional[int] = Field(default=None, ge=0, le=MAX_BUFFER_MIN)
     is_active: Optional[bool] = None
 
 # esquema para la respuesta de un servicio
@@ -22,6 +28,8 @@ class ServiceOut(BaseModel):
     name: str
     duration_min: int
     price: Decimal
+    buffer_before_min: int
+    buffer_after_min: int
     is_active: bool
 
     model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,305 @@
+from __future__ import annotations
+
+import time
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple
+
+from sqlalchemy import and_, select, delete, insert, or_, literal, union_all
+from sqlalchemy.orm import Session
+
+from app.models.booking import Booking
+from app.models.beauty_booking import BeautyBooking
+from app.models.booking_archive import BookingArchive
+from app.models.beauty_booking_archive import BeautyBookingArchive
+from app.models.archive_checkpoint import ArchiveCheckpoint
+
+
+DEFAULT_RETENTION_DAYS = 180
+# días que una fila cambiada (ej. recién cancelada) se queda en la tabla caliente para que
+# el feed de sincronización (booking_changes) la entregue antes de archivarla
+DEFAULT_SYNC_RETENTION_DAYS = 30
+DEFAULT_BATCH_SIZE = 500
+
+
+class ArchiveSpec(NamedTuple):
+    job_name: str
+    hot: type
+    archive: type
+    columns: tuple[str, ...]
+
+
+ARCHIVE_SPECS = {
+    "bookings": ArchiveSpec(
+        job_name="bookings",
+        hot=Booking,
+        archive=BookingArchive,
+        columns=("id", "barber_id", "service_id", "start_datetime", "end_datetime", "status", "created_at"),
+    ),
+    "beauty_bookings": ArchiveSpec(
+        job_name="beauty_bookings",
+        hot=BeautyBooking,
+        archive=BeautyBookingArchive,
+        columns=("id", "staff_id", "beauty_service_id", "start_datetime", "end_datetime", "status", "created_at"),
+    ),
+}
+
+
+class ArchiveRunResult(NamedTuple):
+    job_name: str
+    batches: int
+    rows_moved: int
+    pass_completed: bool
+
+
+def _get_checkpoint(session: Session, job_name: str) -> ArchiveCheckpoint:
+    checkpoint = session.get(ArchiveCheckpoint, job_name)
+    if checkpoint is None:
+        checkpoint = ArchiveCheckpoint(job_name=job_name, last_id=0, rows_moved=0)
+        session.add(checkpoint)
+        session.flush()
+    return checkpoint
+
+
+class Cutoffs(NamedTuple):
+    retention: datetime  # terminaron antes: se archivan aunque sigan confirmados
+    sync: datetime       # cambiaron antes: el feed de sincronización ya tuvo tiempo de entregarlos
+
+
+def _is_candidate(hot, cutoffs: Cutoffs):
+    # cancelados, o que terminaron antes del cutoff de retención; en ambos casos solo si su
+    # último cambio ya salió de la ventana de sincronización
+    return and_(
+        or_(hot.status == "cancelled", hot.end_datetime < cutoffs.retention),
+        hot.changed_at < cutoffs.sync,
+    )
+
+
+def archive_batch(session: Session, spec: ArchiveSpec, cutoffs: Cutoffs, after_id: int, batch_size: int) -> list[int]:
+    """
+    Mueve un lote acotado de la tabla caliente al archivo en un solo statement:
+
+        WITH moved AS (DELETE ... WHERE id IN (SELECT ... FOR UPDATE SKIP LOCKED) RETURNING ...)
+        INSERT INTO <archive> SELECT ... FROM moved RETURNING id
+
+    Candidatos: cancelados, o que terminaron antes del cutoff de retención, cuyo último
+    cambio es anterior a la ventana de sincronización. Devuelve los ids movidos (ordenados).
+    """
+    hot = spec.hot
+
+    candidates = (
+        select(hot.id)
+        .where(hot.id > after_id, _is_candidate(hot, cutoffs))
+        .order_by(hot.id.asc())
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+
+    if session.get_bind().dialect.name != "postgresql":
+        return _archive_batch_portable(session, spec, candidates)
+
+    moved = (
+        delete(hot)
+        .where(hot.id.in_(candidates))
+        .returning(*[getattr(hot, c) for c in spec.columns])
+        .cte("moved")
+    )
+
+    stmt = (
+        insert(spec.archive)
+        .from_select(list(spec.columns), select(*[moved.c[c] for c in spec.columns]))
+        .returning(spec.archive.id)
+    )
+
+    return sorted(session.execute(stmt).scalars().all())
+
+
+def _archive_batch_portable(session: Session, spec: ArchiveSpec, candidates) -> list[int]:
+    # motores sin DML dentro de un CTE (SQLite): los mismos pasos en tres statements de
+    # la misma transacción (el commit del lote es de quien llama)
+    hot = spec.hot
+    ids = sorted(session.execute(candidates).scalars().all())
+    if not ids:
+        return []
+    session.execute(
+        insert(spec.archive).from_select(
+            list(spec.columns), select(*[getattr(hot, c) for c in spec.columns]).where(hot.id.in_(ids))
+        )
+    )
+    session.execute(delete(hot).where(hot.id.in_(ids)).execution_options(synchronize_session=False))
+    return ids
+
+
+def _has_candidates_after(session: Session, spec: ArchiveSpec, cutoffs: Cutoffs, after_id: int) -> bool:
+    # sin SKIP LOCKED: también ve las filas que otra transacción tiene tomadas
+    hot = spec.hot
+    stmt = select(hot.id).where(hot.id > after_id, _is_candidate(hot, cutoffs)).limit(1)
+    return session.execute(stmt).first() is not None
+
+
+def run_archive_job(
+    session: Session,
+    job_name: str,
+    retention_days: int = DEFAULT_RETENTION_DAYS,
+    sync_retention_days: int = DEFAULT_SYNC_RETENTION_DAYS,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    sleep_seconds: float = 0.0,
+    max_batches: int | None = None,
+) -> ArchiveRunResult:
+    """
+    Corre el archivado por lotes con commit por lote, reanudando desde el checkpoint.
+
+    - sync_retention_days: una fila cambiada hace menos que esto no se mueve (el feed de
+      sincronización todavía tiene que entregar su último cambio, ej. el "cancel")
+    - sleep_seconds: pausa entre lotes (throttling para no competir con tráfico real)
+    - max_batches: corta la corrida; la siguiente continúa donde quedó el checkpoint
+    """
+    if batch_size <= 0:
+        raise ValueError("batch_size must be > 0")
+
+    if retention_days < 0:
+        raise ValueError("retention_days must be >= 0")
+
+    if sync_retention_days < 0:
+        raise ValueError("sync_retention_days must be >= 0")
+
+    spec = ARCHIVE_SPECS.get(job_name)
+    if spec is None:
+        raise ValueError(f"Unknown archive job: {job_name}")
+
+    now = datetime.now(timezone.utc)
+    cutoffs = Cutoffs(now - timedelta(days=retention_days), now - timedelta(days=sync_retention_days))
+
+    batches = 0
+    total = 0
+    pass_completed = False
+
+    while max_batches is None or batches < max_batches:
+        checkpoint = _get_checkpoint(session, spec.job_name)
+
+        moved_ids = archive_batch(session, spec, cutoffs, checkpoint.last_id, batch_size)
+
+        if moved_ids:
+            checkpoint.last_id = moved_ids[-1]
+            checkpoint.rows_moved += len(moved_ids)
+
+        # un lote incompleto no basta para cerrar la pasada: SKIP LOCKED se salta filas
+        # que otra transacción tiene tomadas. Solo se vuelve al inicio cuando ya no queda
+        # ningún candidato después del checkpoint; si quedan (bloqueados), se corta aquí
+        # y la siguiente corrida sigue desde last_id
+        stalled = False
+        if len(moved_ids) < batch_size:
+            if _has_candidates_after(session, spec, cutoffs, checkpoint.last_id):
+                stalled = True
+            else:
+                checkpoint.last_id = 0
+                pass_completed = True
+
+        session.commit()
+
+        batches += 1
+        total += len(moved_ids)
+
+        if pass_completed or stalled:
+            break
+
+        if sleep_seconds > 0:
+            time.sleep(sleep_seconds)
+
+    return ArchiveRunResult(
+        job_name=spec.job_name,
+        batches=batches,
+        rows_moved=total,
+        pass_completed=pass_completed,
+    )
+
+
+def booking_history_stmt(barber_id: int, start_dt: datetime, end_dt: datetime, status: str | None = None):
+    """
+    SELECT sobre bookings + bookings_archive (UNION ALL) para reportes.
+    Agrega columna `archived` para distinguir el origen.
+    """
+    hot = (
+        select(
+            Booking.id,
+            Booking.barber_id,
+            Booking.service_id,
+            Booking.start_datetime,
+            Booking.end_datetime,
+            Booking.status,
+            Booking.created_at,
+            literal(False).label("archived"),
+        )
+        .where(
+            Booking.barber_id == barber_id,
+            Booking.start_datetime < end_dt,
+            Booking.end_datetime > start_dt,
+        )
+    )
+    cold = (
+        select(
+            BookingArchive.id,
+            BookingArchive.barber_id,
+            BookingArchive.service_id,
+            BookingArchive.start_datetime,
+            BookingArchive.end_datetime,
+            BookingArchive.status,
+            BookingArchive.created_at,
+            literal(True).label("archived"),
+        )
+        .where(
+            BookingArchive.barber_id == barber_id,
+            BookingArchive.start_datetime < end_dt,
+            BookingArchive.end_datetime > start_dt,
+        )
+    )
+
+    if status is not None:
+        hot = hot.where(Booking.status == status)
+        cold = cold.where(BookingArchive.status == status)
+
+    history = union_all(hot, cold).subquery("history")
+    return select(history).order_by(history.c.start_datetime.asc(), history.c.id.asc())
+
+
+def beauty_booking_history_stmt(staff_id: int, start_dt: datetime, end_dt: datetime, status: str | None = None):
+    hot = (
+        select(
+            BeautyBooking.id,
+            BeautyBooking.staff_id,
+            BeautyBooking.beauty_service_id,
+            BeautyBooking.start_datetime,
+            BeautyBooking.end_datetime,
+            BeautyBooking.status,
+            BeautyBooking.created_at,
+            literal(False).label("archived"),
+        )
+        .where(
+            BeautyBooking.staff_id == staff_id,
+            BeautyBooking.start_datetime < end_dt,
+            BeautyBooking.end_datetime > start_dt,
+        )
+    )
+    cold = (
+        select(
+            BeautyBookingArchive.id,
+            BeautyBookingArchive.staff_id,
+            BeautyBookingArchive.beauty_service_id,
+            BeautyBookingArchive.start_datetime,
+            BeautyBookingArchive.end_datetime,
+            BeautyBookingArchive.status,
+            BeautyBookingArchive.created_at,
+            literal(True).label("archived"),
+        )
+        .where(
+            BeautyBookingArchive.staff_id == staff_id,
+            BeautyBookingArchive.start_datetime < end_dt,
+            BeautyBookingArchive.end_datetime > start_dt,
+        )
+    )
+
+    if status is not None:
+        hot = hot.where(BeautyBooking.status == status)
+        cold = cold.where(BeautyBookingArchive.status == status)
+
+    history = union_all(hot, cold).subquery("history")
+    return select(history).order_by(history.c.start_datetime.asc(), history.c.id.asc())
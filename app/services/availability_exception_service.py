@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, time as time_type
+from typing import Iterable
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models.availability_exception import AvailabilityException
+
+
+def exceptions_for_day(session: Session, business_id: int, target_date: date) -> list[AvailabilityException]:
+    """
+    Todas las excepciones del negocio que tocan `target_date` (negocio + recursos),
+    en una sola consulta por el índice (business_id, start_date, end_date).
+    """
+    stmt = (
+        select(AvailabilityException)
+        .where(
+            AvailabilityException.business_id == business_id,
+            AvailabilityException.start_date <= target_date,
+            AvailabilityException.end_date >= target_date,
+        )
+        .order_by(AvailabilityException.id.asc())
+    )
+    return list(session.execute(stmt).scalars().all())
+
+
+def is_business_closed(exceptions: Iterable[AvailabilityException]) -> bool:
+    return any(e.is_business_wide and e.is_full_day for e in exceptions)
+
+
+def applies_to(exception: AvailabilityException, barber_id: int | None = None, staff_id: int | None = None) -> bool:
+    if exception.is_business_wide:
+        return True
+    if barber_id is not None and exception.barber_id == barber_id:
+        return True
+    if staff_id is not None and exception.staff_id == staff_id:
+        return True
+    return False
+
+
+def is_resource_closed(
+    exceptions: Iterable[AvailabilityException],
+    barber_id: int | None = None,
+    staff_id: int | None = None,
+) -> bool:
+    return any(e.is_full_day and applies_to(e, barber_id, staff_id) for e in exceptions)
+
+
+def blocked_intervals(
+    exceptions: Iterable[AvailabilityException],
+    target_date: date,
+    barber_id: int | None = None,
+    staff_id: int | None = None,
+) -> list[tuple[datetime, datetime]]:
+    """Bloqueos parciales del recurso en el día, como datetimes naive en hora local."""
+    out: list[tuple[datetime, datetime]] = []
+    for e in exceptions:
+        if not applies_to(e, barber_id, staff_id):
+            continue
+        if e.is_full_day:
+            out.append((datetime.combine(target_date, time_type.min), datetime.combine(target_date, time_type.max)))
+        else:
+            out.append((datetime.combine(target_date, e.start_time), datetime.combine(target_date, e.end_time)))
+    return out
+
+
+def to_local_naive(dt: datetime, timezone_name: str | None) -> datetime:
+    """datetime aware -> naive en hora local del negocio (naive se asume ya local)."""
+    if dt.tzinfo is None:
+        return dt
+    return dt.astimezone(ZoneInfo(timezone_name or "America/Monterrey")).replace(tzinfo=None)
+
+
+def build_block_exceptions(
+    business_id: int,
+    start_local: datetime,
+    end_local: datetime,
+    barber_id: int | None = None,
+    staff_id: int | None = None,
+    reason: str | None = None,
+) -> list[AvailabilityException]:
+    """
+    Convierte un rango local [start_local, end_local) en excepciones:
+    primer día parcial, días intermedios completos y último día parcial (máx. 3 filas).
+    """
+    if end_local <= start_local:
+        raise ValueError("end_datetime must be greater than start_datetime")
+
+    def _make(d_start: date, d_end: date, t_start: time_type | None, t_end: time_type | None):
+        return AvailabilityException(
+            business_id=business_id,
+            barber_id=barber_id,
+            staff_id=staff_id,
+            start_date=d_start,
+            end_date=d_end,
+            start_time=t_start,
+            end_time=t_end,
+            reason=reason,
+        )
+
+    first_day = start_local.date()
+    last_instant = end_local - timedelta(microseconds=1)
+    last_day = last_instant.date()
+
+    start_t = start_local.time()
+    # fin exclusivo a medianoche -> hasta el final del día anterior
+    end_t = end_local.time() if end_local.time() != time_type.min else time_type.max
+
+    if first_day == last_day:
+        if start_t == time_type.min and end_t == time_type.max:
+            return [_make(first_day, first_day, None, None)]
+        return [_make(first_day, first_day, start_t, end_t)]
+
+    rows: list[AvailabilityException] = []
+
+    full_from = first_day
+    if start_t != time_type.min:
+        rows.append(_make(first_day, first_day, start_t, time_type.max))
+        full_from = first_day + timedelta(days=1)
+
+    full_to = last_day
+    tail = None
+    if end_t != time_type.max:
+        tail = _make(last_day, last_day, time_type.min, end_t)
+        full_to = last_day - timedelta(days=1)
+
+    if full_from <= full_to:
+        rows.append(_make(full_from, full_to, None, None))
+
+    if tail is not None:
+        rows.append(tail)
+
+    return rows
@@ -1,24 +1,56 @@
 from __future__ import annotations
 
-from datetime import datetime
-from sqlalchemy import select
+from datetime import datetime, timedelta
+from typing import Callable
+from sqlalchemy import select, update
 from sqlalchemy.orm import Session
 
+from app.core.availability_events import record_change, dates_between
+from app.core.resource_versions import business_timezone
+from app.core.occupancy import MAX_BUFFER_MIN, as_utc, padded
 from app.models.beauty_booking import BeautyBooking
+from app.models.beauty_service import BeautyService
+from app.models.availability_exception import AvailabilityException
+from app.services.booking_changes import change_values
+from app.services.booking_locks import lock_resource, record_conflict
 
 
-def has_overlap(session: Session, staff_id: int, start_dt: datetime, end_dt: datetime) -> bool:
+def has_overlap(
+    session: Session,
+    staff_id: int,
+    start_dt: datetime,
+    end_dt: datetime,
+    exclude_booking_id: int | None = None,
+    buffer_before_min: int = 0,
+    buffer_after_min: int = 0,
+) -> bool:
+    """Igual que booking_service.has_overlap: buffers del nuevo y de cada booking existente."""
+    new_start, new_end = padded(as_utc(start_dt), as_utc(end_dt), buffer_before_min, buffer_after_min)
+    margin = timedelta(minutes=MAX_BUFFER_MIN)
     stmt = (
-        select(BeautyBooking.id)
+        select(
+            BeautyBooking.start_datetime,
+            BeautyBooking.end_datetime,
+            BeautyService.buffer_before_min,
+            BeautyService.buffer_after_min,
+        )
+        .join(BeautyService, BeautyService.id == BeautyBooking.beauty_service_id)
         .where(
             BeautyBooking.staff_id == staff_id,
             BeautyBooking.status == "confirmed",
-            BeautyBooking.start_datetime < end_dt,
-            BeautyBooking.end_datetime > start_dt,
+            BeautyBooking.start_datetime < new_end + margin,
+            BeautyBooking.end_datetime > new_start - margin,
         )
-        .limit(1)
     )
-    return session.execute(stmt).first() is not None
+    if exclude_booking_id is not None:
+        stmt = stmt.where(BeautyBooking.id != exclude_booking_id)
+    for row in session.execute(stmt):
+        start, end = padded(
+            as_utc(row.start_datetime), as_utc(row.end_datetime), row.buffer_before_min, row.buffer_after_min
+        )
+        if start < new_end and end > new_start:
+            return True
+    return False
 
 
 def create_beauty_booking(
@@ -27,13 +59,48 @@ def create_beauty_booking(
     beauty_service_id: int,
     start_dt: datetime,
     end_dt: datetime,
+    lock_mode: str | None = None,
+    buffer_before_min: int = 0,
+    buffer_after_min: int = 0,
+    before_commit: Callable[[BeautyBooking], None] | None = None,
 ) -> BeautyBooking:
+    """Igual que booking_service.create_booking, con lock del staff."""
     if end_dt <= start_dt:
         raise ValueError("end_datetime must be greater than start_datetime")
 
-    if has_overlap(session, staff_id, start_dt, end_dt):
+    # serializa escritores del mismo staff (lock hasta el commit)
+    lock_resource(session, "staff", staff_id, lock_mode)
+
+    if has_overlap(session, staff_id, start_dt, end_dt, None, buffer_before_min, buffer_after_min):
+        session.rollback()
+        record_conflict("staff")
         raise ValueError("Slot is already booked")
 
+    booking = add_beauty_booking(
+        session, staff_id, beauty_service_id, start_dt, end_dt, buffer_before_min, buffer_after_min
+    )
+    if before_commit is not None:
+        session.flush()
+        before_commit(booking)
+    session.commit()
+    session.refresh(booking)
+    return booking
+
+
+def add_beauty_booking(
+    session: Session,
+    staff_id: int,
+    beauty_service_id: int,
+    start_dt: datetime,
+    end_dt: datetime,
+    buffer_before_min: int = 0,
+    buffer_after_min: int = 0,
+) -> BeautyBooking:
+    """
+    Agrega el booking y anota el cambio de agenda; el commit (y el lock previo) es de quien
+    llama. Los días publicados incluyen los buffers: una limpieza que pasa de medianoche
+    también cambia los slots del día siguiente.
+    """
     booking = BeautyBooking(
         staff_id=staff_id,
         beauty_service_id=beauty_service_id,
@@ -41,19 +108,173 @@ def create_beauty_booking(
         end_datetime=end_dt,
         status="confirmed",
     )
-
     session.add(booking)
-    session.commit()
-    session.refresh(booking)
+    tz_name = business_timezone(session, "staff", staff_id)
+    days = dates_between(*padded(start_dt, end_dt, buffer_before_min, buffer_after_min), tz_name)
+    record_change(session, "staff", staff_id, days, "booking_created")
     return booking
 
 
 def cancel_beauty_booking(session: Session, booking_id: int) -> BeautyBooking:
-    booking = session.get(BeautyBooking, booking_id)
-    if not booking:
+    found = session.execute(
+        select(BeautyBooking, BeautyService.buffer_before_min, BeautyService.buffer_after_min)
+        .join(BeautyService, BeautyService.id == BeautyBooking.beauty_service_id)
+        .where(BeautyBooking.id == booking_id)
+    ).first()
+    if not found:
         raise ValueError("Beauty booking not found")
+    booking, before, after = found
 
     booking.status = "cancelled"
+    tz_name = business_timezone(session, "staff", booking.staff_id)
+    record_change(
+        session,
+        "staff",
+        booking.staff_id,
+        dates_between(*padded(booking.start_datetime, booking.end_datetime, before, after), tz_name),
+        "booking_cancelled",
+    )
     session.commit()
     session.refresh(booking)
-    return booking
\ No newline at end of file
+    return booking
+
+
+def reschedule_beauty_booking(
+    session: Session,
+    booking_id: int,
+    start_dt: datetime,
+    end_dt: datetime,
+    lock_mode: str | None = None,
+) -> BeautyBooking:
+    """
+    Mueve un beauty booking confirmado en una sola transacción (mismo staff):
+    lock del staff -> traslape excluyendo el propio booking -> UPDATE ... RETURNING.
+    """
+    if end_dt <= start_dt:
+        raise ValueError("end_datetime must be greater than start_datetime")
+
+    current = session.execute(
+        select(
+            BeautyBooking.staff_id,
+            BeautyBooking.start_datetime,
+            BeautyBooking.end_datetime,
+            BeautyService.buffer_before_min,
+            BeautyService.buffer_after_min,
+        )
+        .join(BeautyService, BeautyService.id == BeautyBooking.beauty_service_id)
+        .where(BeautyBooking.id == booking_id)
+    ).first()
+    if current is None:
+        raise LookupError("Beauty booking not found")
+
+    lock_resource(session, "staff", current.staff_id, lock_mode)
+
+    if has_overlap(
+        session,
+        current.staff_id,
+        start_dt,
+        end_dt,
+        exclude_booking_id=booking_id,
+        buffer_before_min=current.buffer_before_min,
+        buffer_after_min=current.buffer_after_min,
+    ):
+        session.rollback()
+        record_conflict("staff")
+        raise ValueError("Slot is already booked")
+
+    stmt = (
+        update(BeautyBooking)
+        .where(
+            BeautyBooking.id == booking_id,
+            BeautyBooking.status == "confirmed",
+        )
+        .values(start_datetime=start_dt, end_datetime=end_dt, **change_values(session, BeautyBooking, "update"))
+        .returning(BeautyBooking)
+    )
+    booking = session.execute(stmt).scalars().first()
+
+    if booking is None:
+        session.rollback()
+        raise ValueError("Only confirmed bookings can be rescheduled")
+
+    tz_name = business_timezone(session, "staff", current.staff_id)
+    buffers = (current.buffer_before_min, current.buffer_after_min)
+    record_change(
+        session,
+        "staff",
+        current.staff_id,
+        dates_between(*padded(current.start_datetime, current.end_datetime, *buffers), tz_name)
+        + dates_between(*padded(start_dt, end_dt, *buffers), tz_name),
+        "booking_rescheduled",
+    )
+    session.commit()
+    session.refresh(booking)
+    return booking
+
+
+def bulk_cancel_beauty_bookings(
+    session: Session,
+    staff_id: int,
+    start_dt: datetime,
+    end_dt: datetime,
+    block_exceptions: list[AvailabilityException] | None = None,
+) -> list[dict]:
+    """
+    Cancela todos los beauty bookings confirmados del staff que tocan [start_dt, end_dt)
+    con un solo UPDATE ... RETURNING. Devuelve las filas afectadas (para notificar).
+    block_exceptions se insertan en la misma transacción (día libre del recurso).
+    """
+    if end_dt <= start_dt:
+        raise ValueError("end_datetime must be greater than start_datetime")
+
+    stmt = (
+        update(BeautyBooking)
+        .where(
+            BeautyBooking.staff_id == staff_id,
+            BeautyBooking.status == "confirmed",
+            BeautyBooking.start_datetime < end_dt,
+            BeautyBooking.end_datetime > start_dt,
+        )
+        .values(status="cancelled", **change_values(session, BeautyBooking, "cancel"))
+        .returning(
+            BeautyBooking.id,
+            BeautyBooking.staff_id,
+            BeautyBooking.beauty_service_id,
+            BeautyBooking.start_datetime,
+            BeautyBooking.end_datetime,
+            BeautyBooking.status,
+            BeautyBooking.created_at,
+            # buffers del servicio: los días publicados incluyen lo que ocupa cada booking
+            *(
+                select(column)
+                .where(BeautyService.id == BeautyBooking.beauty_service_id)
+                .correlate(BeautyBooking)
+                .scalar_subquery()
+                .label(column.key)
+                for column in (BeautyService.buffer_before_min, BeautyService.buffer_after_min)
+            ),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    rows = [dict(r) for r in session.execute(stmt).mappings().all()]
+
+    if rows:
+        tz_name = business_timezone(session, "staff", staff_id)
+        days = set()
+        for r in rows:
+            before, after = r.pop("buffer_before_min"), r.pop("buffer_after_min")
+            days.update(dates_between(*padded(r["start_datetime"], r["end_datetime"], before, after), tz_name))
+        record_change(session, "staff", staff_id, days, "booking_cancelled")
+
+    if block_exceptions:
+        session.add_all(block_exceptions)
+        blocked_days = set()
+        for e in block_exceptions:
+            day = e.start_date
+            while day <= e.end_date:
+                blocked_days.add(day)
+                day += timedelta(days=1)
+        record_change(session, "staff", staff_id, blocked_days, "exception_created")
+
+    session.commit()
+    return sorted(rows, key=lambda r: (r["start_datetime"], r["id"]))
@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import os
+import time as time_module
+from datetime import date, datetime, timedelta
+from typing import Callable, NamedTuple, Sequence
+from zoneinfo import ZoneInfo
+
+from sqlalchemy.orm import Session
+
+from app.core.occupancy import padded, slot_step
+from app.models.beauty_booking import BeautyBooking
+from app.services.availability_exception_service import exceptions_for_day, is_business_closed, to_local_naive
+from app.services.beauty_booking_service import add_beauty_booking
+from app.services.booking_locks import lock_resource, record_conflict, required_lock_mode
+from app.services.catalog_cache import ServiceEntry, TenantCatalog
+from app.services.staff_day import StaffDay, load_staff_days
+
+
+# Itinerarios de varios servicios seguidos (ej. corte -> color -> peinado), cada uno con
+# el staff que esté libre. La búsqueda es pura sobre la ocupación precalculada del día
+# (staff_day: dos consultas para todos los candidatos): por cada hora de inicio, DFS por
+# servicio probando primero el mismo staff del paso anterior y cortando la rama en cuanto
+# un paso no tiene a nadie libre. Devuelve los primeros N inicios con su mejor asignación
+# (menos cambios de staff) y se corta al agotar el presupuesto de tiempo. Los buffers de
+# cada servicio cuentan igual que en los slots; como los pasos van pegados, el mismo staff
+# no hace dos seguidos si entre ellos queda limpieza o preparación.
+
+MAX_ITINERARY_SERVICES = 5
+MAX_ITINERARY_RESULTS = 20
+
+ITINERARY_STEP_MINUTES = int(os.getenv("ITINERARY_STEP_MINUTES", "15"))
+ITINERARY_TIME_BUDGET_MS = int(os.getenv("ITINERARY_TIME_BUDGET_MS", "200"))
+
+if ITINERARY_STEP_MINUTES < 1:
+    raise RuntimeError(f"ITINERARY_STEP_MINUTES invalido: {ITINERARY_STEP_MINUTES}. Debe ser >= 1")
+if ITINERARY_TIME_BUDGET_MS < 1:
+    raise RuntimeError(f"ITINERARY_TIME_BUDGET_MS invalido: {ITINERARY_TIME_BUDGET_MS}. Debe ser >= 1")
+
+
+class Leg(NamedTuple):
+    service_id: int
+    staff_id: int
+    start: datetime  # hora local naive
+    end: datetime
+
+
+class Itinerary(NamedTuple):
+    legs: tuple[Leg, ...]
+    staff_changes: int
+
+
+class SearchResult(NamedTuple):
+    items: list[Itinerary]
+    truncated: bool  # se acabó el presupuesto antes de revisar todos los inicios
+
+
+def _candidate_starts(first_candidates: Sequence[int], days: dict[int, StaffDay], step: timedelta) -> list[datetime]:
+    starts: set[datetime] = set()
+    for staff_id in first_candidates:
+        day = days.get(staff_id)
+        if day is None:
+            continue
+        for window_start, window_end in day.windows:
+            cur = window_start
+            while cur < window_end:
+                starts.add(cur)
+                cur += step
+    return sorted(starts)
+
+
+def _same_staff_clash(steps: Sequence[tuple[int, datetime, datetime, int, int]]) -> bool:
+    """
+    Pasos (staff, inicio, fin, buffer antes, buffer después) del mismo staff que se enciman
+    contando buffers: A -> A seguido con limpieza, o A -> B -> A con un B más corto que ella.
+    """
+    by_staff = sorted((staff_id, *padded(start, end, before, after)) for staff_id, start, end, before, after in steps)
+    return any(a[0] == b[0] and b[1] < a[2] for a, b in zip(by_staff, by_staff[1:]))
+
+
+def search_itineraries(
+    services: Sequence[ServiceEntry],
+    candidates: Sequence[Sequence[int]],
+    days: dict[int, StaffDay],
+    limit: int,
+    step_minutes: int = ITINERARY_STEP_MINUTES,
+    budget_ms: int = ITINERARY_TIME_BUDGET_MS,
+) -> SearchResult:
+    """
+    `candidates[i]` = staff que puede hacer `services[i]`. Sin consultas: todo sale de `days`.
+    Resultados en orden de inicio, uno por hora de inicio.
+    """
+    durations = [timedelta(minutes=service.duration_min) for service in services]
+    # el mismo staff en dos pasos seguidos necesita este hueco entre ellos (no hay: van pegados)
+    gaps = [0] + [prev.buffer_after_min + cur.buffer_before_min for prev, cur in zip(services, services[1:])]
+    total = sum(durations, timedelta())
+    # lo más tarde que termina alguna regla del último paso: inicios posteriores no caben
+    latest_end = max(
+        (w_end for staff_id in candidates[-1] if staff_id in days for _, w_end in days[staff_id].windows),
+        default=None,
+    )
+    deadline = time_module.perf_counter() + budget_ms / 1000
+
+    # para un inicio fijo cada paso tiene hora fija: el mejor resto solo depende de
+    # (paso, staff anterior) y se calcula una vez (legs x staff² por inicio, no staff^legs)
+    memo: dict[tuple[int, int | None], tuple[int, tuple[Leg, ...]] | None] = {}
+
+    def best_from(i: int, start: datetime, prev_staff: int | None) -> tuple[int, tuple[Leg, ...]] | None:
+        if i == len(services):
+            return 0, ()
+        if (i, prev_staff) in memo:
+            return memo[(i, prev_staff)]
+        end = start + durations[i]
+        # primero el mismo staff: si sirve, no hay cambio y no se puede mejorar
+        ordered = sorted(candidates[i], key=lambda staff_id: (staff_id != prev_staff, staff_id))
+        best = None
+        for staff_id in ordered:
+            if staff_id == prev_staff and gaps[i]:
+                continue
+            day = days.get(staff_id)
+            if day is None or not day.can_take(start, end, services[i].buffer_before_min, services[i].buffer_after_min):
+                continue
+            rest = best_from(i + 1, end, staff_id)
+            if rest is None:
+                continue
+            changes = rest[0] + (prev_staff is not None and staff_id != prev_staff)
+            if best is None or changes < best[0]:
+                best = (changes, (Leg(services[i].id, staff_id, start, end),) + rest[1])
+                if changes == 0:
+                    break
+        memo[(i, prev_staff)] = best
+        return best
+
+    items: list[Itinerary] = []
+    if latest_end is None:
+        return SearchResult(items, False)
+
+    for start in _candidate_starts(candidates[0], days, timedelta(minutes=step_minutes)):
+        if start + total > latest_end:
+            break
+        if time_module.perf_counter() > deadline:
+            return SearchResult(items, True)
+        memo.clear()
+        found = best_from(0, start, None)
+        # el memo solo ve el paso anterior: A -> B -> A se revisa con el itinerario armado
+        if found is not None and not _same_staff_clash(
+            [
+                (leg.staff_id, leg.start, leg.end, service.buffer_before_min, service.buffer_after_min)
+                for leg, service in zip(found[1], services)
+            ]
+        ):
+            items.append(Itinerary(found[1], found[0]))
+            if len(items) >= limit:
+                break
+    return SearchResult(items, False)
+
+
+def _tz(catalog: TenantCatalog) -> ZoneInfo:
+    return ZoneInfo(catalog.timezone or "America/Monterrey")
+
+
+def _candidates(catalog: TenantCatalog, services: Sequence[ServiceEntry]) -> list[list[int]]:
+    return [[staff.id for staff in catalog.active_staff_for(service.id)] for service in services]
+
+
+def _load_days(db: Session, catalog: TenantCatalog, staff_ids, target_date: date) -> dict[int, StaffDay]:
+    exceptions = exceptions_for_day(db, catalog.business_id, target_date)
+    if is_business_closed(exceptions):
+        return {}
+    return load_staff_days(db, sorted(staff_ids), target_date, _tz(catalog), exceptions)
+
+
+def find_itineraries(
+    db: Session,
+    catalog: TenantCatalog,
+    services: Sequence[ServiceEntry],
+    target_date: date,
+    limit: int,
+) -> SearchResult:
+    candidates = _candidates(catalog, services)
+    if not all(candidates):
+        return SearchResult([], False)
+    days = _load_days(db, catalog, {staff_id for group in candidates for staff_id in group}, target_date)
+    # el paso del negocio (si lo configuró) manda sobre el default de itinerarios
+    step_minutes = slot_step(catalog.slot_step_min, ITINERARY_STEP_MINUTES)
+    return search_itineraries(services, candidates, days, limit, step_minutes=step_minutes)
+
+
+def book_itinerary(
+    session: Session,
+    catalog: TenantCatalog,
+    legs: Sequence[tuple[ServiceEntry, int, datetime]],
+    lock_mode: str | None = None,
+    before_commit: Callable[[list[BeautyBooking]], None] | None = None,
+) -> list[BeautyBooking]:
+    """
+    Crea todos los bookings de un itinerario (servicio, staff, inicio) en una transacción:
+    o quedan todos o ninguno. Inicio naive = hora local del negocio. ValueError si algún
+    paso ya no está libre o cae fuera de las reglas del staff.
+    """
+    tz = _tz(catalog)
+    planned: list[tuple[ServiceEntry, int, datetime, datetime, datetime]] = []
+    for service, staff_id, start_dt in legs:
+        if not catalog.is_assigned(staff_id, service.id) or not catalog.staff[staff_id].is_active:
+            raise ValueError("This staff member is not assigned to the selected beauty service")
+        start_local = to_local_naive(start_dt, catalog.timezone)
+        if start_dt.tzinfo is None:
+            start_dt = start_dt.replace(tzinfo=tz)
+        planned.append((service, staff_id, start_dt, start_local, start_local + timedelta(minutes=service.duration_min)))
+
+    target_date = planned[0][3].date()
+    if any(start_local.date() != target_date for _, _, _, start_local, _ in planned):
+        raise ValueError("All itinerary services must be on the same day")
+
+    # el mismo staff no puede tener dos pasos encimados (buffers incluidos)
+    if _same_staff_clash(
+        [
+            (staff_id, start, end, service.buffer_before_min, service.buffer_after_min)
+            for service, staff_id, _, start, end in planned
+        ]
+    ):
+        raise ValueError("Itinerary services overlap for the same staff member")
+
+    # locks en orden fijo (dos itinerarios con el mismo staff no se bloquean cruzado) y
+    # después una sola lectura de la agenda: con el lock tomado ya no puede cambiar. Por
+    # eso el lock es obligatorio aquí, aunque BOOKING_LOCK_MODE sea none
+    lock_mode = required_lock_mode(session, lock_mode)
+    staff_ids = sorted({staff_id for _, staff_id, *_ in planned})
+    for staff_id in staff_ids:
+        lock_resource(session, "staff", staff_id, lock_mode)
+
+    days = _load_days(session, catalog, staff_ids, target_date)
+    bookings = []
+    for service, staff_id, start_dt, start_local, end_local in planned:
+        day = days.get(staff_id)
+        if day is None or not day.can_take(start_local, end_local, service.buffer_before_min, service.buffer_after_min):
+            session.rollback()
+            record_conflict("staff")
+            raise ValueError("Slot is already booked")
+        end_dt = start_dt + timedelta(minutes=service.duration_min)
+        bookings.append(add_beauty_booking(
+            session, staff_id, service.id, start_dt, end_dt, service.buffer_before_min, service.buffer_after_min
+        ))
+
+    if before_commit is not None:
+        session.flush()
+        before_commit(bookings)
+    session.commit()
+    return bookings
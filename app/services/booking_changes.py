@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from typing import NamedTuple
+
+from sqlalchemy import event, func, inspect, literal_column, select, tuple_
+from sqlalchemy.orm import Session, object_session
+
+from app.models.beauty_booking import BeautyBooking
+from app.models.booking import Booking
+
+
+# Log de cambios para sincronización incremental (calendarios de staff/barberos).
+#
+# Cada insert/update de un booking estampa change_seq + change_op en la misma fila:
+# - Postgres: change_seq = xid de la transacción (pg_current_xact_id). Al leer solo se
+#   devuelven filas con xid < xmin del snapshot, es decir, de transacciones que ya
+#   terminaron: una transacción vieja que hace commit tarde no puede quedar detrás
+#   de un cursor que ya la pasó.
+# - SQLite (dev/tests): un solo escritor a la vez, max(change_seq) + 1 ya sigue el
+#   orden de commit.
+# El cursor es (change_seq, id): varias filas de una misma transacción comparten xid.
+# Las escrituras con update() de Core tienen que agregar change_values() a .values().
+#
+# En Postgres el feed avanza hasta la transacción abierta más vieja de toda la base: una
+# transacción que se queda abierta (idle in transaction, un reporte largo) detiene el
+# feed de todos mientras dure. No se pierde nada, pero conviene acotarla en el servidor
+# con idle_in_transaction_session_timeout / statement_timeout.
+#
+# changed_at guarda la hora del último cambio: el archivado (archive_service) no mueve
+# filas cambiadas dentro de la ventana de sincronización, así un "cancel" le llega a los
+# clientes antes de que la fila salga de la tabla caliente.
+
+MAX_CHANGES_LIMIT = 1000
+
+CHANGE_OPS = ("insert", "update", "cancel")
+
+# xmin del snapshot actual: toda transacción con xid menor ya terminó
+_PG_VISIBLE_LIMIT = literal_column("pg_snapshot_xmin(pg_current_snapshot())::text::bigint")
+
+
+class ChangeCursor(NamedTuple):
+    seq: int
+    id: int
+
+    def __str__(self) -> str:
+        return f"{self.seq}.{self.id}"
+
+
+START = ChangeCursor(0, 0)
+
+
+def parse_cursor(value: str | None) -> ChangeCursor:
+    """ChangeCursor de "seq.id"; vacío = desde el principio. ValueError si no es válido."""
+    if not value:
+        return START
+    seq, sep, booking_id = value.partition(".")
+    if not sep or not seq.isdigit() or not booking_id.isdigit():
+        raise ValueError("Invalid cursor")
+    return ChangeCursor(int(seq), int(booking_id))
+
+
+def _seq_expr(dialect_name: str, table):
+    if dialect_name == "postgresql":
+        return literal_column("pg_current_xact_id()::text::bigint")
+    return select(func.coalesce(func.max(table.c.change_seq), 0) + 1).scalar_subquery()
+
+
+def change_values(session: Session, model, op: str) -> dict:
+    """Valores extra para un update() de Core sobre `model` (Booking | BeautyBooking)."""
+    if op not in CHANGE_OPS:
+        raise ValueError(f"Invalid change op: {op}")
+    dialect_name = session.get_bind().dialect.name
+    return {
+        "change_seq": _seq_expr(dialect_name, model.__table__),
+        "change_op": op,
+        "changed_at": datetime.now(timezone.utc),
+    }
+
+
+def _stamp_insert(mapper, connection, target) -> None:
+    target.change_seq = _seq_expr(connection.dialect.name, mapper.local_table)
+    target.change_op = "insert"
+    target.changed_at = datetime.now(timezone.utc)
+
+
+def _stamp_update(mapper, connection, target) -> None:
+    session = object_session(target)
+    if session is not None and not session.is_modified(target, include_collections=False):
+        return
+    status = inspect(target).attrs.status.history
+    cancelled = status.has_changes() and target.status == "cancelled"
+    target.change_seq = _seq_expr(connection.dialect.name, mapper.local_table)
+    target.change_op = "cancel" if cancelled else "update"
+    target.changed_at = datetime.now(timezone.utc)
+
+
+for _model in (Booking, BeautyBooking):
+    event.listen(_model, "before_insert", _stamp_insert)
+    event.listen(_model, "before_update", _stamp_update)
+
+
+class ChangePage(NamedTuple):
+    items: list
+    cursor: ChangeCursor
+    has_more: bool
+
+
+def changes_since(db: Session, model, owner_column, owner_id: int, since: ChangeCursor, limit: int) -> ChangePage:
+    """
+    Bookings de un barbero/staff que cambiaron después de `since`, en orden de cambio.
+    Usa el índice (owner, change_seq, id): una actualización sin cambios es un range
+    scan vacío.
+    """
+    stmt = (
+        select(model)
+        .where(
+            owner_column == owner_id,
+            tuple_(model.change_seq, model.id) > tuple_(since.seq, since.id),
+        )
+        .order_by(model.change_seq, model.id)
+        .limit(limit + 1)
+    )
+    if db.get_bind().dialect.name == "postgresql":
+        stmt = stmt.where(model.change_seq < _PG_VISIBLE_LIMIT)
+
+    rows = list(db.execute(stmt).scalars().all())
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    cursor = ChangeCursor(rows[-1].change_seq, rows[-1].id) if rows else since
+    return ChangePage(rows, cursor, has_more)
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import os
+import time
+
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+
+from app.core.metrics import counter, histogram
+from app.models.barber import Barber
+from app.models.staff import Staff
+
+
+# Serialización de escrituras por recurso (barbero/staff) antes del chequeo de traslape:
+# - none: sin lock (comportamiento original)
+# - row: SELECT ... FOR UPDATE sobre la fila de barbers/staff
+# - advisory: pg_advisory_xact_lock(namespace, resource_id)
+# En ambos casos el lock vive hasta el commit/rollback de la transacción.
+LOCK_MODES = ("none", "row", "advisory")
+
+BOOKING_LOCK_MODE = os.getenv("BOOKING_LOCK_MODE", "none")
+
+if BOOKING_LOCK_MODE not in LOCK_MODES:
+    raise RuntimeError(f"BOOKING_LOCK_MODE invalido: {BOOKING_LOCK_MODE}. Opciones: {', '.join(LOCK_MODES)}")
+
+RESOURCE_MODELS = {
+    "barber": Barber,
+    "staff": Staff,
+}
+
+# primer argumento de pg_advisory_xact_lock(int, int) para no chocar ids de tablas distintas
+ADVISORY_NAMESPACES = {
+    "barber": 1001,
+    "staff": 1002,
+}
+
+LOCK_WAIT_SECONDS = histogram(
+    "booking_lock_wait_seconds",
+    "Time spent waiting for the per-resource booking lock",
+    ("resource", "mode"),
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+
+BOOKING_CONFLICTS = counter(
+    "booking_conflicts_total",
+    "Booking attempts rejected because the slot was already booked",
+    ("resource",),
+)
+
+
+def lock_resource(session: Session, resource: str, resource_id: int, mode: str | None = None) -> float:
+    """
+    Toma el lock del recurso dentro de la transacción actual.
+    Devuelve los segundos esperados (0.0 si mode == "none").
+    """
+    mode = mode or BOOKING_LOCK_MODE
+
+    if mode not in LOCK_MODES:
+        raise ValueError(f"Invalid lock mode: {mode}")
+
+    if resource not in RESOURCE_MODELS:
+        raise ValueError(f"Invalid lock resource: {resource}")
+
+    if mode == "none":
+        return 0.0
+
+    started = time.perf_counter()
+
+    if mode == "row":
+        model = RESOURCE_MODELS[resource]
+        session.execute(select(model.id).where(model.id == resource_id).with_for_update())
+    else:
+        session.execute(select(func.pg_advisory_xact_lock(ADVISORY_NAMESPACES[resource], resource_id)))
+
+    waited = time.perf_counter() - started
+    LOCK_WAIT_SECONDS.observe(waited, resource=resource, mode=mode)
+    return waited
+
+
+def required_lock_mode(session: Session, mode: str | None = None) -> str:
+    """
+    Modo para los caminos que eligen staff/horario con una lectura previa y revisan el
+    traslape después del lock (auto-asignación, itinerarios): sin lock esa revisión no
+    protege de nada, así que "none" (explícito o por BOOKING_LOCK_MODE) se cambia por
+    advisory en Postgres (no bloquea las escrituras sobre la fila del staff) y por row
+    en los demás motores.
+    """
+    mode = mode or BOOKING_LOCK_MODE
+    if mode != "none":
+        return mode
+    return "advisory" if session.get_bind().dialect.name == "postgresql" else "row"
+
+
+def record_conflict(resource: str) -> None:
+    BOOKING_CONFLICTS.inc(resource=resource)
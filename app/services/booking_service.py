@@ -1,31 +1,89 @@
 from __future__ import annotations
-from datetime import datetime
-from sqlalchemy import select, and_
+from datetime import datetime, timedelta
+from typing import Callable
+from sqlalchemy import select, update, and_
 from sqlalchemy.orm import Session
 
+from app.core.availability_events import record_change, dates_between
+from app.core.resource_versions import business_timezone
+from app.core.occupancy import MAX_BUFFER_MIN, as_utc, padded
 from app.models.booking import Booking
+from app.models.service import Service
+from app.models.availability_exception import AvailabilityException
+from app.services.booking_changes import change_values
+from app.services.booking_locks import lock_resource, record_conflict
 
 
-def has_overlap(session: Session, barber_id: int, start_dt: datetime, end_dt: datetime) -> bool:
+def has_overlap(
+    session: Session,
+    barber_id: int,
+    start_dt: datetime,
+    end_dt: datetime,
+    exclude_booking_id: int | None = None,
+    buffer_before_min: int = 0,
+    buffer_after_min: int = 0,
+) -> bool:
+    """
+    Traslape contando buffers: el nuevo ocupa [start - before, end + after) y cada
+    booking existente lo mismo con los de su servicio. El SQL filtra con el margen
+    máximo de buffer (una consulta, sin aritmética de fechas del motor) y el cruce
+    exacto se revisa aquí.
+    """
+    new_start, new_end = padded(as_utc(start_dt), as_utc(end_dt), buffer_before_min, buffer_after_min)
+    margin = timedelta(minutes=MAX_BUFFER_MIN)
     # overlap: existing.start < new_end AND existing.end > new_start
     stmt = (
-        select(Booking.id)
+        select(
+            Booking.start_datetime,
+            Booking.end_datetime,
+            Service.buffer_before_min,
+            Service.buffer_after_min,
+        )
+        .join(Service, Service.id == Booking.service_id)
         .where(
             Booking.barber_id == barber_id,
             Booking.status == "confirmed",
-            Booking.start_datetime < end_dt,
-            Booking.end_datetime > start_dt,
+            Booking.start_datetime < new_end + margin,
+            Booking.end_datetime > new_start - margin,
         )
-        .limit(1)
     )
-    return session.execute(stmt).first() is not None
+    # en un reschedule el booking no choca consigo mismo
+    if exclude_booking_id is not None:
+        stmt = stmt.where(Booking.id != exclude_booking_id)
+    for row in session.execute(stmt):
+        start, end = padded(
+            as_utc(row.start_datetime), as_utc(row.end_datetime), row.buffer_before_min, row.buffer_after_min
+        )
+        if start < new_end and end > new_start:
+            return True
+    return False
 
 
-def create_booking(session: Session, barber_id: int, service_id: int, start_dt: datetime, end_dt: datetime) -> Booking:
+def create_booking(
+    session: Session,
+    barber_id: int,
+    service_id: int,
+    start_dt: datetime,
+    end_dt: datetime,
+    lock_mode: str | None = None,
+    buffer_before_min: int = 0,
+    buffer_after_min: int = 0,
+    before_commit: Callable[[Booking], None] | None = None,
+) -> Booking:
+    """
+    Crea el booking con lock del barbero y revisión de traslape. `before_commit` recibe el
+    booking ya insertado (flush) y escribe en la misma transacción (ej. la respuesta de
+    una Idempotency-Key): o quedan los dos o ninguno.
+    """
     if end_dt <= start_dt:
         raise ValueError("end_datetime must be greater than start_datetime")
 
-    if has_overlap(session, barber_id, start_dt, end_dt):
+    # serializa escritores del mismo barbero (lock hasta el commit)
+    lock_resource(session, "barber", barber_id, lock_mode)
+
+    if has_overlap(session, barber_id, start_dt, end_dt, None, buffer_before_min, buffer_after_min):
+        session.rollback()
+        record_conflict("barber")
         raise ValueError("Slot is already booked")
 
     booking = Booking(
@@ -36,6 +94,13 @@ def create_booking(session: Session, barber_id: int, service_id: int, start_dt:
         status="confirmed",
     )
     session.add(booking)
+    tz_name = business_timezone(session, "barber", barber_id)
+    # con buffers: una limpieza que pasa de medianoche también cambia los slots del día siguiente
+    days = dates_between(*padded(start_dt, end_dt, buffer_before_min, buffer_after_min), tz_name)
+    record_change(session, "barber", barber_id, days, "booking_created")
+    if before_commit is not None:
+        session.flush()
+        before_commit(booking)
     session.commit()
     session.refresh(booking)
     return booking
@@ -56,11 +121,170 @@ def list_bookings_in_range(session: Session, barber_id: int, start_dt: datetime,
 
 
 def cancel_booking(session: Session, booking_id: int) -> Booking:
-    booking = session.get(Booking, booking_id)
-    if not booking:
+    found = session.execute(
+        select(Booking, Service.buffer_before_min, Service.buffer_after_min)
+        .join(Service, Service.id == Booking.service_id)
+        .where(Booking.id == booking_id)
+    ).first()
+    if not found:
         raise ValueError("Booking not found")
+    booking, before, after = found
 
     booking.status = "cancelled"
+    tz_name = business_timezone(session, "barber", booking.barber_id)
+    record_change(
+        session,
+        "barber",
+        booking.barber_id,
+        dates_between(*padded(booking.start_datetime, booking.end_datetime, before, after), tz_name),
+        "booking_cancelled",
+    )
+    session.commit()
+    session.refresh(booking)
+    return booking
+
+
+def reschedule_booking(
+    session: Session,
+    barber_id: int,
+    booking_id: int,
+    start_dt: datetime,
+    end_dt: datetime,
+    lock_mode: str | None = None,
+) -> Booking:
+    """
+    Mueve un booking confirmado en una sola transacción:
+    lock del barbero -> traslape excluyendo el propio booking -> UPDATE ... RETURNING.
+    """
+    if end_dt <= start_dt:
+        raise ValueError("end_datetime must be greater than start_datetime")
+
+    current = session.execute(
+        select(
+            Booking.start_datetime,
+            Booking.end_datetime,
+            Service.buffer_before_min,
+            Service.buffer_after_min,
+        )
+        .join(Service, Service.id == Booking.service_id)
+        .where(
+            Booking.id == booking_id,
+            Booking.barber_id == barber_id,
+        )
+    ).first()
+    if current is None:
+        raise LookupError("Booking not found")
+
+    lock_resource(session, "barber", barber_id, lock_mode)
+
+    if has_overlap(
+        session,
+        barber_id,
+        start_dt,
+        end_dt,
+        exclude_booking_id=booking_id,
+        buffer_before_min=current.buffer_before_min,
+        buffer_after_min=current.buffer_after_min,
+    ):
+        session.rollback()
+        record_conflict("barber")
+        raise ValueError("Slot is already booked")
+
+    stmt = (
+        update(Booking)
+        .where(
+            Booking.id == booking_id,
+            Booking.barber_id == barber_id,
+            Booking.status == "confirmed",
+        )
+        .values(start_datetime=start_dt, end_datetime=end_dt, **change_values(session, Booking, "update"))
+        .returning(Booking)
+    )
+    booking = session.execute(stmt).scalars().first()
+
+    # se canceló entre la lectura y el update
+    if booking is None:
+        session.rollback()
+        raise ValueError("Only confirmed bookings can be rescheduled")
+
+    tz_name = business_timezone(session, "barber", barber_id)
+    buffers = (current.buffer_before_min, current.buffer_after_min)
+    record_change(
+        session,
+        "barber",
+        barber_id,
+        dates_between(*padded(current.start_datetime, current.end_datetime, *buffers), tz_name)
+        + dates_between(*padded(start_dt, end_dt, *buffers), tz_name),
+        "booking_rescheduled",
+    )
     session.commit()
     session.refresh(booking)
-    return booking
\ No newline at end of file
+    return booking
+
+
+def bulk_cancel_bookings(
+    session: Session,
+    barber_id: int,
+    start_dt: datetime,
+    end_dt: datetime,
+    block_exceptions: list[AvailabilityException] | None = None,
+) -> list[dict]:
+    """
+    Cancela todos los bookings confirmados del barbero que tocan [start_dt, end_dt)
+    con un solo UPDATE ... RETURNING. Devuelve las filas afectadas (para notificar).
+    block_exceptions se insertan en la misma transacción (día libre del recurso).
+    """
+    if end_dt <= start_dt:
+        raise ValueError("end_datetime must be greater than start_datetime")
+
+    stmt = (
+        update(Booking)
+        .where(
+            Booking.barber_id == barber_id,
+            Booking.status == "confirmed",
+            Booking.start_datetime < end_dt,
+            Booking.end_datetime > start_dt,
+        )
+        .values(status="cancelled", **change_values(session, Booking, "cancel"))
+        .returning(
+            Booking.id,
+            Booking.barber_id,
+            Booking.service_id,
+            Booking.start_datetime,
+            Booking.end_datetime,
+            Booking.status,
+            Booking.created_at,
+            # buffers del servicio: los días publicados incluyen lo que ocupa cada booking
+            *(
+                select(column)
+                .where(Service.id == Booking.service_id)
+                .correlate(Booking)
+                .scalar_subquery()
+                .label(column.key)
+                for column in (Service.buffer_before_min, Service.buffer_after_min)
+            ),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    rows = [dict(r) for r in session.execute(stmt).mappings().all()]
+
+    if rows:
+        tz_name = business_timezone(session, "barber", barber_id)
+        days = set()
+        for r in rows:
+            before, after = r.pop("buffer_before_min"), r.pop("buffer_after_min")
+            days.update(dates_between(*padded(r["start_datetime"], r["end_datetime"], before, after), tz_name))
+        record_change(session, "barber", barber_id, days, "booking_cancelled")
+
+    if block_exceptions:
+        session.add_all(block_exceptions)
+        blocked_days = set()
+        for e in block_exceptions:
+            day = e.start_date
+            while day <= e.end_date:
+                blocked_days.add(day)
+                day += timedelta(days=1)
+        record_change(session, "barber", barber_id, blocked_days, "exception_created")
+
+    session.commit()
+    return sorted(rows, key=lambda r: (r["start_datetime"], r["id"]))
@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import hashlib
+import hmac
+import os
+from datetime import datetime, time, timedelta, timezone
+from typing import Iterator, NamedTuple
+
+from sqlalchemy import select
+
+from app.core.resource_versions import ANY_SCOPE, VersionKey
+from app.core.security import SECRET_KEY
+from app.db.session import SessionLocal
+from app.models.barber import Barber
+from app.models.beauty_booking import BeautyBooking
+from app.models.beauty_service import BeautyService
+from app.models.booking import Booking
+from app.models.service import Service
+from app.models.staff import Staff
+
+
+# Feed iCalendar (.ics) por barbero/staff para suscribirse desde el calendario del teléfono.
+#
+# Las apps de calendario piden la URL cada pocos minutos: el ETag sale de las versiones
+# del dueño (resource_versions) + el día de inicio de la ventana, así un feed sin cambios
+# es un 304 con una sola consulta. El cuerpo se arma solo con datos de la DB (DTSTAMP =
+# created_at), así que para una misma versión es idéntico byte a byte: el ETag es fuerte.
+#
+# La URL lleva un token HMAC en vez del JWT (las apps no mandan headers). Cambiar
+# CALENDAR_FEED_SECRET invalida todas las URLs entregadas.
+
+CALENDAR_FEED_SECRET = os.getenv("CALENDAR_FEED_SECRET", SECRET_KEY)
+CALENDAR_FEED_PAST_DAYS = int(os.getenv("CALENDAR_FEED_PAST_DAYS", "30"))
+CALENDAR_FEED_FUTURE_DAYS = int(os.getenv("CALENDAR_FEED_FUTURE_DAYS", "180"))
+
+if not CALENDAR_FEED_SECRET:
+    raise RuntimeError("CALENDAR_FEED_SECRET invalido: no puede estar vacío")
+if CALENDAR_FEED_PAST_DAYS < 0:
+    raise RuntimeError(f"CALENDAR_FEED_PAST_DAYS invalido: {CALENDAR_FEED_PAST_DAYS}. Debe ser >= 0")
+if CALENDAR_FEED_FUTURE_DAYS < 1:
+    raise RuntimeError(f"CALENDAR_FEED_FUTURE_DAYS invalido: {CALENDAR_FEED_FUTURE_DAYS}. Debe ser >= 1")
+
+# filas por vuelta del cursor de servidor (y por chunk de la respuesta)
+FEED_BATCH_SIZE = 200
+
+_KINDS = {"b": "barber", "s": "staff"}
+_PREFIXES = {kind: prefix for prefix, kind in _KINDS.items()}
+
+
+class FeedOwner(NamedTuple):
+    kind: str   # "barber" | "staff"
+    id: int
+
+
+class FeedWindow(NamedTuple):
+    start: datetime
+    end: datetime
+
+    @property
+    def rolled_at(self) -> datetime:
+        """00:00 UTC del día en curso: cuando la ventana se movió por última vez."""
+        return self.start + timedelta(days=CALENDAR_FEED_PAST_DAYS)
+
+
+def _signature(kind: str, owner_id: int) -> str:
+    message = f"calendar:{kind}:{owner_id}".encode()
+    return hmac.new(CALENDAR_FEED_SECRET.encode(), message, hashlib.sha256).hexdigest()[:32]
+
+
+def feed_token(kind: str, owner_id: int) -> str:
+    """Token de la URL del feed: "<b|s><id>-<firma>"."""
+    return f"{_PREFIXES[kind]}{owner_id}-{_signature(kind, owner_id)}"
+
+
+def parse_feed_token(token: str) -> FeedOwner:
+    """FeedOwner de un token de feed_token(). ValueError si no es válido."""
+    head, sep, signature = token.partition("-")
+    kind = _KINDS.get(head[:1])
+    if not sep or kind is None or not head[1:].isdigit():
+        raise ValueError("Invalid calendar token")
+    owner = FeedOwner(kind, int(head[1:]))
+    if not hmac.compare_digest(signature, _signature(owner.kind, owner.id)):
+        raise ValueError("Invalid calendar token")
+    return owner
+
+
+def feed_window(now: datetime | None = None) -> FeedWindow:
+    """Ventana móvil en UTC, en días completos: cambia una vez al día."""
+    today = (now or datetime.now(timezone.utc)).astimezone(timezone.utc).date()
+    start = datetime.combine(today - timedelta(days=CALENDAR_FEED_PAST_DAYS), time.min, tzinfo=timezone.utc)
+    return FeedWindow(start, start + timedelta(days=CALENDAR_FEED_PAST_DAYS + CALENDAR_FEED_FUTURE_DAYS + 1))
+
+
+def version_keys(owner: FeedOwner) -> list[VersionKey]:
+    """Lo que puede cambiar el cuerpo del feed: bookings, nombre del dueño y de los servicios."""
+    if owner.kind == "barber":
+        # ("barber", id) ya cubre sus bookings y su nombre
+        return [VersionKey("barber", owner.id), VersionKey("services", ANY_SCOPE)]
+    business = select(Staff.business_id).where(Staff.id == owner.id).scalar_subquery()
+    return [
+        VersionKey("staff_bookings", owner.id),
+        VersionKey("staff", business),
+        VersionKey("beauty_services", business),
+    ]
+
+
+def owner_name(db, owner: FeedOwner) -> str | None:
+    """Nombre para X-WR-CALNAME; None si el barbero/staff ya no existe."""
+    model = Barber if owner.kind == "barber" else Staff
+    return db.execute(select(model.name).where(model.id == owner.id)).scalar()
+
+
+def _bookings_stmt(owner: FeedOwner, window: FeedWindow):
+    if owner.kind == "barber":
+        booking, service, owner_col, service_col = Booking, Service, Booking.barber_id, Booking.service_id
+    else:
+        booking, service, owner_col, service_col = (
+            BeautyBooking, BeautyService, BeautyBooking.staff_id, BeautyBooking.beauty_service_id
+        )
+    # usa el índice (owner, start_datetime)
+    return (
+        select(booking.id, booking.start_datetime, booking.end_datetime, booking.created_at, service.name)
+        .join(service, service.id == service_col)
+        .where(
+            owner_col == owner.id,
+            booking.status == "confirmed",
+            booking.start_datetime >= window.start,
+            booking.start_datetime < window.end,
+        )
+        .order_by(booking.start_datetime, booking.id)
+    )
+
+
+# ---- formato iCalendar (RFC 5545)
+
+
+def _escape(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+        .replace("\r\n", "\\n").replace("\n", "\\n")
+    )
+
+
+def _fold(line: str) -> str:
+    """Parte líneas de más de 75 octetos (continuación = CRLF + espacio)."""
+    raw = line.encode()
+    if len(raw) <= 75:
+        return line + "\r\n"
+    parts = []
+    limit = 75
+    while raw:
+        cut = min(limit, len(raw))
+        # no cortar a la mitad de un caracter UTF-8
+        while cut < len(raw) and (raw[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(raw[:cut].decode())
+        raw = raw[cut:]
+        limit = 74
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _utc_stamp(value: datetime) -> str:
+    # SQLite devuelve naive: se guardó en UTC
+    value = value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _header(name: str) -> str:
+    return "".join(
+        _fold(line)
+        for line in (
+            "BEGIN:VCALENDAR",
+            "VERSION:2.0",
+            "PRODID:-//BeautyBarber//Calendar Feed//ES",
+            "CALSCALE:GREGORIAN",
+            "METHOD:PUBLISH",
+            f"X-WR-CALNAME:{_escape(name)}",
+            "REFRESH-INTERVAL;VALUE=DURATION:PT15M",
+            "X-PUBLISHED-TTL:PT15M",
+        )
+    )
+
+
+def _event(kind: str, row) -> str:
+    return "".join(
+        _fold(line)
+        for line in (
+            "BEGIN:VEVENT",
+            f"UID:{kind}-booking-{row.id}@beautybarber",
+            f"DTSTAMP:{_utc_stamp(row.created_at)}",
+            f"DTSTART:{_utc_stamp(row.start_datetime)}",
+            f"DTEND:{_utc_stamp(row.end_datetime)}",
+            f"SUMMARY:{_escape(row.name)}",
+            "STATUS:CONFIRMED",
+            "END:VEVENT",
+        )
+    )
+
+
+def iter_feed(owner: FeedOwner, name: str, window: FeedWindow) -> Iterator[bytes]:
+    """
+    Cuerpo del .ics en chunks de FEED_BATCH_SIZE eventos. Lee con cursor de servidor
+    (yield_per) en una sesión propia: la del request ya se cerró cuando arranca el stream.
+    """
+    yield _header(name).encode()
+    with SessionLocal() as db:
+        result = db.execute(_bookings_stmt(owner, window), execution_options={"yield_per": FEED_BATCH_SIZE})
+        for rows in result.partitions():
+            yield "".join(_event(owner.kind, row) for row in rows).encode()
+    yield b"END:VCALENDAR\r\n"
@@ -0,0 +1,232 @@
+# app/services/catalog_cache.py
+"""
+Caché en memoria del catálogo de belleza por negocio (tenant).
+
+Por negocio se guarda una foto inmutable con:
+    services          servicios por id
+    staff             staff por id (activos e inactivos)
+    staff_by_service  servicio -> ids de staff asignados (ordenados)
+    timezone          timezone del negocio
+    slot_step_min     paso de slots del negocio (None = duración del servicio)
+
+La foto lleva las versiones de resource_versions con las que se construyó
+(beauty_services, staff, staff_services, business y global). Cada uso las vuelve a
+leer (una consulta, o ninguna si el endpoint ya las leyó para su ETag) y si alguna
+cambió se reconstruye: así los workers se mantienen coherentes sin hablar entre sí.
+Los CRUD de servicios/staff/asignaciones además llaman a invalidate() para que el
+worker que escribió no dependa ni de esa lectura, y el bus de app.core.invalidation
+descarta la foto en los demás workers en cuanto llega el NOTIFY.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Mapping, NamedTuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core import invalidation
+from app.core.resource_versions import VersionKey, read_versions
+from app.models.beauty_service import BeautyService
+from app.models.business import Business
+from app.models.staff import Staff
+from app.models.staff_service import StaffService
+
+CATALOG_CACHE_MAX_TENANTS = int(os.getenv("CATALOG_CACHE_MAX_TENANTS", "512"))
+
+if CATALOG_CACHE_MAX_TENANTS < 0:
+    raise RuntimeError(f"CATALOG_CACHE_MAX_TENANTS invalido: {CATALOG_CACHE_MAX_TENANTS}. Debe ser >= 0 (0 desactiva)")
+
+# recursos de resource_versions de los que depende la foto (global se agrega al leer)
+RESOURCES = ("beauty_services", "staff", "staff_services", "business")
+
+
+class ServiceEntry(NamedTuple):
+    id: int
+    business_id: int
+    name: str
+    duration_min: int
+    price: Decimal
+    is_active: bool
+    buffer_before_min: int = 0
+    buffer_after_min: int = 0
+
+
+class StaffEntry(NamedTuple):
+    id: int
+    business_id: int
+    name: str
+    is_active: bool
+
+
+class TenantCatalog(NamedTuple):
+    business_id: int
+    versions: tuple[int, ...]  # en el orden de RESOURCES + global
+    timezone: str | None
+    services: dict[int, ServiceEntry]
+    staff: dict[int, StaffEntry]
+    staff_by_service: dict[int, tuple[int, ...]]
+    slot_step_min: int | None = None
+
+    def is_assigned(self, staff_id: int, service_id: int) -> bool:
+        return staff_id in self.staff_by_service.get(service_id, ())
+
+    def active_staff_for(self, service_id: int) -> list[StaffEntry]:
+        return [
+            self.staff[staff_id]
+            for staff_id in self.staff_by_service.get(service_id, ())
+            if self.staff[staff_id].is_active
+        ]
+
+
+_lock = threading.Lock()
+_tenants: OrderedDict[int, TenantCatalog] = OrderedDict()
+# id -> business_id; el negocio de un servicio/staff no cambia, así que no se versiona.
+# Solo guarda ids de fotos en _tenants: se poda junto con ellas para no crecer sin límite
+_service_business: dict[int, int] = {}
+_staff_business: dict[int, int] = {}
+
+
+def _forget(catalog: TenantCatalog) -> None:
+    """Quita del índice inverso los ids de una foto que sale de _tenants (con _lock)."""
+    for service_id in catalog.services:
+        if _service_business.get(service_id) == catalog.business_id:
+            del _service_business[service_id]
+    for staff_id in catalog.staff:
+        if _staff_business.get(staff_id) == catalog.business_id:
+            del _staff_business[staff_id]
+
+
+def _version_keys(business_id: int) -> list[VersionKey]:
+    return [VersionKey(resource, business_id) for resource in RESOURCES]
+
+
+def _current_versions(db: Session, business_id: int, known: Mapping[str, int] | None) -> tuple[int, ...]:
+    names = RESOURCES + ("global",)
+    if known is not None and all(name in known for name in names):
+        return tuple(known[name] for name in names)
+    return read_versions(db, _version_keys(business_id)).values
+
+
+def _load(db: Session, business_id: int, versions: tuple[int, ...]) -> TenantCatalog:
+    # solo columnas: sin identity map ni los selectin de Staff/BeautyService
+    services = {
+        row.id: ServiceEntry(
+            row.id,
+            business_id,
+            row.name,
+            row.duration_min,
+            row.price,
+            row.is_active,
+            row.buffer_before_min,
+            row.buffer_after_min,
+        )
+        for row in db.execute(
+            select(
+                BeautyService.id,
+                BeautyService.name,
+                BeautyService.duration_min,
+                BeautyService.price,
+                BeautyService.is_active,
+                BeautyService.buffer_before_min,
+                BeautyService.buffer_after_min,
+            ).where(BeautyService.business_id == business_id)
+        )
+    }
+    staff = {
+        row.id: StaffEntry(row.id, business_id, row.name, row.is_active)
+        for row in db.execute(
+            select(Staff.id, Staff.name, Staff.is_active).where(Staff.business_id == business_id)
+        )
+    }
+    adjacency: dict[int, list[int]] = {}
+    for row in db.execute(
+        select(StaffService.staff_id, StaffService.beauty_service_id)
+        .join(Staff, Staff.id == StaffService.staff_id)
+        .where(Staff.business_id == business_id)
+    ):
+        if row.beauty_service_id in services:
+            adjacency.setdefault(row.beauty_service_id, []).append(row.staff_id)
+    business = db.execute(select(Business.timezone, Business.slot_step_min).where(Business.id == business_id)).first()
+
+    return TenantCatalog(
+        business_id=business_id,
+        versions=versions,
+        timezone=business.timezone if business else None,
+        services=services,
+        staff=staff,
+        staff_by_service={service_id: tuple(sorted(ids)) for service_id, ids in adjacency.items()},
+        slot_step_min=business.slot_step_min if business else None,
+    )
+
+
+def tenant_catalog(db: Session, business_id: int, known: Mapping[str, int] | None = None) -> TenantCatalog:
+    """
+    Catálogo vigente del negocio. `known` son versiones ya leídas en este request
+    (Conditional.versions.by_resource): si cubren todo no se consulta nada.
+    """
+    # las versiones se leen antes de cargar: si alguien escribe en medio, la foto queda
+    # con la versión vieja y el siguiente request la reconstruye
+    versions = _current_versions(db, business_id, known)
+    with _lock:
+        cached = _tenants.get(business_id)
+        if cached is not None and cached.versions == versions:
+            _tenants.move_to_end(business_id)
+            return cached
+
+    catalog = _load(db, business_id, versions)
+    if CATALOG_CACHE_MAX_TENANTS:
+        with _lock:
+            previous = _tenants.pop(business_id, None)
+            if previous is not None:
+                _forget(previous)  # servicios/staff borrados desde la foto anterior
+            _tenants[business_id] = catalog
+            while len(_tenants) > CATALOG_CACHE_MAX_TENANTS:
+                _forget(_tenants.popitem(last=False)[1])
+            _service_business.update((service_id, business_id) for service_id in catalog.services)
+            _staff_business.update((staff_id, business_id) for staff_id in catalog.staff)
+    return catalog
+
+
+def business_of_service(db: Session, service_id: int) -> int | None:
+    business_id = _service_business.get(service_id)
+    if business_id is None:
+        business_id = db.execute(select(BeautyService.business_id).where(BeautyService.id == service_id)).scalar()
+    return business_id
+
+
+def business_of_staff(db: Session, staff_id: int) -> int | None:
+    business_id = _staff_business.get(staff_id)
+    if business_id is None:
+        business_id = db.execute(select(Staff.business_id).where(Staff.id == staff_id)).scalar()
+    return business_id
+
+
+def invalidate(business_id: int) -> None:
+    """Descarta la foto del negocio en este worker (los demás lo notan por versión)."""
+    with _lock:
+        catalog = _tenants.pop(business_id, None)
+        if catalog is not None:
+            _forget(catalog)
+
+
+def clear() -> None:
+    with _lock:
+        _tenants.clear()
+        _service_business.clear()
+        _staff_business.clear()
+
+
+def _on_invalidation(items) -> None:
+    for item in items:
+        if item.entity in ("global", "resync"):
+            clear()
+            return
+        if item.entity in RESOURCES and item.tenant:
+            invalidate(item.tenant)
+
+
+invalidation.register(_on_invalidation)
@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, NamedTuple
+
+from sqlalchemy import select, delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.models.idempotency_key import IdempotencyKey
+
+
+IDEMPOTENCY_TTL = timedelta(hours=24)
+
+
+def request_fingerprint(*parts: Any) -> str:
+    # JSON canónico (keys ordenadas) -> sha256
+    raw = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def get_idempotent_response(session: Session, scope: str, key: str, fingerprint: str) -> IdempotencyKey | None:
+    """
+    Busca una respuesta guardada (una sola lectura por el índice único scope+key).
+    Lanza ValueError si la key ya se usó con un request distinto.
+    """
+    stmt = select(IdempotencyKey).where(
+        IdempotencyKey.scope == scope,
+        IdempotencyKey.key == key,
+        IdempotencyKey.expires_at > datetime.now(timezone.utc),
+    )
+    stored = session.execute(stmt).scalars().first()
+
+    if stored is None:
+        return None
+
+    if stored.request_hash != fingerprint:
+        raise ValueError("Idempotency-Key was already used with a different request")
+
+    return stored
+
+
+class IdempotencyClaim(NamedTuple):
+    record: IdempotencyKey
+    replayed: bool  # True: otro request ya guardó la respuesta y `record` es esa
+
+
+def claim_idempotency_key(session: Session, scope: str, key: str, fingerprint: str) -> IdempotencyClaim:
+    """
+    Reserva la key en la transacción del booking (flush, sin commit) antes de escribir.
+    Un reintento concurrente con la misma key se queda esperando en el índice único hasta
+    que el primero termina: si hizo commit, choca y responde lo guardado; si falló (rollback
+    del booking), la key queda libre y este request la toma. La respuesta se llena con
+    store_idempotent_response antes del commit del booking: key y booking quedan juntos.
+    Lanza ValueError si la key ya se usó con un request distinto.
+    """
+    now = datetime.now(timezone.utc)
+    # una key vencida que el purge todavía no borró no puede bloquear la nueva
+    session.execute(
+        delete(IdempotencyKey)
+        .where(
+            IdempotencyKey.scope == scope,
+            IdempotencyKey.key == key,
+            IdempotencyKey.expires_at <= now,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    record = IdempotencyKey(
+        scope=scope,
+        key=key,
+        request_hash=fingerprint,
+        response_status=0,  # se llena antes del commit
+        response_body={},
+        expires_at=now + IDEMPOTENCY_TTL,
+    )
+    session.add(record)
+    try:
+        session.flush()
+    except IntegrityError:
+        # la key es lo primero que escribe la transacción: el rollback no pierde nada
+        session.rollback()
+        stored = get_idempotent_response(session, scope, key, fingerprint)
+        if stored is None:
+            raise ValueError("Idempotency-Key is being used by another request")
+        return IdempotencyClaim(stored, True)
+    return IdempotencyClaim(record, False)
+
+
+def store_idempotent_response(claim: IdempotencyClaim, status_code: int, body: dict) -> None:
+    """Llena la respuesta de una key reservada; se guarda con el commit de quien llama."""
+    claim.record.response_status = status_code
+    claim.record.response_body = body
+
+
+def purge_expired_idempotency_keys(session: Session, batch_size: int = 1000) -> int:
+    """Borra keys expiradas por lotes. Devuelve cuántas se borraron."""
+    total = 0
+
+    while True:
+        expired = (
+            select(IdempotencyKey.id)
+            .where(IdempotencyKey.expires_at <= datetime.now(timezone.utc))
+            .limit(batch_size)
+        )
+        result = session.execute(
+            delete(IdempotencyKey)
+            .where(IdempotencyKey.id.in_(expired))
+            .execution_options(synchronize_session=False)
+        )
+        session.commit()
+
+        total += result.rowcount
+        if result.rowcount < batch_size:
+            return total
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import os
+from datetime import datetime, timedelta
+from typing import Callable, Sequence
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.models.beauty_booking import BeautyBooking
+from app.services.availability_exception_service import exceptions_for_day, is_business_closed, to_local_naive
+from app.services.beauty_booking_service import add_beauty_booking, has_overlap
+from app.services.booking_locks import lock_resource, record_conflict, required_lock_mode
+from app.services.catalog_cache import ServiceEntry, TenantCatalog
+from app.services.staff_day import StaffDay, load_staff_days
+
+
+# Asignación automática de staff: el cliente manda servicio + hora y el servidor elige
+# quién lo atiende. Candidatos = staff activo asignado al servicio (catálogo en memoria);
+# reglas y bookings de todos en dos consultas (staff_day), sin calcular la matriz de slots.
+# Política:
+# - least_booked: el que tiene menos minutos reservados ese día
+# - round_robin: el que lleva más tiempo sin recibir un booking (último id), igual en todos los workers
+# - preferred: el primero libre de preferred_staff_ids; si ninguno, least_booked
+ASSIGN_POLICIES = ("least_booked", "round_robin", "preferred")
+
+BEAUTY_ASSIGN_POLICY = os.getenv("BEAUTY_ASSIGN_POLICY", "least_booked")
+
+if BEAUTY_ASSIGN_POLICY not in ASSIGN_POLICIES:
+    raise RuntimeError(
+        f"BEAUTY_ASSIGN_POLICY invalido: {BEAUTY_ASSIGN_POLICY}. Opciones: {', '.join(ASSIGN_POLICIES)}"
+    )
+
+
+def rank_candidates(
+    db: Session,
+    days: dict[int, StaffDay],
+    free_ids: Sequence[int],
+    policy: str,
+    preferred_staff_ids: Sequence[int] = (),
+) -> list[int]:
+    """Staff libres en el orden en que se intentan."""
+    least_booked = sorted(free_ids, key=lambda staff_id: (days[staff_id].booked_minutes, staff_id))
+    if policy == "least_booked":
+        return least_booked
+
+    if policy == "round_robin":
+        last_booking = dict(
+            db.execute(
+                select(BeautyBooking.staff_id, func.max(BeautyBooking.id))
+                .where(BeautyBooking.staff_id.in_(list(free_ids)))
+                .group_by(BeautyBooking.staff_id)
+            ).all()
+        )
+        return sorted(free_ids, key=lambda staff_id: (last_booking.get(staff_id, 0), staff_id))
+
+    free = set(free_ids)
+    preferred = [staff_id for staff_id in dict.fromkeys(preferred_staff_ids) if staff_id in free]
+    return preferred + [staff_id for staff_id in least_booked if staff_id not in preferred]
+
+
+def auto_assign_beauty_booking(
+    session: Session,
+    catalog: TenantCatalog,
+    service: ServiceEntry,
+    start_dt: datetime,
+    policy: str | None = None,
+    preferred_staff_ids: Sequence[int] = (),
+    lock_mode: str | None = None,
+    before_commit: Callable[[BeautyBooking], None] | None = None,
+) -> BeautyBooking:
+    """
+    Crea el booking con el mejor staff libre a `start_dt` (naive = hora local del negocio).
+    Con el lock de cada candidato se vuelve a revisar el traslape: si otro request ganó
+    el hueco se pasa al siguiente. ValueError si nadie puede. `before_commit` como en
+    create_beauty_booking.
+    """
+    policy = policy or BEAUTY_ASSIGN_POLICY
+    if policy not in ASSIGN_POLICIES:
+        raise ValueError(f"Invalid assignment policy: {policy}")
+
+    tz = ZoneInfo(catalog.timezone or "America/Monterrey")
+    duration = timedelta(minutes=service.duration_min)
+    start_local = to_local_naive(start_dt, catalog.timezone)
+    end_local = start_local + duration
+    if start_dt.tzinfo is None:
+        start_dt = start_dt.replace(tzinfo=tz)
+    end_dt = start_dt + duration
+
+    eligible = [staff.id for staff in catalog.active_staff_for(service.id)]
+    if not eligible:
+        raise ValueError("No staff is assigned to this beauty service")
+
+    exceptions = exceptions_for_day(session, catalog.business_id, start_local.date())
+    if is_business_closed(exceptions):
+        raise ValueError("No staff available at that time")
+
+    days = load_staff_days(session, eligible, start_local.date(), tz, exceptions)
+    buffers = (service.buffer_before_min, service.buffer_after_min)
+    free_ids = [
+        staff_id for staff_id in eligible if staff_id in days and days[staff_id].can_take(start_local, end_local, *buffers)
+    ]
+
+    # la revisión de traslape de abajo solo vale con un lock real (nunca "none")
+    lock_mode = required_lock_mode(session, lock_mode)
+    for staff_id in rank_candidates(session, days, free_ids, policy, preferred_staff_ids):
+        lock_resource(session, "staff", staff_id, lock_mode)
+        if has_overlap(session, staff_id, start_dt, end_dt, None, *buffers):
+            record_conflict("staff")
+            continue
+        booking = add_beauty_booking(session, staff_id, service.id, start_dt, end_dt, *buffers)
+        if before_commit is not None:
+            session.flush()
+            before_commit(booking)
+        session.commit()
+        session.refresh(booking)
+        return booking
+
+    session.rollback()
+    raise ValueError("No staff available at that time")
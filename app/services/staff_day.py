@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterable, NamedTuple, Sequence
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.instrumentation import BOOKINGS_SCANNED
+from app.core.occupancy import MAX_BUFFER_MIN, Occupancy, padded
+from app.models.availability_exception import AvailabilityException
+from app.models.beauty_booking import BeautyBooking
+from app.models.beauty_service import BeautyService
+from app.models.staff_availability_rule import StaffAvailabilityRule
+from app.services.availability_exception_service import blocked_intervals, is_resource_closed
+
+
+# Agenda de un día para varios staff a la vez (asignación automática, itinerarios):
+# reglas y bookings de todos los candidatos en una consulta cada una, en vez de
+# las dos consultas por staff del motor de slots. Todo en hora local naive.
+
+DAY_NAMES = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+
+class StaffDay(NamedTuple):
+    staff_id: int
+    windows: tuple[tuple[datetime, datetime], ...]  # reglas del día, ordenadas
+    occupancy: Occupancy                            # bookings confirmados (con sus buffers) + bloqueos parciales
+    booked_minutes: int                             # minutos de bookings dentro del día (sin buffers)
+
+    def can_take(self, start: datetime, end: datetime, before_min: int = 0, after_min: int = 0) -> bool:
+        """Con preparación y limpieza incluidas: dentro de una regla y sin traslape."""
+        start, end = padded(start, end, before_min, after_min)
+        return any(w_start <= start and end <= w_end for w_start, w_end in self.windows) and self.occupancy.is_free(
+            start, end
+        )
+
+
+def local_day_bounds(target_date: date, tz: ZoneInfo, margin_min: int = 0) -> tuple[datetime, datetime]:
+    """
+    Inicio y fin (exclusivo) del día local, en UTC para consultar. `margin_min` abre el
+    rango hacia los dos lados: un booking de la víspera cuya limpieza pasa de medianoche
+    también ocupa este día.
+    """
+    margin = timedelta(minutes=margin_min)
+    start = datetime.combine(target_date, time.min, tzinfo=tz) - margin
+    end = datetime.combine(target_date + timedelta(days=1), time.min, tzinfo=tz) + margin
+    return start.astimezone(timezone.utc), end.astimezone(timezone.utc)
+
+
+def to_local(value: datetime, tz: ZoneInfo) -> datetime:
+    """Columna aware -> naive local (SQLite devuelve naive: se guardó en UTC)."""
+    value = value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+    return value.astimezone(tz).replace(tzinfo=None)
+
+
+def load_staff_days(
+    db: Session,
+    staff_ids: Sequence[int],
+    target_date: date,
+    tz: ZoneInfo,
+    exceptions: Iterable[AvailabilityException],
+) -> dict[int, StaffDay]:
+    """
+    StaffDay de cada staff que trabaja ese día (tiene reglas y no está bloqueado todo
+    el día). Dos consultas en total, sin importar cuántos staff.
+    """
+    exceptions = list(exceptions)
+    staff_ids = [staff_id for staff_id in staff_ids if not is_resource_closed(exceptions, staff_id=staff_id)]
+    if not staff_ids:
+        return {}
+
+    windows: dict[int, list[tuple[datetime, datetime]]] = {}
+    for row in db.execute(
+        select(StaffAvailabilityRule.staff_id, StaffAvailabilityRule.start_time, StaffAvailabilityRule.end_time)
+        .where(
+            StaffAvailabilityRule.staff_id.in_(staff_ids),
+            StaffAvailabilityRule.day_of_week == DAY_NAMES[target_date.weekday()],
+        )
+        .order_by(StaffAvailabilityRule.staff_id, StaffAvailabilityRule.start_time)
+    ):
+        start = datetime.combine(target_date, row.start_time)
+        end = datetime.combine(target_date, row.end_time)
+        if start < end:
+            windows.setdefault(row.staff_id, []).append((start, end))
+    if not windows:
+        return {}
+
+    day_start, day_end = local_day_bounds(target_date, tz, MAX_BUFFER_MIN)
+    busy: dict[int, list[tuple[datetime, datetime]]] = {staff_id: [] for staff_id in windows}
+    buffers: dict[int, list[tuple[int, int]]] = {staff_id: [] for staff_id in windows}
+    scanned = 0
+    for row in db.execute(
+        select(
+            BeautyBooking.staff_id,
+            BeautyBooking.start_datetime,
+            BeautyBooking.end_datetime,
+            BeautyService.buffer_before_min,
+            BeautyService.buffer_after_min,
+        )
+        .join(BeautyService, BeautyService.id == BeautyBooking.beauty_service_id)
+        .where(
+            BeautyBooking.staff_id.in_(list(windows)),
+            BeautyBooking.status == "confirmed",
+            BeautyBooking.start_datetime < day_end,
+            BeautyBooking.end_datetime > day_start,
+        )
+    ):
+        scanned += 1
+        busy[row.staff_id].append((to_local(row.start_datetime, tz), to_local(row.end_datetime, tz)))
+        buffers[row.staff_id].append((row.buffer_before_min, row.buffer_after_min))
+    BOOKINGS_SCANNED.inc(scanned, engine="beauty")
+
+    local_start, local_end = datetime.combine(target_date, time.min), datetime.combine(target_date, time.max)
+    days: dict[int, StaffDay] = {}
+    for staff_id, staff_windows in windows.items():
+        bookings = busy[staff_id]
+        booked = sum(
+            max((min(end, local_end) - max(start, local_start)).total_seconds(), 0) for start, end in bookings
+        )
+        days[staff_id] = StaffDay(
+            staff_id,
+            tuple(staff_windows),
+            Occupancy(
+                [padded(start, end, *pad) for (start, end), pad in zip(bookings, buffers[staff_id])]
+                + blocked_intervals(exceptions, target_date, staff_id=staff_id)
+            ),
+            int(booked // 60),
+        )
+    return days
@@ -0,0 +1,123 @@
+# benchmarks/endpoints.py
+"""
+Casos end-to-end vía TestClient (stack completo: middlewares, ORM, serialización).
+La base se toma de DATABASE_URL (Postgres local o SQLite, ver benchmarks.run).
+"""
+from __future__ import annotations
+
+import itertools
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Callable
+
+from fastapi.testclient import TestClient
+
+import app.models as m
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+from app.main import app
+
+from benchmarks.scenarios import BENCH_DATE, Scenario, booking_intervals, rule_windows
+
+DAY_NAMES = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+
+def seed(scenario: Scenario) -> dict:
+    """Esquema limpio + datos del escenario. Devuelve los ids que usan los casos."""
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    rng = random.Random(scenario.seed)
+    db = SessionLocal()
+    try:
+        business = m.Business(name=f"bench {scenario.name}", slug=f"bench-{scenario.name}", timezone="UTC")
+        db.add(business)
+        db.flush()
+
+        service = m.Service(name="Corte", duration_min=scenario.service_minutes, price=100)
+        beauty_service = m.BeautyService(
+            business_id=business.id, name="Uñas", duration_min=scenario.service_minutes, price=200
+        )
+        db.add_all([service, beauty_service])
+        db.flush()
+
+        barbers = []
+        for i in range(scenario.barbers):
+            barber = m.Barber(business_id=business.id, name=f"Barber {i}")
+            barber.services.append(service)
+            db.add(barber)
+            barbers.append(barber)
+
+        staff = [m.Staff(business_id=business.id, name=f"Staff {i}") for i in range(scenario.staff)]
+        db.add_all(staff)
+        db.flush()
+
+        weekday = BENCH_DATE.weekday()
+        for barber in barbers:
+            for rule in rule_windows(scenario, rng):
+                db.add(m.BarberAvailabilityRule(
+                    barber_id=barber.id, day_of_week=weekday, start_time=rule.start_time,
+                    end_time=rule.end_time, slot_minutes=rule.slot_minutes,
+                ))
+            for start, end in booking_intervals(scenario, rng):
+                db.add(m.Booking(barber_id=barber.id, service_id=service.id, start_datetime=start, end_datetime=end))
+
+        for member in staff:
+            db.add(m.StaffService(staff_id=member.id, beauty_service_id=beauty_service.id))
+            for rule in rule_windows(scenario, rng):
+                db.add(m.StaffAvailabilityRule(
+                    staff_id=member.id, day_of_week=DAY_NAMES[weekday],
+                    start_time=rule.start_time, end_time=rule.end_time,
+                ))
+            for start, end in booking_intervals(scenario, rng):
+                db.add(m.BeautyBooking(
+                    staff_id=member.id, beauty_service_id=beauty_service.id,
+                    start_datetime=start, end_datetime=end,
+                ))
+
+        db.commit()
+        return {"barber": barbers[0].id, "service": service.id, "beauty_service": beauty_service.id}
+    finally:
+        db.close()
+
+
+def build_cases(scenario: Scenario) -> dict[str, Callable[[], object]]:
+    ids = seed(scenario)
+    client = TestClient(app)
+    day = BENCH_DATE.isoformat()
+
+    barber_slots_url = f"/api/barbers/{ids['barber']}/availability/slots?date={day}&service_id={ids['service']}"
+    beauty_slots_url = f"/api/beauty-services/{ids['beauty_service']}/available-slots?date={day}"
+    booking_url = f"/api/barbers/{ids['barber']}/bookings"
+
+    # cada creación usa un hueco nuevo en días futuros para no chocar nunca
+    duration = timedelta(minutes=scenario.service_minutes)
+    per_day = (24 * 60) // scenario.service_minutes
+    base_day = datetime.combine(BENCH_DATE + timedelta(days=365), datetime.min.time(), tzinfo=timezone.utc)
+    counter = itertools.count()
+
+    def _check(response, expected: int):
+        if response.status_code != expected:
+            raise RuntimeError(f"{response.request.url} -> {response.status_code}: {response.text[:200]}")
+
+    def barber_slots():
+        _check(client.get(barber_slots_url), 200)
+
+    def beauty_slots():
+        _check(client.get(beauty_slots_url), 200)
+
+    def create_booking():
+        n = next(counter)
+        start = base_day + timedelta(days=n // per_day) + duration * (n % per_day)
+        payload = {
+            "service_id": ids["service"],
+            "start_datetime": start.isoformat(),
+            "end_datetime": (start + duration).isoformat(),
+        }
+        _check(client.post(booking_url, json=payload), 201)
+
+    return {
+        "http.barber_slots": barber_slots,
+        "http.beauty_slots": beauty_slots,
+        "http.create_booking": create_booking,
+    }
@@ -0,0 +1,86 @@
+# benchmarks/harness.py
+from __future__ import annotations
+
+import gc
+import time
+import tracemalloc
+from typing import Callable, NamedTuple
+
+
+class BenchResult(NamedTuple):
+    name: str
+    scenario: str
+    iterations: int
+    ops_per_sec: float
+    p50_us: float
+    p99_us: float
+    alloc_bytes_per_op: float
+    peak_alloc_bytes: int
+
+    def as_dict(self) -> dict:
+        return self._asdict()
+
+
+def _percentile(sorted_values: list[int], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return float(sorted_values[idx])
+
+
+def measure(
+    name: str,
+    scenario: str,
+    fn: Callable[[], object],
+    iterations: int,
+    warmup: int = 5,
+    alloc_iterations: int = 20,
+) -> BenchResult:
+    """
+    Corre `fn` `iterations` veces y mide latencia por operación.
+    La memoria se mide en una pasada aparte con tracemalloc (lo vuelve lento, así
+    que no se mezcla con la medición de tiempo).
+    """
+    for _ in range(warmup):
+        fn()
+
+    gc.collect()
+    samples: list[int] = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(iterations):
+            started = time.perf_counter_ns()
+            fn()
+            samples.append(time.perf_counter_ns() - started)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+    samples.sort()
+    total_s = sum(samples) / 1e9
+
+    # memoria: pico de bytes asignados por operación (lo temporal también cuenta)
+    alloc_runs = max(1, min(alloc_iterations, iterations))
+    peaks: list[int] = []
+    tracemalloc.start()
+    try:
+        for _ in range(alloc_runs):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            fn()
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(max(0, peak - before))
+    finally:
+        tracemalloc.stop()
+
+    return BenchResult(
+        name=name,
+        scenario=scenario,
+        iterations=iterations,
+        ops_per_sec=round(iterations / total_s, 2) if total_s else 0.0,
+        p50_us=round(_percentile(samples, 50) / 1000, 2),
+        p99_us=round(_percentile(samples, 99) / 1000, 2),
+        alloc_bytes_per_op=round(sum(peaks) / len(peaks), 1),
+        peak_alloc_bytes=max(peaks),
+    )
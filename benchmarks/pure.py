@@ -0,0 +1,61 @@
+# benchmarks/pure.py
+"""Casos sobre funciones puras del motor de slots (sin DB ni HTTP)."""
+from __future__ import annotations
+
+import random
+from datetime import datetime, timedelta
+from typing import Callable
+
+from app.api.routes.availability_rules import _generate_time_slots_for_window
+from app.api.routes.beauty_slots import _generate_slots_for_staff_window
+from app.core.occupancy import Occupancy
+from app.core.time_utils import merge_availability_windows
+
+from benchmarks.scenarios import BENCH_DATE, Scenario, booking_intervals, rule_windows
+
+
+def build_cases(scenario: Scenario) -> dict[str, Callable[[], object]]:
+    rng = random.Random(scenario.seed)
+    rules = rule_windows(scenario, rng)
+    windows = merge_availability_windows(rules)
+    bookings = [
+        (start.replace(tzinfo=None), end.replace(tzinfo=None))
+        for start, end in booking_intervals(scenario, rng)
+    ]
+    occupancy = Occupancy(bookings)
+    duration = timedelta(minutes=scenario.service_minutes)
+
+    def generate_time_slots():
+        for w in windows:
+            _generate_time_slots_for_window(
+                target_date=BENCH_DATE,
+                start_time=w["start_time"],
+                end_time=w["end_time"],
+                step_minutes=w["slot_minutes"],
+                service_duration_min=scenario.service_minutes,
+            )
+
+    def merge_windows():
+        merge_availability_windows(rules)
+
+    def build_occupancy():
+        Occupancy(bookings)
+
+    def beauty_slot_loop():
+        # mismo recorrido que el endpoint de beauty slots para un staff
+        for rule in rules:
+            for slot_str in _generate_slots_for_staff_window(
+                target_date=BENCH_DATE,
+                start_time=rule.start_time,
+                end_time=rule.end_time,
+                service_duration_min=scenario.service_minutes,
+            ):
+                slot_start = datetime.combine(BENCH_DATE, datetime.strptime(slot_str, "%H:%M").time())
+                occupancy.is_free(slot_start, slot_start + duration)
+
+    return {
+        "pure.generate_time_slots": generate_time_slots,
+        "pure.merge_availability_windows": merge_windows,
+        "pure.build_occupancy": build_occupancy,
+        "pure.beauty_slot_loop": beauty_slot_loop,
+    }
@@ -0,0 +1,162 @@
+# benchmarks/run.py
+"""
+Runner de benchmarks del motor de slots y de bookings.
+
+    python -m benchmarks.run                              # todo, SQLite temporal
+    python -m benchmarks.run --suite pure --scenario heavy_bookings
+    python -m benchmarks.run --save benchmarks/baselines/sqlite.json
+    python -m benchmarks.run --compare benchmarks/baselines/sqlite.json
+
+Los tiempos dependen de la máquina: el baseline se guarda y se compara en la misma
+(ej. --save en main y --compare en la rama). benchmarks/baselines/ no se versiona.
+
+Para medir contra Postgres: --database-url postgresql+psycopg://... (base desechable,
+se borra y recrea el esquema por escenario).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+from contextlib import ExitStack
+from datetime import datetime, timezone
+
+DEFAULT_ITERATIONS = {"pure": 2000, "http": 100}
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmarks de slots y bookings")
+    parser.add_argument("--suite", choices=("all", "pure", "http"), default="all")
+    parser.add_argument("--scenario", action="append", help="Escenario (repetible). Default: todos")
+    parser.add_argument("--filter", default="", help="Solo casos cuyo nombre contenga este texto")
+    parser.add_argument("--iterations", type=int, help="Iteraciones por caso (default: 2000 pure / 100 http)")
+    parser.add_argument("--database-url", help="Base para los casos http (default: SQLite temporal)")
+    parser.add_argument("--save", help="Guardar resultados como baseline JSON")
+    parser.add_argument("--compare", help="Comparar contra un baseline JSON")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="Regresión tolerada en ops/sec al comparar (default 0.10 = 10%%)",
+    )
+    return parser.parse_args(argv)
+
+
+def _configure_database(database_url: str | None, stack: ExitStack) -> str:
+    # tiene que quedar antes de importar app.* (app.db.session lee DATABASE_URL al importar)
+    if database_url:
+        os.environ["DATABASE_URL"] = database_url
+    else:
+        # el directorio temporal se borra al terminar (stack)
+        directory = stack.enter_context(tempfile.TemporaryDirectory(prefix="bench-"))
+        os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+    return os.environ["DATABASE_URL"]
+
+
+def _print_table(results: list[dict]) -> None:
+    header = f"{'case':34} {'scenario':18} {'ops/sec':>11} {'p50 us':>10} {'p99 us':>10} {'alloc/op':>11}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['name']:34} {r['scenario']:18} {r['ops_per_sec']:>11.1f} "
+            f"{r['p50_us']:>10.1f} {r['p99_us']:>10.1f} {r['alloc_bytes_per_op']:>11.0f}"
+        )
+
+
+def compare(results: list[dict], baseline: dict, threshold: float) -> list[str]:
+    """Devuelve los casos que empeoraron más de `threshold` en ops/sec."""
+    previous = {(r["name"], r["scenario"]): r for r in baseline.get("results", [])}
+    regressions = []
+
+    print(f"\n{'case':34} {'scenario':18} {'ops/sec':>10} {'p99':>10} {'alloc':>10}")
+    for r in results:
+        old = previous.get((r["name"], r["scenario"]))
+        if old is None:
+            continue
+
+        def delta(key: str) -> float:
+            return (r[key] - old[key]) / old[key] if old[key] else 0.0
+
+        ops, p99, alloc = delta("ops_per_sec"), delta("p99_us"), delta("alloc_bytes_per_op")
+        flag = ""
+        if ops < -threshold:
+            flag = "  REGRESSION"
+            regressions.append(f"{r['name']} [{r['scenario']}] {ops:+.1%} ops/sec")
+        print(f"{r['name']:34} {r['scenario']:18} {ops:>+10.1%} {p99:>+10.1%} {alloc:>+10.1%}{flag}")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+    with ExitStack() as stack:
+        database_url = _configure_database(args.database_url, stack)
+        return _run(args, database_url, stack)
+
+
+def _run(args: argparse.Namespace, database_url: str, stack: ExitStack) -> int:
+    # el aviso de N+1 por request ensucia la salida (beauty slots lo dispara a propósito)
+    logging.getLogger("app.db.queries").setLevel(logging.ERROR)
+
+    from app.db.session import engine
+    from benchmarks import endpoints, pure
+    from benchmarks.harness import measure
+    from benchmarks.scenarios import SCENARIOS
+
+    # se cierra el pool antes de borrar el directorio temporal de la base
+    stack.callback(engine.dispose)
+
+    names = args.scenario or list(SCENARIOS)
+    unknown = [n for n in names if n not in SCENARIOS]
+    if unknown:
+        print(f"Escenarios desconocidos: {', '.join(unknown)}. Opciones: {', '.join(SCENARIOS)}", file=sys.stderr)
+        return 2
+
+    suites = ("pure", "http") if args.suite == "all" else (args.suite,)
+    results: list[dict] = []
+
+    for scenario_name in names:
+        scenario = SCENARIOS[scenario_name]
+        for suite in suites:
+            cases = pure.build_cases(scenario) if suite == "pure" else endpoints.build_cases(scenario)
+            iterations = args.iterations or DEFAULT_ITERATIONS[suite]
+            for case_name, fn in cases.items():
+                if args.filter and args.filter not in case_name:
+                    continue
+                results.append(measure(case_name, scenario.name, fn, iterations).as_dict())
+
+    _print_table(results)
+
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        payload = {
+            "meta": {
+                "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "database": database_url.split(":", 1)[0],
+            },
+            "results": results,
+        }
+        with open(args.save, "w", encoding="utf-8") as fh:
+            json.dump(payload, fh, indent=2)
+            fh.write("\n")
+        print(f"\nBaseline guardado en {args.save}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print("\nRegresiones:\n  " + "\n  ".join(regressions))
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+# benchmarks/scenarios.py
+from __future__ import annotations
+
+import random
+from datetime import date, datetime, time, timedelta, timezone
+from types import SimpleNamespace
+from typing import NamedTuple
+
+# lunes fijo para que day_of_week sea estable entre corridas
+BENCH_DATE = date(2030, 1, 7)
+
+
+class Scenario(NamedTuple):
+    name: str
+    barbers: int
+    staff: int
+    open_time: time
+    close_time: time
+    slot_minutes: int           # paso de las reglas de barbero
+    service_minutes: int        # duración del servicio de barbería y de belleza
+    booking_density: float      # fracción de la jornada ocupada por bookings (0-1)
+    rules_per_day: int          # reglas por recurso y día (>1 = ventanas traslapadas)
+    seed: int = 1234
+
+
+SCENARIOS: dict[str, Scenario] = {
+    s.name: s
+    for s in (
+        Scenario("small_shop", barbers=3, staff=2, open_time=time(9), close_time=time(19),
+                 slot_minutes=30, service_minutes=30, booking_density=0.3, rules_per_day=1),
+        Scenario("large_salon", barbers=12, staff=40, open_time=time(8), close_time=time(21),
+                 slot_minutes=30, service_minutes=45, booking_density=0.5, rules_per_day=2),
+        Scenario("fine_granularity", barbers=5, staff=5, open_time=time(7), close_time=time(22),
+                 slot_minutes=15, service_minutes=15, booking_density=0.4, rules_per_day=1),
+        Scenario("heavy_bookings", barbers=5, staff=5, open_time=time(9), close_time=time(19),
+                 slot_minutes=15, service_minutes=30, booking_density=0.9, rules_per_day=1),
+        Scenario("overlapping_rules", barbers=5, staff=5, open_time=time(8), close_time=time(20),
+                 slot_minutes=15, service_minutes=30, booking_density=0.4, rules_per_day=12),
+    )
+}
+
+
+def rule_windows(scenario: Scenario, rng: random.Random) -> list[SimpleNamespace]:
+    """
+    Reglas de un recurso para el día. Con rules_per_day > 1 se generan ventanas
+    traslapadas y con slot_minutes mezclados (el caso caro para el merge).
+    """
+    if scenario.rules_per_day == 1:
+        return [SimpleNamespace(start_time=scenario.open_time, end_time=scenario.close_time,
+                                slot_minutes=scenario.slot_minutes)]
+
+    open_min = scenario.open_time.hour * 60 + scenario.open_time.minute
+    close_min = scenario.close_time.hour * 60 + scenario.close_time.minute
+    span = close_min - open_min
+    rules = []
+    for _ in range(scenario.rules_per_day):
+        start = open_min + rng.randrange(0, span // 2, 15)
+        end = min(close_min, start + rng.randrange(60, span // 2 + 60, 15))
+        step = scenario.slot_minutes if rng.random() < 0.7 else scenario.slot_minutes * 2
+        rules.append(SimpleNamespace(start_time=time(start // 60, start % 60),
+                                     end_time=time(end // 60, end % 60), slot_minutes=step))
+    return rules
+
+
+def booking_intervals(scenario: Scenario, rng: random.Random, day: date = BENCH_DATE) -> list[tuple[datetime, datetime]]:
+    """Bookings sin traslape (UTC) que ocupan ~booking_density de la jornada."""
+    slot = timedelta(minutes=scenario.service_minutes)
+    cur = datetime.combine(day, scenario.open_time, tzinfo=timezone.utc)
+    close = datetime.combine(day, scenario.close_time, tzinfo=timezone.utc)
+    out = []
+    while cur + slot <= close:
+        if rng.random() < scenario.booking_density:
+            out.append((cur, cur + slot))
+        cur += slot
+    return out
@@ -0,0 +1 @@
+# loadtest/__init__.py
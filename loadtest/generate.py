@@ -0,0 +1,524 @@
+# loadtest/generate.py
+"""
+Generador determinista de tenants sintéticos para pruebas de carga.
+
+    python -m loadtest.generate --businesses 20 --barbers 100 --staff 60 --days 180 \
+        --requests 50000 --requests-out loadtest/requests.mix.jsonl
+
+Escribe directo con COPY (Postgres + psycopg) o INSERT por lotes (otros motores), con
+ids asignados aquí para no hacer round-trips por fila: cada tabla empieza en
+--id-offset + 1 (default 0, base vacía). Misma semilla + mismos parámetros + mismo
+offset = mismos ids, mismos datos y mismo archivo de requests, sin importar qué más haya
+en la base. Si alguna tabla ya tiene ids arriba del offset se aborta antes de escribir.
+El archivo de requests es JSONL (una request por línea) y lo consume loadtest.replay.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, time as time_type, timedelta, timezone
+from decimal import Decimal
+from typing import Iterable, Iterator
+from zoneinfo import ZoneInfo
+
+TIMEZONES = (
+    "America/Monterrey",
+    "America/Mexico_City",
+    "America/Tijuana",
+    "America/Cancun",
+    "America/Bogota",
+    "America/Lima",
+)
+
+DAY_NAMES = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+# turnos típicos por día (hora local); domingo cerrado
+SHIFTS = (
+    ((time_type(9), time_type(14)), (time_type(15), time_type(19))),
+    ((time_type(10), time_type(18)),),
+    ((time_type(8), time_type(13)), (time_type(14), time_type(17))),
+    ((time_type(12), time_type(20)),),
+)
+
+BARBER_DURATIONS = (20, 30, 30, 45, 60)
+BEAUTY_DURATIONS = (30, 45, 60, 60, 90, 120)
+BEAUTY_CATEGORIES = ("nails", "lashes", "hair", "makeup", "spa")
+
+# mezcla de requests por default (peso relativo)
+DEFAULT_MIX = {
+    "barber_slots": 40,
+    "beauty_slots": 25,
+    "create_booking": 10,
+    "create_beauty_booking": 5,
+    "list_staff": 5,
+    "list_beauty_services": 5,
+    "barber_history": 5,
+    "staff_history": 5,
+}
+
+LOADTEST_PASSWORD = "loadtest"
+
+
+def _rng(seed: int, *parts) -> random.Random:
+    # una semilla por entidad: el resultado no depende del orden en que se generan las demás
+    return random.Random(":".join(str(p) for p in (seed, *parts)))
+
+
+def _parse_mix(value: str | None) -> dict[str, int]:
+    if not value:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"Tipo de request desconocido: {name}. Opciones: {', '.join(DEFAULT_MIX)}")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+class Writer:
+    """COPY en Postgres (psycopg 3) o INSERT por lotes, dentro de la misma transacción."""
+
+    def __init__(self, conn, batch_size: int):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.use_copy = conn.dialect.name == "postgresql" and conn.dialect.driver == "psycopg"
+        self.totals: dict[str, int] = {}
+
+    def write(self, table, columns: tuple[str, ...], rows: Iterable[tuple]) -> int:
+        started = time.perf_counter()
+        if self.use_copy:
+            n = self._copy(table, columns, rows)
+        else:
+            n = self._insert(table, columns, rows)
+        elapsed = time.perf_counter() - started
+        self.totals[table.name] = self.totals.get(table.name, 0) + n
+        rate = n / elapsed if elapsed else 0.0
+        print(f"  {table.name:28} {n:>10} rows  {elapsed:7.1f}s  {rate:>10.0f} rows/s", flush=True)
+        return n
+
+    def _copy(self, table, columns, rows) -> int:
+        raw = self.conn.connection.driver_connection
+        n = 0
+        with raw.cursor() as cur:
+            with cur.copy(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN") as copy:
+                for row in rows:
+                    copy.write_row(row)
+                    n += 1
+        return n
+
+    def _insert(self, table, columns, rows) -> int:
+        n = 0
+        batch: list[dict] = []
+        stmt = table.insert()
+        for row in rows:
+            batch.append(dict(zip(columns, row)))
+            if len(batch) >= self.batch_size:
+                self.conn.execute(stmt, batch)
+                n += len(batch)
+                batch = []
+        if batch:
+            self.conn.execute(stmt, batch)
+            n += len(batch)
+        return n
+
+
+def _max_id(conn, table) -> int:
+    from sqlalchemy import func, select
+
+    return conn.execute(select(func.max(table.c.id))).scalar() or 0
+
+
+def _reset_sequences(conn, tables) -> None:
+    from sqlalchemy import text
+
+    if conn.dialect.name != "postgresql":
+        return
+    for table in tables:
+        conn.execute(
+            text(
+                f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), "
+                f"(SELECT COALESCE(MAX(id), 1) FROM {table.name}))"
+            )
+        )
+
+
+def _slots(
+    rng: random.Random,
+    day: date,
+    windows: Iterable[tuple[time_type, time_type]],
+    durations: tuple[int, ...],
+    density: float,
+    tz: ZoneInfo,
+) -> Iterator[tuple[datetime, datetime]]:
+    """Recorre las ventanas del día y coloca bookings sin traslape (en UTC)."""
+    for start_t, end_t in windows:
+        cur = datetime.combine(day, start_t)
+        end = datetime.combine(day, end_t)
+        while cur < end:
+            dur = timedelta(minutes=rng.choice(durations))
+            if cur + dur > end:
+                break
+            if rng.random() < density:
+                yield (
+                    cur.replace(tzinfo=tz).astimezone(timezone.utc),
+                    (cur + dur).replace(tzinfo=tz).astimezone(timezone.utc),
+                )
+                cur += dur
+            else:
+                cur += timedelta(minutes=15)
+
+
+def generate(conn, args) -> dict:
+    """Inserta todo el dataset y devuelve el catálogo que usa la mezcla de requests."""
+    from app.core.resource_versions import bump_global
+    from app.core.security import hash_password
+    from app.models.barber import Barber
+    from app.models.barber_availability_rule import BarberAvailabilityRule
+    from app.models.barber_service import barber_services
+    from app.models.beauty_booking import BeautyBooking
+    from app.models.beauty_service import BeautyService
+    from app.models.booking import Booking
+    from app.models.business import Business
+    from app.models.service import Service
+    from app.models.staff import Staff
+    from app.models.staff_availability_rule import StaffAvailabilityRule
+    from app.models.staff_service import StaffService
+    from app.models.user import User
+
+    T = {
+        "business": Business.__table__,
+        "service": Service.__table__,
+        "barber": Barber.__table__,
+        "staff": Staff.__table__,
+        "beauty_service": BeautyService.__table__,
+        "staff_service": StaffService.__table__,
+        "barber_rule": BarberAvailabilityRule.__table__,
+        "staff_rule": StaffAvailabilityRule.__table__,
+        "user": User.__table__,
+        "booking": Booking.__table__,
+        "beauty_booking": BeautyBooking.__table__,
+    }
+    # ids fijos (no MAX(id) + 1): la salida no depende de lo que ya tenga la base. Las
+    # asignaciones y reglas no llevan id explícito (no se referencian desde aquí)
+    explicit = ("business", "service", "barber", "staff", "beauty_service", "user", "booking", "beauty_booking")
+    taken = {name: _max_id(conn, T[name]) for name in explicit}
+    clashes = [f"{T[name].name} (max id {max_id})" for name, max_id in taken.items() if max_id > args.id_offset]
+    if clashes:
+        raise ValueError(
+            f"--id-offset {args.id_offset} choca con filas existentes: {', '.join(clashes)}. "
+            f"Usar una base vacía o --id-offset >= {max(taken.values())}"
+        )
+    ids = {name: args.id_offset + 1 for name in explicit}
+    writer = Writer(conn, args.batch_size)
+    now = datetime.utcnow()
+    seed = args.seed
+    days = [args.start_date + timedelta(days=i) for i in range(args.days)]
+    password_hash = hash_password(LOADTEST_PASSWORD)
+
+    # ---- catálogo global de servicios de barbería
+    services = []
+    for i in range(args.services):
+        rng = _rng(seed, "service", i)
+        services.append((ids["service"] + i, rng.choice(BARBER_DURATIONS)))
+    writer.write(
+        T["service"],
+        ("id", "name", "duration_min", "price", "is_active", "created_at"),
+        (
+            (sid, f"Servicio {sid}", dur, Decimal(_rng(seed, "price", sid - ids["service"]).randrange(80, 400, 10)), True, now)
+            for sid, dur in services
+        ),
+    )
+    service_duration = dict(services)
+
+    catalog: dict = {"businesses": [], "start_date": args.start_date.isoformat(), "days": args.days}
+    businesses, barbers, staff, beauty_services = [], [], [], []
+    barber_links, staff_links, barber_rules, staff_rules, users = [], [], [], [], []
+
+    for b in range(args.businesses):
+        bid = ids["business"] + b
+        rng = _rng(seed, "business", b)
+        tz = rng.choice(TIMEZONES)
+        businesses.append((bid, f"Negocio {bid}", f"lt-{seed}-{bid}", tz, "MX", "MXN", True, now))
+
+        entry = {"id": bid, "timezone": tz, "barbers": [], "staff": [], "beauty_services": {}, "admin_user_id": None}
+
+        for i in range(args.barbers):
+            barber_id = ids["barber"] + b * args.barbers + i
+            brng = _rng(seed, "barber", barber_id - ids["barber"])
+            barbers.append((barber_id, bid, f"Barbero {barber_id}", True, now))
+            offered = sorted(brng.sample([s for s, _ in services], k=min(len(services), brng.randint(2, 6))))
+            barber_links.extend((barber_id, sid) for sid in offered)
+            shift = brng.choice(SHIFTS)
+            step = brng.choice((15, 30, 30))
+            for dow in range(6):
+                for start_t, end_t in shift:
+                    barber_rules.append((barber_id, dow, start_t, end_t, step, True, now))
+            entry["barbers"].append({"id": barber_id, "services": offered, "shift": shift})
+
+        for i in range(args.beauty_services):
+            bs_id = ids["beauty_service"] + b * args.beauty_services + i
+            srng = _rng(seed, "beauty_service", bs_id - ids["beauty_service"])
+            dur = srng.choice(BEAUTY_DURATIONS)
+            beauty_services.append(
+                (bs_id, bid, f"Servicio belleza {bs_id}", srng.choice(BEAUTY_CATEGORIES), dur,
+                 Decimal(srng.randrange(150, 1500, 50)), True, now)
+            )
+            entry["beauty_services"][bs_id] = {"duration": dur, "staff": []}
+
+        bs_ids = sorted(entry["beauty_services"])
+        for i in range(args.staff):
+            staff_id = ids["staff"] + b * args.staff + i
+            srng = _rng(seed, "staff", staff_id - ids["staff"])
+            staff.append((staff_id, bid, f"Staff {staff_id}", True, now))
+            offered = sorted(srng.sample(bs_ids, k=min(len(bs_ids), srng.randint(2, 5)))) if bs_ids else []
+            for bs_id in offered:
+                staff_links.append((staff_id, bs_id, now))
+                entry["beauty_services"][bs_id]["staff"].append(staff_id)
+            shift = srng.choice(SHIFTS)
+            for dow in range(6):
+                for start_t, end_t in shift:
+                    staff_rules.append((staff_id, DAY_NAMES[dow], start_t, end_t))
+            entry["staff"].append({"id": staff_id, "services": offered, "shift": shift})
+
+        admin_id = ids["user"] + len(users)
+        users.append((admin_id, bid, None, f"Admin {bid}", f"admin-{seed}-{bid}@loadtest.local",
+                      password_hash, "business_admin", True, now))
+        entry["admin_user_id"] = admin_id
+        catalog["businesses"].append(entry)
+
+    super_admin_id = ids["user"] + len(users)
+    users.append((super_admin_id, None, None, "Super Admin", f"super-{seed}-{super_admin_id}@loadtest.local",
+                  password_hash, "super_admin", True, now))
+    catalog["super_admin_user_id"] = super_admin_id
+
+    writer.write(T["business"], ("id", "name", "slug", "timezone", "country", "currency", "is_active", "created_at"),
+                 businesses)
+    writer.write(T["barber"], ("id", "business_id", "name", "is_active", "created_at"), barbers)
+    writer.write(barber_services, ("barber_id", "service_id"), barber_links)
+    writer.write(T["beauty_service"],
+                 ("id", "business_id", "name", "category", "duration_min", "price", "is_active", "created_at"),
+                 beauty_services)
+    writer.write(T["staff"], ("id", "business_id", "name", "is_active", "created_at"), staff)
+    writer.write(T["staff_service"], ("staff_id", "beauty_service_id", "created_at"), staff_links)
+    writer.write(T["barber_rule"],
+                 ("barber_id", "day_of_week", "start_time", "end_time", "slot_minutes", "is_active", "created_at"),
+                 barber_rules)
+    writer.write(T["staff_rule"], ("staff_id", "day_of_week", "start_time", "end_time"), staff_rules)
+    writer.write(T["user"],
+                 ("id", "business_id", "staff_id", "name", "email", "password_hash", "role", "is_active", "created_at"),
+                 users)
+
+    # ---- bookings: generadores, no se materializan en memoria
+    def barber_bookings():
+        next_id = ids["booking"]
+        for entry in catalog["businesses"]:
+            tz = ZoneInfo(entry["timezone"])
+            for barber in entry["barbers"]:
+                rng = _rng(seed, "barber_bookings", barber["id"] - ids["barber"])
+                durations = tuple(service_duration[s] for s in barber["services"])
+                for day in days:
+                    if day.weekday() == 6:
+                        continue
+                    for start, end in _slots(rng, day, barber["shift"], durations, args.density, tz):
+                        status = "cancelled" if rng.random() < args.cancel_rate else "confirmed"
+                        yield (next_id, barber["id"], rng.choice(barber["services"]), start, end, status)
+                        next_id += 1
+
+    def staff_bookings():
+        next_id = ids["beauty_booking"]
+        for entry in catalog["businesses"]:
+            tz = ZoneInfo(entry["timezone"])
+            for member in entry["staff"]:
+                if not member["services"]:
+                    continue
+                rng = _rng(seed, "staff_bookings", member["id"] - ids["staff"])
+                durations = tuple(entry["beauty_services"][s]["duration"] for s in member["services"])
+                for day in days:
+                    if day.weekday() == 6:
+                        continue
+                    for start, end in _slots(rng, day, member["shift"], durations, args.density, tz):
+                        status = "cancelled" if rng.random() < args.cancel_rate else "confirmed"
+                        yield (next_id, member["id"], rng.choice(member["services"]), start, end, status)
+                        next_id += 1
+
+    writer.write(T["booking"], ("id", "barber_id", "service_id", "start_datetime", "end_datetime", "status"),
+                 barber_bookings())
+    writer.write(T["beauty_booking"],
+                 ("id", "staff_id", "beauty_service_id", "start_datetime", "end_datetime", "status"),
+                 staff_bookings())
+
+    _reset_sequences(conn, [t for name, t in T.items()])
+    # los inserts de Core no pasan por el flush: invalidar los ETags que ya tenga un cliente/CDN
+    bump_global(conn)
+    catalog["totals"] = writer.totals
+    return catalog
+
+
+def build_request_mix(catalog: dict, n: int, mix: dict[str, int], seed: int) -> Iterator[dict]:
+    """Requests sintéticos con la forma que espera loadtest.replay."""
+    rng = _rng(seed, "requests")
+    kinds = list(mix)
+    weights = [mix[k] for k in kinds]
+    start = date.fromisoformat(catalog["start_date"])
+    businesses = [b for b in catalog["businesses"] if b["barbers"] or b["staff"]]
+
+    def random_day() -> date:
+        return start + timedelta(days=rng.randrange(catalog["days"]))
+
+    def local_iso(day: date, t: time_type, minutes: int, tz: str) -> tuple[str, str]:
+        begin = datetime.combine(day, t).replace(tzinfo=ZoneInfo(tz))
+        return begin.isoformat(), (begin + timedelta(minutes=minutes)).isoformat()
+
+    def shift_time(shift) -> time_type:
+        start_t, end_t = rng.choice(shift)
+        span = (end_t.hour - start_t.hour) * 4
+        quarter = rng.randrange(max(1, span - 4))
+        minutes = start_t.hour * 60 + start_t.minute + quarter * 15
+        return time_type(minutes // 60, minutes % 60)
+
+    def request(kind, method, route, path, query=None, body=None, auth=None, expect=(200,)):
+        return {
+            "kind": kind,
+            "method": method,
+            "route": route,
+            "path": path,
+            "query": query or {},
+            "body": body,
+            "auth_role": auth[0] if auth else None,
+            "user_id": auth[1] if auth else None,
+            "expect": list(expect),
+        }
+
+    produced = 0
+    while produced < n:
+        biz = rng.choice(businesses)
+        kind = rng.choices(kinds, weights)[0]
+        admin = ("business_admin", biz["admin_user_id"])
+        day = random_day()
+        item = None
+
+        if kind in ("barber_slots", "create_booking", "barber_history") and biz["barbers"]:
+            barber = rng.choice(biz["barbers"])
+            if kind == "barber_slots":
+                item = request(kind, "GET", "/api/barbers/{barber_id}/availability/slots",
+                               f"/api/barbers/{barber['id']}/availability/slots",
+                               query={"date": day.isoformat(), "service_id": rng.choice(barber["services"])})
+            elif kind == "create_booking":
+                service_id = rng.choice(barber["services"])
+                begin, end = local_iso(day, shift_time(barber["shift"]), 30, biz["timezone"])
+                item = request(kind, "POST", "/api/barbers/{barber_id}/bookings",
+                               f"/api/barbers/{barber['id']}/bookings",
+                               body={"service_id": service_id, "start_datetime": begin, "end_datetime": end},
+                               expect=(201, 400))
+            else:
+                end_day = min(day + timedelta(days=30), start + timedelta(days=catalog["days"] - 1))
+                item = request(kind, "GET", "/api/reports/barbers/{barber_id}/bookings",
+                               f"/api/reports/barbers/{barber['id']}/bookings",
+                               query={"start_date": day.isoformat(), "end_date": end_day.isoformat()}, auth=admin)
+
+        elif kind in ("beauty_slots", "create_beauty_booking") and biz["beauty_services"]:
+            bs_id = rng.choice(sorted(biz["beauty_services"]))
+            info = biz["beauty_services"][bs_id]
+            if kind == "beauty_slots":
+                item = request(kind, "GET", "/api/beauty-services/{service_id}/available-slots",
+                               f"/api/beauty-services/{bs_id}/available-slots", query={"date": day.isoformat()})
+            elif info["staff"]:
+                staff_id = rng.choice(info["staff"])
+                member = next(s for s in biz["staff"] if s["id"] == staff_id)
+                begin, end = local_iso(day, shift_time(member["shift"]), info["duration"], biz["timezone"])
+                item = request(kind, "POST", "/api/beauty-bookings", "/api/beauty-bookings",
+                               body={"staff_id": staff_id, "beauty_service_id": bs_id,
+                                     "start_datetime": begin, "end_datetime": end},
+                               expect=(201, 400))
+
+        elif kind == "staff_history" and biz["staff"]:
+            member = rng.choice(biz["staff"])
+            end_day = min(day + timedelta(days=30), start + timedelta(days=catalog["days"] - 1))
+            item = request(kind, "GET", "/api/reports/staff/{staff_id}/beauty-bookings",
+                           f"/api/reports/staff/{member['id']}/beauty-bookings",
+                           query={"start_date": day.isoformat(), "end_date": end_day.isoformat()}, auth=admin)
+
+        elif kind == "list_staff":
+            item = request(kind, "GET", "/api/staff", "/api/staff", auth=admin)
+
+        elif kind == "list_beauty_services":
+            item = request(kind, "GET", "/api/beauty-services", "/api/beauty-services", auth=admin)
+
+        if item is not None:
+            produced += 1
+            yield item
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Genera tenants sintéticos y una mezcla de requests para carga")
+    parser.add_argument("--database-url", help="Default: DATABASE_URL")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--id-offset", type=int, default=0,
+                        help="Los ids de cada tabla empiezan en offset + 1 (default 0: base vacía)")
+    parser.add_argument("--businesses", type=int, default=10)
+    parser.add_argument("--barbers", type=int, default=50, help="Barberos por negocio")
+    parser.add_argument("--staff", type=int, default=30, help="Staff por negocio")
+    parser.add_argument("--services", type=int, default=20, help="Servicios de barbería (catálogo global)")
+    parser.add_argument("--beauty-services", type=int, default=15, help="Servicios de belleza por negocio")
+    parser.add_argument("--start-date", type=date.fromisoformat, default=date(2026, 1, 5))
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--density", type=float, default=0.6, help="Probabilidad de ocupar cada hueco (0-1)")
+    parser.add_argument("--cancel-rate", type=float, default=0.08)
+    parser.add_argument("--batch-size", type=int, default=5000, help="Filas por INSERT cuando no hay COPY")
+    parser.add_argument("--create-schema", action="store_true", help="create_all antes de insertar (bases desechables)")
+    parser.add_argument("--requests", type=int, default=10000, help="Requests a generar (0 = ninguno)")
+    parser.add_argument("--requests-out", default="loadtest/requests.mix.jsonl")
+    parser.add_argument("--mix", type=_parse_mix, default=None,
+                        help="Pesos, ej. barber_slots=50,beauty_slots=30,create_booking=20")
+    args = parser.parse_args(argv)
+
+    if not 0.0 <= args.density <= 1.0:
+        parser.error("--density debe estar entre 0 y 1")
+    if args.days <= 0:
+        parser.error("--days debe ser > 0")
+    if args.id_offset < 0:
+        parser.error("--id-offset debe ser >= 0")
+    return args
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+
+    from app.db.session import engine
+
+    if args.create_schema:
+        import app.models  # noqa: F401  (registra todas las tablas)
+        from app.db.base import Base
+
+        Base.metadata.create_all(engine)
+
+    started = time.perf_counter()
+    print(f"Generando datos (seed={args.seed}) en {engine.url.render_as_string(hide_password=True)}")
+    try:
+        with engine.begin() as conn:
+            catalog = generate(conn, args)
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 2
+    print(f"Listo en {time.perf_counter() - started:.1f}s")
+
+    if args.requests:
+        os.makedirs(os.path.dirname(os.path.abspath(args.requests_out)), exist_ok=True)
+        with open(args.requests_out, "w", encoding="utf-8") as fh:
+            for item in build_request_mix(catalog, args.requests, args.mix or DEFAULT_MIX, args.seed):
+                fh.write(json.dumps(item, ensure_ascii=False) + "\n")
+        print(f"{args.requests} requests escritos en {args.requests_out} (password de usuarios: {LOADTEST_PASSWORD})")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
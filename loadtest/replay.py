@@ -0,0 +1,280 @@
+# loadtest/replay.py
+"""
+Replay de requests grabados/generados contra la app, para capacity planning.
+
+    # en proceso (httpx.ASGITransport), usando DATABASE_URL
+    python -m loadtest.replay loadtest/requests.mix.jsonl --concurrency 32
+
+    # contra un servidor levantado, a 200 req/s con llegadas Poisson
+    python -m loadtest.replay loadtest/requests.mix.jsonl --base-url http://localhost:8000 \
+        --rate 200 --poisson --duration 60
+
+Cada línea del archivo es un JSON con: method, path, query, body, auth_role, user_id
+y opcionalmente route (template para agrupar) y expect (status esperados).
+Con --rate la latencia se mide desde el momento en que la request *debía* salir
+(open loop), así una cola en el cliente no esconde la lentitud del servidor.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import random
+import re
+import sys
+import time
+from typing import Iterator
+
+_ID_SEGMENT_RE = re.compile(r"/\d+(?=/|$)")
+
+
+def route_of(item: dict) -> str:
+    """Template de ruta para agrupar (si el log no lo trae, los ids numéricos se colapsan)."""
+    return item.get("route") or _ID_SEGMENT_RE.sub("/{id}", item["path"])
+
+
+def load_requests(path: str) -> tuple[list[dict], int]:
+    items, skipped = [], 0
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError:
+                skipped += 1
+                continue
+            if not isinstance(item, dict) or "method" not in item or "path" not in item:
+                skipped += 1
+                continue
+            items.append(item)
+    return items, skipped
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[idx]
+
+
+class RouteStats:
+    __slots__ = ("latencies", "errors", "statuses")
+
+    def __init__(self):
+        self.latencies: list[float] = []
+        self.errors = 0
+        self.statuses: dict[str, int] = {}
+
+    def record(self, latency: float, status: str, ok: bool) -> None:
+        self.latencies.append(latency)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if not ok:
+            self.errors += 1
+
+    def summary(self, wall_seconds: float) -> dict:
+        lat = sorted(self.latencies)
+        n = len(lat)
+        return {
+            "requests": n,
+            "throughput_rps": round(n / wall_seconds, 2) if wall_seconds else 0.0,
+            "error_rate": round(self.errors / n, 4) if n else 0.0,
+            "p50_ms": round(_percentile(lat, 50) * 1000, 2),
+            "p90_ms": round(_percentile(lat, 90) * 1000, 2),
+            "p99_ms": round(_percentile(lat, 99) * 1000, 2),
+            "max_ms": round(lat[-1] * 1000, 2) if lat else 0.0,
+            "statuses": dict(sorted(self.statuses.items())),
+        }
+
+
+class TokenCache:
+    """JWT por (user_id, role), firmados con la misma SECRET_KEY de la app."""
+
+    def __init__(self):
+        self._tokens: dict[tuple, str] = {}
+
+    def header(self, item: dict) -> dict:
+        role, user_id = item.get("auth_role"), item.get("user_id")
+        if not role or user_id is None:
+            return {}
+        key = (user_id, role)
+        if key not in self._tokens:
+            from app.core.security import create_access_token
+
+            self._tokens[key] = create_access_token({"sub": str(user_id), "role": role})
+        return {"Authorization": f"Bearer {self._tokens[key]}"}
+
+
+def _schedule(items: list[dict], args) -> Iterator[dict]:
+    source = itertools.cycle(items) if args.loop or args.duration else iter(items)
+    if args.limit:
+        source = itertools.islice(source, args.limit)
+    return source
+
+
+async def run(args) -> dict:
+    import httpx
+
+    items, skipped = load_requests(args.file)
+    if not items:
+        raise SystemExit(f"{args.file}: no hay requests válidos (se saltaron {skipped} líneas)")
+    if skipped:
+        print(f"Aviso: {skipped} líneas sin method/path se ignoraron", file=sys.stderr)
+
+    if args.base_url:
+        transport = None
+        base_url = args.base_url.rstrip("/")
+    else:
+        from app.main import app
+
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://replay"
+
+    tokens = TokenCache()
+    stats: dict[str, RouteStats] = {}
+    total = RouteStats()
+    rng = random.Random(args.seed)
+    queue: asyncio.Queue = asyncio.Queue(maxsize=args.concurrency * 4)
+    stop_at = time.perf_counter() + args.duration if args.duration else None
+    warmup_left = args.warmup
+
+    async def send(client, item: dict, intended_at: float) -> None:
+        nonlocal warmup_left
+        expect = item.get("expect")
+        try:
+            response = await client.request(
+                item["method"],
+                item["path"],
+                params=item.get("query") or None,
+                json=item.get("body"),
+                headers=tokens.header(item),
+            )
+            status = str(response.status_code)
+            ok = response.status_code in expect if expect else response.status_code < 500
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+            ok = False
+        latency = time.perf_counter() - intended_at
+
+        if warmup_left > 0:
+            warmup_left -= 1
+            return
+        stats.setdefault(route_of(item), RouteStats()).record(latency, status, ok)
+        total.record(latency, status, ok)
+
+    async def worker(client) -> None:
+        while True:
+            entry = await queue.get()
+            try:
+                if entry is None:
+                    return
+                item, intended_at = entry
+                await send(client, item, intended_at if args.rate else time.perf_counter())
+            finally:
+                queue.task_done()
+
+    async def producer() -> None:
+        next_at = time.perf_counter()
+        for item in _schedule(items, args):
+            now = time.perf_counter()
+            if stop_at and now >= stop_at:
+                break
+            if args.rate:
+                # open loop: tiempos de llegada fijos (o Poisson) sin importar lo que tarde el server
+                gap = rng.expovariate(args.rate) if args.poisson else 1.0 / args.rate
+                next_at += gap
+                if next_at > now:
+                    await asyncio.sleep(next_at - now)
+            await queue.put((item, next_at))
+        for _ in range(args.concurrency):
+            await queue.put(None)
+
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(
+        transport=transport, base_url=base_url, timeout=args.timeout, limits=limits
+    ) as client:
+        started = time.perf_counter()
+        workers = [asyncio.create_task(worker(client)) for _ in range(args.concurrency)]
+        await producer()
+        await asyncio.gather(*workers)
+        wall = time.perf_counter() - started
+
+    return {
+        "mode": "server" if args.base_url else "in-process",
+        "concurrency": args.concurrency,
+        "rate": args.rate,
+        "wall_seconds": round(wall, 3),
+        "total": total.summary(wall),
+        "routes": {route: s.summary(wall) for route, s in sorted(stats.items())},
+    }
+
+
+def print_report(report: dict) -> None:
+    total = report["total"]
+    print(
+        f"\n{report['mode']}  concurrency={report['concurrency']}  rate={report['rate'] or 'max'}  "
+        f"wall={report['wall_seconds']}s  requests={total['requests']}  "
+        f"rps={total['throughput_rps']}  errors={total['error_rate']:.2%}"
+    )
+    header = f"{'route':58} {'n':>7} {'rps':>8} {'err%':>7} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}"
+    print(header)
+    print("-" * len(header))
+    for route, s in report["routes"].items():
+        print(
+            f"{route[:58]:58} {s['requests']:>7} {s['throughput_rps']:>8.1f} {s['error_rate']:>7.2%} "
+            f"{s['p50_ms']:>8.1f} {s['p90_ms']:>8.1f} {s['p99_ms']:>8.1f} {s['max_ms']:>8.1f}"
+        )
+    print("(latencias en ms)")
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Replay de requests JSONL contra la API")
+    parser.add_argument("file", help="JSONL de requests (ej. el que escribe loadtest.generate)")
+    parser.add_argument("--base-url", help="Servidor a probar. Sin esto corre en proceso vía ASGITransport")
+    parser.add_argument("--database-url", help="Solo en proceso. Default: DATABASE_URL")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--rate", type=float, default=0.0, help="Llegadas por segundo (0 = lo más rápido posible)")
+    parser.add_argument("--poisson", action="store_true", help="Llegadas exponenciales en vez de constantes")
+    parser.add_argument("--limit", type=int, default=0, help="Máximo de requests a enviar")
+    parser.add_argument("--duration", type=float, default=0.0, help="Segundos (recorre el archivo en loop)")
+    parser.add_argument("--loop", action="store_true", help="Repetir el archivo hasta --limit/--duration")
+    parser.add_argument("--warmup", type=int, default=0, help="Requests iniciales que no cuentan")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json-out", help="Guardar el reporte en JSON")
+    args = parser.parse_args(argv)
+
+    if args.concurrency <= 0:
+        parser.error("--concurrency debe ser > 0")
+    if args.rate < 0:
+        parser.error("--rate no puede ser negativo")
+    if args.loop and not (args.limit or args.duration):
+        parser.error("--loop requiere --limit o --duration")
+    return args
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = _parse_args(argv)
+    if args.database_url:
+        os.environ["DATABASE_URL"] = args.database_url
+
+    # en proceso el log por request de app.db.queries ahogaría el reporte
+    logging.getLogger("app.db.queries").setLevel(logging.ERROR)
+
+    report = asyncio.run(run(args))
+    print_report(report)
+
+    if args.json_out:
+        with open(args.json_out, "w", encoding="utf-8") as fh:
+            json.dump(report, fh, indent=2)
+            fh.write("\n")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
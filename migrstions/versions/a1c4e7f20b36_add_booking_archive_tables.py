@@ -0,0 +1,66 @@
+"""add booking archive tables
+
+Revision ID: a1c4e7f20b36
+Revises: 9a579d2d35e7
+Create Date: 2026-10-18 10:12:41.204117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1c4e7f20b36'
+down_revision: Union[str, None] = '9a579d2d35e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('bookings_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('barber_id', sa.Integer(), nullable=False),
+    sa.Column('service_id', sa.Integer(), nullable=False),
+    sa.Column('start_datetime', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('end_datetime', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_bookings_archive_barber_id'), 'bookings_archive', ['barber_id'], unique=False)
+    op.create_index('ix_bookings_archive_barber_start', 'bookings_archive', ['barber_id', 'start_datetime'], unique=False)
+
+    op.create_table('beauty_bookings_archive',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('staff_id', sa.Integer(), nullable=False),
+    sa.Column('beauty_service_id', sa.Integer(), nullable=False),
+    sa.Column('start_datetime', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('end_datetime', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('status', sa.String(length=20), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_beauty_bookings_archive_staff_id'), 'beauty_bookings_archive', ['staff_id'], unique=False)
+    op.create_index('ix_beauty_bookings_archive_staff_start', 'beauty_bookings_archive', ['staff_id', 'start_datetime'], unique=False)
+
+    op.create_table('archive_checkpoints',
+    sa.Column('job_name', sa.String(length=50), nullable=False),
+    sa.Column('last_id', sa.Integer(), nullable=False),
+    sa.Column('rows_moved', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('job_name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('archive_checkpoints')
+    op.drop_index('ix_beauty_bookings_archive_staff_start', table_name='beauty_bookings_archive')
+    op.drop_index(op.f('ix_beauty_bookings_archive_staff_id'), table_name='beauty_bookings_archive')
+    op.drop_table('beauty_bookings_archive')
+    op.drop_index('ix_bookings_archive_barber_start', table_name='bookings_archive')
+    op.drop_index(op.f('ix_bookings_archive_barber_id'), table_name='bookings_archive')
+    op.drop_table('bookings_archive')
@@ -0,0 +1,36 @@
+"""add booking changed_at
+
+Revision ID: a3c9e7f1d52b
+Revises: f2b6d8e1a947
+Create Date: 2026-10-19 21:05:37.184402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c9e7f1d52b'
+down_revision: Union[str, None] = 'f2b6d8e1a947'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # filas existentes quedan con la hora de la migración: se archivan después de la
+    # ventana de sincronización, como si acabaran de cambiar
+    op.add_column(
+        'bookings',
+        sa.Column('changed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    )
+    op.add_column(
+        'beauty_bookings',
+        sa.Column('changed_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('beauty_bookings', 'changed_at')
+    op.drop_column('bookings', 'changed_at')
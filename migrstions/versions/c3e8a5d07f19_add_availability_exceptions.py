@@ -0,0 +1,47 @@
+"""add availability exceptions
+
+Revision ID: c3e8a5d07f19
+Revises: b7d2f9a41c58
+Create Date: 2026-10-18 12:41:09.318224
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e8a5d07f19'
+down_revision: Union[str, None] = 'b7d2f9a41c58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('availability_exceptions',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('business_id', sa.Integer(), nullable=False),
+    sa.Column('barber_id', sa.Integer(), nullable=True),
+    sa.Column('staff_id', sa.Integer(), nullable=True),
+    sa.Column('start_date', sa.Date(), nullable=False),
+    sa.Column('end_date', sa.Date(), nullable=False),
+    sa.Column('start_time', sa.Time(), nullable=True),
+    sa.Column('end_time', sa.Time(), nullable=True),
+    sa.Column('reason', sa.String(length=120), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['barber_id'], ['barbers.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['business_id'], ['businesses.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['staff_id'], ['staff.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_availability_exceptions_barber_id'), 'availability_exceptions', ['barber_id'], unique=False)
+    op.create_index(op.f('ix_availability_exceptions_staff_id'), 'availability_exceptions', ['staff_id'], unique=False)
+    op.create_index('ix_availability_exceptions_business_dates', 'availability_exceptions', ['business_id', 'start_date', 'end_date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_availability_exceptions_business_dates', table_name='availability_exceptions')
+    op.drop_index(op.f('ix_availability_exceptions_staff_id'), table_name='availability_exceptions')
+    op.drop_index(op.f('ix_availability_exceptions_barber_id'), table_name='availability_exceptions')
+    op.drop_table('availability_exceptions')
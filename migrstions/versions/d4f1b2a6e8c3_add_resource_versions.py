@@ -0,0 +1,32 @@
+"""add resource versions
+
+Revision ID: d4f1b2a6e8c3
+Revises: c3e8a5d07f19
+Create Date: 2026-10-19 10:12:44.902117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4f1b2a6e8c3'
+down_revision: Union[str, None] = 'c3e8a5d07f19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('resource_versions',
+    sa.Column('resource', sa.String(length=50), nullable=False),
+    sa.Column('scope_id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('resource', 'scope_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('resource_versions')
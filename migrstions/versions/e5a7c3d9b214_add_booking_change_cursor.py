@@ -0,0 +1,39 @@
+"""add booking change cursor
+
+Revision ID: e5a7c3d9b214
+Revises: d4f1b2a6e8c3
+Create Date: 2026-10-19 15:41:08.337251
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a7c3d9b214'
+down_revision: Union[str, None] = 'd4f1b2a6e8c3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # filas existentes quedan en 0: entran en la primera sincronización (since vacío)
+    op.add_column('bookings', sa.Column('change_seq', sa.BigInteger(), server_default='0', nullable=False))
+    op.add_column('bookings', sa.Column('change_op', sa.String(length=10), server_default='insert', nullable=False))
+    op.create_index('ix_bookings_barber_change', 'bookings', ['barber_id', 'change_seq', 'id'], unique=False)
+
+    op.add_column('beauty_bookings', sa.Column('change_seq', sa.BigInteger(), server_default='0', nullable=False))
+    op.add_column('beauty_bookings', sa.Column('change_op', sa.String(length=10), server_default='insert', nullable=False))
+    op.create_index('ix_beauty_bookings_staff_change', 'beauty_bookings', ['staff_id', 'change_seq', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_beauty_bookings_staff_change', table_name='beauty_bookings')
+    op.drop_column('beauty_bookings', 'change_op')
+    op.drop_column('beauty_bookings', 'change_seq')
+
+    op.drop_index('ix_bookings_barber_change', table_name='bookings')
+    op.drop_column('bookings', 'change_op')
+    op.drop_column('bookings', 'change_seq')
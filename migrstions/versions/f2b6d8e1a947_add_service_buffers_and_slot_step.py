@@ -0,0 +1,39 @@
+"""add service buffers and slot step
+
+Revision ID: f2b6d8e1a947
+Revises: e5a7c3d9b214
+Create Date: 2026-10-19 18:12:44.910528
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b6d8e1a947'
+down_revision: Union[str, None] = 'e5a7c3d9b214'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # servicios existentes quedan sin buffers y los negocios sin paso: mismos slots que antes
+    op.add_column('services', sa.Column('buffer_before_min', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('services', sa.Column('buffer_after_min', sa.Integer(), server_default='0', nullable=False))
+
+    op.add_column('beauty_services', sa.Column('buffer_before_min', sa.Integer(), server_default='0', nullable=False))
+    op.add_column('beauty_services', sa.Column('buffer_after_min', sa.Integer(), server_default='0', nullable=False))
+
+    op.add_column('businesses', sa.Column('slot_step_min', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('businesses', 'slot_step_min')
+
+    op.drop_column('beauty_services', 'buffer_after_min')
+    op.drop_column('beauty_services', 'buffer_before_min')
+
+    op.drop_column('services', 'buffer_after_min')
+    op.drop_column('services', 'buffer_before_min')
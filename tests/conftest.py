@@ -0,0 +1,146 @@
+# tests/conftest.py
+import os
+import tempfile
+
+# la app lee DATABASE_URL al importar app.db.session: tiene que quedar antes de todo
+_DB_DIR = tempfile.mkdtemp(prefix="beautybarber-tests-")
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL", f"sqlite:///{_DB_DIR}/test.db")
+# los builders de dicts se validan contra su schema (app.core.responses)
+os.environ.setdefault("RESPONSE_VALIDATION", "1")
+
+from datetime import date, datetime, time, timezone  # noqa: E402
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+import app.models as m  # noqa: E402
+from app.core.security import create_access_token, hash_password  # noqa: E402
+from app.db.base import Base  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.services import catalog_cache  # noqa: E402
+from app.services.calendar_feed import feed_token  # noqa: E402
+
+# lunes: las reglas de disponibilidad del tenant son de lunes
+TEST_DATE = date(2030, 1, 7)
+TEST_PASSWORD = "secret123"
+# la misma fecha como la mandan los tests en query params / JSON
+D = TEST_DATE.isoformat()
+
+# hash una sola vez (bcrypt es lento a propósito)
+_PASSWORD_HASH = hash_password(TEST_PASSWORD)
+
+
+def _utc(hour: int, minute: int = 0, day: date = TEST_DATE) -> datetime:
+    return datetime.combine(day, time(hour, minute), tzinfo=timezone.utc)
+
+
+def auth_headers(tenant: dict, role: str = "admin") -> dict:
+    """Header Authorization con el token de `role` ("admin" | "super" | "staff") del tenant."""
+    return {"Authorization": f"Bearer {tenant['tokens'][role]}"}
+
+
+def seed_tenant(db) -> dict:
+    """Un negocio chico con todo lo que tocan los endpoints (ids en el dict devuelto)."""
+    business = m.Business(name="Tenant", slug="tenant", timezone="UTC")
+    db.add(business)
+    db.flush()
+
+    cut = m.Service(name="Corte", duration_min=30, price=150)
+    beard = m.Service(name="Barba", duration_min=30, price=100)
+    spare = m.Service(name="Tinte", duration_min=60, price=300)
+    db.add_all([cut, beard, spare])
+    db.flush()
+
+    barber = m.Barber(business_id=business.id, name="Beto", email="beto@example.com")
+    barber.services.extend([cut, beard])
+    other_barber = m.Barber(business_id=business.id, name="Memo", email="memo@example.com")
+    other_barber.services.append(cut)
+    db.add_all([barber, other_barber])
+
+    staff = m.Staff(business_id=business.id, name="Sofi")
+    other_staff = m.Staff(business_id=business.id, name="Vale")
+    db.add_all([staff, other_staff])
+
+    nails = m.BeautyService(business_id=business.id, name="Uñas", duration_min=60, price=250)
+    lashes = m.BeautyService(business_id=business.id, name="Pestañas", duration_min=45, price=300)
+    db.add_all([nails, lashes])
+    db.flush()
+
+    db.add_all([
+        m.StaffService(staff_id=staff.id, beauty_service_id=nails.id),
+        m.StaffService(staff_id=other_staff.id, beauty_service_id=nails.id),
+    ])
+
+    rule = m.BarberAvailabilityRule(
+        barber_id=barber.id, day_of_week=0, start_time=time(9), end_time=time(13), slot_minutes=30
+    )
+    db.add_all([
+        rule,
+        m.BarberAvailabilityRule(
+            barber_id=barber.id, day_of_week=0, start_time=time(15), end_time=time(18), slot_minutes=30
+        ),
+        m.StaffAvailabilityRule(staff_id=staff.id, day_of_week="monday", start_time=time(9), end_time=time(13)),
+        m.StaffAvailabilityRule(staff_id=other_staff.id, day_of_week="monday", start_time=time(10), end_time=time(14)),
+    ])
+
+    booking = m.Booking(barber_id=barber.id, service_id=cut.id, start_datetime=_utc(10), end_datetime=_utc(10, 30))
+    beauty_booking = m.BeautyBooking(
+        staff_id=staff.id, beauty_service_id=nails.id, start_datetime=_utc(11), end_datetime=_utc(12)
+    )
+    exception = m.AvailabilityException(
+        business_id=business.id, barber_id=other_barber.id, start_date=TEST_DATE, end_date=TEST_DATE, reason="vacaciones"
+    )
+    db.add_all([booking, beauty_booking, exception])
+
+    admin = m.User(business_id=business.id, name="Admin", email="admin@example.com",
+                   password_hash=_PASSWORD_HASH, role="business_admin")
+    super_admin = m.User(business_id=business.id, name="Root", email="root@example.com",
+                         password_hash=_PASSWORD_HASH, role="super_admin")
+    staff_user = m.User(business_id=business.id, staff_id=staff.id, name="Sofi", email="sofi@example.com",
+                        password_hash=_PASSWORD_HASH, role="staff")
+    db.add_all([admin, super_admin, staff_user])
+    db.commit()
+
+    return {
+        "business": business.id,
+        "barber": barber.id,
+        "other_barber": other_barber.id,
+        "service": cut.id,
+        "other_service": beard.id,
+        "spare_service": spare.id,
+        "staff": staff.id,
+        "other_staff": other_staff.id,
+        "beauty_service": nails.id,
+        "other_beauty_service": lashes.id,
+        "rule": rule.id,
+        "booking": booking.id,
+        "beauty_booking": beauty_booking.id,
+        "exception": exception.id,
+        "date": TEST_DATE.isoformat(),
+        "staff_feed": feed_token("staff", staff.id),
+        "tokens": {
+            "admin": create_access_token({"sub": str(admin.id), "role": admin.role}),
+            "super": create_access_token({"sub": str(super_admin.id), "role": super_admin.role}),
+            "staff": create_access_token({"sub": str(staff_user.id), "role": staff_user.role}),
+        },
+    }
+
+
+@pytest.fixture()
+def tenant() -> dict:
+    # esquema limpio por test: los endpoints que escriben no afectan a los demás
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    # los ids y las versiones se reinician con el esquema: la caché de catálogo también
+    catalog_cache.clear()
+    db = SessionLocal()
+    try:
+        return seed_tenant(db)
+    finally:
+        db.close()
+
+
+@pytest.fixture()
+def client() -> TestClient:
+    return TestClient(app)
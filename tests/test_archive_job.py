@@ -0,0 +1,104 @@
+# tests/test_archive_job.py
+"""
+Job de archivado: mueve bookings viejos a *_archive por lotes con checkpoint, sigue
+desde el checkpoint entre corridas y solo vuelve al inicio cuando ya no quedan
+candidatos después de él (un lote corto por SKIP LOCKED no cierra la pasada). Lo que
+cambió dentro de la ventana de sincronización no se mueve.
+"""
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select, update
+
+import app.models as m
+from app.db.session import SessionLocal
+from app.services import archive_service
+from app.services.archive_service import run_archive_job
+
+from conftest import auth_headers
+
+
+def _old_bookings(tenant, count: int) -> list[int]:
+    # terminaron hace un año: fuera de la retención de 180 días
+    start = datetime.now(timezone.utc) - timedelta(days=365)
+    with SessionLocal() as db:
+        rows = [
+            m.Booking(
+                barber_id=tenant["barber"],
+                service_id=tenant["service"],
+                start_datetime=start + timedelta(hours=i),
+                end_datetime=start + timedelta(hours=i, minutes=30),
+            )
+            for i in range(count)
+        ]
+        db.add_all(rows)
+        db.flush()
+        # sin cambios desde entonces: fuera de la ventana de sincronización
+        ids = [row.id for row in rows]
+        db.execute(update(m.Booking).where(m.Booking.id.in_(ids)).values(changed_at=start))
+        db.commit()
+        return ids
+
+
+def _checkpoint(db) -> int:
+    return db.get(m.ArchiveCheckpoint, "bookings").last_id
+
+
+def test_archive_moves_old_rows_and_resumes_from_checkpoint(tenant):
+    old_ids = _old_bookings(tenant, 5)
+
+    with SessionLocal() as db:
+        first = run_archive_job(db, "bookings", batch_size=2, max_batches=1)
+        assert (first.rows_moved, first.pass_completed) == (2, False)
+        assert _checkpoint(db) == old_ids[1]
+
+        rest = run_archive_job(db, "bookings", batch_size=2)
+        assert (rest.rows_moved, rest.pass_completed) == (3, True)
+        # se acabó el rango: la próxima pasada empieza desde el inicio
+        assert _checkpoint(db) == 0
+
+        archived = db.execute(select(m.BookingArchive.id).order_by(m.BookingArchive.id)).scalars().all()
+        assert archived == old_ids
+        # el booking confirmado del seed (2030) se queda en la tabla caliente
+        assert db.get(m.Booking, tenant["booking"]) is not None
+
+
+def test_short_batch_with_pending_rows_keeps_the_checkpoint(tenant, monkeypatch):
+    old_ids = _old_bookings(tenant, 4)
+    real_batch = archive_service.archive_batch
+
+    # simula SKIP LOCKED: el lote sale con una sola fila aunque queden candidatos
+    def skipping_batch(session, spec, cutoffs, after_id, batch_size):
+        return real_batch(session, spec, cutoffs, after_id, 1)
+
+    monkeypatch.setattr(archive_service, "archive_batch", skipping_batch)
+    with SessionLocal() as db:
+        result = run_archive_job(db, "bookings", batch_size=3)
+        assert (result.rows_moved, result.pass_completed) == (1, False)
+        assert _checkpoint(db) == old_ids[0]
+
+    monkeypatch.setattr(archive_service, "archive_batch", real_batch)
+    with SessionLocal() as db:
+        result = run_archive_job(db, "bookings", batch_size=3)
+        assert (result.rows_moved, result.pass_completed) == (3, True)
+        assert _checkpoint(db) == 0
+        assert db.execute(select(func.count()).select_from(m.BookingArchive)).scalar() == 4
+
+
+def test_recent_cancel_stays_until_the_sync_window_passes(tenant, client):
+    client.patch(f"/api/barbers/{tenant['barber']}/bookings/{tenant['booking']}/cancel")
+
+    with SessionLocal() as db:
+        assert run_archive_job(db, "bookings").rows_moved == 0
+    # el feed de sincronización todavía entrega el cancel
+    changes = client.get(f"/api/barbers/{tenant['barber']}/bookings/changes", headers=auth_headers(tenant)).json()
+    assert [(item["id"], item["change_op"]) for item in changes["items"]] == [(tenant["booking"], "cancel")]
+
+    with SessionLocal() as db:
+        db.execute(
+            update(m.Booking)
+            .where(m.Booking.id == tenant["booking"])
+            .values(changed_at=datetime.now(timezone.utc) - timedelta(days=31))
+        )
+        db.commit()
+        assert run_archive_job(db, "bookings").rows_moved == 1
+        assert db.get(m.Booking, tenant["booking"]) is None
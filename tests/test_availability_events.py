@@ -0,0 +1,141 @@
+# tests/test_availability_events.py
+"""
+Días publicados con cada cambio de agenda (crear, reagendar, cancelar, cancelación
+masiva): son días locales del negocio, igual que los motores de slots. En Monterrey
+(UTC-6) las 19:00 del 7 de enero son 01:00 UTC del 8.
+"""
+from datetime import date, datetime, timezone
+
+import pytest
+
+from app.core import availability_events
+from app.core.availability_events import dates_between
+from app.db.session import SessionLocal
+from app.models.business import Business
+
+from conftest import auth_headers
+
+LOCAL_DAY = date(2030, 1, 7)
+
+
+@pytest.fixture()
+def changes():
+    received = []
+    availability_events.subscribe(received.append)
+    yield received
+    availability_events.unsubscribe(received.append)
+
+
+@pytest.fixture()
+def monterrey(tenant):
+    with SessionLocal() as db:
+        db.get(Business, tenant["business"]).timezone = "America/Monterrey"
+        db.commit()
+    return tenant
+
+
+def test_dates_between_uses_the_business_day():
+    start = datetime(2030, 1, 8, 1, 0, tzinfo=timezone.utc)
+    end = datetime(2030, 1, 8, 1, 30, tzinfo=timezone.utc)
+    assert dates_between(start, end, "America/Monterrey") == (LOCAL_DAY,)
+    assert dates_between(start, end, "UTC") == (date(2030, 1, 8),)
+    # naive = UTC, como regresa SQLite
+    assert dates_between(start.replace(tzinfo=None), end.replace(tzinfo=None), "America/Monterrey") == (LOCAL_DAY,)
+    # termina justo a medianoche local: no toca el día siguiente
+    assert dates_between(
+        datetime(2030, 1, 8, 5, 0, tzinfo=timezone.utc), datetime(2030, 1, 8, 6, 0, tzinfo=timezone.utc), "America/Monterrey"
+    ) == (LOCAL_DAY,)
+
+
+def test_barber_changes_publish_the_local_day(monterrey, client, changes):
+    tenant = monterrey
+    url = f"/api/barbers/{tenant['barber']}/bookings"
+    created = client.post(url, json={
+        "service_id": tenant["service"],
+        "start_datetime": "2030-01-07T19:00:00-06:00",
+        "end_datetime": "2030-01-07T19:30:00-06:00",
+    })
+    assert created.status_code == 201, created.text
+    booking_id = created.json()["id"]
+
+    # reagendar y cancelar leen el booking guardado en UTC
+    moved = client.patch(f"{url}/{booking_id}/reschedule", json={
+        "start_datetime": "2030-01-08T02:00:00+00:00",
+        "end_datetime": "2030-01-08T02:30:00+00:00",
+    })
+    assert moved.status_code == 200, moved.text
+    assert client.patch(f"{url}/{booking_id}/cancel").status_code == 200
+
+    assert [(c.reason, c.dates) for c in changes] == [
+        ("booking_created", (LOCAL_DAY,)),
+        ("booking_rescheduled", (LOCAL_DAY,)),
+        ("booking_cancelled", (LOCAL_DAY,)),
+    ]
+
+
+def test_beauty_bulk_cancel_publishes_the_local_day(monterrey, client, changes):
+    tenant = monterrey
+    created = client.post("/api/beauty-bookings", json={
+        "staff_id": tenant["staff"],
+        "beauty_service_id": tenant["beauty_service"],
+        "start_datetime": "2030-01-08T01:00:00+00:00",
+        "end_datetime": "2030-01-08T02:00:00+00:00",
+    })
+    assert created.status_code == 201, created.text
+
+    response = client.post(
+        f"/api/staff/{tenant['staff']}/beauty-bookings/bulk-cancel",
+        json={"start_datetime": "2030-01-08T00:30:00+00:00", "end_datetime": "2030-01-08T03:00:00+00:00"},
+        headers={"Authorization": f"Bearer {tenant['tokens']['admin']}"},
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["cancelled_count"] == 1
+
+    assert [(c.reason, c.dates) for c in changes] == [
+        ("booking_created", (LOCAL_DAY,)),
+        ("booking_cancelled", (LOCAL_DAY,)),
+    ]
+
+
+def test_buffer_crossing_midnight_publishes_the_next_day(tenant, client, changes):
+    # negocio en UTC; 23:30 + 30 min de servicio + 60 de limpieza llega a las 01:00 del 8
+    assert client.put(f"/api/services/{tenant['service']}", json={"buffer_after_min": 60}).status_code == 200
+    both_days = (LOCAL_DAY, date(2030, 1, 8))
+
+    url = f"/api/barbers/{tenant['barber']}/bookings"
+    created = client.post(url, json={
+        "service_id": tenant["service"],
+        "start_datetime": "2030-01-07T23:30:00+00:00",
+        "end_datetime": "2030-01-08T00:00:00+00:00",
+    })
+    assert created.status_code == 201, created.text
+    booking_id = created.json()["id"]
+
+    moved = client.patch(f"{url}/{booking_id}/reschedule", json={
+        "start_datetime": "2030-01-07T23:00:00+00:00",
+        "end_datetime": "2030-01-07T23:30:00+00:00",
+    })
+    assert moved.status_code == 200, moved.text
+    assert client.patch(f"{url}/{booking_id}/cancel").status_code == 200
+
+    again = client.post(url, json={
+        "service_id": tenant["service"],
+        "start_datetime": "2030-01-07T23:30:00+00:00",
+        "end_datetime": "2030-01-08T00:00:00+00:00",
+    })
+    assert again.status_code == 201, again.text
+    bulk = client.post(
+        f"{url}/bulk-cancel",
+        json={"start_datetime": "2030-01-07T23:00:00+00:00", "end_datetime": "2030-01-08T00:00:00+00:00"},
+        headers=auth_headers(tenant),
+    )
+    assert bulk.status_code == 200, bulk.text
+    assert "buffer_after_min" not in bulk.json()["items"][0]
+
+    assert [(c.reason, c.dates) for c in changes] == [
+        ("booking_created", both_days),
+        ("booking_rescheduled", both_days),
+        ("booking_cancelled", both_days),
+        ("booking_created", both_days),
+        ("booking_cancelled", both_days),
+    ]
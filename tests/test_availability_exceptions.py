@@ -0,0 +1,93 @@
+# tests/test_availability_exceptions.py
+"""
+Excepciones de disponibilidad (feriados, vacaciones, bloqueos parciales) en los dos
+motores de slots y su CRUD. Seed: Memo (other_barber) tiene el día de vacaciones.
+"""
+from app.core.query_counter import count_queries
+
+from conftest import D, auth_headers
+
+
+def _barber_slots(client, tenant, barber_key: str = "barber") -> dict:
+    return client.get(
+        f"/api/barbers/{tenant[barber_key]}/availability/slots",
+        params={"date": D, "service_id": tenant["service"]},
+    ).json()
+
+
+def _beauty_slots(client, tenant) -> dict:
+    return client.get(
+        f"/api/beauty-services/{tenant['beauty_service']}/available-slots", params={"date": D}
+    ).json()
+
+
+def _create(client, tenant, **payload):
+    return client.post(
+        "/api/availability/exceptions",
+        json={"start_date": D, "end_date": D, **payload},
+        headers=auth_headers(tenant),
+    )
+
+
+def test_resource_exceptions_close_the_day_or_block_slots(tenant, client):
+    # día completo del seed: Memo cerrado
+    assert _barber_slots(client, tenant, "other_barber")["is_closed"] is True
+
+    response = _create(client, tenant, barber_id=tenant["barber"], start_time="11:00", end_time="12:00")
+    assert response.status_code == 201, response.text
+
+    morning = _barber_slots(client, tenant)["items"][0]
+    assert {"11:00", "11:30"} <= set(morning["unavailable_slots"])
+    assert not {"11:00", "11:30"} & set(morning["slots"])
+    assert "12:00" in morning["slots"]
+
+    # bloqueo parcial de Sofi: solo le quita su ventana, Vale sigue igual
+    before = {item["staff_id"]: item for item in _beauty_slots(client, tenant)["items"]}
+    assert _create(client, tenant, staff_id=tenant["staff"], start_time="09:00", end_time="10:00").status_code == 201
+    after = {item["staff_id"]: item for item in _beauty_slots(client, tenant)["items"]}
+    assert "09:00" in before[tenant["staff"]]["slots"]
+    assert "09:00" not in after[tenant["staff"]]["slots"]
+    assert after[tenant["other_staff"]] == before[tenant["other_staff"]]
+
+
+def test_business_closure_short_circuits_both_engines(tenant, client):
+    created = _create(client, tenant, reason="feriado")
+    assert created.status_code == 201, created.text
+
+    # el cierre del negocio corta antes de leer bookings
+    with count_queries() as stats:
+        beauty = _beauty_slots(client, tenant)
+    assert (beauty["is_closed"], beauty["items"]) == (True, [])
+    assert not any("beauty_bookings" in sql for sql in stats.statements)
+
+    barber = _barber_slots(client, tenant)
+    assert (barber["is_closed"], barber["slots"]) == (True, [])
+
+    # borrarla reabre el día
+    deleted = client.delete(f"/api/availability/exceptions/{created.json()['id']}", headers=auth_headers(tenant))
+    assert deleted.status_code == 200
+    assert _beauty_slots(client, tenant)["is_closed"] is False
+    assert _barber_slots(client, tenant)["slots"]
+
+
+def test_create_validates_and_list_filters(tenant, client):
+    assert _create(client, tenant, barber_id=tenant["barber"], staff_id=tenant["staff"]).status_code == 400
+    assert _create(client, tenant, start_time="12:00").status_code == 400
+    assert _create(client, tenant, start_time="12:00", end_time="11:00").status_code == 400
+    assert client.post(
+        "/api/availability/exceptions", json={"start_date": D, "end_date": "2030-01-06"}, headers=auth_headers(tenant)
+    ).status_code == 400
+    assert _create(client, tenant, barber_id=999).status_code == 404
+    assert client.post("/api/availability/exceptions", json={"start_date": D, "end_date": D}).status_code == 401
+
+    listed = client.get(
+        "/api/availability/exceptions",
+        params={"start_date": D, "end_date": D, "barber_id": tenant["other_barber"]},
+        headers=auth_headers(tenant),
+    )
+    assert listed.status_code == 200
+    assert [item["id"] for item in listed.json()] == [tenant["exception"]]
+    assert client.get(
+        "/api/availability/exceptions", params={"start_date": "2030-02-01", "end_date": "2030-02-28"},
+        headers=auth_headers(tenant),
+    ).json() == []
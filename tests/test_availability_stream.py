@@ -0,0 +1,176 @@
+# tests/test_availability_stream.py
+"""
+Stream SSE de disponibilidad. TestClient espera a que la respuesta termine, así que
+el stream se maneja con ASGI directo: se abre, se hace un booking real en otro hilo
+y se lee el evento que llega; al final se manda http.disconnect.
+"""
+import asyncio
+from datetime import date
+
+import orjson
+
+from app.core.availability_stream import RESYNC, AvailabilityHub, SlotChange
+from app.core.instrumentation import HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT, SSE_CLIENTS
+from app.core.invalidation import Invalidation
+from app.db.session import SessionLocal
+from app.main import app
+from app.models.business import Business
+
+from conftest import D
+
+
+class _SSEClient:
+    def __init__(self, path: str, query: str = ""):
+        self.scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "query_string": query.encode(),
+            "root_path": "",
+            "headers": [(b"host", b"testserver")],
+            "client": ("127.0.0.1", 1234),
+            "server": ("testserver", 80),
+        }
+        self.messages: asyncio.Queue = asyncio.Queue()
+        self.disconnected = asyncio.Event()
+        self._requested = False
+
+    async def _receive(self):
+        if not self._requested:
+            self._requested = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await self.disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def _send(self, message):
+        await self.messages.put(message)
+
+    def start(self) -> asyncio.Task:
+        return asyncio.create_task(app(self.scope, self._receive, self._send))
+
+    async def read_until(self, marker: str, timeout: float = 5) -> str:
+        text = ""
+        while marker not in text:
+            message = await asyncio.wait_for(self.messages.get(), timeout)
+            if message["type"] == "http.response.start":
+                assert message["status"] == 200
+                continue
+            text += message.get("body", b"").decode()
+        return text
+
+
+def _book(client, tenant: dict, hour: int):
+    return client.post("/api/beauty-bookings", json={
+        "staff_id": tenant["staff"],
+        "beauty_service_id": tenant["beauty_service"],
+        "start_datetime": f"{D}T{hour:02d}:00:00+00:00",
+        "end_datetime": f"{D}T{hour:02d}:59:00+00:00",
+    })
+
+
+def test_booking_is_pushed_to_matching_stream(tenant, client):
+    async def scenario():
+        stream = _SSEClient(f"/api/businesses/{tenant['business']}/availability/stream", f"date={D}")
+        task = stream.start()
+        await stream.read_until(": connected")
+
+        response = await asyncio.to_thread(_book, client, tenant, 9)
+        assert response.status_code == 201
+
+        text = await stream.read_until("event: slots")
+        data = orjson.loads(text.split("data: ")[-1].split("\n")[0])
+        assert data == {"resource": "staff", "id": tenant["staff"], "date": D}
+
+        stream.disconnected.set()
+        await asyncio.wait_for(task, 5)
+
+    asyncio.run(scenario())
+
+
+def test_open_stream_stays_out_of_http_latency_and_in_flight(tenant):
+    route = "/api/businesses/{business_id}/availability/stream"
+
+    def stream_latency_samples() -> int:
+        return sum(v["count"] for k, v in HTTP_REQUEST_DURATION.samples().items() if k[1] == route)
+
+    in_flight = HTTP_REQUESTS_IN_FLIGHT.samples().get(("GET",), 0.0)
+    samples = stream_latency_samples()
+
+    async def scenario():
+        stream = _SSEClient(f"/api/businesses/{tenant['business']}/availability/stream", f"date={D}")
+        task = stream.start()
+        await stream.read_until(": connected")
+        # abierto: lo cuenta SSE_CLIENTS, no las requests en curso
+        assert HTTP_REQUESTS_IN_FLIGHT.samples().get(("GET",), 0.0) == in_flight
+        assert SSE_CLIENTS.samples()[()] >= 1
+
+        stream.disconnected.set()
+        await asyncio.wait_for(task, 5)
+
+    asyncio.run(scenario())
+    assert HTTP_REQUESTS_IN_FLIGHT.samples().get(("GET",), 0.0) == in_flight
+    assert stream_latency_samples() == samples
+
+
+def test_near_midnight_booking_is_pushed_for_the_local_day(tenant, client):
+    # 19:00 en Monterrey = 01:00 UTC del día siguiente; los slots agrupan por día local
+    with SessionLocal() as db:
+        db.get(Business, tenant["business"]).timezone = "America/Monterrey"
+        db.commit()
+
+    async def scenario():
+        stream = _SSEClient(f"/api/businesses/{tenant['business']}/availability/stream", f"date={D}")
+        task = stream.start()
+        await stream.read_until(": connected")
+
+        response = await asyncio.to_thread(client.post, "/api/beauty-bookings", json={
+            "staff_id": tenant["staff"],
+            "beauty_service_id": tenant["beauty_service"],
+            "start_datetime": "2030-01-08T01:00:00+00:00",
+            "end_datetime": "2030-01-08T02:00:00+00:00",
+        })
+        assert response.status_code == 201, response.text
+
+        text = await stream.read_until("event: slots")
+        data = orjson.loads(text.split("data: ")[-1].split("\n")[0])
+        assert data == {"resource": "staff", "id": tenant["staff"], "date": D}
+
+        stream.disconnected.set()
+        await asyncio.wait_for(task, 5)
+
+    asyncio.run(scenario())
+
+
+def test_filters_and_overflow_resync():
+    async def scenario():
+        hub = AvailabilityHub(max_clients=2)
+        staff_only = hub.subscribe(1, staff_id=7, queue_size=2)
+        other_day = hub.subscribe(1, day=date(2030, 1, 8))
+        assert hub.subscribe(1) is None  # tope de clientes
+
+        hub.publish([Invalidation(1, "staff_slots", 8, date(2030, 1, 7))])
+        hub.publish([Invalidation(1, "staff_slots", 7, date(2030, 1, 7))])
+        await asyncio.sleep(0)  # call_soon_threadsafe corre en la siguiente vuelta
+        assert await staff_only.next(1) == SlotChange("staff", 7, date(2030, 1, 7))
+        assert other_day.queue.empty()
+
+        # cliente lento: se llena la cola y queda un solo resync
+        hub.publish([Invalidation(1, "staff_slots", 7, None)] * 5)
+        hub.publish([Invalidation(1, "business_slots", 1, None)])
+        await asyncio.sleep(0)
+        assert staff_only.queue.qsize() == 1
+        assert await staff_only.next(1) is RESYNC
+        # el resync del bus (reconexión del listener) llega a todos
+        hub.publish([Invalidation(0, "resync")])
+        await asyncio.sleep(0)
+        assert await other_day.next(1) is RESYNC
+
+        hub.unsubscribe(staff_only)
+        hub.unsubscribe(staff_only)
+        assert hub.subscribe(2) is not None
+
+    asyncio.run(scenario())
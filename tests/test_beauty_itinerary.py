@@ -0,0 +1,177 @@
+# tests/test_beauty_itinerary.py
+"""
+Itinerarios de varios servicios: búsqueda pura sobre la ocupación del día (mínimo de
+cambios de staff, ramas sin staff libre descartadas) y reserva todo-o-nada.
+Seed: Sofi 9-13 con booking 11-12, Vale 10-14; uñas (60 min) las hacen las dos.
+"""
+import threading
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import func, select
+
+import app.models as m
+from app.core.occupancy import Occupancy
+from app.db.session import SessionLocal, engine
+from app.services import catalog_cache
+from app.services.beauty_itinerary import book_itinerary, search_itineraries
+from app.services.booking_locks import LOCK_WAIT_SECONDS, required_lock_mode
+from app.services.catalog_cache import ServiceEntry
+from app.services.staff_day import StaffDay
+
+from conftest import D
+
+
+def _at(hour: int, minute: int = 0) -> datetime:
+    return datetime(2030, 1, 7, hour, minute)
+
+
+def _assign_lashes_to_vale(client, tenant):
+    response = client.post(
+        f"/api/staff/{tenant['other_staff']}/services/{tenant['other_beauty_service']}",
+        headers={"Authorization": f"Bearer {tenant['tokens']['admin']}"},
+    )
+    assert response.status_code == 201, response.text
+
+
+def _search(client, tenant, *service_ids, limit=5):
+    response = client.get(
+        "/api/beauty-itineraries",
+        params={"service_ids": list(service_ids), "date": D, "limit": limit},
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_solver_prefers_same_staff_and_prunes_dead_branches():
+    cut = ServiceEntry(1, 1, "Corte", 60, 100, True)
+    color = ServiceEntry(2, 1, "Color", 90, 300, True)
+    days = {
+        # A está libre todo el día; B tiene 10-12 ocupado
+        1: StaffDay(1, ((_at(9), _at(13)),), Occupancy(), 0),
+        2: StaffDay(2, ((_at(9), _at(18)),), Occupancy([(_at(10), _at(12))]), 120),
+    }
+    result = search_itineraries([cut, color], [[1, 2], [2]], days, limit=3, step_minutes=60)
+
+    assert not result.truncated
+    # 9:00: color (solo B) a las 10 choca; 10:00: B ocupado hasta 12 -> 11:00 corte con A, color con B a las 12
+    first = result.items[0]
+    assert [(leg.staff_id, leg.start) for leg in first.legs] == [(1, _at(11)), (2, _at(12))]
+    assert first.staff_changes == 1
+    # 12:00: B puede hacer los dos -> sin cambio de staff aunque A también esté libre
+    second = result.items[1]
+    assert [(leg.staff_id, leg.start) for leg in second.legs] == [(2, _at(12)), (2, _at(13))]
+    assert second.staff_changes == 0
+
+
+def test_solver_does_not_chain_the_same_staff_over_a_buffer():
+    # 15 min de limpieza después del corte: el color pegado no puede ser con el mismo staff
+    cut = ServiceEntry(1, 1, "Corte", 60, 100, True, 0, 15)
+    color = ServiceEntry(2, 1, "Color", 60, 300, True)
+    days = {staff_id: StaffDay(staff_id, ((_at(9), _at(13)),), Occupancy(), 0) for staff_id in (1, 2)}
+    result = search_itineraries([cut, color], [[1, 2], [1, 2]], days, limit=1, step_minutes=60)
+
+    [first] = result.items
+    assert [(leg.staff_id, leg.start) for leg in first.legs] == [(1, _at(9)), (2, _at(10))]
+    assert first.staff_changes == 1
+
+
+def test_search_endpoint_returns_back_to_back_legs(tenant, client):
+    _assign_lashes_to_vale(client, tenant)
+    body = _search(client, tenant, tenant["beauty_service"], tenant["other_beauty_service"], limit=2)
+
+    first = body["items"][0]
+    assert first["start_datetime"].startswith(f"{D}T09:00:00")
+    assert [leg["staff_id"] for leg in first["legs"]] == [tenant["staff"], tenant["other_staff"]]
+    assert first["legs"][0]["end_datetime"] == first["legs"][1]["start_datetime"]
+    assert first["end_datetime"].startswith(f"{D}T10:45:00")
+    assert len(body["items"]) == 2
+
+    # 5 h de uñas seguidas solo caben 9-14 cambiando de Sofi a Vale una vez
+    [marathon] = _search(client, tenant, *[tenant["beauty_service"]] * 5)["items"]
+    staff_ids = [leg["staff_id"] for leg in marathon["legs"]]
+    assert staff_ids[0] == tenant["staff"] and staff_ids[-1] == tenant["other_staff"]
+    assert marathon["staff_changes"] == 1
+
+    bad = client.get("/api/beauty-itineraries", params={"service_ids": [999], "date": D})
+    assert bad.status_code == 404
+
+
+def test_book_itinerary_is_all_or_nothing(tenant, client):
+    _assign_lashes_to_vale(client, tenant)
+    itinerary = _search(client, tenant, tenant["beauty_service"], tenant["other_beauty_service"])["items"][0]
+    legs = [
+        {"beauty_service_id": leg["beauty_service_id"], "staff_id": leg["staff_id"], "start_datetime": leg["start_datetime"]}
+        for leg in itinerary["legs"]
+    ]
+
+    booked = client.post("/api/beauty-itineraries", json={"legs": legs})
+    assert booked.status_code == 201, booked.text
+    assert [b["staff_id"] for b in booked.json()["items"]] == [tenant["staff"], tenant["other_staff"]]
+
+    # el segundo paso ya está tomado: el primero (libre, otra hora) tampoco se crea
+    retry = [dict(legs[0], start_datetime=f"{D}T12:00:00+00:00"), legs[1]]
+    before = client.get(f"/api/staff/{tenant['staff']}/beauty-bookings/changes",
+                        headers={"Authorization": f"Bearer {tenant['tokens']['staff']}"}).json()
+    assert client.post("/api/beauty-itineraries", json={"legs": retry}).status_code == 400
+    after = client.get(f"/api/staff/{tenant['staff']}/beauty-bookings/changes",
+                       params={"since": before["cursor"]},
+                       headers={"Authorization": f"Bearer {tenant['tokens']['staff']}"}).json()
+    assert after["items"] == []
+
+    # fuera del horario de la regla
+    late = [dict(legs[0], start_datetime=f"{D}T12:30:00+00:00")]
+    assert client.post("/api/beauty-itineraries", json={"legs": late}).status_code == 400
+
+
+def _nails_for_both(db, tenant, reverse: bool = False):
+    catalog = catalog_cache.tenant_catalog(db, tenant["business"])
+    nails = catalog.services[tenant["beauty_service"]]
+    legs = [
+        (nails, tenant["staff"], datetime(2030, 1, 7, 9, 0, tzinfo=timezone.utc)),
+        (nails, tenant["other_staff"], datetime(2030, 1, 7, 12, 0, tzinfo=timezone.utc)),
+    ]
+    return catalog, legs[::-1] if reverse else legs
+
+
+def test_book_itinerary_locks_every_staff_without_booking_lock_mode(tenant):
+    with SessionLocal() as db:
+        mode = required_lock_mode(db, "none")
+        before = LOCK_WAIT_SECONDS.samples().get(("staff", mode), {"count": 0})["count"]
+        catalog, legs = _nails_for_both(db, tenant)
+        assert len(book_itinerary(db, catalog, legs, lock_mode="none")) == 2
+    assert LOCK_WAIT_SECONDS.samples()[("staff", mode)]["count"] == before + 2
+
+
+@pytest.mark.skipif(engine.dialect.name != "postgresql", reason="el lock solo serializa en Postgres")
+def test_concurrent_itineraries_for_the_same_slots_book_once(tenant):
+    barrier = threading.Barrier(4)
+    results: list[str] = []
+
+    def writer(reverse: bool):
+        with SessionLocal() as db:
+            # la mitad pide los pasos al revés: los locks van en orden fijo, sin deadlock
+            catalog, legs = _nails_for_both(db, tenant, reverse)
+            barrier.wait()
+            try:
+                book_itinerary(db, catalog, legs)
+                results.append("ok")
+            except ValueError:
+                results.append("conflict")
+
+    threads = [threading.Thread(target=writer, args=(i % 2 == 1,)) for i in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(results) == ["conflict", "conflict", "conflict", "ok"]
+    with SessionLocal() as db:
+        count = db.execute(
+            select(func.count()).select_from(m.BeautyBooking).where(
+                m.BeautyBooking.start_datetime.in_(
+                    [datetime(2030, 1, 7, 9, 0, tzinfo=timezone.utc), datetime(2030, 1, 7, 12, 0, tzinfo=timezone.utc)]
+                )
+            )
+        ).scalar()
+    assert count == 2
@@ -0,0 +1,83 @@
+# tests/test_booking_changes.py
+"""
+Sincronización incremental: el cursor avanza con cada insert/update/cancel (ORM y
+update() de Core) y una sincronización al día devuelve una página vacía.
+"""
+from conftest import D, auth_headers
+
+
+def _changes(client, tenant, since: str | None = None, role: str = "staff", **params):
+    url = f"/api/staff/{tenant['staff']}/beauty-bookings/changes"
+    if since is not None:
+        params["since"] = since
+    response = client.get(url, params=params, headers=auth_headers(tenant, role))
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_initial_sync_then_only_new_changes(tenant, client):
+    first = _changes(client, tenant)
+    assert [item["id"] for item in first["items"]] == [tenant["beauty_booking"]]
+    assert first["items"][0]["change_op"] == "insert"
+    assert first["has_more"] is False
+
+    # al día: nada nuevo y el cursor no se mueve
+    again = _changes(client, tenant, first["cursor"])
+    assert again == {"items": [], "cursor": first["cursor"], "has_more": False}
+
+    created = client.post("/api/beauty-bookings", json={
+        "staff_id": tenant["staff"],
+        "beauty_service_id": tenant["beauty_service"],
+        "start_datetime": f"{D}T09:00:00+00:00",
+        "end_datetime": f"{D}T10:00:00+00:00",
+    }).json()
+    client.patch(
+        f"/api/beauty-bookings/{tenant['beauty_booking']}/reschedule",
+        json={"start_datetime": f"{D}T12:00:00+00:00", "end_datetime": f"{D}T13:00:00+00:00"},
+    )
+    client.patch(f"/api/beauty-bookings/{created['id']}/cancel")
+
+    delta = _changes(client, tenant, first["cursor"])
+    ops = {item["id"]: item["change_op"] for item in delta["items"]}
+    assert ops == {tenant["beauty_booking"]: "update", created["id"]: "cancel"}
+    # orden de cambio: el reschedule fue antes que el cancel
+    assert [item["id"] for item in delta["items"]] == [tenant["beauty_booking"], created["id"]]
+
+
+def test_bulk_cancel_and_pagination(tenant, client):
+    cursor = _changes(client, tenant)["cursor"]
+    for hour in (9, 13):
+        client.post("/api/beauty-bookings", json={
+            "staff_id": tenant["staff"],
+            "beauty_service_id": tenant["beauty_service"],
+            "start_datetime": f"{D}T{hour:02d}:00:00+00:00",
+            "end_datetime": f"{D}T{hour:02d}:30:00+00:00",
+        })
+    client.post(
+        f"/api/staff/{tenant['staff']}/beauty-bookings/bulk-cancel",
+        json={"start_datetime": f"{D}T00:00:00+00:00", "end_datetime": f"{D}T23:59:00+00:00"},
+        headers=auth_headers(tenant),
+    )
+
+    page = _changes(client, tenant, cursor, limit=2)
+    assert page["has_more"] is True
+    rest = _changes(client, tenant, page["cursor"], limit=2)
+    assert rest["has_more"] is False
+    items = page["items"] + rest["items"]
+    assert len(items) == 3
+    assert {item["change_op"] for item in items} == {"cancel"}
+
+
+def test_barber_changes_and_validation(tenant, client):
+    url = f"/api/barbers/{tenant['barber']}/bookings/changes"
+    first = client.get(url, headers=auth_headers(tenant)).json()
+    assert [item["id"] for item in first["items"]] == [tenant["booking"]]
+
+    client.patch(f"/api/barbers/{tenant['barber']}/bookings/{tenant['booking']}/cancel")
+    delta = client.get(url, params={"since": first["cursor"]}, headers=auth_headers(tenant)).json()
+    assert [(item["id"], item["change_op"]) for item in delta["items"]] == [(tenant["booking"], "cancel")]
+
+    assert client.get(url, params={"since": "abc"}, headers=auth_headers(tenant)).status_code == 400
+    # un staff solo ve su propio calendario
+    other = f"/api/staff/{tenant['other_staff']}/beauty-bookings/changes"
+    assert client.get(other, headers=auth_headers(tenant, "staff")).status_code == 403
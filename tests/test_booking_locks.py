@@ -0,0 +1,86 @@
+# tests/test_booking_locks.py
+"""
+Lock por recurso antes del chequeo de traslape (BOOKING_LOCK_MODE) y sus métricas:
+tiempo de espera por recurso/modo y rechazos por slot ocupado.
+"""
+import threading
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import func, select
+
+import app.models as m
+from app.db.session import SessionLocal, engine
+from app.services.booking_locks import BOOKING_CONFLICTS, LOCK_WAIT_SECONDS, lock_resource
+from app.services.booking_service import create_booking
+
+from conftest import D
+
+
+def _lock_waits(resource: str, mode: str) -> int:
+    return LOCK_WAIT_SECONDS.samples().get((resource, mode), {"count": 0})["count"]
+
+
+def test_lock_modes_and_wait_metric(tenant):
+    before = _lock_waits("barber", "row")
+    with SessionLocal() as db:
+        assert lock_resource(db, "barber", tenant["barber"], "none") == 0.0
+        assert lock_resource(db, "barber", tenant["barber"], "row") >= 0.0
+        db.rollback()
+
+        with pytest.raises(ValueError):
+            lock_resource(db, "barber", tenant["barber"], "table")
+        with pytest.raises(ValueError):
+            lock_resource(db, "chair", 1, "row")
+
+    # "none" no observa: solo cuenta la espera del lock de fila
+    assert _lock_waits("barber", "row") == before + 1
+
+
+def test_overlap_rejection_is_counted_per_resource(tenant, client):
+    conflicts = BOOKING_CONFLICTS.samples()
+    barber_before = conflicts.get(("barber",), 0.0)
+    staff_before = conflicts.get(("staff",), 0.0)
+
+    # 10:00-10:30 ya está tomado en el seed
+    taken = client.post(f"/api/barbers/{tenant['barber']}/bookings", json={
+        "service_id": tenant["service"],
+        "start_datetime": f"{D}T10:00:00+00:00",
+        "end_datetime": f"{D}T10:30:00+00:00",
+    })
+    assert taken.status_code == 400
+
+    conflicts = BOOKING_CONFLICTS.samples()
+    assert conflicts[("barber",)] == barber_before + 1
+    assert conflicts.get(("staff",), 0.0) == staff_before
+
+
+@pytest.mark.skipif(engine.dialect.name != "postgresql", reason="FOR UPDATE solo serializa en Postgres")
+@pytest.mark.parametrize("mode", ["row", "advisory"])
+def test_concurrent_writers_for_the_same_slot_get_one_booking(tenant, mode):
+    start = datetime(2030, 1, 7, 12, 0, tzinfo=timezone.utc)
+    end = datetime(2030, 1, 7, 12, 30, tzinfo=timezone.utc)
+    barrier = threading.Barrier(4)
+    results: list[str] = []
+
+    def writer():
+        with SessionLocal() as db:
+            barrier.wait()
+            try:
+                create_booking(db, tenant["barber"], tenant["service"], start, end, lock_mode=mode)
+                results.append("ok")
+            except ValueError:
+                results.append("conflict")
+
+    threads = [threading.Thread(target=writer) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(results) == ["conflict", "conflict", "conflict", "ok"]
+    with SessionLocal() as db:
+        count = db.execute(
+            select(func.count()).select_from(m.Booking).where(m.Booking.start_datetime == start)
+        ).scalar()
+        assert count == 1
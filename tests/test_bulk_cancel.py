@@ -0,0 +1,99 @@
+# tests/test_bulk_cancel.py
+"""
+Cancelación masiva de la agenda de un barbero/staff en un rango: solo lo confirmado que
+toca el rango, un solo UPDATE, y opcionalmente la excepción que bloquea esos días.
+"""
+from datetime import datetime, timezone
+
+from sqlalchemy import select
+
+import app.models as m
+from app.db.session import SessionLocal
+
+from conftest import D, auth_headers
+
+
+def _add_barber_booking(tenant, barber_key: str, day: int, hour: int) -> int:
+    with SessionLocal() as db:
+        booking = m.Booking(
+            barber_id=tenant[barber_key],
+            service_id=tenant["service"],
+            start_datetime=datetime(2030, 1, day, hour, tzinfo=timezone.utc),
+            end_datetime=datetime(2030, 1, day, hour, 30, tzinfo=timezone.utc),
+        )
+        db.add(booking)
+        db.commit()
+        return booking.id
+
+
+def _status(model, booking_id: int) -> str:
+    with SessionLocal() as db:
+        return db.get(model, booking_id).status
+
+
+def test_barber_bulk_cancel_only_touches_the_range(tenant, client):
+    afternoon = _add_barber_booking(tenant, "barber", 7, 15)
+    next_day = _add_barber_booking(tenant, "barber", 8, 10)
+    other_barber = _add_barber_booking(tenant, "other_barber", 7, 11)
+
+    response = client.post(
+        f"/api/barbers/{tenant['barber']}/bookings/bulk-cancel",
+        json={"start_datetime": f"{D}T00:00:00+00:00", "end_datetime": f"{D}T23:59:00+00:00"},
+        headers=auth_headers(tenant),
+    )
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["cancelled_count"] == 2
+    assert [item["id"] for item in body["items"]] == [tenant["booking"], afternoon]
+    assert {item["status"] for item in body["items"]} == {"cancelled"}
+
+    assert _status(m.Booking, next_day) == "confirmed"
+    assert _status(m.Booking, other_barber) == "confirmed"
+
+    # lo ya cancelado no se vuelve a contar
+    again = client.post(
+        f"/api/barbers/{tenant['barber']}/bookings/bulk-cancel",
+        json={"start_datetime": f"{D}T00:00:00+00:00", "end_datetime": f"{D}T23:59:00+00:00"},
+        headers=auth_headers(tenant),
+    )
+    assert again.json() == {"cancelled_count": 0, "items": []}
+
+
+def test_staff_bulk_cancel_can_block_the_days(tenant, client):
+    response = client.post(
+        f"/api/staff/{tenant['staff']}/beauty-bookings/bulk-cancel",
+        json={
+            "start_datetime": f"{D}T00:00:00+00:00",
+            "end_datetime": f"{D}T23:59:00+00:00",
+            "block_availability": True,
+            "reason": "enfermedad",
+        },
+        headers=auth_headers(tenant),
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["cancelled_count"] == 1
+    assert _status(m.BeautyBooking, tenant["beauty_booking"]) == "cancelled"
+
+    with SessionLocal() as db:
+        blocked = db.execute(
+            select(m.AvailabilityException).where(m.AvailabilityException.staff_id == tenant["staff"])
+        ).scalar_one()
+        assert (blocked.start_date.isoformat(), blocked.reason) == (D, "enfermedad")
+
+    # el día bloqueado ya no ofrece slots para Sofi
+    slots = client.get(
+        f"/api/beauty-services/{tenant['beauty_service']}/available-slots", params={"date": D}
+    ).json()
+    assert all(item["staff_id"] != tenant["staff"] or not item["slots"] for item in slots["items"])
+
+
+def test_bulk_cancel_validates_range_role_and_tenant(tenant, client):
+    url = f"/api/barbers/{tenant['barber']}/bookings/bulk-cancel"
+    backwards = {"start_datetime": f"{D}T12:00:00+00:00", "end_datetime": f"{D}T09:00:00+00:00"}
+
+    assert client.post(url, json=backwards, headers=auth_headers(tenant)).status_code == 400
+    assert client.post(url, json=backwards).status_code == 401
+    assert client.post(
+        "/api/staff/999/beauty-bookings/bulk-cancel", json=backwards, headers=auth_headers(tenant)
+    ).status_code == 404
+    assert _status(m.Booking, tenant["booking"]) == "confirmed"
@@ -0,0 +1,117 @@
+# tests/test_calendar_feed.py
+"""
+Feed .ics por staff/barbero: token firmado, eventos confirmados de la ventana móvil y
+ETag fuerte que solo cambia con los bookings del dueño (304 con una sola consulta) y
+Last-Modified que avanza también cuando la ventana se mueve de día.
+"""
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+import pytest
+from sqlalchemy import update
+
+import app.models as m
+from app.api.routes import calendar_feed as feed_routes
+from app.core.query_counter import assert_max_queries
+from app.db.session import SessionLocal
+from app.services.calendar_feed import _fold, feed_token, feed_window, parse_feed_token
+
+from conftest import D, auth_headers
+
+# sin compresión: el middleware vuelve débil el ETag de una respuesta comprimida
+IDENTITY = {"Accept-Encoding": "identity"}
+
+
+@pytest.fixture(autouse=True)
+def window_around_seed(monkeypatch):
+    # los bookings de seed_tenant son de 2030: la ventana se centra en ese día
+    monkeypatch.setattr(feed_routes, "feed_window", lambda: feed_window(datetime(2030, 1, 7, tzinfo=timezone.utc)))
+
+
+def _feed_path(client, tenant, kind: str, owner: str, role: str = "admin") -> str:
+    response = client.get(f"/api/{kind}/{tenant[owner]}/calendar-feed", headers=auth_headers(tenant, role))
+    assert response.status_code == 200, response.text
+    return response.json()["url"].removeprefix("http://testserver")
+
+
+def test_token_roundtrip_and_tampering():
+    token = feed_token("staff", 12)
+    assert parse_feed_token(token) == ("staff", 12)
+    assert parse_feed_token(feed_token("barber", 12)) == ("barber", 12)
+    for bad in (token.replace("s12", "s13"), "s12", "x12-" + token.split("-")[1], ""):
+        with pytest.raises(ValueError):
+            parse_feed_token(bad)
+
+
+def test_long_lines_are_folded_on_utf8_boundaries():
+    folded = _fold("SUMMARY:" + "Uñas " * 30)
+    lines = folded.split("\r\n")
+    assert all(len(line.encode()) <= 75 for line in lines)
+    assert "".join(line.removeprefix(" ") for line in lines) == "SUMMARY:" + "Uñas " * 30
+
+
+def test_staff_feed_streams_confirmed_bookings(tenant, client):
+    path = _feed_path(client, tenant, "staff", "staff", role="staff")
+    response = client.get(path, headers=IDENTITY)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/calendar")
+    assert not response.headers["etag"].startswith("W/")
+    body = response.text
+    assert body.startswith("BEGIN:VCALENDAR\r\n") and body.endswith("END:VCALENDAR\r\n")
+    assert "X-WR-CALNAME:Sofi" in body
+    assert f"UID:staff-booking-{tenant['beauty_booking']}@beautybarber" in body
+    assert "DTSTART:20300107T110000Z" in body
+    assert "SUMMARY:Uñas" in body
+
+    # cancelado: sale del feed
+    client.patch(f"/api/beauty-bookings/{tenant['beauty_booking']}/cancel")
+    assert "BEGIN:VEVENT" not in client.get(path).text
+
+
+def test_unchanged_feed_is_a_one_query_304(tenant, client):
+    path = _feed_path(client, tenant, "barbers", "barber")
+    first = client.get(path, headers=IDENTITY)
+    assert f"UID:barber-booking-{tenant['booking']}@beautybarber" in first.text
+    etag = first.headers["etag"]
+
+    with assert_max_queries(1):
+        response = client.get(path, headers={**IDENTITY, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+    # un booking de otro dueño no toca este feed; uno del mismo, sí
+    client.patch(f"/api/beauty-bookings/{tenant['beauty_booking']}/cancel")
+    assert client.get(path, headers={"If-None-Match": etag}).status_code == 304
+    client.patch(f"/api/barbers/{tenant['barber']}/bookings/{tenant['booking']}/cancel")
+    changed = client.get(path, headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert "BEGIN:VEVENT" not in changed.text
+
+
+def test_feed_url_permissions_and_bad_token(tenant, client):
+    response = client.get(f"/api/staff/{tenant['other_staff']}/calendar-feed", headers=auth_headers(tenant, "staff"))
+    assert response.status_code == 403
+    response = client.get(f"/api/barbers/{tenant['barber']}/calendar-feed", headers=auth_headers(tenant, "staff"))
+    assert response.status_code == 403
+    assert client.get("/api/calendar/s1-deadbeef.ics").status_code == 404
+    assert client.get(f"/api/calendar/{feed_token('staff', 999)}.ics").status_code == 404
+
+
+def test_window_roll_moves_last_modified(tenant, client, monkeypatch):
+    # ventana real (hoy) y la última escritura de hace dos días
+    monkeypatch.setattr(feed_routes, "feed_window", feed_window)
+    two_days_ago = datetime.now(timezone.utc).replace(microsecond=0) - timedelta(days=2)
+    with SessionLocal() as db:
+        db.execute(update(m.ResourceVersion).values(updated_at=two_days_ago))
+        db.commit()
+    path = _feed_path(client, tenant, "barbers", "barber")
+
+    first = client.get(path, headers=IDENTITY)
+    assert parsedate_to_datetime(first.headers["last-modified"]) == feed_window().rolled_at
+
+    # un cliente que solo valida por fecha recibe los días que entraron a la ventana
+    stale = client.get(path, headers={**IDENTITY, "If-Modified-Since": format_datetime(two_days_ago, usegmt=True)})
+    assert stale.status_code == 200
+    fresh = client.get(path, headers={**IDENTITY, "If-Modified-Since": first.headers["last-modified"]})
+    assert fresh.status_code == 304
@@ -0,0 +1,100 @@
+# tests/test_catalog_cache.py
+"""
+Catálogo de belleza en memoria: se reusa mientras las versiones no cambien, los CRUD
+lo invalidan y una escritura de otro worker (otra sesión, sin invalidate) se nota
+por versión.
+"""
+import app.models as m
+from app.core.query_counter import assert_max_queries
+from app.db.session import SessionLocal
+from app.services import catalog_cache
+
+from conftest import D, auth_headers
+
+
+def _booking(tenant: dict, staff: str, hour: int) -> dict:
+    return {
+        "staff_id": tenant[staff],
+        "beauty_service_id": tenant["other_beauty_service"],
+        "start_datetime": f"{D}T{hour:02d}:00:00+00:00",
+        "end_datetime": f"{D}T{hour:02d}:45:00+00:00",
+    }
+
+
+def test_catalog_is_reused_until_versions_change(tenant):
+    with SessionLocal() as db:
+        first = catalog_cache.tenant_catalog(db, tenant["business"])
+        assert [s.id for s in first.active_staff_for(tenant["beauty_service"])] == [
+            tenant["staff"],
+            tenant["other_staff"],
+        ]
+
+        # en caliente solo se leen las versiones
+        with assert_max_queries(1):
+            assert catalog_cache.tenant_catalog(db, tenant["business"]) is first
+
+    # otro "worker": escribe con su propia sesión y no llama a invalidate()
+    with SessionLocal() as other:
+        other.get(m.Staff, tenant["other_staff"]).is_active = False
+        other.commit()
+
+    with SessionLocal() as db:
+        fresh = catalog_cache.tenant_catalog(db, tenant["business"])
+    assert fresh is not first
+    assert [s.id for s in fresh.active_staff_for(tenant["beauty_service"])] == [tenant["staff"]]
+
+
+def test_evicted_tenants_leave_the_reverse_index(tenant, monkeypatch):
+    monkeypatch.setattr(catalog_cache, "CATALOG_CACHE_MAX_TENANTS", 1)
+    with SessionLocal() as db:
+        other = m.Business(name="Otro", slug="otro", timezone="UTC")
+        db.add(other)
+        db.flush()
+        db.add(m.BeautyService(business_id=other.id, name="Cejas", duration_min=30, price=120))
+        db.commit()
+
+        catalog_cache.tenant_catalog(db, tenant["business"])
+        assert catalog_cache._service_business[tenant["beauty_service"]] == tenant["business"]
+
+        # el segundo negocio saca al primero del LRU y con él sus ids
+        catalog_cache.tenant_catalog(db, other.id)
+        assert set(catalog_cache._service_business.values()) == {other.id}
+        assert tenant["staff"] not in catalog_cache._staff_business
+        # sin índice se resuelve con la base
+        assert catalog_cache.business_of_service(db, tenant["beauty_service"]) == tenant["business"]
+
+    catalog_cache.invalidate(other.id)
+    assert catalog_cache._service_business == {} and catalog_cache._staff_business == {}
+
+
+def test_slots_follow_staff_crud(tenant, client):
+    url = f"/api/beauty-services/{tenant['beauty_service']}/available-slots?date={D}"
+    assert len(client.get(url).json()["items"]) == 2
+
+    client.delete(f"/api/staff/{tenant['other_staff']}", headers=auth_headers(tenant))
+    items = client.get(url).json()["items"]
+    assert [item["staff_id"] for item in items] == [tenant["staff"]]
+
+
+def test_booking_validation_follows_assignments(tenant, client):
+    # other_beauty_service no tiene staff asignado
+    response = client.post("/api/beauty-bookings", json=_booking(tenant, "staff", 9))
+    assert response.status_code == 400
+    assert "not assigned" in response.json()["detail"]
+
+    client.post(f"/api/staff/{tenant['staff']}/services/{tenant['other_beauty_service']}", headers=auth_headers(tenant))
+    assert client.post("/api/beauty-bookings", json=_booking(tenant, "staff", 9)).status_code == 201
+
+    client.delete(f"/api/beauty-services/{tenant['other_beauty_service']}", headers=auth_headers(tenant))
+    response = client.post("/api/beauty-bookings", json=_booking(tenant, "staff", 12))
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Beauty service is inactive"
+
+
+def test_unknown_ids_are_404(tenant, client):
+    payload = {**_booking(tenant, "staff", 9), "staff_id": 999}
+    assert client.post("/api/beauty-bookings", json=payload).status_code == 404
+
+    payload = {**_booking(tenant, "staff", 9), "beauty_service_id": 999}
+    assert client.post("/api/beauty-bookings", json=payload).status_code == 404
+    assert client.get(f"/api/beauty-services/999/available-slots?date={D}").status_code == 404
@@ -0,0 +1,88 @@
+# tests/test_compression.py
+import zlib
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.responses import JSONResponse, PlainTextResponse, StreamingResponse
+
+from app.core.compression import CompressionMiddleware, choose_encoding
+from app.core.instrumentation import HTTP_COMPRESSION_INPUT_BYTES, HTTP_COMPRESSION_SKIPPED
+
+BIG = {"slots": [f"{h:02d}:{m:02d}" for h in range(24) for m in range(60)]}
+
+
+def _big():
+    return JSONResponse(BIG, headers={"ETag": '"v1"'})
+
+
+def _small():
+    return JSONResponse({"ok": True})
+
+
+def _stream():
+    async def chunks():
+        for i in range(50):
+            yield f'{{"chunk": {i}, "pad": "{"x" * 100}"}}\n'.encode()
+
+    return StreamingResponse(chunks(), media_type="application/json")
+
+
+def _binary():
+    return PlainTextResponse("x" * 5000, media_type="image/png")
+
+
+def _client(**kwargs) -> TestClient:
+    app = FastAPI()
+    for path, endpoint in (("/big", _big), ("/small", _small), ("/stream", _stream), ("/binary", _binary)):
+        app.add_api_route(path, endpoint)
+    return TestClient(CompressionMiddleware(app, encodings=("gzip",), **kwargs))
+
+
+def test_choose_encoding():
+    assert choose_encoding("gzip, br", ("br", "gzip")) == "br"
+    assert choose_encoding("gzip;q=1.0, br;q=0.5", ("br", "gzip")) == "gzip"
+    assert choose_encoding("br;q=0, *", ("br", "gzip")) == "gzip"
+    assert choose_encoding("identity", ("br", "gzip")) is None
+
+
+def test_large_json_is_gzipped():
+    before = HTTP_COMPRESSION_INPUT_BYTES.samples().get(("/big", "gzip"), 0)
+    response = _client().get("/big", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert int(response.headers["content-length"]) < len(response.content)
+    assert response.json() == BIG
+    assert "Accept-Encoding" in response.headers["vary"]
+    # el ETag fuerte pasa a débil: la versión comprimida no es byte a byte la misma
+    assert response.headers["etag"] == 'W/"v1"'
+    assert HTTP_COMPRESSION_INPUT_BYTES.samples()[("/big", "gzip")] > before
+
+
+def test_below_threshold_and_not_accepted_are_left_alone():
+    client = _client()
+    small = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+    assert HTTP_COMPRESSION_SKIPPED.samples()[("/small", "below_threshold")] >= 1
+
+    identity = client.get("/big", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers
+    assert identity.headers["vary"] == "Accept-Encoding"
+
+    binary = client.get("/binary", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in binary.headers
+
+
+def test_streaming_is_compressed_per_chunk():
+    chunks = []
+    client = _client(minimum_size=10_000)
+    with client.stream("GET", "/stream", headers={"Accept-Encoding": "gzip"}) as response:
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        chunks = list(response.iter_raw())
+
+    # cada chunk con sync flush se puede descomprimir sin esperar al final
+    decoder = zlib.decompressobj(31)
+    first = decoder.decompress(chunks[0])
+    assert first.startswith(b'{"chunk": 0')
+    body = first + b"".join(decoder.decompress(c) for c in chunks[1:])
+    assert body.count(b"\n") == 50
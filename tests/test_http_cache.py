@@ -0,0 +1,132 @@
+# tests/test_http_cache.py
+"""
+ETag / 304 sobre resource_versions: la revalidación no corre la consulta principal y
+cualquier escritura del recurso (ORM o update() de Core) cambia el ETag.
+"""
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select, update
+
+import app.models as m
+from app.core.http_cache import _last_modified
+from app.core.query_counter import assert_max_queries
+from app.db.session import SessionLocal
+
+from conftest import D, auth_headers
+
+
+def test_not_modified_only_reads_versions(tenant, client):
+    first = client.get("/api/services")
+    assert first.status_code == 200
+    assert first.headers["cache-control"].startswith("public, max-age=")
+    etag = first.headers["etag"]
+
+    with assert_max_queries(1):
+        again = client.get("/api/services", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == etag
+
+
+def test_write_changes_etag(tenant, client):
+    etag = client.get("/api/services").headers["etag"]
+    client.put(f"/api/services/{tenant['service']}", json={"price": 175})
+
+    response = client.get("/api/services", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+def test_barber_slots_revalidate_after_booking_changes(tenant, client):
+    url = f"/api/barbers/{tenant['barber']}/availability/slots?date={D}"
+    etag = client.get(url).headers["etag"]
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    # reschedule escribe con update() de Core: se versiona vía record_change
+    client.patch(
+        f"/api/barbers/{tenant['barber']}/bookings/{tenant['booking']}/reschedule",
+        json={"start_datetime": f"{D}T12:00:00+00:00", "end_datetime": f"{D}T12:30:00+00:00"},
+    )
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert "12:00" in response.json()["items"][0]["unavailable_slots"]
+
+
+def test_beauty_slots_revalidate_after_cancel(tenant, client):
+    url = f"/api/beauty-services/{tenant['beauty_service']}/available-slots?date={D}"
+    etag = client.get(url).headers["etag"]
+
+    client.patch(f"/api/beauty-bookings/{tenant['beauty_booking']}/cancel")
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_format_is_part_of_the_etag(tenant, client):
+    url = f"/api/barbers/{tenant['barber']}/availability/slots?date={D}"
+    full = client.get(url).headers["etag"]
+    compact = client.get(url + "&format=compact")
+    assert compact.headers["etag"] != full
+    assert client.get(url + "&format=compact", headers={"If-None-Match": full}).status_code == 200
+
+
+def _versions() -> dict[tuple[str, int], int]:
+    with SessionLocal() as db:
+        rows = db.execute(select(m.ResourceVersion.resource, m.ResourceVersion.scope_id, m.ResourceVersion.version))
+        return {(row.resource, row.scope_id): row.version for row in rows}
+
+
+def _age_versions(seconds: int = 5) -> None:
+    # como si la última escritura hubiera sido hace unos segundos
+    with SessionLocal() as db:
+        db.execute(update(m.ResourceVersion).values(updated_at=datetime.now(timezone.utc) - timedelta(seconds=seconds)))
+        db.commit()
+
+
+def test_private_catalog_and_if_modified_since(tenant, client):
+    client.put(f"/api/staff/{tenant['staff']}", json={"name": "Sofía"}, headers=auth_headers(tenant))
+    _age_versions()
+    first = client.get("/api/staff", headers=auth_headers(tenant))
+    assert first.headers["cache-control"] == "private, no-cache"
+
+    headers = {**auth_headers(tenant), "If-Modified-Since": first.headers["last-modified"]}
+    assert client.get("/api/staff", headers=headers).status_code == 304
+
+
+def test_last_modified_is_withheld_during_the_write_second():
+    now = datetime(2030, 1, 7, 10, 0, 0, 900000, tzinfo=timezone.utc)
+    # una escritura más en este mismo segundo tendría el mismo Last-Modified
+    assert _last_modified(now.replace(microsecond=100000), now) is None
+    assert _last_modified(now - timedelta(seconds=1), now) == datetime(2030, 1, 7, 9, 59, 59, tzinfo=timezone.utc)
+    # SQLite: naive en UTC
+    assert _last_modified(datetime(2030, 1, 7, 9, 0, 0, 5), now) == datetime(2030, 1, 7, 9, tzinfo=timezone.utc)
+    assert _last_modified(None, now) is None
+
+
+def test_fresh_write_is_not_hidden_by_if_modified_since(tenant, client):
+    _age_versions()
+    stale = client.get("/api/staff", headers=auth_headers(tenant)).headers["last-modified"]
+
+    client.put(f"/api/staff/{tenant['staff']}", json={"name": "Sofía"}, headers=auth_headers(tenant))
+    response = client.get("/api/staff", headers={**auth_headers(tenant), "If-Modified-Since": stale})
+    assert response.status_code == 200
+    assert response.json()[0]["name"] == "Sofía"
+
+
+def test_beauty_booking_only_bumps_its_staff(tenant, client):
+    before = _versions()
+    assert client.patch(f"/api/beauty-bookings/{tenant['beauty_booking']}/cancel").status_code == 200
+    after = _versions()
+
+    changed = {key for key in after if after[key] != before.get(key)}
+    assert changed == {("staff_bookings", tenant["staff"])}
+
+
+def test_service_write_only_revalidates_where_it_is_offered(tenant, client):
+    # Memo solo ofrece el corte: editar el tinte no cambia su lista de servicios
+    url = f"/api/barbers/{tenant['other_barber']}/services"
+    etag = client.get(url).headers["etag"]
+
+    client.put(f"/api/services/{tenant['spare_service']}", json={"price": 320})
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+    client.put(f"/api/services/{tenant['service']}", json={"price": 175})
+    assert client.get(url, headers={"If-None-Match": etag}).status_code == 200
@@ -0,0 +1,82 @@
+# tests/test_idempotency.py
+"""
+Idempotency-Key en POST /api/barbers/{id}/bookings: la key se guarda en la misma
+transacción que el booking. Un reintento responde lo guardado (camino rápido o choque
+con el índice único si la lectura no lo vio) y una key vencida sin purgar no estorba.
+"""
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select
+
+import app.models as m
+from app.api import idempotency
+from app.db.session import SessionLocal
+
+from conftest import D
+
+
+def _book(client, tenant, key: str, start: str = "11:00", end: str = "11:30"):
+    return client.post(
+        f"/api/barbers/{tenant['barber']}/bookings",
+        json={
+            "service_id": tenant["service"],
+            "start_datetime": f"{D}T{start}:00+00:00",
+            "end_datetime": f"{D}T{end}:00+00:00",
+        },
+        headers={"Idempotency-Key": key},
+    )
+
+
+def _booking_count() -> int:
+    with SessionLocal() as db:
+        return db.execute(select(func.count()).select_from(m.Booking)).scalar()
+
+
+def test_retry_replays_the_stored_response(tenant, client):
+    created = _book(client, tenant, "k-1")
+    replayed = _book(client, tenant, "k-1")
+    assert created.status_code == replayed.status_code == 201
+    assert replayed.headers["Idempotent-Replayed"] == "true"
+    assert replayed.json() == created.json()
+
+    # misma key con otro payload
+    assert _book(client, tenant, "k-1", "12:00", "12:30").status_code == 422
+
+
+def test_concurrent_retry_replays_from_the_unique_conflict(tenant, client, monkeypatch):
+    created = _book(client, tenant, "k-race")
+    count = _booking_count()
+
+    # el reintento no ve la key en la lectura rápida (llegó mientras el primero escribía):
+    # choca al reservarla y responde lo guardado, no "Slot is already booked"
+    monkeypatch.setattr(idempotency, "get_idempotent_response", lambda *args: None)
+    retried = _book(client, tenant, "k-race")
+    assert retried.status_code == 201, retried.text
+    assert retried.headers["Idempotent-Replayed"] == "true"
+    assert retried.json()["id"] == created.json()["id"]
+    assert _booking_count() == count
+
+
+def test_failed_booking_does_not_keep_the_key_and_expired_keys_are_replaced(tenant, client):
+    # 10:00 ya está tomado: el rollback del booking se lleva la key
+    assert _book(client, tenant, "k-fail", "10:00", "10:30").status_code == 400
+    with SessionLocal() as db:
+        assert db.execute(select(m.IdempotencyKey).where(m.IdempotencyKey.key == "k-fail")).first() is None
+
+    with SessionLocal() as db:
+        db.add(m.IdempotencyKey(
+            scope="bookings",
+            key="k-old",
+            request_hash="x",
+            response_status=201,
+            response_body={"id": -1},
+            expires_at=datetime.now(timezone.utc) - timedelta(minutes=1),
+        ))
+        db.commit()
+
+    created = _book(client, tenant, "k-old")
+    assert created.status_code == 201, created.text
+    assert "Idempotent-Replayed" not in created.headers
+    with SessionLocal() as db:
+        stored = db.execute(select(m.IdempotencyKey).where(m.IdempotencyKey.key == "k-old")).scalar_one()
+        assert stored.response_body["id"] == created.json()["id"]
@@ -0,0 +1,138 @@
+# tests/test_invalidation.py
+"""
+Bus de invalidación: claves compactas por commit, nada en rollback, eco propio
+ignorado y, contra Postgres, entrega real por LISTEN/NOTIFY.
+"""
+import time
+from datetime import date, datetime, timezone
+
+import pytest
+from sqlalchemy import event, select, text
+from sqlalchemy.orm import Session
+
+import app.models as m
+from app.core import invalidation, resource_versions
+from app.core.invalidation import RESYNC, Invalidation, decode, encode, handle_payload
+from app.db.session import SessionLocal, engine
+from app.services import catalog_cache
+
+from conftest import D, auth_headers
+
+
+@pytest.fixture()
+def received():
+    batches: list[list[Invalidation]] = []
+    handler = lambda items: batches.append(list(items))  # noqa: E731
+    invalidation.register(handler)
+    yield batches
+    invalidation.unregister(handler)
+
+
+def test_encode_decode_roundtrip_and_split():
+    items = [Invalidation(3, "staff_slots", 7, date(2030, 1, 7)), Invalidation(0, "services")]
+    [payload] = encode(items, origin="w1")
+    assert payload == "w1|3:staff_slots:7:20300107,0:services:0:"
+    assert decode(payload) == ("w1", items)
+
+    many = [Invalidation(1, "staff_slots", i, date(2030, 1, 7)) for i in range(2000)]
+    payloads = encode(many, origin="w1")
+    assert len(payloads) > 1
+    assert all(len(p) <= invalidation.MAX_PAYLOAD_BYTES for p in payloads)
+    assert [item for p in payloads for item in decode(p)[1]] == many
+
+
+def test_commit_dispatches_tenant_keys(tenant, client, received):
+    response = client.post("/api/beauty-bookings", json={
+        "staff_id": tenant["staff"],
+        "beauty_service_id": tenant["beauty_service"],
+        "start_datetime": f"{D}T09:00:00+00:00",
+        "end_datetime": f"{D}T10:00:00+00:00",
+    })
+    assert response.status_code == 201
+
+    [items] = received
+    biz = tenant["business"]
+    assert Invalidation(biz, "staff_slots", tenant["staff"], date(2030, 1, 7)) in items
+    assert Invalidation(biz, "staff_bookings", tenant["staff"]) in items
+
+
+def test_cancel_near_midnight_dispatches_the_local_day(tenant, client, received):
+    # el cancel lee el booking guardado en UTC: 01:00 UTC del 8 = 19:00 del 7 en Monterrey
+    with SessionLocal() as db:
+        db.get(m.Business, tenant["business"]).timezone = "America/Monterrey"
+        db.add(m.Booking(
+            barber_id=tenant["barber"],
+            service_id=tenant["service"],
+            start_datetime=datetime(2030, 1, 8, 1, 0, tzinfo=timezone.utc),
+            end_datetime=datetime(2030, 1, 8, 1, 30, tzinfo=timezone.utc),
+        ))
+        db.commit()
+        booking_id = db.execute(select(m.Booking.id).order_by(m.Booking.id.desc())).scalar()
+    received.clear()
+
+    response = client.patch(f"/api/barbers/{tenant['barber']}/bookings/{booking_id}/cancel")
+    assert response.status_code == 200
+
+    [items] = received
+    slots = [item for item in items if item.entity == "barber_slots"]
+    assert slots == [Invalidation(tenant["business"], "barber_slots", tenant["barber"], date(2030, 1, 7))]
+
+
+def test_core_updates_are_notified_whatever_the_listener_order(tenant, client, received):
+    # el bump de record_change registrado después del NOTIFY: igual tiene que entrar
+    event.remove(Session, "before_commit", resource_versions._bump_availability_changes)
+    event.listen(Session, "before_commit", resource_versions._bump_availability_changes)
+
+    response = client.post(
+        f"/api/staff/{tenant['staff']}/beauty-bookings/bulk-cancel",
+        json={"start_datetime": f"{D}T00:00:00+00:00", "end_datetime": f"{D}T23:59:00+00:00"},
+        headers=auth_headers(tenant),
+    )
+    assert response.json()["cancelled_count"] == 1
+
+    [items] = received
+    assert Invalidation(tenant["business"], "staff_bookings", tenant["staff"]) in items
+
+
+def test_rollback_dispatches_nothing(tenant, received):
+    with SessionLocal() as db:
+        db.get(m.Staff, tenant["staff"]).name = "Otra"
+        db.flush()
+        db.rollback()
+    assert received == []
+
+
+def test_remote_payload_drops_catalog_and_own_echo_is_ignored(tenant, received):
+    biz = tenant["business"]
+    with SessionLocal() as db:
+        catalog_cache.tenant_catalog(db, biz)
+
+    handle_payload(encode([Invalidation(biz, "staff")], origin=invalidation.ORIGIN)[0])
+    assert received == []
+    assert biz in catalog_cache._tenants
+
+    handle_payload(encode([Invalidation(biz, "staff")], origin="otro-worker")[0])
+    assert received == [[Invalidation(biz, "staff")]]
+    assert biz not in catalog_cache._tenants
+
+    handle_payload("basura")
+    assert received[-1] == [RESYNC]
+
+
+@pytest.mark.skipif(engine.dialect.name != "postgresql", reason="LISTEN/NOTIFY requiere Postgres")
+def test_listener_receives_notify_from_another_worker(tenant, received):
+    listener = invalidation.InvalidationListener(engine, poll_seconds=0.1).start()
+    payload = encode([Invalidation(tenant["business"], "staff")], origin="otro-worker")[0]
+    try:
+        # se reenvía hasta que el listener ya esté escuchando
+        deadline = time.monotonic() + 5
+        while not received and time.monotonic() < deadline:
+            with engine.begin() as conn:
+                conn.execute(
+                    text("SELECT pg_notify(:channel, :payload)"),
+                    {"channel": invalidation.INVALIDATION_CHANNEL, "payload": payload},
+                )
+            time.sleep(0.2)
+    finally:
+        listener.stop()
+    assert received and received[0] == [Invalidation(tenant["business"], "staff")]
@@ -0,0 +1,84 @@
+# tests/test_metrics.py
+"""
+Métricas en modo multi-worker: suma de snapshots por pid, gauges solo de procesos vivos
+y pase de los snapshots de procesos muertos a metrics_dead.json (un pid reusado no pisa
+ni mezcla lo que contó el muerto).
+"""
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from app.core.metrics import (
+    Counter,
+    Gauge,
+    Registry,
+    collect_multiprocess,
+    mark_process_dead,
+    render_text,
+    write_process_snapshot,
+)
+
+
+def _registry(requests: float, in_flight: float) -> Registry:
+    registry = Registry()
+    registry.register(Counter("requests_total", "Requests", ("route",))).inc(requests, route="/a")
+    registry.register(Gauge("in_flight", "In flight")).set(in_flight)
+    return registry
+
+
+def _write(directory, pid: int, registry: Registry) -> None:
+    with open(os.path.join(directory, f"metrics_{pid}.json"), "w", encoding="utf-8") as fh:
+        json.dump(registry.dump(), fh)
+
+
+def _dead_pid() -> int:
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+def _values(dump: dict) -> tuple[float, float]:
+    requests = dict((tuple(k), v) for k, v in dump["requests_total"]["series"]).get(("/a",), 0.0)
+    in_flight = dict((tuple(k), v) for k, v in dump.get("in_flight", {"series": []})["series"]).get((), 0.0)
+    return requests, in_flight
+
+
+@pytest.fixture()
+def directory(tmp_path):
+    return str(tmp_path)
+
+
+def test_collect_sums_workers_and_folds_dead_snapshots(directory):
+    dead = _dead_pid()
+    _write(directory, os.getppid(), _registry(requests=3, in_flight=2))
+    _write(directory, dead, _registry(requests=5, in_flight=7))
+    own = _registry(requests=1, in_flight=1)
+
+    # counters: propio + vivo + muerto; gauges: solo procesos vivos
+    assert _values(collect_multiprocess(own, directory)) == (9, 3)
+    assert not os.path.exists(os.path.join(directory, f"metrics_{dead}.json"))
+    assert os.path.exists(os.path.join(directory, "metrics_dead.json"))
+
+    # la segunda lectura no cuenta dos veces lo del muerto
+    assert _values(collect_multiprocess(own, directory)) == (9, 3)
+    assert 'requests_total{route="/a"} 9' in render_text(collect_multiprocess(own, directory))
+
+
+def test_restarted_worker_with_reused_pid_keeps_the_dead_counters(directory):
+    pid = os.getpid()
+    # proceso anterior con el mismo pid que murió sin limpiar
+    _write(directory, pid, _registry(requests=4, in_flight=9))
+
+    mark_process_dead(pid, directory)
+    fresh = _registry(requests=2, in_flight=1)
+    write_process_snapshot(fresh, directory)
+
+    assert _values(collect_multiprocess(fresh, directory)) == (6, 1)
+
+    # salida limpia: el snapshot propio pasa a metrics_dead.json y el archivo se borra
+    mark_process_dead(pid, directory)
+    assert sorted(f for f in os.listdir(directory) if f.endswith(".json")) == ["metrics_dead.json"]
+    assert _values(collect_multiprocess(Registry(), directory)) == (6, 0)
@@ -0,0 +1,63 @@
+# tests/test_profiling.py
+"""
+Perfilado opt-in de los endpoints de slots: solo con `X-Profile: 1` y token de
+super_admin (o muestreo), perfiles acumulados por endpoint y descarga pstats/collapsed.
+"""
+import marshal
+
+import pytest
+
+from app.core.profiling import PROFILE_STORE
+
+from conftest import D, auth_headers
+
+
+@pytest.fixture(autouse=True)
+def clean_store():
+    PROFILE_STORE.reset()
+    yield
+    PROFILE_STORE.reset()
+
+
+def _beauty_slots(client, tenant, headers: dict):
+    response = client.get(
+        f"/api/beauty-services/{tenant['beauty_service']}/available-slots", params={"date": D}, headers=headers
+    )
+    assert response.status_code == 200, response.text
+    return response
+
+
+def test_only_super_admin_header_profiles(tenant, client):
+    _beauty_slots(client, tenant, {})
+    _beauty_slots(client, tenant, {"X-Profile": "1", **auth_headers(tenant, "admin")})
+    assert PROFILE_STORE.names() == []
+
+    _beauty_slots(client, tenant, {"X-Profile": "1", **auth_headers(tenant, "super")})
+    _beauty_slots(client, tenant, {"X-Profile": "true", **auth_headers(tenant, "super")})
+    client.get(
+        f"/api/barbers/{tenant['barber']}/availability/slots",
+        params={"date": D, "service_id": tenant["service"]},
+        headers={"X-Profile": "1", **auth_headers(tenant, "super")},
+    )
+
+    listed = client.get("/api/admin/profiles", headers=auth_headers(tenant, "super")).json()
+    assert {item["name"]: item["samples"] for item in listed["items"]} == {"beauty_slots": 2, "get_slots": 1}
+
+
+def test_profile_downloads_and_reset(tenant, client):
+    _beauty_slots(client, tenant, {"X-Profile": "1", **auth_headers(tenant, "super")})
+    headers = auth_headers(tenant, "super")
+
+    pstats_file = client.get("/api/admin/profiles/beauty_slots/pstats", headers=headers)
+    assert pstats_file.status_code == 200
+    stats = marshal.loads(pstats_file.content)
+    assert any(fn_name == "get_beauty_service_available_slots" for _file, _line, fn_name in stats)
+
+    collapsed = client.get("/api/admin/profiles/beauty_slots/collapsed", headers=headers)
+    assert collapsed.status_code == 200
+    lines = collapsed.text.strip().splitlines()
+    assert lines and all(line.rsplit(" ", 1)[1].isdigit() for line in lines)
+
+    assert client.get("/api/admin/profiles", headers=auth_headers(tenant, "admin")).status_code == 403
+    assert client.delete("/api/admin/profiles", headers=headers).status_code == 204
+    assert client.get("/api/admin/profiles/beauty_slots/pstats", headers=headers).status_code == 404
@@ -0,0 +1,224 @@
+# tests/test_query_budgets.py
+"""
+Presupuesto de SQL por endpoint: cada ruta de app.main tiene un caso con el máximo
+de statements y de filas traídas (ORM o Core) que puede usar contra el tenant de conftest.seed_tenant.
+Si un cambio sube el número (lazy load nuevo, falta de selectinload, refresh extra)
+el test falla e imprime los statements. Si baja, actualizar el presupuesto.
+Se mide con el catálogo de belleza caliente (app.services.catalog_cache).
+"""
+from typing import NamedTuple
+
+import pytest
+from fastapi.routing import APIRoute
+
+from app.core.query_counter import assert_max_queries
+from app.db.session import SessionLocal
+from app.main import app
+from app.services import catalog_cache
+
+
+class Case(NamedTuple):
+    method: str
+    route: str              # template tal como está registrado en app.main
+    url: str                # con placeholders de seed_tenant: {barber}, {date}, ...
+    status: int
+    queries: int
+    rows: int
+    auth: str | None = None  # "admin" | "super" | "staff"
+    json: dict | None = None
+    data: dict | None = None
+
+
+D = "{date}"
+
+CASES = [
+    # health / métricas / perfiles
+    Case("GET", "/api/health", "/api/health", 200, 0, 0),
+    Case("GET", "/api/db-check", "/api/db-check", 200, 1, 1),
+    Case("GET", "/api/metrics/json", "/api/metrics/json", 200, 0, 0),
+    Case("GET", "/metrics", "/metrics", 200, 0, 0),
+    Case("GET", "/api/admin/profiles", "/api/admin/profiles", 200, 9, 17, auth="super"),
+    Case("GET", "/api/admin/profiles/{name}/pstats", "/api/admin/profiles/get_slots/pstats", 404, 9, 17, auth="super"),
+    Case("GET", "/api/admin/profiles/{name}/collapsed", "/api/admin/profiles/get_slots/collapsed", 404, 9, 17,
+         auth="super"),
+    Case("DELETE", "/api/admin/profiles", "/api/admin/profiles", 204, 9, 17, auth="super"),
+    # auth
+    Case("POST", "/api/auth/login", "/api/auth/login", 200, 9, 17,
+         data={"username": "admin@example.com", "password": "secret123"}),
+    Case("GET", "/api/auth/me", "/api/auth/me", 200, 9, 17, auth="admin"),
+    # negocio
+    Case("GET", "/api/business/settings", "/api/business/settings", 200, 9, 17, auth="admin"),
+    Case("PUT", "/api/business/settings", "/api/business/settings", 200, 12, 18, auth="admin",
+         json={"slot_step_min": 30}),
+    # barberos
+    Case("POST", "/api/barbers", "/api/barbers", 201, 14, 18, auth="admin",
+         json={"name": "Nuevo", "email": "nuevo@example.com"}),
+    Case("GET", "/api/barbers", "/api/barbers", 200, 3, 7),
+    Case("GET", "/api/barbers/{barber_id}", "/api/barbers/{barber}", 200, 3, 5),
+    Case("PUT", "/api/barbers/{barber_id}", "/api/barbers/{barber}", 200, 8, 10, json={"phone": "8110000000"}),
+    Case("DELETE", "/api/barbers/{barber_id}", "/api/barbers/{other_barber}", 200, 8, 4),
+    Case("POST", "/api/barbers/{barber_id}/services/{service_id}", "/api/barbers/{barber}/services/{spare_service}",
+         200, 10, 12),
+    Case("DELETE", "/api/barbers/{barber_id}/services/{service_id}", "/api/barbers/{barber}/services/{other_service}",
+         200, 11, 13),
+    Case("GET", "/api/barbers/{barber_id}/services", "/api/barbers/{barber}/services", 200, 6, 12),
+    Case("GET", "/api/barbers/{service_id}/barbers", "/api/barbers/{service}/barbers", 200, 3, 5),
+    # servicios de barbería
+    Case("POST", "/api/services", "/api/services", 201, 5, 1, json={"name": "Cejas", "duration_min": 15, "price": 80}),
+    Case("GET", "/api/services", "/api/services", 200, 4, 11),
+    Case("GET", "/api/services/{service_id}", "/api/services/{service}", 200, 3, 5),
+    Case("PUT", "/api/services/{service_id}", "/api/services/{service}", 200, 8, 10, json={"price": 170}),
+    Case("PATCH", "/api/services/{service_id}/restore", "/api/services/{service}/restore", 200, 6, 10),
+    Case("DELETE", "/api/services/{service_id}", "/api/services/{spare_service}", 200, 6, 2),
+    Case("GET", "/api/services/{service_id}/barbers", "/api/services/{service}/barbers", 200, 3, 5),
+    # disponibilidad de barberos
+    Case("POST", "/api/barbers/{barber_id}/availability/rules", "/api/barbers/{barber}/availability/rules", 201,
+         8, 6, json={"day_of_week": 1, "start_time": "09:00", "end_time": "12:00", "slot_minutes": 30}),
+    Case("GET", "/api/barbers/{barber_id}/availability/rules", "/api/barbers/{barber}/availability/rules", 200,
+         4, 7),
+    Case("PUT", "/api/availability/rules/{rule_id}", "/api/availability/rules/{rule}", 200, 7, 4,
+         json={"end_time": "14:00"}),
+    Case("DELETE", "/api/availability/rules/{rule_id}", "/api/availability/rules/{rule}", 200, 5, 3),
+    Case("GET", "/api/barbers/{barber_id}/availability/slots",
+         "/api/barbers/{barber}/availability/slots?date=" + D + "&service_id={service}", 200, 15, 27),
+    # stream SSE: no termina, se presupuesta el rechazo de parámetros (no toca la DB)
+    Case("GET", "/api/businesses/{business_id}/availability/stream",
+         "/api/businesses/{business}/availability/stream?date=mañana", 400, 0, 0),
+    # excepciones de disponibilidad
+    Case("POST", "/api/availability/exceptions", "/api/availability/exceptions", 201, 14, 19, auth="admin",
+         json={"staff_id": "{staff}", "start_date": D, "end_date": D, "start_time": "16:00", "end_time": "18:00"}),
+    Case("GET", "/api/availability/exceptions", "/api/availability/exceptions?start_date=" + D + "&end_date=" + D,
+         200, 10, 18, auth="admin"),
+    Case("DELETE", "/api/availability/exceptions/{exception_id}", "/api/availability/exceptions/{exception}", 200,
+         13, 18, auth="admin"),
+    # bookings de barbería (+1: timezone del negocio para publicar el día local del cambio)
+    Case("POST", "/api/barbers/{barber_id}/bookings", "/api/barbers/{barber}/bookings", 201, 11, 13,
+         json={"service_id": "{service}", "start_datetime": D + "T11:00:00+00:00", "end_datetime": D + "T11:30:00+00:00"}),
+    Case("PATCH", "/api/barbers/{barber_id}/bookings/{booking_id}/cancel", "/api/barbers/{barber}/bookings/{booking}/cancel",
+         200, 8, 8),
+    Case("PATCH", "/api/barbers/{barber_id}/bookings/{booking_id}/reschedule",
+         "/api/barbers/{barber}/bookings/{booking}/reschedule", 200, 6, 4,
+         json={"start_datetime": D + "T12:00:00+00:00", "end_datetime": D + "T12:30:00+00:00"}),
+    Case("POST", "/api/barbers/{barber_id}/bookings/bulk-cancel", "/api/barbers/{barber}/bookings/bulk-cancel", 200,
+         16, 23, auth="admin",
+         json={"start_datetime": D + "T00:00:00+00:00", "end_datetime": D + "T23:59:00+00:00", "block_availability": True}),
+    Case("GET", "/api/barbers/{barber_id}/bookings/changes", "/api/barbers/{barber}/bookings/changes", 200,
+         11, 19, auth="admin"),
+    # staff
+    Case("POST", "/api/staff", "/api/staff", 201, 13, 18, auth="admin",
+         json={"business_id": "{business}", "name": "Nueva"}),
+    Case("GET", "/api/staff", "/api/staff", 200, 12, 22, auth="admin"),
+    Case("GET", "/api/staff/{staff_id}", "/api/staff/{staff}", 200, 11, 19, auth="admin"),
+    Case("PUT", "/api/staff/{staff_id}", "/api/staff/{staff}", 200, 15, 21, auth="admin", json={"specialty": "uñas"}),
+    Case("DELETE", "/api/staff/{staff_id}", "/api/staff/{other_staff}", 200, 15, 21, auth="admin"),
+    # servicios de belleza
+    Case("POST", "/api/beauty-services", "/api/beauty-services", 201, 13, 18, auth="admin",
+         json={"business_id": "{business}", "name": "Maquillaje", "duration_min": 60, "price": 500}),
+    Case("GET", "/api/beauty-services", "/api/beauty-services", 200, 12, 22, auth="admin"),
+    Case("GET", "/api/beauty-services/{service_id}", "/api/beauty-services/{beauty_service}", 200, 11, 20,
+         auth="admin"),
+    Case("PUT", "/api/beauty-services/{service_id}", "/api/beauty-services/{beauty_service}", 200, 15, 23,
+         auth="admin", json={"price": 275}),
+    Case("DELETE", "/api/beauty-services/{service_id}", "/api/beauty-services/{other_beauty_service}", 200, 15, 19,
+         auth="admin"),
+    # staff <-> servicios
+    Case("POST", "/api/staff/{staff_id}/services/{service_id}", "/api/staff/{staff}/services/{other_beauty_service}",
+         201, 17, 21, auth="admin"),
+    Case("DELETE", "/api/staff/{staff_id}/services/{service_id}", "/api/staff/{other_staff}/services/{beauty_service}",
+         200, 16, 23, auth="admin"),
+    Case("GET", "/api/staff/{staff_id}/services", "/api/staff/{staff}/services", 200, 13, 22, auth="admin"),
+    Case("GET", "/api/beauty-services/{service_id}/staff", "/api/beauty-services/{beauty_service}/staff", 200,
+         13, 24, auth="admin"),
+    # disponibilidad de staff
+    Case("POST", "/api/staff/availability", "/api/staff/availability", 200, 4, 2,
+         json={"staff_id": "{staff}", "day_of_week": "tuesday", "start_time": "09:00", "end_time": "13:00"}),
+    Case("GET", "/api/staff/{staff_id}/availability", "/api/staff/{staff}/availability", 200, 1, 1),
+    Case("GET", "/api/beauty-services/{service_id}/available-slots",
+         "/api/beauty-services/{beauty_service}/available-slots?date=" + D, 200, 6, 11),
+    # bookings de belleza
+    Case("POST", "/api/beauty-bookings", "/api/beauty-bookings", 201, 6, 7,
+         json={"staff_id": "{staff}", "beauty_service_id": "{beauty_service}",
+               "start_datetime": D + "T09:00:00+00:00", "end_datetime": D + "T10:00:00+00:00"}),
+    # +1: lock del staff elegido (siempre, aunque BOOKING_LOCK_MODE sea none)
+    Case("POST", "/api/beauty-bookings/auto", "/api/beauty-bookings/auto", 201, 10, 11,
+         json={"beauty_service_id": "{beauty_service}", "start_datetime": D + "T10:00:00+00:00"}),
+    Case("PATCH", "/api/beauty-bookings/{booking_id}/cancel", "/api/beauty-bookings/{beauty_booking}/cancel", 200,
+         5, 3),
+    Case("PATCH", "/api/beauty-bookings/{booking_id}/reschedule", "/api/beauty-bookings/{beauty_booking}/reschedule",
+         200, 6, 4, json={"start_datetime": D + "T12:00:00+00:00", "end_datetime": D + "T13:00:00+00:00"}),
+    Case("POST", "/api/staff/{staff_id}/beauty-bookings/bulk-cancel", "/api/staff/{staff}/beauty-bookings/bulk-cancel",
+         200, 13, 20, auth="admin",
+         json={"start_datetime": D + "T00:00:00+00:00", "end_datetime": D + "T23:59:00+00:00"}),
+    Case("GET", "/api/staff/{staff_id}/beauty-bookings/changes", "/api/staff/{staff}/beauty-bookings/changes", 200,
+         13, 21, auth="staff"),
+    # feed de calendario (.ics)
+    Case("GET", "/api/barbers/{barber_id}/calendar-feed", "/api/barbers/{barber}/calendar-feed", 200, 10, 18,
+         auth="admin"),
+    Case("GET", "/api/staff/{staff_id}/calendar-feed", "/api/staff/{staff}/calendar-feed", 200, 12, 20,
+         auth="staff"),
+    # versiones + nombre + cursor de bookings; sin cambios es un 304 de 1 (test_calendar_feed)
+    Case("GET", "/api/calendar/{token}.ics", "/api/calendar/{staff_feed}.ics", 200, 3, 4),
+    # itinerarios de varios servicios
+    Case("GET", "/api/beauty-itineraries", "/api/beauty-itineraries?service_ids={beauty_service}&service_ids="
+         "{beauty_service}&date=" + D, 200, 4, 11),
+    # +2: lock de cada staff del itinerario (siempre, aunque BOOKING_LOCK_MODE sea none)
+    Case("POST", "/api/beauty-itineraries", "/api/beauty-itineraries", 201, 13, 14,
+         json={"legs": [
+             {"beauty_service_id": "{beauty_service}", "staff_id": "{staff}", "start_datetime": D + "T09:00:00+00:00"},
+             {"beauty_service_id": "{beauty_service}", "staff_id": "{other_staff}",
+              "start_datetime": D + "T10:00:00+00:00"},
+         ]}),
+    # reportes
+    Case("GET", "/api/reports/barbers/{barber_id}/bookings",
+         "/api/reports/barbers/{barber}/bookings?start_date=" + D + "&end_date=" + D, 200, 13, 23, auth="admin"),
+    Case("GET", "/api/reports/staff/{staff_id}/beauty-bookings",
+         "/api/reports/staff/{staff}/beauty-bookings?start_date=" + D + "&end_date=" + D, 200, 12, 20, auth="admin"),
+]
+
+
+def _fill(value, tenant: dict):
+    """Sustituye placeholders; un valor que es solo "{id}" se convierte a int."""
+    if isinstance(value, dict):
+        return {k: _fill(v, tenant) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_fill(v, tenant) for v in value]
+    if isinstance(value, str):
+        filled = value.format(**tenant)
+        if value.startswith("{") and value.endswith("}") and filled.isdigit():
+            return int(filled)
+        return filled
+    return value
+
+
+def test_every_route_has_a_budget():
+    registered = {
+        (method, route.path)
+        for route in app.routes
+        if isinstance(route, APIRoute)
+        for method in route.methods
+    }
+    budgeted = {(case.method, case.route) for case in CASES}
+    missing = sorted(registered - budgeted)
+    stale = sorted(budgeted - registered)
+    assert not missing, f"Rutas sin presupuesto de queries: {missing}"
+    assert not stale, f"Presupuestos de rutas que ya no existen: {stale}"
+
+
+@pytest.mark.parametrize("case", CASES, ids=[f"{c.method} {c.route}" for c in CASES])
+def test_query_budget(case: Case, tenant: dict, client):
+    headers = {"Authorization": f"Bearer {tenant['tokens'][case.auth]}"} if case.auth else {}
+
+    # catálogo de belleza ya en memoria: el presupuesto es el de un worker en régimen
+    with SessionLocal() as db:
+        catalog_cache.tenant_catalog(db, tenant["business"])
+
+    with assert_max_queries(case.queries, max_rows=case.rows):
+        response = client.request(
+            case.method,
+            _fill(case.url, tenant),
+            headers=headers,
+            json=_fill(case.json, tenant),
+            data=case.data,
+        )
+
+    assert response.status_code == case.status, response.text
@@ -0,0 +1,93 @@
+# tests/test_query_counter.py
+"""
+Contador de queries por request: forma normalizada del SQL, Server-Timing, log
+estructurado, aviso de N+1 cuando una misma forma se repite QUERY_REPEAT_THRESHOLD veces
+y filas traídas por la sesión (ORM o Core).
+"""
+import json
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import select, text, update
+
+from app.core.query_counter import QueryCounterMiddleware, assert_max_queries, count_queries, statement_shape
+from app.db.session import SessionLocal, engine
+from app.models.booking import Booking
+
+
+def _app(repeats: int) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(QueryCounterMiddleware, threshold=3)
+
+    @app.get("/items")
+    def items():
+        with engine.connect() as conn:
+            for i in range(repeats):
+                conn.execute(text(f"SELECT {i + 1}"))
+        return {"ok": True}
+
+    return app
+
+
+def test_statement_shape_ignores_literals():
+    assert statement_shape("SELECT * FROM staff WHERE id = 7") == statement_shape("SELECT * FROM staff WHERE id = 12")
+    assert statement_shape("SELECT 1 WHERE name = 'o''brien'") == "SELECT ? WHERE name = ?"
+    assert statement_shape("SELECT x FROM t WHERE id IN (1, 2, 3)\n  AND y = 4") == "SELECT x FROM t WHERE id IN (?) AND y = ?"
+
+
+def test_repeated_shape_is_reported_as_n_plus_one(caplog):
+    client = TestClient(_app(repeats=4))
+    with caplog.at_level(logging.INFO, logger="app.db.queries"):
+        with count_queries() as stats:
+            response = client.get("/items")
+
+    assert response.status_code == 200
+    assert stats.count == 4
+    assert stats.repeated_shapes(3) == [("SELECT ?", 4)]
+    assert 'desc="4 queries, 0 rows"' in response.headers["server-timing"]
+
+    events = [json.loads(record.getMessage()) for record in caplog.records]
+    summary = next(e for e in events if e["event"] == "request_queries")
+    assert (summary["route"], summary["queries"], summary["status"]) == ("/items", 4, 200)
+    repeated = [e for e in events if e["event"] == "repeated_query"]
+    assert [(e["count"], e["statement"]) for e in repeated] == [(4, "SELECT ?")]
+
+
+def test_below_threshold_is_not_reported(caplog):
+    client = TestClient(_app(repeats=2))
+    with caplog.at_level(logging.WARNING, logger="app.db.queries"):
+        assert client.get("/items").status_code == 200
+    assert caplog.records == []
+
+
+def test_assert_max_queries_lists_the_statements():
+    client = TestClient(_app(repeats=2))
+    with assert_max_queries(2):
+        client.get("/items")
+
+    with pytest.raises(AssertionError) as excinfo:
+        with assert_max_queries(1):
+            client.get("/items")
+    assert "got 2 statements" in str(excinfo.value)
+    assert "2. SELECT 2" in str(excinfo.value)
+
+
+def test_rows_count_core_selects_and_returning(tenant):
+    with SessionLocal() as db:
+        with count_queries() as stats:
+            starts = db.execute(select(Booking.start_datetime).where(Booking.barber_id == tenant["barber"])).all()
+            returned = db.execute(
+                update(Booking).where(Booking.id == tenant["booking"]).values(status="confirmed").returning(Booking.id)
+            ).scalars().all()
+        db.rollback()
+
+    assert returned == [tenant["booking"]]
+    assert stats.rows == len(starts) + 1
+
+    # un stream con yield_per no se bufferiza para contarlo
+    with SessionLocal() as db:
+        with count_queries() as stats:
+            streamed = list(db.execute(select(Booking.id), execution_options={"yield_per": 1}).scalars())
+    assert streamed and stats.rows == 0
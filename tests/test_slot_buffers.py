@@ -0,0 +1,183 @@
+# tests/test_slot_buffers.py
+"""
+Buffers de preparación/limpieza por servicio y paso de slots por negocio, en los dos
+motores y en el traslape al reservar. Seed: barbero 9-13 (slot 30) con corte 10:00-10:30;
+Sofi 9-13 con uñas 11-12.
+"""
+from datetime import date, datetime, time, timezone
+
+import app.models as m
+from app.api.routes.availability_rules import _generate_time_slots_for_window
+from app.api.routes.beauty_slots import _generate_slots_for_staff_window
+from app.core import occupancy
+from app.core.slot_format import decode_mask
+from app.db.session import SessionLocal
+from app.models.business import Business
+
+from conftest import D, auth_headers
+
+
+def _hhmm(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _set_nails_buffers(client, tenant, before: int, after: int):
+    response = client.put(
+        f"/api/beauty-services/{tenant['beauty_service']}",
+        json={"buffer_before_min": before, "buffer_after_min": after},
+        headers=auth_headers(tenant),
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["buffer_after_min"] == after
+
+
+def _sofi_window(client, tenant, **params) -> dict:
+    body = client.get(
+        f"/api/beauty-services/{tenant['beauty_service']}/available-slots", params={"date": D, **params}
+    ).json()
+    return next(item for item in body["items"] if item["staff_id"] == tenant["staff"])
+
+
+def test_generators_fit_buffers_inside_the_window():
+    day = date(2030, 1, 7)
+    # preparación corre el primer inicio; sin paso del negocio se avanza la duración
+    assert _generate_slots_for_staff_window(day, time(9), time(13), 60, None, 15, 15) == ["09:15", "10:15", "11:15"]
+    assert _generate_slots_for_staff_window(day, time(9), time(13), 60, 30, 15, 15)[:3] == ["09:15", "09:45", "10:15"]
+    assert _generate_slots_for_staff_window(day, time(9), time(11), 60) == ["09:00", "10:00"]
+    assert _generate_time_slots_for_window(day, time(9), time(10), 30, 30, 10, 10) == ["09:10"]
+
+
+def test_beauty_slots_use_buffers_and_business_step(tenant, client):
+    _set_nails_buffers(client, tenant, 0, 15)
+    # el booking de 11-12 ocupa hasta 12:15; sin paso del negocio, paso = duración
+    window = _sofi_window(client, tenant)
+    assert (window["slots"], window["unavailable_slots"]) == (["09:00"], ["10:00", "11:00"])
+
+    with SessionLocal() as db:
+        db.get(Business, tenant["business"]).slot_step_min = 30
+        db.commit()
+    window = _sofi_window(client, tenant)
+    assert window["slots"] == ["09:00", "09:30"]
+    assert window["unavailable_slots"] == ["10:00", "10:30", "11:00", "11:30"]
+
+
+def test_compact_format_carries_the_preparation_offset(tenant, client):
+    _set_nails_buffers(client, tenant, 15, 0)
+    full = _sofi_window(client, tenant)
+    compact = client.get(
+        f"/api/beauty-services/{tenant['beauty_service']}/available-slots", params={"date": D, "format": "compact"}
+    ).json()
+    window = next(w for w in compact["windows"] if w["staff_id"] == tenant["staff"])
+
+    assert window["offset"] == 15 and window["step"] == 60
+    decoded = [
+        (_hhmm(window["start"] + window["offset"] + i * window["step"]), ok)
+        for i, ok in enumerate(decode_mask(window["mask"], window["count"]))
+    ]
+    assert [s for s, ok in decoded if ok] == full["slots"]
+    assert [s for s, ok in decoded if not ok] == full["unavailable_slots"]
+
+
+def test_bookings_respect_buffers_of_both_sides(tenant, client):
+    _set_nails_buffers(client, tenant, 0, 15)
+    payload = {"staff_id": tenant["staff"], "beauty_service_id": tenant["beauty_service"]}
+
+    # pegado al booking de 11-12: choca con su limpieza
+    taken = client.post("/api/beauty-bookings", json={
+        **payload, "start_datetime": f"{D}T12:00:00+00:00", "end_datetime": f"{D}T13:00:00+00:00",
+    })
+    assert taken.status_code == 400
+    # antes: el nuevo termina 11:00 pero su limpieza llega a 11:15
+    assert client.post("/api/beauty-bookings", json={
+        **payload, "start_datetime": f"{D}T10:00:00+00:00", "end_datetime": f"{D}T11:00:00+00:00",
+    }).status_code == 400
+    assert client.post("/api/beauty-bookings", json={
+        **payload, "start_datetime": f"{D}T12:15:00+00:00", "end_datetime": f"{D}T13:15:00+00:00",
+    }).status_code == 201
+
+
+def test_barber_slots_and_booking_with_buffers(tenant, client):
+    response = client.put(f"/api/services/{tenant['service']}", json={"buffer_after_min": 10})
+    assert response.status_code == 200, response.text
+
+    body = client.get(
+        f"/api/barbers/{tenant['barber']}/availability/slots",
+        params={"date": D, "service_id": tenant["service"]},
+    ).json()
+    morning = body["items"][0]
+    # corte 10:00-10:30 ocupa hasta 10:40; cada candidato lleva también sus 10 min
+    assert morning["unavailable_slots"] == ["09:30", "10:00", "10:30"]
+    assert morning["slots"][-1] == "12:00"
+
+    url = f"/api/barbers/{tenant['barber']}/bookings"
+
+    def book(start: str, end: str):
+        return client.post(url, json={
+            "service_id": tenant["service"], "start_datetime": f"{D}T{start}:00+00:00", "end_datetime": f"{D}T{end}:00+00:00",
+        })
+
+    assert book("10:30", "11:00").status_code == 400
+    assert book("10:40", "11:10").status_code == 201
+
+
+def test_business_settings_set_and_clear_the_step(tenant, client):
+    url = "/api/business/settings"
+    assert client.get(url, headers=auth_headers(tenant)).json()["slot_step_min"] is None
+
+    response = client.put(url, json={"slot_step_min": 30}, headers=auth_headers(tenant))
+    assert response.status_code == 200, response.text
+    assert response.json()["slot_step_min"] == 30
+    assert _sofi_window(client, tenant)["slots"] == ["09:00", "09:30", "10:00", "12:00"]
+
+    # null explícito vuelve al default; sin el campo no se toca
+    assert client.put(url, json={}, headers=auth_headers(tenant)).json()["slot_step_min"] == 30
+    assert client.put(url, json={"slot_step_min": None}, headers=auth_headers(tenant)).json()["slot_step_min"] is None
+    assert _sofi_window(client, tenant)["slots"] == ["09:00", "10:00", "12:00"]
+
+    assert client.put(url, json={"slot_step_min": 3}, headers=auth_headers(tenant)).status_code == 422
+    assert client.put(url, json={"slot_step_min": 30}, headers=auth_headers(tenant, "staff")).status_code == 403
+    assert client.put(url, json={"slot_step_min": 30}).status_code == 401
+
+
+def test_env_default_step_applies_when_business_has_none(tenant, client, monkeypatch):
+    monkeypatch.setattr(occupancy, "SLOT_STEP_MIN", 30)
+    assert _sofi_window(client, tenant)["slots"] == ["09:00", "09:30", "10:00", "12:00"]
+
+
+def test_previous_day_buffer_crossing_midnight_blocks_early_slots(tenant, client):
+    _set_nails_buffers(client, tenant, 0, 60)
+    assert client.put(f"/api/services/{tenant['service']}", json={"buffer_after_min": 60}).status_code == 200
+    with SessionLocal() as db:
+        db.add_all([
+            m.StaffAvailabilityRule(staff_id=tenant["staff"], day_of_week="monday", start_time=time(0), end_time=time(3)),
+            m.BarberAvailabilityRule(
+                barber_id=tenant["barber"], day_of_week=0, start_time=time(0), end_time=time(3), slot_minutes=30
+            ),
+            # domingo 23:00-23:30: la limpieza de 60 llega a las 00:30 del lunes
+            m.BeautyBooking(
+                staff_id=tenant["staff"], beauty_service_id=tenant["beauty_service"],
+                start_datetime=datetime(2030, 1, 6, 23, tzinfo=timezone.utc),
+                end_datetime=datetime(2030, 1, 6, 23, 30, tzinfo=timezone.utc),
+            ),
+            m.Booking(
+                barber_id=tenant["barber"], service_id=tenant["service"],
+                start_datetime=datetime(2030, 1, 6, 23, tzinfo=timezone.utc),
+                end_datetime=datetime(2030, 1, 6, 23, 30, tzinfo=timezone.utc),
+            ),
+        ])
+        db.commit()
+
+    body = client.get(
+        f"/api/beauty-services/{tenant['beauty_service']}/available-slots", params={"date": D}
+    ).json()
+    early = next(i for i in body["items"] if i["staff_id"] == tenant["staff"] and i["start_time"] == "00:00")
+    assert "00:00" in early["unavailable_slots"]
+    assert "01:00" in early["slots"]
+
+    barber = client.get(
+        f"/api/barbers/{tenant['barber']}/availability/slots",
+        params={"date": D, "service_id": tenant["service"]},
+    ).json()
+    early = barber["items"][0]
+    assert "00:00" in early["unavailable_slots"]
+    assert "00:30" in early["slots"]
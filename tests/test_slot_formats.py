@@ -0,0 +1,77 @@
+# tests/test_slot_formats.py
+"""
+El formato compacto de slots tiene que decir exactamente lo mismo que el JSON completo:
+se decodifica cada ventana (start + offset + i * step, bit i del mask) y se compara.
+"""
+import pytest
+
+from app.core import slot_format
+from app.core.slot_format import decode_mask, encode_mask
+
+
+def _hhmm(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _expand(window: dict) -> tuple[list[str], list[str]]:
+    available, unavailable = [], []
+    for i, ok in enumerate(decode_mask(window["mask"], window["count"])):
+        (available if ok else unavailable).append(_hhmm(window["start"] + window["offset"] + i * window["step"]))
+    return available, unavailable
+
+
+def test_mask_roundtrip():
+    bits = [True, False, False, True, True, False, True, False, True, True]
+    assert decode_mask(encode_mask(bits), len(bits)) == bits
+    assert encode_mask([]) == ""
+
+
+def test_barber_slots_compact_matches_full(tenant, client):
+    url = "/api/barbers/{barber}/availability/slots?date={date}&service_id={service}".format(**tenant)
+    full = client.get(url).json()
+    response = client.get(url + "&format=compact")
+    assert response.status_code == 200
+    assert "Accept" in [v.strip() for v in response.headers["vary"].split(",")]
+    compact = response.json()
+
+    assert compact["date"] == full["date"]
+    assert compact["duration_min"] == full["duration_min"]
+    assert len(compact["windows"]) == len(full["items"])
+    for window, item in zip(compact["windows"], full["items"]):
+        assert (_hhmm(window["start"]), _hhmm(window["end"])) == (item["start_time"], item["end_time"])
+        assert _expand(window) == (item["slots"], item["unavailable_slots"])
+    # el booking de las 10:00 tiene que seguir apareciendo como ocupado
+    assert "10:00" in full["items"][0]["unavailable_slots"]
+
+
+def test_beauty_slots_compact_matches_full(tenant, client):
+    url = "/api/beauty-services/{beauty_service}/available-slots?date={date}".format(**tenant)
+    full = client.get(url).json()
+    compact = client.get(url + "&format=compact").json()
+
+    assert compact["service_duration_min"] == 60
+    assert [w["staff_id"] for w in compact["windows"]] == [i["staff_id"] for i in full["items"]]
+    for window, item in zip(compact["windows"], full["items"]):
+        assert _expand(window) == (item["slots"], item["unavailable_slots"])
+
+
+def test_accept_msgpack_without_library_falls_back_to_json(tenant, client, monkeypatch):
+    monkeypatch.setattr(slot_format, "msgpack", None)
+    url = "/api/barbers/{barber}/availability/slots?date={date}".format(**tenant)
+    response = client.get(url, headers={"Accept": "application/x-msgpack"})
+    assert response.headers["content-type"] == "application/json"
+    assert "items" in response.json()
+
+
+def test_msgpack_without_library_is_406(tenant, client, monkeypatch):
+    monkeypatch.setattr(slot_format, "msgpack", None)
+    url = "/api/barbers/{barber}/availability/slots?date={date}&format=msgpack".format(**tenant)
+    assert client.get(url).status_code == 406
+
+
+@pytest.mark.skipif(slot_format.msgpack is None, reason="msgpack no instalado")
+def test_msgpack_accept_header(tenant, client):
+    url = "/api/barbers/{barber}/availability/slots?date={date}".format(**tenant)
+    response = client.get(url, headers={"Accept": "application/x-msgpack"})
+    assert response.headers["content-type"] == slot_format.MSGPACK_MEDIA_TYPE
+    assert "windows" in slot_format.msgpack.unpackb(response.content)
@@ -0,0 +1,116 @@
+# tests/test_staff_assignment.py
+"""
+Asignación automática de staff (POST /api/beauty-bookings/auto) contra seed_tenant:
+Sofi trabaja 9-13 y ya tiene 11-12; Vale trabaja 10-14 sin bookings. Ambas hacen uñas.
+"""
+import threading
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import func, select
+
+import app.models as m
+from app.db.session import SessionLocal, engine
+from app.services import catalog_cache
+from app.services.booking_locks import LOCK_WAIT_SECONDS, required_lock_mode
+from app.services.staff_assignment import auto_assign_beauty_booking
+
+from conftest import D
+
+
+def _auto(client, tenant, hour: int, minute: int = 0, **extra):
+    return client.post("/api/beauty-bookings/auto", json={
+        "beauty_service_id": tenant["beauty_service"],
+        "start_datetime": f"{D}T{hour:02d}:{minute:02d}:00+00:00",
+        **extra,
+    })
+
+
+def test_least_booked_picks_the_free_staff_with_fewer_minutes(tenant, client):
+    # 11:00: Sofi está ocupada
+    response = _auto(client, tenant, 11)
+    assert response.status_code == 201, response.text
+    assert response.json()["staff_id"] == tenant["other_staff"]
+    assert response.json()["end_datetime"].startswith(f"{D}T12:00:00")
+
+    # 9:00: solo Sofi trabaja a esa hora, aunque tenga más minutos reservados
+    assert _auto(client, tenant, 9).json()["staff_id"] == tenant["staff"]
+
+    # 13:00: Sofi ya salió; a las 13:30 los 60 min ya no caben en la regla de Vale (hasta 14)
+    assert _auto(client, tenant, 13).json()["staff_id"] == tenant["other_staff"]
+    assert _auto(client, tenant, 13, 30).status_code == 400
+
+
+def test_preferred_and_round_robin(tenant, client):
+    # least_booked daría Vale (0 min contra 60)
+    preferred = _auto(client, tenant, 10, policy="preferred", preferred_staff_ids=[tenant["staff"]])
+    assert preferred.json()["staff_id"] == tenant["staff"]
+
+    # round robin: Sofi recibió el último booking -> Vale
+    first = _auto(client, tenant, 12, policy="round_robin")
+    assert first.json()["staff_id"] == tenant["other_staff"]
+    second = _auto(client, tenant, 12, policy="round_robin")
+    assert second.json()["staff_id"] == tenant["staff"]
+    # ya no queda nadie a las 12
+    assert _auto(client, tenant, 12, policy="round_robin").status_code == 400
+
+
+def test_errors_and_idempotent_replay(tenant, client):
+    unassigned = client.post("/api/beauty-bookings/auto", json={
+        "beauty_service_id": tenant["other_beauty_service"],
+        "start_datetime": f"{D}T10:00:00+00:00",
+    })
+    assert unassigned.status_code == 400
+    assert _auto(client, tenant, 10, policy="fastest").status_code == 422
+
+    headers = {"Idempotency-Key": "auto-1"}
+    payload = {"beauty_service_id": tenant["beauty_service"], "start_datetime": f"{D}T10:00:00+00:00"}
+    created = client.post("/api/beauty-bookings/auto", json=payload, headers=headers)
+    replayed = client.post("/api/beauty-bookings/auto", json=payload, headers=headers)
+    assert created.status_code == replayed.status_code == 201
+    assert replayed.headers["Idempotent-Replayed"] == "true"
+    assert replayed.json()["id"] == created.json()["id"]
+
+
+def test_candidate_is_locked_even_without_booking_lock_mode(tenant, client):
+    with SessionLocal() as db:
+        mode = required_lock_mode(db, "none")
+    assert mode in ("row", "advisory")
+
+    before = LOCK_WAIT_SECONDS.samples().get(("staff", mode), {"count": 0})["count"]
+    assert _auto(client, tenant, 10).status_code == 201
+    assert LOCK_WAIT_SECONDS.samples()[("staff", mode)]["count"] == before + 1
+
+
+@pytest.mark.skipif(engine.dialect.name != "postgresql", reason="el lock solo serializa en Postgres")
+def test_concurrent_auto_assign_never_double_books(tenant):
+    # 10:00: Sofi y Vale libres; 4 requests a la vez -> una para cada una
+    start = datetime(2030, 1, 7, 10, 0, tzinfo=timezone.utc)
+    barrier = threading.Barrier(4)
+    results: list[int | None] = []
+
+    def writer():
+        with SessionLocal() as db:
+            catalog = catalog_cache.tenant_catalog(db, tenant["business"])
+            service = catalog.services[tenant["beauty_service"]]
+            barrier.wait()
+            try:
+                results.append(auto_assign_beauty_booking(db, catalog, service, start).staff_id)
+            except ValueError:
+                results.append(None)
+
+    threads = [threading.Thread(target=writer) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results.count(None) == 2
+    assert sorted(filter(None, results)) == sorted([tenant["staff"], tenant["other_staff"]])
+    with SessionLocal() as db:
+        counts = db.execute(
+            select(m.BeautyBooking.staff_id, func.count())
+            .where(m.BeautyBooking.start_datetime == start)
+            .group_by(m.BeautyBooking.staff_id)
+        ).all()
+    assert sorted(count for _, count in counts) == [1, 1]